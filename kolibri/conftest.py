@@ -1,5 +1,6 @@
 import os
 import shutil
+import sys
 
 import pytest
 
@@ -33,3 +34,12 @@ def global_fixture():
         except OSError:
             # Don't fail a test just because we failed to cleanup
             pass
+
+
+@pytest.fixture(autouse=True)
+def clear_peer_registry():
+    yield
+    # the peers cache the URLs that their addresses resolved to, which tests mock differently
+    client = sys.modules.get("kolibri.core.discovery.utils.network.client")
+    if client is not None:
+        client.peer_registry.clear()
@@ -1,12 +1,16 @@
+from rest_framework import views
 from rest_framework import viewsets
+from rest_framework.response import Response
 
 import kolibri
 from .models import PingbackNotification
 from .models import PingbackNotificationDismissed
 from .serializers import PingbackNotificationDismissedSerializer
 from .serializers import PingbackNotificationSerializer
+from .tracing import get_request_traces
 from kolibri.core.auth.api import KolibriAuthPermissions
 from kolibri.core.auth.api import KolibriAuthPermissionsFilter
+from kolibri.core.device.permissions import IsSuperuser
 from kolibri.utils.version import version_matches_range
 
 
@@ -38,3 +42,15 @@ class PingbackNotificationDismissedViewSet(viewsets.ModelViewSet):
     serializer_class = PingbackNotificationDismissedSerializer
     queryset = PingbackNotificationDismissed.objects.all()
     filter_backends = (KolibriAuthPermissionsFilter,)
+
+
+class RequestTracesView(views.APIView):
+    """
+    Returns the traces of the latest sampled requests served by this process, and the
+    slowest SQL statements by view.
+    """
+
+    permission_classes = (IsSuperuser,)
+
+    def get(self, request):
+        return Response(get_request_traces())
@@ -1,7 +1,9 @@
+from django.conf.urls import url
 from rest_framework import routers
 
 from .api import PingbackNotificationDismissedViewSet
 from .api import PingbackNotificationViewSet
+from .api import RequestTracesView
 
 router = routers.SimpleRouter()
 
@@ -16,4 +18,6 @@ router.register(
     basename="pingbacknotificationdismissed",
 )
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    url(r"^requesttraces/", RequestTracesView.as_view(), name="requesttraces"),
+]
@@ -0,0 +1,9 @@
+"""
+This module contains constants which represent what the statistics reported in
+pingbacks are about.
+"""
+
+FACILITY = "facility"
+CHANNEL = "channel"
+
+choices = ((FACILITY, "Facility"), (CHANNEL, "Channel"))
@@ -0,0 +1,327 @@
+"""
+Load testing of the core learner and coach flows of a running Kolibri server.
+
+A facility is seeded with learners, a coach and lessons, and then concurrent simulated learners
+log in and go through the learn home page, content browsing and progress tracking, while the
+coaches load the summaries of their class. The latency of every request is recorded by endpoint,
+so that the throughput and the latency percentiles of every endpoint can be reported.
+"""
+import csv
+import io
+import logging
+import math
+import os
+import random
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+from le_utils.constants import content_kinds
+
+from kolibri.core.auth.models import FacilityUser
+from kolibri.core.content.models import ChannelMetadata
+from kolibri.core.content.models import ContentNode
+from kolibri.core.lessons.models import Lesson
+from kolibri.core.logger.utils import user_data
+
+logger = logging.getLogger(__name__)
+
+LOAD_TEST_PASSWORD = "password"
+
+LOAD_TEST_COACH_USERNAME = "loadtestcoach"
+
+# Content nodes the simulated learners pick from to browse and track progress
+MAX_CONTENT_NODES = 100
+
+REQUEST_TIMEOUT = 60
+
+PERCENTILES = (50, 95, 99)
+
+USER_DATA_PATH = os.path.join(
+    os.path.dirname(user_data.__file__),
+    os.pardir,
+    "management",
+    "commands",
+    "user_data.csv",
+)
+
+
+def seed_load_test_data(learners, lessons=5, verbosity=0):
+    """
+    Creates, if they do not exist yet, a facility with a classroom of learners, a coach of the
+    classroom and lessons from the channels on the device.
+
+    :return: A dict with the facility and classroom ids, the usernames of the learners and of
+        the coach, and the ids of the content nodes that the learners can interact with
+    """
+    with io.open(USER_DATA_PATH, mode="r", encoding="utf-8") as f:
+        users_data = [data for data in csv.DictReader(f)]
+    if learners > len(users_data):
+        raise ValueError("Cannot seed more than {} learners".format(len(users_data)))
+    facility = user_data.get_or_create_facilities(n_facilities=1, verbosity=verbosity)[
+        0
+    ]
+    classroom = user_data.get_or_create_classrooms(
+        n_classes=1, facility=facility, verbosity=verbosity
+    )[0]
+    users = user_data.get_or_create_classroom_users(
+        n_users=learners,
+        classroom=classroom,
+        user_data=users_data,
+        facility=facility,
+        verbosity=verbosity,
+    )
+    coach, created = FacilityUser.objects.get_or_create(
+        username=LOAD_TEST_COACH_USERNAME, facility=facility
+    )
+    if created:
+        coach.set_password(LOAD_TEST_PASSWORD)
+        coach.save()
+        facility.add_coach(coach)
+        classroom.add_coach(coach)
+    channels = ChannelMetadata.objects.all()
+    if lessons and not Lesson.objects.filter(collection=classroom).exists():
+        user_data.create_lessons_for_classroom(
+            classroom=classroom,
+            facility=facility,
+            channels=channels,
+            lessons=lessons,
+            now=timezone.now(),
+        )
+    content_node_ids = list(
+        ContentNode.objects.filter(available=True)
+        .exclude(kind=content_kinds.TOPIC)
+        .values_list("id", flat=True)[:MAX_CONTENT_NODES]
+    )
+    return {
+        "facility_id": facility.id,
+        "classroom_id": classroom.id,
+        "learners": [user.username for user in users],
+        "coaches": [coach.username],
+        "topic_ids": [channel.root_id for channel in channels],
+        "content_node_ids": content_node_ids,
+    }
+
+
+def percentile(values, percent):
+    """
+    :param values: The sorted values
+    :param percent: The percentile, from 0 to 100
+    :return: The nearest-rank percentile of the values, or None if there are no values
+    """
+    if not values:
+        return None
+    rank = int(math.ceil(percent / 100.0 * len(values)))
+    return values[max(rank, 1) - 1]
+
+
+class LoadTestResults(object):
+    """
+    Collects the latencies of the requests made by the simulated users, by endpoint
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.start = time.time()
+        self.end = None
+
+    def record(self, endpoint, duration, ok):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(duration)
+            self.errors.setdefault(endpoint, 0)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def finish(self):
+        self.end = time.time()
+
+    def summarize(self):
+        """
+        :return: A list of dicts, one by endpoint, with the number of requests and of errors,
+            the throughput in requests per second and the latency percentiles in seconds
+        """
+        elapsed = max((self.end or time.time()) - self.start, 1e-6)
+        summary = []
+        with self._lock:
+            for endpoint in sorted(self.latencies):
+                latencies = sorted(self.latencies[endpoint])
+                stats = {
+                    "endpoint": endpoint,
+                    "requests": len(latencies),
+                    "errors": self.errors[endpoint],
+                    "throughput": len(latencies) / elapsed,
+                }
+                for percent in PERCENTILES:
+                    stats["p{}".format(percent)] = percentile(latencies, percent)
+                summary.append(stats)
+        return summary
+
+
+class SimulatedUser(object):
+    """
+    A user of the server with its own session, timing every request it makes
+    """
+
+    def __init__(self, base_url, results, username, plan):
+        self.base_url = base_url
+        self.results = results
+        self.username = username
+        self.plan = plan
+        self.session = requests.Session()
+
+    def request(self, endpoint, method, url, **kwargs):
+        headers = kwargs.pop("headers", {})
+        csrf_token = self.session.cookies.get(settings.CSRF_COOKIE_NAME)
+        if csrf_token:
+            headers["X-CSRFToken"] = csrf_token
+        start = time.time()
+        try:
+            response = self.session.request(
+                method,
+                self.base_url + url,
+                headers=headers,
+                timeout=REQUEST_TIMEOUT,
+                **kwargs
+            )
+        except requests.exceptions.RequestException as e:
+            logger.debug("{} {} failed: {}".format(method, url, e))
+            self.results.record(endpoint, time.time() - start, False)
+            return None
+        self.results.record(endpoint, time.time() - start, response.ok)
+        return response if response.ok else None
+
+    def run_iteration(self):
+        raise NotImplementedError(
+            "Subclasses of SimulatedUser must implement run_iteration"
+        )
+
+    def login(self):
+        # Gets the CSRF cookie before posting the credentials
+        self.request(
+            "session",
+            "GET",
+            reverse("kolibri:core:session-detail", kwargs={"pk": "current"}),
+        )
+        return (
+            self.request(
+                "login",
+                "POST",
+                reverse("kolibri:core:session-list"),
+                json={
+                    "username": self.username,
+                    "password": LOAD_TEST_PASSWORD,
+                    "facility": self.plan["facility_id"],
+                },
+            )
+            is not None
+        )
+
+
+class SimulatedLearner(SimulatedUser):
+    def run_iteration(self):
+        self.request(
+            "learn home", "GET", reverse("kolibri:kolibri.plugins.learn:homehydrate")
+        )
+        self.request(
+            "channels",
+            "GET",
+            reverse("kolibri:core:channel-list"),
+            params={"available": "true"},
+        )
+        if self.plan["topic_ids"]:
+            self.request(
+                "content browsing",
+                "GET",
+                reverse("kolibri:core:contentnode-list"),
+                params={"parent": random.choice(self.plan["topic_ids"])},
+            )
+        if not self.plan["content_node_ids"]:
+            return
+        node_id = random.choice(self.plan["content_node_ids"])
+        self.request(
+            "content node",
+            "GET",
+            reverse("kolibri:core:contentnode-detail", kwargs={"pk": node_id}),
+        )
+        response = self.request(
+            "start progress tracking",
+            "POST",
+            reverse("kolibri:core:trackprogress-list"),
+            json={"node_id": node_id},
+        )
+        if response is not None:
+            self.request(
+                "update progress tracking",
+                "PUT",
+                reverse(
+                    "kolibri:core:trackprogress-detail",
+                    kwargs={"pk": response.json()["session_id"]},
+                ),
+                json={"progress_delta": 0.1, "time_spent_delta": 10},
+            )
+
+
+class SimulatedCoach(SimulatedUser):
+    def run_iteration(self):
+        self.request(
+            "coach class summary",
+            "GET",
+            reverse(
+                "kolibri:kolibri.plugins.coach:classsummary-detail",
+                kwargs={"pk": self.plan["classroom_id"]},
+            ),
+        )
+
+
+def run_load_test(base_url, plan, concurrency, duration, seed=1):
+    """
+    Drives concurrent simulated users against the server for a number of seconds. The users are
+    spread over the worker threads, coaches first, and every worker logs its users in and then
+    plays them in turn until the time is up.
+
+    :param base_url: The url of the running server, without a trailing slash
+    :param plan: The dict returned by seed_load_test_data
+    :param concurrency: The number of worker threads
+    :param duration: The number of seconds the users are driven for
+    :param seed: The random seed, so that the users make the same choices on every run
+    :return: The LoadTestResults
+    """
+    random.seed(seed)
+    results = LoadTestResults()
+    users = [
+        SimulatedCoach(base_url, results, username, plan)
+        for username in plan["coaches"]
+    ]
+    users += [
+        SimulatedLearner(base_url, results, username, plan)
+        for username in plan["learners"]
+    ]
+    stop = threading.Event()
+
+    def work(worker_users):
+        worker_users = [user for user in worker_users if user.login()]
+        while worker_users and not stop.is_set():
+            for user in worker_users:
+                if stop.is_set():
+                    break
+                user.run_iteration()
+
+    threads = [
+        threading.Thread(target=work, args=(users[index::concurrency],))
+        for index in range(min(concurrency, len(users)))
+    ]
+    results.start = time.time()
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    stop.wait(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    results.finish()
+    return results
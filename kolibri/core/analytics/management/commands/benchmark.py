@@ -1,3 +1,4 @@
+import random
 import sys
 
 from django.conf import settings
@@ -6,12 +7,18 @@ from morango.models import InstanceIDModel
 
 import kolibri
 from kolibri.core.analytics import SUPPORTED_OS
+from kolibri.core.analytics.loadtest import PERCENTILES
+from kolibri.core.analytics.loadtest import run_load_test
+from kolibri.core.analytics.loadtest import seed_load_test_data
 from kolibri.core.analytics.measurements import get_channels_usage_info
 from kolibri.core.analytics.measurements import get_db_info
 from kolibri.core.analytics.measurements import get_kolibri_process_cmd
+from kolibri.core.analytics.measurements import get_kolibri_process_info
 from kolibri.core.analytics.measurements import get_kolibri_use
 from kolibri.core.analytics.measurements import get_machine_info
 from kolibri.core.analytics.measurements import get_requests_info
+from kolibri.core.public.admission import get_published_admission_metrics
+from kolibri.core.sqlite.checkpoint import get_checkpoint_metrics
 from kolibri.utils.server import installation_type
 from kolibri.utils.server import NotRunning
 from kolibri.utils.system import get_free_space
@@ -26,6 +33,12 @@ def format_line(parameter, value, indented=False):
     return "{info}{value}".format(info=info, value=value)
 
 
+def format_seconds(value):
+    if value is None:
+        return "-"
+    return "{:.2f} s".format(value)
+
+
 class Command(BaseCommand):
     """
     This command will output information about different parameters of the server running Kolibri
@@ -60,6 +73,18 @@ class Command(BaseCommand):
     * Recommended channels:           0.01 s
     * Channels:                       0.02 s
 
+    Databases
+    * default
+      * WAL size:                    0.52 Mb
+      * Last checkpoint duration:    0.01 s
+
+    Sync admission
+    * Sync budget:                   4
+    * Active syncs:                  2
+    * Queued syncs:                  10
+    * DB write latency:              0.02 s
+    * Average sync duration:         12.40 s
+
     Device info
     * Version:                       (version)
     * OS:                            (os)
@@ -69,10 +94,65 @@ class Command(BaseCommand):
     * Free disk space:               (content_storage_free_space)
     * Server time:                   (server_time)
     * Server timezone:               (server_timezone)
+
+    With --load, a facility is seeded with learners, a coach and lessons, and simulated learners
+    and coaches are driven against the server for --duration seconds, then the throughput and the
+    latencies of every endpoint are reported instead:
+
+    Load test (20 learners, 10 concurrent users, 60 s)
+    * learn home
+      * Requests (errors):           1200 (0)
+      * Throughput:                  20.00 req/s
+      * Latency p50:                 0.05 s
+      * Latency p95:                 0.12 s
+      * Latency p99:                 0.20 s
     """
 
     help = "Outputs performance info and statistics of usage for the running Kolibri instance in this server"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--load",
+            action="store_true",
+            dest="load",
+            help="Run a load test of the learner and coach flows against the server",
+        )
+        parser.add_argument(
+            "--learners",
+            type=int,
+            default=20,
+            dest="learners",
+            help="Number of learners to seed and simulate in the load test",
+        )
+        parser.add_argument(
+            "--lessons",
+            type=int,
+            default=5,
+            dest="lessons",
+            help="Number of lessons to seed for the class of the load test",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=10,
+            dest="concurrency",
+            help="Number of users making requests concurrently in the load test",
+        )
+        parser.add_argument(
+            "--duration",
+            type=int,
+            default=60,
+            dest="duration",
+            help="Number of seconds the load test runs for",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=1,
+            dest="seed",
+            help="Random seed, so that load tests are reproducible",
+        )
+
     def handle(self, *args, **options):
         if not SUPPORTED_OS:
             print("This OS is not yet supported")
@@ -82,8 +162,13 @@ class Command(BaseCommand):
             get_kolibri_use()
         except NotRunning:
             sys.exit("Profile command executed while Kolibri server was not running")
-        get_requests_info()
         self.messages = []
+        if options["load"]:
+            self.handle_load(options)
+            self.messages.append("")
+            print("\n".join(self.messages))
+            return
+        get_requests_info()
         self.add_header("Sessions")
         session_parameters = (
             "Active sessions (guests incl)",
@@ -126,6 +211,44 @@ class Command(BaseCommand):
         requests_parameters = ("Homepage", "Recommended channels", "Channels")
         self.add_section(requests_parameters, requests_stats)
 
+        self.add_header("Databases")
+        for name, metrics in sorted(get_checkpoint_metrics().items()):
+            self.messages.append("\033[95m* {}\033[0m".format(name))
+            self.messages.append(
+                format_line(
+                    "WAL size",
+                    "{:.2f} Mb".format(metrics.get("wal_size", 0) / pow(10, 6)),
+                    True,
+                )
+            )
+            if "checkpoint_duration" in metrics:
+                self.messages.append(
+                    format_line(
+                        "Last checkpoint duration",
+                        "{:.2f} s".format(metrics["checkpoint_duration"]),
+                        True,
+                    )
+                )
+
+        admission_metrics = get_published_admission_metrics()
+        if admission_metrics:
+            self.add_header("Sync admission")
+            admission_parameters = (
+                "Sync budget",
+                "Active syncs",
+                "Queued syncs",
+                "DB write latency",
+                "Average sync duration",
+            )
+            admission_values = (
+                admission_metrics["budget"],
+                admission_metrics["active_syncs"],
+                admission_metrics["queued"],
+                format_seconds(admission_metrics["write_latency"]),
+                format_seconds(admission_metrics["sync_duration"]),
+            )
+            self.add_section(admission_parameters, admission_values)
+
         self.add_header("Device info")
         instance_model = InstanceIDModel.get_or_create_current_instance()[0]
         self.messages.append(format_line("Version", kolibri.__version__))
@@ -148,6 +271,49 @@ class Command(BaseCommand):
         self.messages.append("")
         print("\n".join(self.messages))
 
+    def handle_load(self, options):
+        random.seed(options["seed"])
+        plan = seed_load_test_data(
+            options["learners"],
+            lessons=options["lessons"],
+            verbosity=options["verbosity"],
+        )
+        _, port = get_kolibri_process_info()
+        results = run_load_test(
+            "http://localhost:{}".format(port),
+            plan,
+            options["concurrency"],
+            options["duration"],
+            seed=options["seed"],
+        )
+        self.add_header(
+            "Load test ({} learners, {} concurrent users, {} s)".format(
+                len(plan["learners"]), options["concurrency"], options["duration"]
+            )
+        )
+        for stats in results.summarize():
+            self.messages.append("\033[95m* {}\033[0m".format(stats["endpoint"]))
+            self.messages.append(
+                format_line(
+                    "Requests (errors)",
+                    "{} ({})".format(stats["requests"], stats["errors"]),
+                    True,
+                )
+            )
+            self.messages.append(
+                format_line(
+                    "Throughput", "{:.2f} req/s".format(stats["throughput"]), True
+                )
+            )
+            for percent in PERCENTILES:
+                self.messages.append(
+                    format_line(
+                        "Latency p{}".format(percent),
+                        format_seconds(stats["p{}".format(percent)]),
+                        True,
+                    )
+                )
+
     def add_header(self, header):
         self.messages.append("")
         self.messages.append("\033[1m{}\033[0m".format(header))
@@ -3,7 +3,6 @@ import os.path
 import sys
 import time
 from datetime import datetime
-from os import getpid
 
 from django.core.management.base import BaseCommand
 
@@ -11,18 +10,10 @@ from kolibri.core.analytics import SUPPORTED_OS
 from kolibri.core.analytics.measurements import get_db_info
 from kolibri.core.analytics.measurements import get_kolibri_use
 from kolibri.core.analytics.measurements import get_machine_info
+from kolibri.core.analytics.tracing import get_published_request_traces
+from kolibri.core.analytics.tracing import get_sample_rate
 from kolibri.utils import conf
 from kolibri.utils.server import NotRunning
-from kolibri.utils.server import PROFILE_LOCK
-from kolibri.utils.system import pid_exists
-
-
-def remove_lock():
-    # Kolibri command PID file exists but no command is running, it's corrupted
-    try:
-        os.remove(PROFILE_LOCK)
-    except OSError:
-        pass  # lock file was deleted by other process
 
 
 class Command(BaseCommand):
@@ -38,6 +29,15 @@ class Command(BaseCommand):
     - Number of processes in the server
     - Percentage of use of cpu by the Kolibri process
     - Memory (In Mbytes) used by the kolibri process (just RAM, not swap memory included)
+
+    And a requests_performance.csv file with the requests traced by the server in the meantime:
+    - Timestamp
+    - Request method and path
+    - View
+    - Response status
+    - Time spent processing the request
+    - Number of database queries and time spent in them
+    - Number of cache hits and misses
     """
 
     help = "Logs performance/profiling info in the server running Kolibri"
@@ -51,53 +51,53 @@ class Command(BaseCommand):
             type=int,
             help="Specifies the number of times the profile will take measures before ending",
         )
+        parser.add_argument(
+            "--slow-queries",
+            action="store_true",
+            dest="slow_queries",
+            help="Prints the slowest SQL statements traced by the server, by view, and exits",
+        )
 
     def check_start_conditions(self):
         if not SUPPORTED_OS:
             print("This OS is not yet supported")
             sys.exit(1)
 
-        if not conf.OPTIONS["Server"]["PROFILE"]:
+        if not get_sample_rate():
             print(
-                "Kolibri has not enabled profiling of its requests."
+                "Kolibri has not enabled tracing of its requests. "
                 "To enable it, edit the Kolibri options.ini file and "
-                "add `PROFILE = true` in the [Server] section"
+                "add `PROFILE = true` or `TRACE_SAMPLE_RATE = 0.1` in the [Server] section"
             )
 
-        if os.path.exists(PROFILE_LOCK):
-            command_pid = None
-            try:
-                with open(PROFILE_LOCK, "r") as f:
-                    command_pid = int(f.readline())
-            except (IOError, TypeError, ValueError):
-                remove_lock()
-            if command_pid:
-                if pid_exists(command_pid):
-                    print("Profile command is already running")
-                    sys.exit(1)
-                else:
-                    remove_lock()
+    def print_slow_queries(self):
+        request_traces = get_published_request_traces()
+        if not request_traces:
+            print("No requests have been traced by the server")
+            return
+        for view, queries in sorted(request_traces["slow_queries"].items()):
+            print(view)
+            for query in queries:
+                print("    {:.4f}s {}".format(query["time"], query["sql"]))
 
     def handle(self, *args, **options):
+        if options["slow_queries"]:
+            self.print_slow_queries()
+            return
+
         self.check_start_conditions()
         interval = 10  # the measures are taken every 10 seconds
 
-        this_pid = getpid()
         file_timestamp = time.strftime("%Y%m%d_%H%M%S")
-        try:
-            with open(PROFILE_LOCK, "w") as f:
-                f.write("%d" % this_pid)
-                f.write("\n{}".format(file_timestamp))
-        except (IOError, OSError):
-            print(
-                "Impossible to create profile lock file. Kolibri won't profile its requests"
-            )
         samples = 1
         num_samples = options["num_samples"]
         performance_dir = os.path.join(conf.KOLIBRI_HOME, "performance")
         self.performance_file = os.path.join(
             performance_dir, "{}_performance.csv".format(file_timestamp)
         )
+        self.requests_performance_file = os.path.join(
+            performance_dir, "{}_requests_performance.csv".format(file_timestamp)
+        )
         if not os.path.exists(performance_dir):
             try:
                 os.mkdir(performance_dir)
@@ -122,7 +122,27 @@ class Command(BaseCommand):
                     "Kolibri Memory (Mb)",
                 )
             )
+        with open(self.requests_performance_file, mode="w") as profile_file:
+            profile_writer = csv.writer(
+                profile_file, delimiter=",", quotechar='"', quoting=csv.QUOTE_MINIMAL
+            )
+            profile_writer.writerow(
+                (
+                    "Date",
+                    "Method",
+                    "Path",
+                    "View",
+                    "Status",
+                    "Duration",
+                    "Queries",
+                    "Query time",
+                    "Cache hits",
+                    "Cache misses",
+                )
+            )
 
+        # only the requests traced from now on are written
+        self.last_trace_time = time.time()
         while samples <= num_samples:
             message = self.get_logs()
             with open(self.performance_file, mode="a") as profile_file:
@@ -133,9 +153,50 @@ class Command(BaseCommand):
                     quoting=csv.QUOTE_MINIMAL,
                 )
                 profile_writer.writerow(message)
+            self.write_request_traces()
             samples += 1
             time.sleep(interval)
 
+    def write_request_traces(self):
+        """
+        Appends the requests traced by the server since the last call
+        """
+        request_traces = get_published_request_traces()
+        if not request_traces:
+            return
+        traces = [
+            trace
+            for trace in request_traces["traces"]
+            if trace["time"] > self.last_trace_time
+        ]
+        if not traces:
+            return
+        self.last_trace_time = traces[-1]["time"]
+        with open(self.requests_performance_file, mode="a") as profile_file:
+            profile_writer = csv.writer(
+                profile_file,
+                delimiter=",",
+                quotechar='"',
+                quoting=csv.QUOTE_MINIMAL,
+            )
+            for trace in traces:
+                profile_writer.writerow(
+                    (
+                        datetime.fromtimestamp(trace["time"]).strftime(
+                            "%Y/%m/%d %H:%M:%S.%f"
+                        ),
+                        trace["method"],
+                        trace["path"],
+                        trace["view"],
+                        trace["status"],
+                        trace["duration"],
+                        trace["queries"],
+                        trace["query_time"],
+                        trace["cache_hits"],
+                        trace["cache_misses"],
+                    )
+                )
+
     def get_logs(self):
         """
         Collect all the information to return one log line
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-19 17:18
+from __future__ import unicode_literals
+
+from django.db import migrations
+from django.db import models
+
+import kolibri.core.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PingbackStatistics",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("facility", "Facility"), ("channel", "Channel")],
+                        max_length=20,
+                    ),
+                ),
+                ("source_id", models.CharField(max_length=32)),
+                ("totals", kolibri.core.fields.JSONField(default={})),
+                ("high_water_mark", kolibri.core.fields.DateTimeTzField(null=True)),
+                ("rebuilt", kolibri.core.fields.DateTimeTzField(null=True)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name="pingbackstatistics",
+            unique_together=set([("kind", "source_id")]),
+        ),
+    ]
@@ -4,8 +4,10 @@ from __future__ import unicode_literals
 from django.db import models
 
 from .constants import nutrition_endpoints
+from .constants import statistics_kinds
 from kolibri.core.auth.models import FacilityUser
 from kolibri.core.auth.permissions.general import IsOwn
+from kolibri.core.fields import DateTimeTzField
 from kolibri.core.fields import JSONField
 
 
@@ -29,3 +31,20 @@ class PingbackNotificationDismissed(models.Model):
 
     class Meta:
         unique_together = (("user", "notification"),)
+
+
+class PingbackStatistics(models.Model):
+    """
+    Running totals of the statistics of a facility or a channel reported in pingbacks,
+    aggregated over the logs up to the high-water mark.
+    """
+
+    kind = models.CharField(max_length=20, choices=statistics_kinds.choices)
+    # The dataset id of the facility or the id of the channel
+    source_id = models.CharField(max_length=32)
+    totals = JSONField(default={})
+    high_water_mark = DateTimeTzField(null=True)
+    rebuilt = DateTimeTzField(null=True)
+
+    class Meta:
+        unique_together = (("kind", "source_id"),)
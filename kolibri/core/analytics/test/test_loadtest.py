@@ -0,0 +1,89 @@
+import mock
+from django.test import SimpleTestCase
+from django.test import TestCase
+
+from kolibri.core.analytics import loadtest
+from kolibri.core.auth.constants import role_kinds
+from kolibri.core.auth.models import FacilityUser
+
+
+class PercentileTestCase(SimpleTestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(loadtest.percentile(values, 50), 50)
+        self.assertEqual(loadtest.percentile(values, 95), 95)
+        self.assertEqual(loadtest.percentile(values, 99), 99)
+        self.assertEqual(loadtest.percentile(values, 0), 1)
+
+    def test_no_values(self):
+        self.assertIsNone(loadtest.percentile([], 50))
+
+
+class LoadTestResultsTestCase(SimpleTestCase):
+    def test_summarize(self):
+        results = loadtest.LoadTestResults()
+        for duration in (0.3, 0.1, 0.2):
+            results.record("learn home", duration, True)
+        results.record("login", 0.5, False)
+        results.start = 0
+        results.end = 2
+        summary = {stats["endpoint"]: stats for stats in results.summarize()}
+        self.assertEqual(summary["learn home"]["requests"], 3)
+        self.assertEqual(summary["learn home"]["errors"], 0)
+        self.assertEqual(summary["learn home"]["throughput"], 1.5)
+        self.assertEqual(summary["learn home"]["p50"], 0.2)
+        self.assertEqual(summary["learn home"]["p99"], 0.3)
+        self.assertEqual(summary["login"]["errors"], 1)
+
+
+class SeedLoadTestDataTestCase(TestCase):
+    def test_seed(self):
+        plan = loadtest.seed_load_test_data(5)
+        self.assertEqual(len(plan["learners"]), 5)
+        coach = FacilityUser.objects.get(username=plan["coaches"][0])
+        self.assertTrue(coach.check_password(loadtest.LOAD_TEST_PASSWORD))
+        self.assertTrue(
+            coach.roles.filter(
+                collection_id=plan["classroom_id"], kind=role_kinds.COACH
+            ).exists()
+        )
+
+    def test_seed_twice(self):
+        loadtest.seed_load_test_data(5)
+        plan = loadtest.seed_load_test_data(5)
+        self.assertEqual(len(plan["learners"]), 5)
+        self.assertEqual(FacilityUser.objects.count(), 6)
+
+
+class SimulatedLearnerTestCase(SimpleTestCase):
+    def test_run_iteration(self):
+        results = loadtest.LoadTestResults()
+        plan = {
+            "facility_id": "facility",
+            "classroom_id": "classroom",
+            "learners": ["learner"],
+            "coaches": [],
+            "topic_ids": ["topic"],
+            "content_node_ids": ["node"],
+        }
+        learner = loadtest.SimulatedLearner(
+            "http://localhost", results, "learner", plan
+        )
+        learner.session = mock.Mock()
+        learner.session.cookies.get.return_value = "token"
+        learner.session.request.return_value.ok = True
+        learner.session.request.return_value.json.return_value = {"session_id": 1}
+        learner.run_iteration()
+        self.assertEqual(
+            sorted(results.latencies),
+            [
+                "channels",
+                "content browsing",
+                "content node",
+                "learn home",
+                "start progress tracking",
+                "update progress tracking",
+            ],
+        )
+        headers = learner.session.request.call_args[1]["headers"]
+        self.assertEqual(headers["X-CSRFToken"], "token")
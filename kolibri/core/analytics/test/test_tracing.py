@@ -0,0 +1,105 @@
+import mock
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from kolibri.core.analytics import tracing
+from kolibri.core.analytics.middleware import RequestTracingMiddleware
+from kolibri.core.auth.models import Facility
+from kolibri.core.auth.test.helpers import create_superuser
+from kolibri.core.auth.test.helpers import DUMMY_PASSWORD
+from kolibri.core.auth.test.helpers import provision_device
+from kolibri.core.utils.cache import process_cache
+
+
+def _mock_request():
+    request = mock.Mock(method="GET", path_info="/test/")
+    request.resolver_match.view_name = "test-view"
+    return request
+
+
+class RequestTracingMiddlewareTestCase(TestCase):
+    def setUp(self):
+        tracing.clear_request_traces()
+
+    def tearDown(self):
+        tracing.clear_request_traces()
+
+    @mock.patch("kolibri.core.analytics.middleware.get_sample_rate", return_value=0)
+    def test_not_used(self, mock_rate):
+        with self.assertRaises(MiddlewareNotUsed):
+            RequestTracingMiddleware(lambda request: None)
+
+    @mock.patch("kolibri.core.analytics.middleware.get_sample_rate", return_value=1)
+    def test_trace(self, mock_rate):
+        def get_response(request):
+            Facility.objects.count()
+            Facility.objects.count()
+            process_cache.set("tracing_test", 1)
+            process_cache.get("tracing_test")
+            process_cache.get("tracing_test_missing")
+            return mock.Mock(status_code=200)
+
+        middleware = RequestTracingMiddleware(get_response)
+        middleware(_mock_request())
+        traces = tracing.get_request_traces()
+        self.assertEqual(len(traces["traces"]), 1)
+        trace = traces["traces"][0]
+        self.assertEqual(trace["view"], "test-view")
+        self.assertEqual(trace["status"], 200)
+        self.assertEqual(trace["queries"], 2)
+        self.assertEqual(trace["cache_hits"], 1)
+        self.assertEqual(trace["cache_misses"], 1)
+        self.assertEqual(len(traces["slow_queries"]["test-view"]), 2)
+
+    @mock.patch("kolibri.core.analytics.middleware.get_sample_rate", return_value=0.5)
+    @mock.patch("kolibri.core.analytics.tracing.random.random", return_value=0.9)
+    def test_not_sampled(self, mock_random, mock_rate):
+        middleware = RequestTracingMiddleware(lambda request: mock.Mock())
+        middleware(_mock_request())
+        self.assertEqual(tracing.get_request_traces()["traces"], [])
+
+    def test_slowest_queries_kept(self):
+        trace = {"view": "test-view", "path": "/test/"}
+        queries = [
+            {"time": str(duration), "sql": "SELECT {}".format(duration)}
+            for duration in range(tracing.SLOW_QUERIES_PER_VIEW + 2)
+        ]
+        tracing.record_trace(trace, queries)
+        slow_queries = tracing.get_request_traces()["slow_queries"]["test-view"]
+        self.assertEqual(len(slow_queries), tracing.SLOW_QUERIES_PER_VIEW)
+        self.assertEqual(
+            slow_queries[0]["sql"],
+            "SELECT {}".format(tracing.SLOW_QUERIES_PER_VIEW + 1),
+        )
+
+    def test_unresolved_queries_kept_together(self):
+        query = {"time": "0.1", "sql": "SELECT 1"}
+        for path in ("/probe/1/", "/probe/2/"):
+            tracing.record_trace({"view": None, "path": path}, [query])
+        slow_queries = tracing.get_request_traces()["slow_queries"]
+        self.assertEqual(list(slow_queries), [tracing.UNRESOLVED_VIEW])
+
+
+class RequestTracesAPITestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        provision_device()
+        cls.facility = Facility.objects.create(name="facility")
+        cls.superuser = create_superuser(cls.facility)
+
+    def test_superuser(self):
+        self.client.login(
+            username=self.superuser.username,
+            password=DUMMY_PASSWORD,
+            facility=self.facility,
+        )
+        response = self.client.get(reverse("kolibri:core:requesttraces"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("traces", response.data)
+        self.assertIn("slow_queries", response.data)
+
+    def test_anonymous(self):
+        response = self.client.get(reverse("kolibri:core:requesttraces"))
+        self.assertEqual(response.status_code, 403)
@@ -9,14 +9,21 @@ import uuid
 
 from django.test import TransactionTestCase
 from le_utils.constants import content_kinds
+from mock import patch
 
+from kolibri.core.analytics.constants import statistics_kinds
 from kolibri.core.analytics.constants.nutrition_endpoints import PINGBACK
 from kolibri.core.analytics.constants.nutrition_endpoints import STATISTICS
 from kolibri.core.analytics.models import PingbackNotification
+from kolibri.core.analytics.models import PingbackStatistics
+from kolibri.core.analytics.utils import aggregate_facility_logs
 from kolibri.core.analytics.utils import calculate_list_stats
 from kolibri.core.analytics.utils import create_and_update_notifications
 from kolibri.core.analytics.utils import extract_channel_statistics
 from kolibri.core.analytics.utils import extract_facility_statistics
+from kolibri.core.analytics.utils import merge_statistics
+from kolibri.core.analytics.utils import STATISTICS_REBUILD_INTERVAL
+from kolibri.core.analytics.utils import STATISTICS_SETTLE_TIME
 from kolibri.core.auth.constants import demographics
 from kolibri.core.auth.constants import facility_presets
 from kolibri.core.auth.constants import role_kinds
@@ -38,6 +45,7 @@ from kolibri.core.logger.models import ContentSummaryLog
 from kolibri.core.logger.models import MasteryLog
 from kolibri.core.logger.models import UserSessionLog
 from kolibri.core.logger.utils import user_data
+from kolibri.utils.time_utils import local_now
 
 
 USER_CSV_PATH = "kolibri/core/logger/management/commands/user_data.csv"
@@ -388,6 +396,93 @@ class ChannelStatisticsTestCase(BaseDeviceSetupMixin, TransactionTestCase):
         assert actual == expected
 
 
+class IncrementalStatisticsTestCase(BaseDeviceSetupMixin, TransactionTestCase):
+    n_superusers = 0
+    n_users = 2
+
+    def _create_session_log(self, end_timestamp):
+        return ContentSessionLog.objects.create(
+            user=self.users[0],
+            start_timestamp=end_timestamp - datetime.timedelta(minutes=1),
+            end_timestamp=end_timestamp,
+            content_id=self.content_id,
+            channel_id=self.channel.id,
+            time_spent=60,
+            kind=content_kinds.VIDEO,
+        )
+
+    def test_totals_stored(self):
+        facility = self.facilities[0]
+        extract_facility_statistics(facility)
+        statistics = PingbackStatistics.objects.get(
+            kind=statistics_kinds.FACILITY, source_id=facility.dataset_id
+        )
+        self.assertEqual(statistics.kind, statistics_kinds.FACILITY)
+        self.assertEqual(statistics.totals["suc"], 4)
+        extract_channel_statistics(self.channel)
+        statistics = PingbackStatistics.objects.get(
+            kind=statistics_kinds.CHANNEL, source_id=self.channel.id
+        )
+        self.assertEqual(statistics.totals["pop"], {self.content_id: 4})
+
+    def test_only_new_logs_aggregated(self):
+        facility = self.facilities[0]
+        extract_facility_statistics(facility)
+        high_water_mark = PingbackStatistics.objects.get(
+            kind=statistics_kinds.FACILITY, source_id=facility.dataset_id
+        ).high_water_mark
+        with patch(
+            "kolibri.core.analytics.utils.aggregate_facility_logs",
+            wraps=aggregate_facility_logs,
+        ) as aggregate:
+            extract_facility_statistics(facility)
+        self.assertEqual(aggregate.call_args_list[0][0][1], high_water_mark)
+        self.assertIsNotNone(aggregate.call_args_list[0][0][2])
+
+    def test_recent_logs_counted_once(self):
+        facility = self.facilities[0]
+        now = local_now()
+        self._create_session_log(now)
+        self.assertEqual(extract_facility_statistics(facility)["suc"], 5)
+        self.assertEqual(extract_channel_statistics(self.channel)["pc"], [5])
+        # once the log is older than the settle time it is merged into the totals
+        with patch(
+            "kolibri.core.analytics.utils.local_now",
+            return_value=now + STATISTICS_SETTLE_TIME * 2,
+        ):
+            self.assertEqual(extract_facility_statistics(facility)["suc"], 5)
+            self.assertEqual(extract_channel_statistics(self.channel)["pc"], [5])
+        statistics = PingbackStatistics.objects.get(
+            kind=statistics_kinds.FACILITY, source_id=facility.dataset_id
+        )
+        self.assertEqual(statistics.totals["suc"], 5)
+
+    def test_totals_rebuilt(self):
+        facility = self.facilities[0]
+        now = local_now()
+        extract_facility_statistics(facility)
+        # a log synced with a timestamp the high-water mark had already passed
+        self._create_session_log(now - STATISTICS_SETTLE_TIME * 2)
+        self.assertEqual(extract_facility_statistics(facility)["suc"], 4)
+        with patch(
+            "kolibri.core.analytics.utils.local_now",
+            return_value=now + STATISTICS_REBUILD_INTERVAL * 2,
+        ):
+            self.assertEqual(extract_facility_statistics(facility)["suc"], 5)
+
+
+def test_merge_statistics():
+    totals = {"f": "2019-01-01", "l": "2019-02-01", "ss": 2, "sk": {"video": 1}}
+    delta = {"f": "2018-01-01", "l": "2020-01-01", "ss": 1, "sk": {"exercise": 1}}
+    assert merge_statistics(totals, delta) == {
+        "f": "2018-01-01",
+        "l": "2020-01-01",
+        "ss": 3,
+        "sk": {"video": 1, "exercise": 1},
+    }
+    assert merge_statistics(totals, {"f": None, "ss": 0}) == totals
+
+
 class CreateUpdateNotificationsTestCase(TransactionTestCase):
     def setUp(self):
         self.msg = {
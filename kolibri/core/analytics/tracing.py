@@ -0,0 +1,157 @@
+"""
+Tracing of the requests served by this process.
+
+A sample of the requests is traced, recording the number and the duration of their database
+queries and their cache hits and misses. The traces are kept in an in-memory ring buffer, along
+with the slowest SQL statements of every view, and are published in the process cache at most
+every TRACES_PUBLISH_INTERVAL seconds, so that they can be inspected from other processes.
+"""
+import heapq
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+from django.db import connections
+
+from kolibri.core.utils.cache import process_cache
+from kolibri.core.utils.cache import start_cache_stats
+from kolibri.core.utils.cache import stop_cache_stats
+from kolibri.utils.conf import OPTIONS
+
+logger = logging.getLogger(__name__)
+
+REQUEST_TRACES_CACHE_KEY = "REQUEST_TRACES"
+
+TRACES_PUBLISH_INTERVAL = 10
+
+# Number of SQL statements kept for every view
+SLOW_QUERIES_PER_VIEW = 5
+
+# SQL statements are truncated to this length
+MAX_SQL_LENGTH = 1000
+
+# The slowest SQL statements of the requests that didn't resolve to a view, e.g. 404s, are
+# kept together, so that probing many paths can't grow the statements kept
+UNRESOLVED_VIEW = "<unresolved>"
+
+_lock = threading.Lock()
+
+_traces = deque(maxlen=OPTIONS["Server"]["TRACE_BUFFER_SIZE"])
+
+# Heaps of the slowest (duration, sql) statements by view
+_slow_queries = {}
+
+_published_at = 0
+
+
+def get_sample_rate():
+    """
+    :return: The fraction of the requests that are traced, all of them when profiling
+    """
+    if OPTIONS["Server"]["PROFILE"]:
+        return 1.0
+    return OPTIONS["Server"]["TRACE_SAMPLE_RATE"]
+
+
+def should_trace(sample_rate):
+    return sample_rate >= 1.0 or random.random() < sample_rate
+
+
+class RequestTrace(object):
+    """
+    Records the database queries and the cache lookups made by the current thread
+    while serving a request.
+    """
+
+    def __init__(self):
+        self.start = time.time()
+        self.query_logs = []
+        for connection in connections.all():
+            self.query_logs.append(
+                (
+                    connection,
+                    connection.force_debug_cursor,
+                    len(connection.queries_log),
+                )
+            )
+            # Makes the connection record its queries in queries_log, as with DEBUG
+            connection.force_debug_cursor = True
+        start_cache_stats()
+
+    def finish(self, request, response):
+        duration = time.time() - self.start
+        cache_stats = stop_cache_stats()
+        queries = []
+        for connection, force_debug_cursor, start in self.query_logs:
+            connection.force_debug_cursor = force_debug_cursor
+            queries.extend(list(connection.queries_log)[start:])
+        resolver_match = getattr(request, "resolver_match", None)
+        trace = {
+            "time": self.start,
+            "method": request.method,
+            "path": request.path_info,
+            "view": resolver_match.view_name if resolver_match else None,
+            "status": response.status_code if response is not None else None,
+            "duration": duration,
+            "queries": len(queries),
+            "query_time": sum(float(query["time"]) for query in queries),
+            "cache_hits": cache_stats["hits"],
+            "cache_misses": cache_stats["misses"],
+        }
+        record_trace(trace, queries)
+        return trace
+
+
+def record_trace(trace, queries):
+    """
+    Adds a request trace to the ring buffer, and its queries to the slowest ones of its view
+    """
+    global _published_at
+    view = trace["view"] or UNRESOLVED_VIEW
+    with _lock:
+        _traces.append(trace)
+        slow_queries = _slow_queries.setdefault(view, [])
+        for query in queries:
+            entry = (float(query["time"]), query["sql"][:MAX_SQL_LENGTH])
+            if len(slow_queries) < SLOW_QUERIES_PER_VIEW:
+                heapq.heappush(slow_queries, entry)
+            elif entry > slow_queries[0]:
+                heapq.heapreplace(slow_queries, entry)
+        publish = time.time() - _published_at >= TRACES_PUBLISH_INTERVAL
+        if publish:
+            _published_at = time.time()
+    if publish:
+        process_cache.set(REQUEST_TRACES_CACHE_KEY, get_request_traces(), None)
+
+
+def get_request_traces():
+    """
+    Returns the traces of this process, as a dict with the list of the latest request traces,
+    oldest first, and the slowest SQL statements by view, slowest first.
+    """
+    with _lock:
+        return {
+            "traces": list(_traces),
+            "slow_queries": {
+                view: [
+                    {"time": duration, "sql": sql}
+                    for duration, sql in sorted(queries, reverse=True)
+                ]
+                for view, queries in _slow_queries.items()
+            },
+        }
+
+
+def get_published_request_traces():
+    """
+    Returns the latest traces published by the server process, or None
+    """
+    return process_cache.get(REQUEST_TRACES_CACHE_KEY)
+
+
+def clear_request_traces():
+    with _lock:
+        _traces.clear()
+        _slow_queries.clear()
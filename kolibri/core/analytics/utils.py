@@ -21,7 +21,9 @@ from morango.models import InstanceIDModel
 
 import kolibri
 from .constants import nutrition_endpoints
+from .constants import statistics_kinds
 from .models import PingbackNotification
+from .models import PingbackStatistics
 from kolibri.core.auth.constants import demographics
 from kolibri.core.auth.constants import role_kinds
 from kolibri.core.auth.models import Classroom
@@ -52,6 +54,14 @@ DEFAULT_SERVER_URL = "https://telemetry.learningequality.org"
 
 USER_THRESHOLD = 10
 
+# Logs are only merged into the stored running totals once they have not been modified for
+# this long, the more recent ones are aggregated again on every ping
+STATISTICS_SETTLE_TIME = datetime.timedelta(days=1)
+
+# The running totals are rebuilt from all the logs this often, to account for the logs
+# synced to this device with timestamps that the high-water mark had already passed
+STATISTICS_REBUILD_INTERVAL = datetime.timedelta(days=7)
+
 facility_settings = [
     "preset",
     "learner_can_edit_username",
@@ -142,28 +152,99 @@ def dump_zipped_json(data):
     return jsondata
 
 
-def extract_facility_statistics(facility):
-
-    dataset_id = facility.dataset_id
-
-    settings = {
-        name: getattr(facility.dataset, name)
-        for name in facility_settings
-        if hasattr(facility.dataset, name)
-    }
-
-    settings.update(allow_guest_access=allow_guest_access())
-
-    learners = FacilityUser.objects.filter(dataset_id=dataset_id).exclude(
-        roles__kind__in=[role_kinds.ADMIN, role_kinds.COACH]
-    )
-    coaches = FacilityUser.objects.filter(
-        dataset_id=dataset_id, roles__kind__in=[role_kinds.ADMIN, role_kinds.COACH]
+def _modified_between(queryset, field, since=None, until=None):
+    """
+    Filters the logs whose timestamp field is after since and up to until, falling back
+    to the start timestamp of the logs whose field is not set.
+    """
+    if since is not None:
+        queryset = queryset.filter(
+            Q(**{field + "__gt": since})
+            | Q(**{field: None, "start_timestamp__gt": since})
+        )
+    if until is not None:
+        queryset = queryset.filter(
+            Q(**{field + "__lte": until})
+            | Q(**{field: None, "start_timestamp__lte": until})
+        )
+    return queryset
+
+
+def merge_statistics(totals, delta):
+    """
+    Merges the statistics aggregated over a new range of logs into running totals, adding
+    up the counts and keeping the earliest first and the latest last interaction dates.
+    """
+    merged = dict(totals)
+    for key, value in delta.items():
+        current = merged.get(key)
+        if current is None:
+            merged[key] = value
+        elif value is None:
+            continue
+        elif key == "f":
+            merged[key] = min(current, value)
+        elif key == "l":
+            merged[key] = max(current, value)
+        elif isinstance(value, dict):
+            merged[key] = merge_statistics(current, value)
+        else:
+            merged[key] = current + value
+    return merged
+
+
+def get_statistics_totals(kind, source_id, aggregate):
+    """
+    Returns the statistics of the logs of a facility or a channel, aggregating only the logs
+    modified since the last call, which are merged into the stored running totals.
+
+    :param kind: One of statistics_kinds
+    :param source_id: The dataset id of the facility or the id of the channel
+    :param aggregate: A function of since and until returning the statistics of the logs
+        modified in that range
+    """
+    now = local_now()
+    high_water_mark = now - STATISTICS_SETTLE_TIME
+    try:
+        statistics = PingbackStatistics.objects.get(kind=kind, source_id=source_id)
+    except PingbackStatistics.DoesNotExist:
+        statistics = PingbackStatistics(kind=kind, source_id=source_id)
+    if (
+        statistics.rebuilt is None
+        or now - statistics.rebuilt > STATISTICS_REBUILD_INTERVAL
+    ):
+        statistics.totals = aggregate(None, high_water_mark)
+        statistics.rebuilt = now
+    else:
+        # never aggregate the same logs twice, even if the clock went back
+        high_water_mark = max(high_water_mark, statistics.high_water_mark)
+        statistics.totals = merge_statistics(
+            statistics.totals, aggregate(statistics.high_water_mark, high_water_mark)
+        )
+    statistics.high_water_mark = high_water_mark
+    with db_lock():
+        statistics.save()
+    # the logs that are still being modified are aggregated on every call
+    return merge_statistics(statistics.totals, aggregate(high_water_mark, None))
+
+
+def aggregate_facility_logs(dataset_id, since=None, until=None):
+    """
+    Returns the statistics of the logs of a facility modified after since and up to until
+    """
+    usersessions = _modified_between(
+        UserSessionLog.objects.filter(dataset_id=dataset_id),
+        "last_interaction_timestamp",
+        since,
+        until,
     )
-
-    usersessions = UserSessionLog.objects.filter(dataset_id=dataset_id)
-    contsessions = ContentSessionLog.objects.filter(
-        dataset_id=dataset_id, time_spent__lt=3600 * 2
+    contsessions = _modified_between(
+        ContentSessionLog.objects.filter(
+            dataset_id=dataset_id, time_spent__lt=3600 * 2
+        ),
+        "end_timestamp",
+        since,
+        until,
     )
 
     # the aggregates below are used to calculate the first and most recent times this device was used
@@ -201,13 +282,109 @@ def extract_facility_statistics(facility):
         devinf["device_info"]: devinf["count"] for devinf in usersess_devinf
     }
 
+    # summary logs are kept updated for as long as the content is used, so they are
+    # counted when they are started and when they are completed instead
     summarylogs = ContentSummaryLog.objects.filter(dataset_id=dataset_id)
+    summarylogs_started = _modified_between(
+        summarylogs, "start_timestamp", since, until
+    )
+    summarylogs_completed = _modified_between(
+        summarylogs.exclude(completion_timestamp=None),
+        "completion_timestamp",
+        since,
+        until,
+    )
+    examlogs = _modified_between(
+        MasteryLog.objects.filter(
+            dataset_id=dataset_id, summarylog__kind=content_kinds.QUIZ
+        ),
+        "start_timestamp",
+        since,
+        until,
+    )
+    attemptlogs = _modified_between(
+        AttemptLog.objects.filter(dataset_id=dataset_id),
+        "start_timestamp",
+        since,
+        until,
+    )
 
     contsessions_user = contsessions.exclude(user=None)
     contsessions_anon = contsessions.filter(user=None)
     contsessions_anon_no_visitor_id = contsessions_anon.filter(visitor_id=None)
-    contsessions_anon_with_visitor_id = contsessions_anon.exclude(visitor_id=None)
 
+    # fmt: off
+    return {
+        # learner_login_count
+        "llc": usersessions.exclude(user__roles__kind__in=[role_kinds.ADMIN, role_kinds.COACH]).distinct().count(),
+        # coach_login_count
+        "clc": usersessions.filter(user__roles__kind__in=[role_kinds.ADMIN, role_kinds.COACH]).distinct().count(),
+        # device info stats
+        "dis": usersess_devinf,
+        # first
+        "f" : first_interaction_timestamp("%Y-%m-%d") if first_interaction_timestamp else None,
+        # last
+        "l": last_interaction_timestamp("%Y-%m-%d") if last_interaction_timestamp else None,
+        # summ_started
+        "ss": summarylogs_started.count(),
+        # summ_complete
+        "sc": summarylogs_completed.count(),
+        # sess_kinds
+        "sk": sesslogs_by_kind,
+        # exam_log_count
+        "elc": examlogs.count(),
+        # att_log_count
+        "alc": attemptlogs.exclude(sessionlog__kind=content_kinds.QUIZ).count(),
+        # exam_att_log_count
+        "ealc": attemptlogs.filter(sessionlog__kind=content_kinds.QUIZ).count(),
+        # sess_user_count
+        "suc": contsessions_user.count(),
+        # sess_anon_count
+        "sac": contsessions_anon.count(),
+        # sess_anon_count_no_visitor_id
+        "sacnv": contsessions_anon_no_visitor_id.count(),
+        # sess_user_time, in seconds
+        "sut": contsessions_user.aggregate(total_time=Sum("time_spent"))["total_time"] or 0,
+        # sess_anon_time, in seconds
+        "sat": contsessions_anon.aggregate(total_time=Sum("time_spent"))["total_time"] or 0,
+    }
+    # fmt: on
+
+
+def extract_facility_statistics(facility):
+
+    dataset_id = facility.dataset_id
+
+    settings = {
+        name: getattr(facility.dataset, name)
+        for name in facility_settings
+        if hasattr(facility.dataset, name)
+    }
+
+    settings.update(allow_guest_access=allow_guest_access())
+
+    learners = FacilityUser.objects.filter(dataset_id=dataset_id).exclude(
+        roles__kind__in=[role_kinds.ADMIN, role_kinds.COACH]
+    )
+    coaches = FacilityUser.objects.filter(
+        dataset_id=dataset_id, roles__kind__in=[role_kinds.ADMIN, role_kinds.COACH]
+    )
+
+    totals = get_statistics_totals(
+        statistics_kinds.FACILITY,
+        dataset_id,
+        lambda since, until: aggregate_facility_logs(dataset_id, since, until),
+    )
+
+    contsessions = ContentSessionLog.objects.filter(
+        dataset_id=dataset_id, time_spent__lt=3600 * 2
+    )
+    contsessions_user = contsessions.exclude(user=None)
+    contsessions_anon_with_visitor_id = contsessions.filter(user=None).exclude(
+        visitor_id=None
+    )
+
+    # distinct counts cannot be merged from running totals
     users_with_logs = contsessions_user.values("user_id").distinct().count()
     anon_visitors_with_logs = (
         contsessions_anon_with_visitor_id.values("visitor_id").distinct().count()
@@ -232,27 +409,27 @@ def extract_facility_statistics(facility):
         # learners_count
         "lc": learners.count(),
         # learner_login_count
-        "llc": usersessions.exclude(user__roles__kind__in=[role_kinds.ADMIN, role_kinds.COACH]).distinct().count(),
+        "llc": totals["llc"],
         # coaches_count
         "cc": coaches.count(),
         # coach_login_count
-        "clc": usersessions.filter(user__roles__kind__in=[role_kinds.ADMIN, role_kinds.COACH]).distinct().count(),
+        "clc": totals["clc"],
         # users_with_logs
         "uwl": users_with_logs,
         # anon_visitors_with_logs
         "vwl": anon_visitors_with_logs,
         # device info stats
-        "dis": usersess_devinf,
+        "dis": totals["dis"],
         # first
-        "f" : first_interaction_timestamp("%Y-%m-%d") if first_interaction_timestamp else None,
+        "f" : totals["f"],
         # last
-        "l": last_interaction_timestamp("%Y-%m-%d") if last_interaction_timestamp else None,
+        "l": totals["l"],
         # summ_started
-        "ss": summarylogs.count(),
+        "ss": totals["ss"],
         # summ_complete
-        "sc": summarylogs.exclude(completion_timestamp=None).count(),
+        "sc": totals["sc"],
         # sess_kinds
-        "sk": sesslogs_by_kind,
+        "sk": totals["sk"],
         # class_count
         "crc": Classroom.objects.filter(dataset_id=dataset_id).count(),
         # group_count
@@ -262,21 +439,21 @@ def extract_facility_statistics(facility):
         # exam_count
         "ec": Exam.objects.filter(dataset_id=dataset_id).count(),
         # exam_log_count
-        "elc": MasteryLog.objects.filter(dataset_id=dataset_id, summarylog__kind=content_kinds.QUIZ).count(),
+        "elc": totals["elc"],
         # att_log_count
-        "alc": AttemptLog.objects.filter(dataset_id=dataset_id).exclude(sessionlog__kind=content_kinds.QUIZ).count(),
+        "alc": totals["alc"],
         # exam_att_log_count
-        "ealc": AttemptLog.objects.filter(dataset_id=dataset_id, sessionlog__kind=content_kinds.QUIZ).count(),
+        "ealc": totals["ealc"],
         # sess_user_count
-        "suc": contsessions_user.count(),
+        "suc": totals["suc"],
         # sess_anon_count
-        "sac": contsessions_anon.count(),
+        "sac": totals["sac"],
         # sess_anon_count_no_visitor_id
-        "sacnv": contsessions_anon_no_visitor_id.count(),
+        "sacnv": totals["sacnv"],
         # sess_user_time
-        "sut": int((contsessions_user.aggregate(total_time=Sum("time_spent"))["total_time"] or 0) / 60),
+        "sut": int(totals["sut"] / 60),
         # sess_anon_time
-        "sat": int((contsessions_anon.aggregate(total_time=Sum("time_spent"))["total_time"] or 0) / 60),
+        "sat": int(totals["sat"] / 60),
         # demographic_stats_learner
         "dsl": learner_demographics,
         # demographic_stats_non_learner
@@ -297,36 +474,95 @@ def extract_facility_statistics(facility):
     return data
 
 
-def extract_channel_statistics(channel):
-
-    channel_id = channel.id
-    tree_id = channel.root.tree_id
-
-    sessionlogs = ContentSessionLog.objects.filter(
-        channel_id=channel_id, time_spent__lt=3600 * 2
+def aggregate_channel_logs(channel_id, since=None, until=None):
+    """
+    Returns the statistics of the logs of a channel modified after since and up to until
+    """
+    sessionlogs = _modified_between(
+        ContentSessionLog.objects.filter(
+            channel_id=channel_id, time_spent__lt=3600 * 2
+        ),
+        "end_timestamp",
+        since,
+        until,
     )
     summarylogs = ContentSummaryLog.objects.filter(channel_id=channel_id)
+    summarylogs_started = _modified_between(
+        summarylogs, "start_timestamp", since, until
+    )
+    summarylogs_completed = _modified_between(
+        summarylogs.exclude(completion_timestamp=None),
+        "completion_timestamp",
+        since,
+        until,
+    )
 
     sesslogs_by_kind = (
         sessionlogs.order_by("kind").values("kind").annotate(count=Count("kind"))
     )
     sesslogs_by_kind = {log["kind"]: log["count"] for log in sesslogs_by_kind}
 
-    pop = list(
-        sessionlogs.values("content_id")
+    pop = (
+        sessionlogs.order_by("content_id")
+        .values("content_id")
         .annotate(count=Count("id"))
-        .order_by("-count")[:50]
     )
+    pop = {item["content_id"]: item["count"] for item in pop}
+
+    contsessions_user = sessionlogs.exclude(user=None)
+    contsessions_anon = sessionlogs.filter(user=None)
+    contsessions_anon_no_visitor_id = contsessions_anon.filter(visitor_id=None)
+
+    # fmt: off
+    return {
+        # popularity of every content
+        "pop": pop,
+        # summ_started
+        "ss": summarylogs_started.count(),
+        # summ_complete
+        "sc": summarylogs_completed.count(),
+        # sess_kinds
+        "sk": sesslogs_by_kind,
+        # sess_user_count
+        "suc": contsessions_user.count(),
+        # sess_anon_count
+        "sac": contsessions_anon.count(),
+        # sess_anon_count_no_visitor_id
+        "sacnv": contsessions_anon_no_visitor_id.count(),
+        # sess_user_time, in seconds
+        "sut": contsessions_user.aggregate(total_time=Sum("time_spent"))["total_time"] or 0,
+        # sess_anon_time, in seconds
+        "sat": contsessions_anon.aggregate(total_time=Sum("time_spent"))["total_time"] or 0,
+    }
+    # fmt: on
+
+
+def extract_channel_statistics(channel):
+
+    channel_id = channel.id
+    tree_id = channel.root.tree_id
+
+    totals = get_statistics_totals(
+        statistics_kinds.CHANNEL,
+        channel_id,
+        lambda since, until: aggregate_channel_logs(channel_id, since, until),
+    )
+
+    pop = sorted(totals["pop"].items(), key=lambda item: item[1], reverse=True)[:50]
 
     localfiles = LocalFile.objects.filter(
         available=True, files__contentnode__tree_id=tree_id
     ).distinct()
 
+    sessionlogs = ContentSessionLog.objects.filter(
+        channel_id=channel_id, time_spent__lt=3600 * 2
+    )
     contsessions_user = sessionlogs.exclude(user=None)
-    contsessions_anon = sessionlogs.filter(user=None)
-    contsessions_anon_no_visitor_id = contsessions_anon.filter(visitor_id=None)
-    contsessions_anon_with_visitor_id = contsessions_anon.exclude(visitor_id=None)
+    contsessions_anon_with_visitor_id = sessionlogs.filter(user=None).exclude(
+        visitor_id=None
+    )
 
+    # distinct counts cannot be merged from running totals
     users_with_logs = contsessions_user.values("user_id").distinct().count()
     anon_visitors_with_logs = (
         contsessions_anon_with_visitor_id.values("visitor_id").distinct().count()
@@ -351,9 +587,9 @@ def extract_channel_statistics(channel):
         # updated
         "u": channel.last_updated.strftime("%Y-%m-%d") if channel.last_updated else None,
         # popular_ids
-        "pi": [item["content_id"][:10] for item in pop],
+        "pi": [content_id[:10] for content_id, _ in pop],
         # popular_counts
-        "pc": [item["count"] for item in pop],
+        "pc": [count for _, count in pop],
         # job_storage calculated by the MB
         # rtibbles: This is the one remaining instance of non-SI bytes units calculations that
         # I have discovered still extant in Kolibri. As this is being used for statistics reporting
@@ -361,21 +597,21 @@ def extract_channel_statistics(channel):
         # produce undesirable inconsistencies in reported statistics.
         "s": (localfiles.aggregate(Sum("file_size"))["file_size__sum"] or 0) / (2 ** 20),
         # summ_started
-        "ss": summarylogs.count(),
+        "ss": totals["ss"],
         # summ_complete
-        "sc": summarylogs.exclude(completion_timestamp=None).count(),
+        "sc": totals["sc"],
         # sess_kinds
-        "sk": sesslogs_by_kind,
+        "sk": totals["sk"],
         # sess_user_count
-        "suc": contsessions_user.count(),
+        "suc": totals["suc"],
         # sess_anon_count
-        "sac": contsessions_anon.count(),
+        "sac": totals["sac"],
         # sess_anon_count_no_visitor_id
-        "sacnv": contsessions_anon_no_visitor_id.count(),
+        "sacnv": totals["sacnv"],
         # sess_user_time
-        "sut": int((contsessions_user.aggregate(total_time=Sum("time_spent"))["total_time"] or 0) / 60),
+        "sut": int(totals["sut"] / 60),
         # sess_anon_time
-        "sat": int((contsessions_anon.aggregate(total_time=Sum("time_spent"))["total_time"] or 0) / 60),
+        "sat": int(totals["sat"] / 60),
         # users_with_logs
         "uwl": users_with_logs,
         # anon_visitors_with_logs
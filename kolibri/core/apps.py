@@ -12,7 +12,8 @@ from django_filters.filters import UUIDFilter
 from django_filters.rest_framework.filterset import FilterSet
 
 from kolibri.core.errors import RedisConnectionError
-from kolibri.core.sqlite.pragmas import CONNECTION_PRAGMAS
+from kolibri.core.sqlite.checkpoint import get_wal_autocheckpoint
+from kolibri.core.sqlite.pragmas import get_connection_pragmas
 from kolibri.core.sqlite.pragmas import START_PRAGMAS
 from kolibri.core.sqlite.utils import repair_sqlite_db
 from kolibri.core.utils.cache import process_cache
@@ -59,9 +60,8 @@ class KolibriCoreConfig(AppConfig):
     @staticmethod
     def activate_pragmas_per_connection(sender, connection, **kwargs):
         """
-        Activate SQLite3 PRAGMAs that apply on a per-connection basis. A no-op
-        right now, but kept around as infrastructure if we ever want to add
-        PRAGMAs in the future.
+        Activate SQLite3 PRAGMAs that apply on a per-connection basis,
+        tuned for the database of the connection.
         """
 
         if connection.vendor == "sqlite":
@@ -77,18 +77,13 @@ class KolibriCoreConfig(AppConfig):
                     repair_sqlite_db(connection)
             cursor = connection.cursor()
 
-            # Shorten the default WAL autocheckpoint from 1000 pages to 500
-            cursor.executescript(CONNECTION_PRAGMAS)
-
-            # We don't turn on the following pragmas, because they have negligible
-            # performance impact. For reference, here's what we've tested:
-
-            # Don't ensure that the OS has fully flushed
-            # our data to disk.
-            # cursor.execute("PRAGMA synchronous=OFF;")
-
-            # Store cross-database JOINs in memory.
-            # cursor.execute("PRAGMA temp_store=MEMORY;")
+            # Set the WAL autocheckpoint, and the cache, memory mapping, temp store
+            # and synchronous levels configured in the Database options.
+            cursor.executescript(
+                get_connection_pragmas(
+                    connection.alias, wal_autocheckpoint=get_wal_autocheckpoint()
+                )
+            )
 
     @staticmethod
     def activate_pragmas_on_start():
@@ -14,6 +14,7 @@ class KolibriAuthConfig(AppConfig):
             pre_sync_transfer_handler,
             post_sync_transfer_handler,
         )  # noqa: F401
+        from kolibri.core.auth.sync_ingestion import connect_stage_timing_handlers
         from morango.api.viewsets import session_controller  # noqa: F401
 
         # attach to `initializing.completed` signal so that the context has all information needed
@@ -22,3 +23,4 @@ class KolibriAuthConfig(AppConfig):
             pre_sync_transfer_handler
         )
         session_controller.signals.cleanup.completed.connect(post_sync_transfer_handler)
+        connect_stage_timing_handlers(session_controller.signals)
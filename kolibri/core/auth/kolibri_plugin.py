@@ -1,12 +1,19 @@
 import uuid
 
+from morango.constants import transfer_stages
+from morango.constants import transfer_statuses
+from morango.constants.capabilities import ASYNC_OPERATIONS
 from morango.sync.operations import LocalOperation
+from morango.utils import SETTINGS
 
 from kolibri.core.auth.hooks import FacilityDataSyncHook
 from kolibri.core.auth.models import FacilityUser
+from kolibri.core.auth.sync_ingestion import hand_over_transfer_session
+from kolibri.core.auth.sync_ingestion import INGESTION_SUPPORTED
 from kolibri.core.auth.sync_operations import KolibriSingleUserSyncOperation
 from kolibri.core.auth.sync_operations import KolibriSyncOperationMixin
 from kolibri.core.auth.tasks import cleanupsync
+from kolibri.core.auth.tasks import enqueue_sync_ingestion
 from kolibri.plugins.hooks import register_hook
 
 
@@ -58,7 +65,43 @@ class CleanUpTaskOperation(KolibriSyncOperationMixin, LocalOperation):
         return False
 
 
+class IngestionOffloadOperation(LocalOperation):
+    """
+    Hands over dequeuing and deserializing the data pushed by clients to the sync ingestion task,
+    so that it is integrated in batches outside of the requests of the clients, which poll the
+    transfer session until the task has completed the stage
+    """
+
+    # run after any other operation of the stage
+    priority = -1
+
+    def handle(self, context):
+        """
+        :type context: morango.sync.context.LocalSessionContext
+        """
+        if (
+            not INGESTION_SUPPORTED
+            or not context.is_server
+            or not context.is_push
+            or ASYNC_OPERATIONS not in context.capabilities
+            or not context.transfer_session.records_transferred
+        ):
+            return False
+
+        if (
+            context.stage == transfer_stages.DESERIALIZING
+            and not SETTINGS.MORANGO_DESERIALIZE_AFTER_DEQUEUING
+        ):
+            return False
+
+        hand_over_transfer_session(context)
+        enqueue_sync_ingestion()
+        return transfer_statuses.STARTED
+
+
 @register_hook
 class AuthSyncHook(FacilityDataSyncHook):
     serializing_operations = [SingleFacilityUserChangeClearingOperation()]
+    dequeuing_operations = [IngestionOffloadOperation()]
+    deserializing_operations = [IngestionOffloadOperation()]
     cleanup_operations = [CleanUpTaskOperation()]
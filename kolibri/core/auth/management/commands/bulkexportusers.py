@@ -2,13 +2,12 @@ import csv
 import logging
 import ntpath
 import os
+import time
 from collections import OrderedDict
 from functools import partial
 
 from django.conf import settings
 from django.core.management.base import CommandError
-from django.db.models import OuterRef
-from django.db.models import Subquery
 from django.utils import translation
 from django.utils.translation import gettext_lazy as _
 from django.utils.translation import pgettext_lazy
@@ -17,13 +16,14 @@ from .bulkimportusers import FILE_WRITE_ERROR
 from .bulkimportusers import MESSAGES
 from .bulkimportusers import NO_FACILITY
 from kolibri.core.auth.constants import role_kinds
+from kolibri.core.auth.constants.collection_kinds import CLASSROOM
 from kolibri.core.auth.constants.demographics import DEFERRED
 from kolibri.core.auth.constants.demographics import NOT_SPECIFIED
-from kolibri.core.auth.models import Classroom
 from kolibri.core.auth.models import Facility
 from kolibri.core.auth.models import FacilityUser
+from kolibri.core.auth.models import Membership
 from kolibri.core.auth.models import Role
-from kolibri.core.query import GroupConcatSubquery
+from kolibri.core.query import GroupConcat
 from kolibri.core.tasks.management.commands.base import AsyncCommand
 from kolibri.core.tasks.utils import get_current_job
 from kolibri.core.utils.csv import open_csv_for_writing
@@ -152,10 +152,77 @@ def translate_labels():
     )
 
 
+# Number of users fetched, with their roles and classrooms, in every query:
+EXPORT_CHUNK_SIZE = 500
+
+# When a user has several roles in the facility, the one to be exported:
+roles_priority = (role_kinds.ADMIN, role_kinds.COACH, role_kinds.ASSIGNABLE_COACH)
+
+
+def _get_classroom_names(queryset, user_ids):
+    """
+    Returns a dictionary with the comma separated names of the classrooms related
+    to every user through the queryset, aggregated by the database
+    """
+    return {
+        user_id: ",".join(names)
+        for user_id, names in queryset.filter(
+            user_id__in=user_ids, collection__kind=CLASSROOM
+        )
+        .values("user_id")
+        .annotate(names=GroupConcat("collection__name"))
+        .values_list("user_id", "names")
+        if names
+    }
+
+
+def _get_facility_roles(facility, user_ids):
+    kinds = {}
+    for user_id, kind in Role.objects.filter(
+        user_id__in=user_ids, collection_id=facility.id
+    ).values_list("user_id", "kind"):
+        if user_id not in kinds or roles_priority.index(kind) < roles_priority.index(
+            kinds[user_id]
+        ):
+            kinds[user_id] = kind
+    return kinds
+
+
+def user_chunks_generator(facility, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Generates lists of users of the facility, paginated by id so that every
+    query uses the primary key index and memory usage is bounded by the chunk size
+    """
+    queryset = FacilityUser.objects.filter(facility=facility).order_by("id")
+    last_id = None
+    while True:
+        chunk_queryset = (
+            queryset if last_id is None else queryset.filter(id__gt=last_id)
+        )
+        users = list(
+            chunk_queryset.values(
+                "id", "username", "full_name", "birth_year", "gender", "id_number"
+            )[:chunk_size]
+        )
+        if not users:
+            break
+        user_ids = [user["id"] for user in users]
+        kinds = _get_facility_roles(facility, user_ids)
+        enrolled = _get_classroom_names(Membership.objects.all(), user_ids)
+        assigned = _get_classroom_names(
+            Role.objects.filter(kind=role_kinds.COACH), user_ids
+        )
+        for user in users:
+            user["kind"] = kinds.get(user["id"])
+            user["enrolled"] = enrolled.get(user["id"])
+            user["assigned"] = assigned.get(user["id"])
+        yield users
+        last_id = user_ids[-1]
+
+
 def csv_file_generator(facility, filepath, overwrite=True):
     if not overwrite and os.path.exists(filepath):
         raise ValueError("{} already exists".format(filepath))
-    queryset = FacilityUser.objects.filter(facility=facility)
 
     header_labels = translate_labels().values()
 
@@ -167,41 +234,15 @@ def csv_file_generator(facility, filepath, overwrite=True):
         writer.writeheader()
         usernames = set()
 
-        query = (
-            queryset.values("pk")
-            .annotate(
-                kind=Subquery(
-                    Role.objects.filter(collection_id=facility.id)
-                    .values("kind")
-                    .filter(user_id=OuterRef("id"))
-                )
-            )
-            .annotate(
-                enrolled=GroupConcatSubquery(
-                    Classroom.objects.filter(membership__user_id=OuterRef("id")).values(
-                        "name"
-                    ),
-                    field="name",
-                )
-            )
-            .annotate(
-                assigned=GroupConcatSubquery(
-                    Classroom.objects.filter(
-                        role__kind="coach", role__user=OuterRef("id")
-                    ).values("name"),
-                    field="name",
-                )
-            )
-        )
-
-        for item in query.values(*db_columns):
-            if item["kind"] == role_kinds.ADMIN:
-                continue
-            if item["username"] not in usernames:
-                item["password"] = "*"
-                writer.writerow(map_output(item))
-                usernames.add(item["username"])
-            yield item
+        for users in user_chunks_generator(facility):
+            for item in users:
+                if item["kind"] == role_kinds.ADMIN:
+                    continue
+                if item["username"] not in usernames:
+                    item["password"] = "*"
+                    writer.writerow(map_output(item))
+                    usernames.add(item["username"])
+                yield item
 
 
 class Command(AsyncCommand):
@@ -273,6 +314,7 @@ class Command(AsyncCommand):
         total_rows = FacilityUser.objects.filter(facility=facility).count()
 
         with self.start_progress(total=total_rows) as progress_update:
+            start = time.time()
             try:
                 for row in csv_file_generator(
                     facility, filepath, overwrite=options["overwrite"]
@@ -282,6 +324,13 @@ class Command(AsyncCommand):
                 self.overall_error.append(MESSAGES[FILE_WRITE_ERROR].format(e))
                 raise CommandError(self.overall_error[-1])
 
+            elapsed = time.time() - start
+            logger.info(
+                "Exported {} users in {:.2f} seconds ({:.0f} users/s)".format(
+                    total_rows, elapsed, total_rows / max(elapsed, 1e-6)
+                )
+            )
+
             # freeze error messages translations:
             self.overall_error = [str(msg) for msg in self.overall_error]
 
@@ -5,12 +5,14 @@ import re
 from uuid import UUID
 
 from django.conf import settings
-from django.contrib.auth.hashers import make_password
 from django.core.exceptions import ValidationError
 from django.core.management.base import CommandError
+from django.db import connections
+from django.db import transaction
 from django.utils import translation
 from django.utils.translation import gettext_lazy as _
 from django.utils.translation import pgettext_lazy
+from morango.sync.backends.utils import calculate_max_sqlite_variables
 
 from kolibri.core.auth.constants import role_kinds
 from kolibri.core.auth.constants.collection_kinds import CLASSROOM
@@ -20,6 +22,9 @@ from kolibri.core.auth.models import Classroom
 from kolibri.core.auth.models import Facility
 from kolibri.core.auth.models import FacilityUser
 from kolibri.core.auth.models import Membership
+from kolibri.core.auth.models import Role
+from kolibri.core.auth.utils.delete import chunk
+from kolibri.core.auth.utils.passwords import hash_passwords
 from kolibri.core.tasks.management.commands.base import AsyncCommand
 from kolibri.core.tasks.utils import get_current_job
 from kolibri.core.utils.csv import open_csv_for_reading
@@ -228,6 +233,12 @@ def valid_name(username=True, allow_null=False):
     return checker
 
 
+def _get_batch_size(Model):
+    if connections[Model.objects.db].vendor == "sqlite":
+        return min(calculate_max_sqlite_variables() // len(Model._meta.fields), 500)
+    return 750
+
+
 def reverse_dict(original):
     """
     Returns a dictionary based on an original dictionary
@@ -495,9 +506,7 @@ class Command(AsyncCommand):
 
     def get_field_values(self, user_row):
         password = user_row.get(self.header_translation["PASSWORD"], None)
-        if password != "*":
-            password = make_password(password)
-        else:
+        if password == "*":
             password = None
 
         gender = user_row.get(self.header_translation["GENDER"], "").strip().upper()
@@ -525,29 +534,34 @@ class Command(AsyncCommand):
     def compare_fields(self, user_obj, values):
         changed = False
         for field in values:
-            if field == "uuid":
-                continue  # uuid can't be updated
-            if field != "password" or values["password"] is not None:
-                if getattr(user_obj, field) != values[field]:
-                    changed = True
-                    setattr(user_obj, field, values[field])
-        return changed
+            if field in ("uuid", "password"):
+                # uuid can't be updated, passwords are hashed in bulk afterwards
+                continue
+            if getattr(user_obj, field) != values[field]:
+                changed = True
+                setattr(user_obj, field, values[field])
+        # a new password always means a new hash, as the salt is random
+        return changed or values["password"] is not None
+
+    def get_existing_users(self):
+        """
+        Load all the users of the facility in a single query, indexed by id and by username
+        """
+        users_by_id = {}
+        users_by_username = {}
+        for user_obj in FacilityUser.objects.filter(facility=self.default_facility):
+            users_by_id[user_obj.id] = user_obj
+            users_by_username[user_obj.username] = user_obj
+        return users_by_id, users_by_username
 
     def build_users_objects(self, users):
         new_users = []
         update_users = []
         keeping_users = []
         per_line_errors = []
-        users_uuid = [
-            u[self.header_translation["UUID"]]
-            for u in users.values()
-            if u[self.header_translation["UUID"]] != ""
-        ]
-        existing_users = (
-            FacilityUser.objects.filter(facility=self.default_facility)
-            .filter(id__in=users_uuid)
-            .values_list("id", flat=True)
-        )
+        # (user object, raw password) pairs to be hashed in a single batch:
+        passwords = []
+        existing_users, existing_usernames = self.get_existing_users()
 
         # creating the users takes half of the time
         progress = (100 / self.number_lines) * 0.5
@@ -556,15 +570,11 @@ class Command(AsyncCommand):
             user_row = users[user]
             values = self.get_field_values(user_row)
             if values["uuid"] in existing_users:
-                user_obj = FacilityUser.objects.get(
-                    id=values["uuid"], facility=self.default_facility
-                )
+                user_obj = existing_users[values["uuid"]]
                 keeping_users.append(user_obj)
                 if user_obj.username != user:
                     # check for duplicated username in the facility
-                    existing_user = FacilityUser.objects.get(
-                        username=user, facility=self.default_facility
-                    )
+                    existing_user = existing_usernames.get(user)
                     if existing_user:
                         error = {
                             "row": users[user]["position"],
@@ -577,6 +587,7 @@ class Command(AsyncCommand):
                         continue
                 if self.compare_fields(user_obj, values):
                     update_users.append(user_obj)
+                    passwords.append((user_obj, values["password"]))
             else:
                 if values["uuid"] != "":
                     error = {
@@ -598,16 +609,31 @@ class Command(AsyncCommand):
                     per_line_errors.append(error)
                 else:
                     user_obj = FacilityUser(
-                        username=user, facility=self.default_facility
+                        username=user,
+                        facility=self.default_facility,
+                        dataset_id=self.default_facility.dataset_id,
                     )
-                    # user_obj.id = user_obj.calculate_uuid()  # Morango does not work properly with this
                     for field in values:
-                        if values[field]:
+                        if field != "password" and values[field]:
                             setattr(user_obj, field, values[field])
+                    passwords.append((user_obj, values["password"]))
                     new_users.append(user_obj)
 
+        self.set_passwords(passwords)
+
         return (new_users, update_users, keeping_users, per_line_errors)
 
+    def set_passwords(self, passwords):
+        """
+        Hash all the passwords in a single batch and set them on their users
+        `passwords` - List of (user object, raw password) tuples, a None password
+        keeps the current one
+        """
+        passwords = [(u, password) for u, password in passwords if password is not None]
+        hashes = hash_passwords([password for user_obj, password in passwords])
+        for (user_obj, password), password_hash in zip(passwords, hashes):
+            user_obj.password = password_hash
+
     def db_validate_list(self, db_list, users=False):
         errors = []
         # validating the users takes aprox 40% of the time
@@ -615,11 +641,13 @@ class Command(AsyncCommand):
             progress = (
                 (100 / self.number_lines) * 0.4 * (len(db_list) / self.number_lines)
             )
+        # the facility is known to exist, so avoid querying it for every user:
+        exclude = ["facility", "dataset"] if users else []
         for obj in db_list:
             if users:
                 self.progress_update(progress)
             try:
-                obj.full_clean()
+                obj.full_clean(exclude=exclude)
             except ValidationError as e:
                 for message in e.message_dict:
                     error = {
@@ -648,19 +676,15 @@ class Command(AsyncCommand):
         new_classes = []
         update_classes = []
         total_classes = set([k for k in classes[0]] + [v for v in classes[1]])
-        existing_classes = (
-            Classroom.objects.filter(parent=self.default_facility)
-            # .filter(name__in=total_classes)  # can't be done if classes names are case insensitive
-            .values_list("name", flat=True)
-        )
+        existing_classes = Classroom.objects.filter(
+            parent=self.default_facility
+        )  # .filter(name__in=total_classes)  # can't be done if classes names are case insensitive
 
-        normalized_name_existing = {c.lower(): c for c in existing_classes}
+        normalized_name_existing = {c.name.lower(): c for c in existing_classes}
         for classroom in total_classes:
             if classroom.lower() in normalized_name_existing:
-                real_name = normalized_name_existing[classroom.lower()]
-                class_obj = Classroom.objects.get(
-                    name=real_name, parent=self.default_facility
-                )
+                class_obj = normalized_name_existing[classroom.lower()]
+                real_name = class_obj.name
                 update_classes.append(class_obj)
                 if real_name != classroom:
                     if classroom in classes[0]:
@@ -724,42 +748,108 @@ class Command(AsyncCommand):
         for classroom in classes:
             Membership.objects.filter(collection=classroom).delete()
 
-    def get_user(self, username, users):
-        user = users.get(username, None)
-        if not user:  # the user has not been created nor updated:
-            user = FacilityUser.objects.get(
-                username=username, facility=self.default_facility
-            )
-        return user
+    def bulk_create(self, Model, objects):
+        for obj in objects:
+            # morango source id and partition are set while calculating the uuid:
+            obj.id = obj.calculate_uuid()
+        Model.objects.bulk_create(objects, batch_size=_get_batch_size(Model))
 
-    def add_classes_memberships(self, classes, users, db_classes):
-        enrolled = classes[0]
-        assigned = classes[1]
-        classes = {k.name: k for k in db_classes}
+    def bulk_delete(self, Model, ids):
+        for ids_chunk in chunk(list(ids), _get_batch_size(Model)):
+            Model.objects.filter(id__in=ids_chunk).delete()
 
-        for classroom in enrolled:
-            db_class = classes[classroom]
-            for username in enrolled[classroom]:
-                # db validation might have rejected a csv validated user:
+    def add_roles(self, users, roles, classes, db_classes):
+        """
+        Create, in bulk, all the facility roles and classroom coach assignments
+        of the imported users that do not exist yet in the database.
+        `users` - Dictionary of imported user objects, keyed by username
+        `roles` - Dictionary of lists of usernames, keyed by facility role kind
+        `classes` - Tuple containing two dictionaries: enrolled classes + assigned classes
+        `db_classes` - Classroom objects referenced in the csv
+        Returns:
+        existing_roles - Dictionary of ids of the classroom roles in the database
+        before the import, keyed by (user id, classroom id)
+        """
+        facility_id = self.default_facility.id
+        existing_roles = {
+            (user_id, collection_id, kind): role_id
+            for role_id, user_id, collection_id, kind in Role.objects.filter(
+                dataset_id=self.default_facility.dataset_id
+            ).values_list("id", "user_id", "collection_id", "kind")
+        }
+        facility_role_users = {
+            user_id
+            for user_id, collection_id, kind in existing_roles
+            if collection_id == facility_id
+        }
+        new_roles = {}
+
+        def add_role(user, collection_id, kind):
+            key = (user.id, collection_id, kind)
+            if key not in existing_roles and key not in new_roles:
+                new_roles[key] = Role(
+                    user=user,
+                    collection_id=collection_id,
+                    kind=kind,
+                    dataset_id=self.default_facility.dataset_id,
+                )
+
+        for role in roles.keys():
+            for username in roles[role]:
                 if username in users:
-                    user = self.get_user(username, users)
-                    if not user.is_member_of(db_class):
-                        db_class.add_member(user)
+                    add_role(users[username], facility_id, role)
+                    facility_role_users.add(users[username].id)
+
+        classes_ids = {k.name: k.id for k in db_classes}
+        assigned = classes[1]
         for classroom in assigned:
-            db_class = classes[classroom]
             for username in assigned[classroom]:
-                # db validation might have rejected a csv validated user:
                 if username in users:
-                    user = self.get_user(username, users)
-                    db_class.add_coach(user)
+                    user = users[username]
+                    if user.id not in facility_role_users:
+                        # same behaviour as Role.save: classroom coaches need a facility role
+                        add_role(user, facility_id, role_kinds.ASSIGNABLE_COACH)
+                        facility_role_users.add(user.id)
+                    add_role(user, classes_ids[classroom], role_kinds.COACH)
+
+        self.bulk_create(Role, list(new_roles.values()))
+        return {
+            (user_id, collection_id): role_id
+            for (user_id, collection_id, kind), role_id in existing_roles.items()
+            if collection_id != facility_id
+        }
 
-    def add_roles(self, users, roles):
-        for role in roles.keys():
-            for username in roles[role]:
+    def add_classes_memberships(self, users, classes, db_classes):
+        """
+        Create, in bulk, all the classroom memberships of the imported users
+        that do not exist yet in the database.
+        Returns:
+        existing_memberships - Dictionary of ids of the classroom memberships in
+        the database before the import, keyed by (user id, classroom id)
+        """
+        existing_memberships = {
+            (user_id, collection_id): membership_id
+            for membership_id, user_id, collection_id in Membership.objects.filter(
+                dataset_id=self.default_facility.dataset_id,
+                collection__kind=CLASSROOM,
+            ).values_list("id", "user_id", "collection_id")
+        }
+        new_memberships = {}
+        classes_ids = {k.name: k.id for k in db_classes}
+        enrolled = classes[0]
+        for classroom in enrolled:
+            for username in enrolled[classroom]:
                 # db validation might have rejected a csv validated user:
                 if username in users:
-                    user = self.get_user(username, users)
-                    self.default_facility.add_role(user, role)
+                    key = (users[username].id, classes_ids[classroom])
+                    if key not in existing_memberships and key not in new_memberships:
+                        new_memberships[key] = Membership(
+                            user=users[username],
+                            collection_id=classes_ids[classroom],
+                            dataset_id=self.default_facility.dataset_id,
+                        )
+        self.bulk_create(Membership, list(new_memberships.values()))
+        return existing_memberships
 
     def exit_if_error(self):
         if self.overall_error:
@@ -775,28 +865,30 @@ class Command(AsyncCommand):
             raise CommandError("File errors: {}".format(self.overall_error))
         return
 
-    def remove_memberships(self, users, enrolled, assigned):
-        users_enrolled = reverse_dict(enrolled)
-        users_assigned = reverse_dict(assigned)
-        for user in users:
-            # enrolled:
-            to_remove = user.memberships.filter(collection__kind=CLASSROOM)
-            username = user.username
-            if username in users_enrolled.keys():
-                to_remove.exclude(
-                    collection__name__in=users_enrolled[username]
-                ).delete()
-            else:
-                to_remove.delete()
-
-            # assigned:
-            to_remove = user.roles.filter(collection__kind=CLASSROOM)
-            if username in users_assigned.keys():
-                to_remove.exclude(
-                    collection__name__in=users_assigned[username]
-                ).delete()
-            else:
-                to_remove.delete()
+    def remove_memberships(
+        self, users, classes, db_classes, existing_memberships, existing_roles
+    ):
+        """
+        Delete, in bulk, the classroom memberships and coach assignments of
+        the users that are not included in the csv anymore.
+        """
+        classes_ids = {k.name: k.id for k in db_classes}
+        users_enrolled = reverse_dict(classes[0])
+        users_assigned = reverse_dict(classes[1])
+        users_ids = {user.id: user.username for user in users}
+
+        def to_remove(existing, users_classes):
+            for (user_id, collection_id), obj_id in existing.items():
+                if user_id not in users_ids:
+                    continue
+                keep = {
+                    classes_ids[c] for c in users_classes.get(users_ids[user_id], [])
+                }
+                if collection_id not in keep:
+                    yield obj_id
+
+        self.bulk_delete(Membership, to_remove(existing_memberships, users_enrolled))
+        self.bulk_delete(Role, to_remove(existing_roles, users_assigned))
 
     def output_messages(
         self, per_line_errors, classes_report, users_report, filepath, errorlines
@@ -886,32 +978,45 @@ class Command(AsyncCommand):
             per_line_errors += self.db_validate_list(db_update_classes)
 
             if not options["dryrun"]:
-                self.delete_users(users_to_delete)
-                # clear users from classes not included in the csv:
-                Membership.objects.filter(collection__in=classes_to_clear).delete()
-
-                # bulk_create and bulk_update are not possible with current Morango:
-                db_users = db_new_users + db_update_users
-                for user in db_users:
-                    user.save()
-                # assign roles to users:
-                users_data = {u.username: u for u in db_users}
-                self.add_roles(users_data, roles)
-
-                db_created_classes = []
-                for classroom in db_new_classes:
-                    created_class = Classroom.objects.create(
-                        name=classroom.name, parent=classroom.parent
-                    )
+                with transaction.atomic():
+                    self.delete_users(users_to_delete)
+                    # clear users from classes not included in the csv:
+                    Membership.objects.filter(collection__in=classes_to_clear).delete()
+
+                    self.bulk_create(FacilityUser, db_new_users)
+                    for user in db_update_users:
+                        user.save()
+                    users_data = {
+                        u.username: u
+                        for u in keeping_users + db_new_users
+                        if u.username in users
+                    }
 
-                    db_created_classes.append(created_class)
-                # hack to get ids created by Morango:
-                db_new_classes = db_created_classes
+                    db_created_classes = []
+                    for classroom in db_new_classes:
+                        created_class = Classroom.objects.create(
+                            name=classroom.name, parent=classroom.parent
+                        )
 
-                self.add_classes_memberships(
-                    classes, users_data, db_new_classes + db_update_classes
-                )
-                self.remove_memberships(keeping_users, classes[0], classes[1])
+                        db_created_classes.append(created_class)
+                    # hack to get ids created by Morango:
+                    db_new_classes = db_created_classes
+                    db_classes = db_new_classes + db_update_classes
+
+                    # assign roles to users:
+                    existing_roles = self.add_roles(
+                        users_data, roles, classes, db_classes
+                    )
+                    existing_memberships = self.add_classes_memberships(
+                        users_data, classes, db_classes
+                    )
+                    self.remove_memberships(
+                        keeping_users,
+                        classes,
+                        db_classes,
+                        existing_memberships,
+                        existing_roles,
+                    )
             classes_report = {
                 "created": len(db_new_classes),
                 "updated": len(db_update_classes),
@@ -1,13 +1,13 @@
 import logging
-from contextlib import contextmanager
 
 from django.core.management.base import CommandError
-from django.db import transaction
 
 from kolibri.core.auth.management.utils import confirm_or_exit
 from kolibri.core.auth.management.utils import get_facility
 from kolibri.core.auth.models import dataset_cache
 from kolibri.core.auth.utils.delete import clean_up_legacy_counters
+from kolibri.core.auth.utils.delete import DeletionCheckpoint
+from kolibri.core.auth.utils.delete import DeletionThrottle
 from kolibri.core.auth.utils.delete import DisablePostDeleteSignal
 from kolibri.core.auth.utils.delete import get_delete_group_for_facility
 from kolibri.core.tasks.management.commands.base import AsyncCommand
@@ -31,6 +31,27 @@ class Command(AsyncCommand):
             action="store_true",
             help="Enforce that deletion count matches expected count",
         )
+        parser.add_argument(
+            "--time-budget",
+            action="store",
+            type=float,
+            default=0.5,
+            dest="time_budget",
+            help="Target duration in seconds of each batch of deletions",
+        )
+        parser.add_argument(
+            "--sleep-ratio",
+            action="store",
+            type=float,
+            default=1.0,
+            dest="sleep_ratio",
+            help="Seconds to pause after each batch, per second spent deleting it",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the checkpoint left by a previously interrupted deletion",
+        )
         parser.add_argument("--noninteractive", action="store_true")
 
     def handle_async(self, *args, **options):
@@ -55,6 +76,18 @@ class Command(AsyncCommand):
             )
 
         delete_group = get_delete_group_for_facility(facility)
+        throttle = DeletionThrottle(
+            time_budget=options["time_budget"], sleep_ratio=options["sleep_ratio"]
+        )
+        checkpoint = DeletionCheckpoint(dataset_id)
+        if options["restart"]:
+            checkpoint.clear()
+        elif checkpoint.deleted:
+            logger.info(
+                "Resuming deletion, {} database records were already deleted".format(
+                    checkpoint.deleted
+                )
+            )
 
         logger.info(
             "Proceeding with facility deletion. Deleting all data for facility <{}>".format(
@@ -62,7 +95,7 @@ class Command(AsyncCommand):
             )
         )
 
-        with self._delete_context():
+        with DisablePostDeleteSignal():
             total_deleted = 0
 
             # run the counting step
@@ -70,17 +103,21 @@ class Command(AsyncCommand):
                 total=delete_group.group_count()
             ) as update_progress:
                 update_progress(increment=0, message="Counting database objects")
-                total_count = delete_group.count(update_progress)
+                total_count = delete_group.count(update_progress, checkpoint=checkpoint)
 
-            # no the deleting step
+            # no the deleting step, every batch is committed on its own so that
+            # the deletion can be resumed from the checkpoint if it is interrupted
             with self.start_progress(total=total_count) as update_progress:
                 update_progress(increment=0, message="Deleting database objects")
-                count, stats = delete_group.delete(update_progress)
+                count, stats = delete_group.delete(
+                    update_progress, throttle=throttle, checkpoint=checkpoint
+                )
                 total_deleted += count
                 # clear related cache
                 dataset_cache.clear()
 
             clean_up_legacy_counters()
+            checkpoint.clear()
 
             # if count doesn't match, something doesn't seem right
             if total_count != total_deleted:
@@ -93,8 +130,3 @@ class Command(AsyncCommand):
                     logger.warning(msg)
 
         logger.info("Deletion complete.")
-
-    @contextmanager
-    def _delete_context(self):
-        with DisablePostDeleteSignal(), transaction.atomic():
-            yield
@@ -1,6 +1,5 @@
 import getpass
 
-import requests
 from django.core.exceptions import ValidationError
 from django.core.management import call_command
 from django.core.management.base import CommandError
@@ -18,6 +17,7 @@ from kolibri.core.auth.models import FacilityUser
 from kolibri.core.device.models import DevicePermissions
 from kolibri.core.device.utils import device_provisioned
 from kolibri.core.device.utils import provision_device
+from kolibri.core.discovery.utils.network.client import PeerSession
 from kolibri.core.tasks.management.commands.base import AsyncCommand
 from kolibri.core.utils.urls import reverse_remote
 
@@ -35,7 +35,7 @@ class Command(AsyncCommand):
     def get_dataset_id(self, base_url, dataset_id):
         # get list of facilities and if more than 1, display all choices to user
         facility_url = reverse_remote(base_url, "kolibri:core:publicfacility-list")
-        facility_resp = requests.get(facility_url)
+        facility_resp = PeerSession.for_address(base_url).get(facility_url)
         facility_resp.raise_for_status()
         facilities = facility_resp.json()
         if len(facilities) > 1 and not dataset_id:
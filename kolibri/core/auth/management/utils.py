@@ -9,7 +9,6 @@ import sys
 from contextlib import contextmanager
 from functools import wraps
 
-import requests
 from django.core.management.base import CommandError
 from morango.models import Certificate
 from morango.models import InstanceIDModel
@@ -27,11 +26,14 @@ from kolibri.core.auth.models import Facility
 from kolibri.core.auth.models import FacilityUser
 from kolibri.core.auth.sync_event_hook_utils import post_sync_transfer_handler
 from kolibri.core.auth.sync_event_hook_utils import pre_sync_transfer_handler
+from kolibri.core.auth.sync_ingestion import connect_stage_timing_handlers
+from kolibri.core.auth.sync_ingestion import negotiate_chunk_size
 from kolibri.core.device.models import DevicePermissions
 from kolibri.core.device.utils import device_provisioned
 from kolibri.core.device.utils import provision_device
 from kolibri.core.device.utils import provision_single_user_device
 from kolibri.core.discovery.utils.network.client import NetworkClient
+from kolibri.core.discovery.utils.network.client import PeerSession
 from kolibri.core.discovery.utils.network.errors import NetworkLocationNotFound
 from kolibri.core.discovery.utils.network.errors import URLParseError
 from kolibri.core.tasks.exceptions import UserCancelledError
@@ -126,7 +128,7 @@ def get_facility(facility_id=None, noninteractive=False):
 def get_facility_dataset_id(baseurl, identifier=None, noninteractive=False):
     # get list of facilities and if more than 1, display all choices to user
     facility_url = reverse_remote(baseurl, "kolibri:core:publicfacility-list")
-    response = requests.get(facility_url)
+    response = PeerSession.for_address(baseurl).get(facility_url)
     response.raise_for_status()
     facilities = response.json()
     if not facilities:
@@ -406,6 +408,9 @@ class MorangoSyncCommand(AsyncCommand):
         custom_signals.initializing.started.connect(pre_sync_transfer_handler)
         custom_signals.cleanup.completed.connect(post_sync_transfer_handler)
 
+        connect_stage_timing_handlers(sync_session_client.controller.signals)
+        negotiate_chunk_size(sync_session_client.sync_connection)
+
         filter_scope, scope_params = get_sync_filter_scope(client_cert, user_id=user_id)
         dataset_id = scope_params.get("dataset_id")
         pull_filter = filter_scope.read_filter
@@ -9,6 +9,9 @@ from django.core.exceptions import ImproperlyConfigured
 from django.db.models.signals import post_save
 from django.utils.functional import SimpleLazyObject
 
+from kolibri.core.auth.sync_ingestion import get_sync_chunk_size
+from kolibri.core.auth.sync_ingestion import SYNC_CHUNK_SIZE_HEADER
+
 
 def get_anonymous_user_model():
     """
@@ -111,6 +114,27 @@ class XhrPreventLoginPromptMiddleware(object):
         return response
 
 
+class SyncChunkSizeMiddleware(object):
+    """
+    Advertises the chunk size this device prefers in the responses to the requests that transfer
+    sync data, so that sync clients can adapt their chunk size to the load of the device.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        resolver_match = getattr(request, "resolver_match", None)
+        if (
+            resolver_match is not None
+            and resolver_match.url_name == "buffers-list"
+            and response.status_code < 400
+        ):
+            response[SYNC_CHUNK_SIZE_HEADER] = str(get_sync_chunk_size())
+        return response
+
+
 SESSION_EXEMPT = "_session_exempt"
 
 
@@ -0,0 +1,372 @@
+"""
+Ingestion of the data pushed to this device by sync clients.
+
+When a client pushes data, the transfer chunks are only written into the morango buffers by the
+requests, while dequeuing the buffers into the store and deserializing the store into the app
+models is offloaded to the `process_sync_ingestion` task, which integrates all the transfer
+sessions waiting for it in large batches instead of one transfer session per request, and
+schedules itself again while any of them could not be integrated yet.
+
+The device also advertises to its sync clients the chunk size it prefers, which shrinks while
+there is a backlog of transfer sessions waiting for ingestion, and records the timing of every
+transfer stage of the sync sessions.
+"""
+import logging
+import operator
+import time
+from collections import defaultdict
+from functools import reduce
+
+from django.db.models import F
+from django.db.models import Min
+from django.db.utils import OperationalError
+from django.utils import timezone
+from morango.constants import transfer_stages
+from morango.constants import transfer_statuses
+from morango.constants.capabilities import FSIC_V2_FORMAT
+from morango.models.core import SyncSession
+from morango.models.core import TransferSession
+from morango.sync.operations import DBBackend
+
+from kolibri.core.auth.models import dataset_cache
+from kolibri.core.device.models import SyncIngestion
+from kolibri.core.utils.cache import process_cache
+from kolibri.core.utils.lock import db_lock_sqlite_only
+
+logger = logging.getLogger(__name__)
+
+try:
+    # morango has no public API to integrate several transfer sessions at once, so the ingestion
+    # relies on internals of the version of morango pinned in the requirements
+    from morango.sync.operations import _dequeue_into_store
+    from morango.sync.operations import _deserialize_from_store
+    from morango.sync.operations import _serialize_into_store
+
+    INGESTION_SUPPORTED = True
+except ImportError:
+    logger.error(
+        "Sync ingestion is disabled, as the installed version of morango does not provide the "
+        "operations it relies on. Install the version of morango pinned in the requirements."
+    )
+    INGESTION_SUPPORTED = False
+
+OFFLOADED_STAGES = (transfer_stages.DEQUEUING, transfer_stages.DESERIALIZING)
+
+# Number of transfer sessions integrated in a single transaction
+INGESTION_BATCH_SIZE = 50
+
+# Seconds after which the ingestion task runs again when a transfer session is still waiting
+INGESTION_POLL_INTERVAL = 0.2
+
+# Passes over the pending ingestion after which a transfer session that could still not be
+# integrated, e.g. because of recurring transaction isolation errors, is errored
+MAX_INGESTION_ATTEMPTS = 10
+
+# Upper bound in seconds of the exponential backoff between two passes
+MAX_INGESTION_RETRY_INTERVAL = 10
+
+SYNC_CHUNK_SIZE_HEADER = "X-Kolibri-Sync-Chunk-Size"
+
+SYNC_CHUNK_SIZE_CACHE_KEY = "SYNC_CHUNK_SIZE"
+
+SYNC_CHUNK_SIZE_CACHE_TIMEOUT = 5
+
+MAX_SYNC_CHUNK_SIZE = 500
+
+MIN_SYNC_CHUNK_SIZE = 50
+
+# The advertised chunk size is halved for every this many transfer sessions waiting for ingestion
+SYNC_CHUNK_SIZE_BACKLOG_STEP = 5
+
+STAGE_TIMINGS_CACHE_KEY = "SYNC_STAGE_TIMINGS_{}"
+
+STAGE_TIMINGS_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def get_pending_transfer_sessions(stage=None):
+    """
+    :param stage: An offloaded transfer stage, or None for all of them
+    :return: A queryset of the transfer sessions waiting for the ingestion task
+    """
+    queryset = TransferSession.objects.filter(
+        active=True,
+        push=True,
+        sync_session__is_server=True,
+        transfer_stage_status=transfer_statuses.STARTED,
+        syncingestion__isnull=False,
+    )
+    if stage is None:
+        return queryset.filter(transfer_stage__in=OFFLOADED_STAGES)
+    return queryset.filter(transfer_stage=stage)
+
+
+def get_sync_chunk_size():
+    """
+    :return: The number of records per chunk this device prefers to receive or send, which
+        decreases with the number of transfer sessions waiting for ingestion, so that every
+        request writes less while the ingestion task is catching up
+    """
+    chunk_size = process_cache.get(SYNC_CHUNK_SIZE_CACHE_KEY)
+    if chunk_size is None:
+        backlog = get_pending_transfer_sessions().count()
+        chunk_size = max(
+            MAX_SYNC_CHUNK_SIZE >> (backlog // SYNC_CHUNK_SIZE_BACKLOG_STEP),
+            MIN_SYNC_CHUNK_SIZE,
+        )
+        process_cache.set(
+            SYNC_CHUNK_SIZE_CACHE_KEY, chunk_size, SYNC_CHUNK_SIZE_CACHE_TIMEOUT
+        )
+    return chunk_size
+
+
+def negotiate_chunk_size(sync_connection):
+    """
+    Updates the chunk size of the connection with the chunk size advertised by the server in
+    every response, without exceeding the chunk size that was requested for the connection
+
+    :type sync_connection: morango.sync.syncsession.NetworkSyncConnection
+    """
+    max_chunk_size = sync_connection.chunk_size
+
+    def update_chunk_size(response, *args, **kwargs):
+        try:
+            chunk_size = int(response.headers[SYNC_CHUNK_SIZE_HEADER])
+        except (KeyError, ValueError):
+            return
+        sync_connection.chunk_size = max(min(chunk_size, max_chunk_size), 1)
+
+    sync_connection.session.hooks["response"].append(update_chunk_size)
+
+
+def hand_over_transfer_session(context):
+    """
+    Records the handover of the transfer session of the context to the sync ingestion task, along
+    with the format of the FSICs negotiated by the sync session
+
+    :type context: morango.sync.context.LocalSessionContext
+    """
+    SyncIngestion.objects.update_or_create(
+        transfer_session_id=context.transfer_session.id,
+        defaults=dict(fsic_v2_format=FSIC_V2_FORMAT in context.capabilities),
+    )
+
+
+def _finish_stage(transfer_session, stage_status):
+    # only update the transfer session if it has not been finished by another ingestion task,
+    # as saving a stale instance could move the transfer session back to a previous stage
+    now = timezone.now()
+    updated = TransferSession.objects.filter(
+        id=transfer_session.id,
+        transfer_stage=transfer_session.transfer_stage,
+        transfer_stage_status=transfer_statuses.STARTED,
+    ).update(transfer_stage_status=stage_status, last_activity_timestamp=now)
+    if updated:
+        SyncSession.objects.filter(id=transfer_session.sync_session_id).update(
+            last_activity_timestamp=now
+        )
+        # the attempts are counted again for the next stage
+        SyncIngestion.objects.filter(transfer_session_id=transfer_session.id).update(
+            attempts=0
+        )
+        record_stage_timing(transfer_session.id, transfer_session.transfer_stage)
+
+
+def _dequeue(transfer_session):
+    _dequeue_into_store(
+        transfer_session,
+        transfer_session.client_fsic,
+        v2_format=transfer_session.syncingestion.fsic_v2_format,
+    )
+
+
+def _dequeue_transfer_sessions(transfer_sessions):
+    try:
+        # on SQLite, the whole batch is written in a single transaction
+        with db_lock_sqlite_only():
+            for transfer_session in transfer_sessions:
+                _dequeue(transfer_session)
+    except Exception:
+        # dequeue the transfer sessions one by one, so that an error only fails its own sync
+        for transfer_session in transfer_sessions:
+            try:
+                with db_lock_sqlite_only():
+                    _dequeue(transfer_session)
+            except Exception as e:
+                logger.error(
+                    "Dequeuing transfer session {} failed".format(transfer_session.id),
+                    exc_info=e,
+                )
+                _finish_stage(transfer_session, transfer_statuses.ERRORED)
+            else:
+                _finish_stage(transfer_session, transfer_statuses.COMPLETED)
+    else:
+        for transfer_session in transfer_sessions:
+            _finish_stage(transfer_session, transfer_statuses.COMPLETED)
+
+
+def _deserialize_transfer_sessions(transfer_sessions):
+    transfer_sessions_by_profile = defaultdict(list)
+    for transfer_session in transfer_sessions:
+        transfer_sessions_by_profile[transfer_session.sync_session.profile].append(
+            transfer_session
+        )
+
+    for profile, profile_transfer_sessions in transfer_sessions_by_profile.items():
+        # deserialize the data of all the transfer sessions of the profile in a single pass
+        sync_filter = reduce(
+            operator.add, (ts.get_filter() for ts in profile_transfer_sessions)
+        )
+        try:
+            with db_lock_sqlite_only():
+                # we first serialize to avoid deserialization merge conflicts
+                _serialize_into_store(profile, filter=sync_filter)
+                _deserialize_from_store(profile, filter=sync_filter)
+        except Exception as e:
+            # transaction isolation errors are retried on the next pass of the task
+            if isinstance(
+                e, OperationalError
+            ) and DBBackend._is_transaction_isolation_error(e):
+                continue
+            logger.error(
+                "Deserializing transfer sessions {} failed".format(
+                    ", ".join(str(ts.id) for ts in profile_transfer_sessions)
+                ),
+                exc_info=e,
+            )
+            stage_status = transfer_statuses.ERRORED
+        else:
+            stage_status = transfer_statuses.COMPLETED
+        for transfer_session in profile_transfer_sessions:
+            _finish_stage(transfer_session, stage_status)
+
+
+def process_pending_ingestion():
+    """
+    Integrates the data of all the transfer sessions waiting for ingestion, in batches.
+    Integrating the data of a transfer session more than once is harmless, as its buffers are
+    emptied by dequeuing and its store records are clean after deserialization.
+
+    :return: The IDs of the transfer sessions that were processed
+    """
+    transfer_session_ids = []
+    dataset_cache.clear()
+    dataset_cache.activate()
+    try:
+        for stage, process in (
+            (transfer_stages.DEQUEUING, _dequeue_transfer_sessions),
+            (transfer_stages.DESERIALIZING, _deserialize_transfer_sessions),
+        ):
+            transfer_sessions = list(
+                get_pending_transfer_sessions(stage)
+                .select_related("sync_session", "syncingestion")
+                .order_by("last_activity_timestamp")
+            )
+            for i in range(0, len(transfer_sessions), INGESTION_BATCH_SIZE):
+                process(transfer_sessions[i : i + INGESTION_BATCH_SIZE])
+            transfer_session_ids.extend(ts.id for ts in transfer_sessions)
+    finally:
+        dataset_cache.deactivate()
+    return transfer_session_ids
+
+
+def ingest_pending_transfer_sessions():
+    """
+    Processes all the pending ingestion once, and errors the transfer sessions that could still
+    not be integrated after `MAX_INGESTION_ATTEMPTS` passes.
+
+    :return: The seconds after which the pending ingestion should be processed again, backing off
+        exponentially with the passes the transfer sessions have waited for, or None when no
+        transfer session is waiting for ingestion anymore
+    """
+    transfer_session_ids = process_pending_ingestion()
+    # the transfer sessions processed by this pass that are still waiting could not be integrated
+    SyncIngestion.objects.filter(
+        transfer_session__in=get_pending_transfer_sessions().filter(
+            id__in=transfer_session_ids
+        )
+    ).update(attempts=F("attempts") + 1)
+    for transfer_session in get_pending_transfer_sessions().filter(
+        syncingestion__attempts__gte=MAX_INGESTION_ATTEMPTS
+    ):
+        logger.error(
+            "Transfer session {} could not be ingested after {} attempts".format(
+                transfer_session.id, MAX_INGESTION_ATTEMPTS
+            )
+        )
+        _finish_stage(transfer_session, transfer_statuses.ERRORED)
+    attempts = get_pending_transfer_sessions().aggregate(
+        attempts=Min("syncingestion__attempts")
+    )["attempts"]
+    if attempts is None:
+        return None
+    return min(INGESTION_POLL_INTERVAL * 2 ** attempts, MAX_INGESTION_RETRY_INTERVAL)
+
+
+def get_stage_timings(transfer_session_id):
+    """
+    :return: A dict of the started and completed timestamps of each stage of the transfer session
+    """
+    return process_cache.get(STAGE_TIMINGS_CACHE_KEY.format(transfer_session_id), {})
+
+
+def record_stage_timing(transfer_session_id, stage, started=False):
+    cache_key = STAGE_TIMINGS_CACHE_KEY.format(transfer_session_id)
+    timings = process_cache.get(cache_key, {})
+    stage_timing = timings.setdefault(stage, {})
+    stage_timing["started" if started else "completed"] = time.time()
+    process_cache.set(cache_key, timings, STAGE_TIMINGS_CACHE_TIMEOUT)
+
+
+def stage_started_handler(context=None, **kwargs):
+    """
+    Attaches to the `started` signals of the session controller's stages
+    """
+    if context is not None and context.transfer_session is not None:
+        record_stage_timing(context.transfer_session.id, context.stage, started=True)
+
+
+def stage_completed_handler(context=None, **kwargs):
+    """
+    Attaches to the `completed` signals of the session controller's stages
+    """
+    if context is not None and context.transfer_session is not None:
+        record_stage_timing(context.transfer_session.id, context.stage)
+
+
+def log_stage_timings(context=None, **kwargs):
+    """
+    Attaches to the `completed` signal of the cleanup stage to report how long each stage took
+    """
+    if context is None or context.transfer_session is None:
+        return
+    transfer_session = context.transfer_session
+    timings = get_stage_timings(transfer_session.id)
+    durations = []
+    for stage in sorted(timings, key=transfer_stages.precedence):
+        stage_timing = timings[stage]
+        if "started" in stage_timing and "completed" in stage_timing:
+            durations.append(
+                "{}={:.2f}s".format(
+                    stage, stage_timing["completed"] - stage_timing["started"]
+                )
+            )
+    logger.info(
+        "Sync session {} {} transfer session {} stage timings: {}".format(
+            transfer_session.sync_session_id,
+            "push" if transfer_session.push else "pull",
+            transfer_session.id,
+            ", ".join(durations) or "none",
+        )
+    )
+    process_cache.delete(STAGE_TIMINGS_CACHE_KEY.format(transfer_session.id))
+
+
+def connect_stage_timing_handlers(signals):
+    """
+    :type signals: morango.sync.controller.SessionControllerSignals
+    """
+    for stage in transfer_stages.ALL:
+        signal_group = getattr(signals, stage)
+        signal_group.started.connect(stage_started_handler)
+        signal_group.completed.connect(stage_completed_handler)
+    signals.cleanup.completed.connect(log_stage_timings)
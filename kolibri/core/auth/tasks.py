@@ -2,6 +2,7 @@ import logging
 import ntpath
 import os
 import shutil
+from datetime import timedelta
 
 from django.conf import settings
 from django.core.management import call_command
@@ -17,6 +18,7 @@ from kolibri.core.auth.constants.user_kinds import ASSIGNABLE_COACH
 from kolibri.core.auth.constants.user_kinds import COACH
 from kolibri.core.auth.constants.user_kinds import SUPERUSER
 from kolibri.core.auth.models import Facility
+from kolibri.core.auth.sync_ingestion import ingest_pending_transfer_sessions
 from kolibri.core.auth.utils.sync import find_soud_sync_sessions
 from kolibri.core.auth.utils.sync import validate_and_create_sync_credentials
 from kolibri.core.auth.utils.users import get_remote_users_info
@@ -471,6 +473,42 @@ def enqueue_soud_sync_processing():
         logger.info("Skipping enqueue of SoUD sync processing: already running")
 
 
+sync_ingestion_queue = "sync_ingestion"
+
+SYNC_INGESTION_JOB_ID = "sync_ingestion"
+
+
+@register_task(
+    job_id=SYNC_INGESTION_JOB_ID,
+    queue=sync_ingestion_queue,
+    priority=Priority.HIGH,
+    status_fn=status_fn,
+)
+def process_sync_ingestion():
+    """
+    Integrates the data pushed to this device by clients, for all the transfer sessions waiting
+    for ingestion, and runs again after a backoff while any of them could not be integrated yet
+    """
+    retry_interval = ingest_pending_transfer_sessions()
+    if retry_interval is not None:
+        get_current_job().retry_in(timedelta(seconds=retry_interval))
+
+
+def enqueue_sync_ingestion():
+    """
+    Enqueues the sync ingestion task, unless it is already enqueued, as the controller hands the
+    stage over again every time the client polls it. A running task is not replaced, and runs
+    again by itself while transfer sessions are waiting for ingestion.
+    """
+    try:
+        if job_storage.get_orm_job(SYNC_INGESTION_JOB_ID).state == State.QUEUED:
+            logger.debug("Skipping enqueue of sync ingestion: already queued")
+            return
+    except JobNotFound:
+        pass
+    process_sync_ingestion.enqueue()
+
+
 @register_task(
     queue=soud_sync_queue,
 )
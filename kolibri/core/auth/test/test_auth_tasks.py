@@ -24,15 +24,19 @@ from kolibri.core.auth.models import FacilityUser
 from kolibri.core.auth.tasks import cleanupsync
 from kolibri.core.auth.tasks import CleanUpSyncsValidator
 from kolibri.core.auth.tasks import enqueue_soud_sync_processing
+from kolibri.core.auth.tasks import enqueue_sync_ingestion
 from kolibri.core.auth.tasks import PeerFacilityImportJobValidator
 from kolibri.core.auth.tasks import PeerFacilitySyncJobValidator
+from kolibri.core.auth.tasks import process_sync_ingestion
 from kolibri.core.auth.tasks import soud_sync_processing
+from kolibri.core.auth.tasks import SYNC_INGESTION_JOB_ID
 from kolibri.core.auth.tasks import SyncJobValidator
 from kolibri.core.device.models import DevicePermissions
 from kolibri.core.device.models import DeviceSettings
 from kolibri.core.discovery.models import NetworkLocation
 from kolibri.core.discovery.utils.network.errors import NetworkLocationNotFound
 from kolibri.core.discovery.utils.network.errors import ResourceGoneError
+from kolibri.core.tasks.exceptions import JobNotFound
 from kolibri.core.tasks.exceptions import JobRunning
 from kolibri.core.tasks.job import Job
 from kolibri.core.tasks.job import State
@@ -798,6 +802,47 @@ class SoudTasksTestCase(TestCase):
         mock_job.retry_in.assert_not_called()
 
 
+class SyncIngestionTasksTestCase(TestCase):
+    @patch("kolibri.core.auth.tasks.job_storage")
+    @patch("kolibri.core.auth.tasks.process_sync_ingestion")
+    def test_enqueue_sync_ingestion(self, mock_task, mock_job_storage):
+        mock_job_storage.get_orm_job.side_effect = JobNotFound()
+        enqueue_sync_ingestion()
+        mock_job_storage.get_orm_job.assert_called_once_with(SYNC_INGESTION_JOB_ID)
+        mock_task.enqueue.assert_called_once_with()
+
+    @patch("kolibri.core.auth.tasks.job_storage")
+    @patch("kolibri.core.auth.tasks.process_sync_ingestion")
+    def test_enqueue_sync_ingestion__queued(self, mock_task, mock_job_storage):
+        mock_job_storage.get_orm_job.return_value.state = State.QUEUED
+        enqueue_sync_ingestion()
+        mock_task.enqueue.assert_not_called()
+
+    @patch("kolibri.core.auth.tasks.job_storage")
+    @patch("kolibri.core.auth.tasks.process_sync_ingestion")
+    def test_enqueue_sync_ingestion__completed(self, mock_task, mock_job_storage):
+        mock_job_storage.get_orm_job.return_value.state = State.COMPLETED
+        enqueue_sync_ingestion()
+        mock_task.enqueue.assert_called_once()
+
+    @patch("kolibri.core.auth.tasks.get_current_job")
+    @patch("kolibri.core.auth.tasks.ingest_pending_transfer_sessions")
+    def test_process_sync_ingestion(self, mock_ingest, mock_get_job):
+        mock_ingest.return_value = None
+        process_sync_ingestion()
+        mock_ingest.assert_called_once()
+        mock_get_job.return_value.retry_in.assert_not_called()
+
+    @patch("kolibri.core.auth.tasks.get_current_job")
+    @patch("kolibri.core.auth.tasks.ingest_pending_transfer_sessions")
+    def test_process_sync_ingestion__pending(self, mock_ingest, mock_get_job):
+        mock_ingest.return_value = 0.4
+        process_sync_ingestion()
+        mock_get_job.return_value.retry_in.assert_called_once_with(
+            datetime.timedelta(seconds=0.4)
+        )
+
+
 class CleanUpSyncsTaskValidatorTestCase(TestCase):
     def setUp(self):
         self.kwargs = dict(
@@ -139,3 +139,14 @@ class UserExportTestCase(TestCase):
                 assert row[self.b.labels["kind"]] == "FACILITY_COACH"
             elif row[self.b.labels["username"]] in assignable_coaches:
                 assert row[self.b.labels["kind"]] == "CLASS_COACH"
+
+    def test_chunked_export(self):
+        rows = {
+            user["id"]: user
+            for users in self.b.user_chunks_generator(self.facility, chunk_size=3)
+            for user in users
+        }
+        for row in self.csv_rows:
+            assert rows[row["id"]]["kind"] == row["kind"]
+            assert rows[row["id"]]["enrolled"] == row["enrolled"]
+            assert rows[row["id"]]["assigned"] == row["assigned"]
@@ -4,6 +4,7 @@ from io import StringIO
 from uuid import uuid4
 
 import pytest
+from django.contrib.auth.hashers import check_password
 from django.core.management import call_command
 from django.test import override_settings
 from django.test import TestCase
@@ -15,6 +16,9 @@ from kolibri.core.auth.constants import demographics
 from kolibri.core.auth.constants import role_kinds
 from kolibri.core.auth.models import Classroom
 from kolibri.core.auth.models import FacilityUser
+from kolibri.core.auth.models import Membership
+from kolibri.core.auth.models import Role
+from kolibri.core.auth.utils.passwords import hash_passwords
 from kolibri.core.utils.csv import open_csv_for_reading
 from kolibri.core.utils.csv import open_csv_for_writing
 
@@ -511,3 +515,77 @@ class ImportTestCase(TestCase):
         result = out_log.getvalue().strip().split("\n")
 
         assert len(result) == number_of_rows
+
+    def test_update_memberships_and_roles(self):
+        _, first_filepath = tempfile.mkstemp(suffix=".csv")
+        rows = [
+            [
+                None,
+                "new_learner",
+                "passwd1",
+                None,
+                "LEARNER",
+                None,
+                "2001",
+                "FEMALE",
+                "class_a",
+                None,
+            ],
+            [
+                None,
+                "new_coach",
+                "passwd2",
+                None,
+                "CLASS_COACH",
+                None,
+                "1969",
+                "MALE",
+                None,
+                "class_a,class_b",
+            ],
+        ]
+        self.create_csv(first_filepath, rows)
+        call_command("bulkimportusers", first_filepath, facility=self.facility.id)
+        learner = FacilityUser.objects.get(username="new_learner")
+        coach = FacilityUser.objects.get(username="new_coach")
+        class_a = Classroom.objects.get(name="class_a")
+        class_b = Classroom.objects.get(name="class_b")
+        assert learner.is_member_of(class_a)
+        assert learner.check_password("passwd1")
+        assert coach.has_role_for_collection(role_kinds.COACH, class_b)
+        assert Role.objects.filter(
+            user=coach, collection=self.facility, kind=role_kinds.ASSIGNABLE_COACH
+        ).exists()
+        # records created in bulk must still be picked up by morango
+        assert all(
+            m._morango_dirty_bit and m._morango_partition
+            for m in Membership.objects.filter(user=learner)
+        )
+
+        # move the learner and the coach to the other class:
+        rows[0][0] = learner.id
+        rows[0][2] = "*"
+        rows[0][8] = "class_b"
+        rows[1][0] = coach.id
+        rows[1][2] = "*"
+        rows[1][9] = "class_b"
+        _, second_filepath = tempfile.mkstemp(suffix=".csv")
+        self.create_csv(second_filepath, rows)
+        call_command("bulkimportusers", second_filepath, facility=self.facility.id)
+        assert not learner.is_member_of(class_a)
+        assert learner.is_member_of(class_b)
+        assert not coach.has_role_for_collection(role_kinds.COACH, class_a)
+        assert coach.has_role_for_collection(role_kinds.COACH, class_b)
+        assert FacilityUser.objects.get(id=learner.id).check_password("passwd1")
+
+
+def test_hash_passwords():
+    hashes = hash_passwords(["passwd{}".format(i) for i in range(60)], workers=2)
+    assert len(hashes) == 60
+    assert all(check_password("passwd{}".format(i), h) for i, h in enumerate(hashes))
+
+
+def test_hash_passwords_with_custom_iterations():
+    hashes = hash_passwords(["passwd"], iterations=1000)
+    assert "$1000$" in hashes[0]
+    assert check_password("passwd", hashes[0])
@@ -2,11 +2,15 @@ import uuid
 
 import mock
 from django.test import TestCase
+from morango.constants import transfer_stages
+from morango.constants import transfer_statuses
+from morango.constants.capabilities import ASYNC_OPERATIONS
 from morango.sync.context import LocalSessionContext
 
 from .helpers import provision_device
 from kolibri.core.auth.kolibri_plugin import AuthSyncHook
 from kolibri.core.auth.kolibri_plugin import CleanUpTaskOperation
+from kolibri.core.auth.kolibri_plugin import IngestionOffloadOperation
 
 
 @mock.patch("kolibri.core.auth.kolibri_plugin.cleanupsync")
@@ -61,7 +65,63 @@ class CleanUpTaskOperationTestCase(TestCase):
         )
 
 
+@mock.patch("kolibri.core.auth.kolibri_plugin.hand_over_transfer_session")
+@mock.patch("kolibri.core.auth.kolibri_plugin.enqueue_sync_ingestion")
+class IngestionOffloadOperationTestCase(TestCase):
+    def setUp(self):
+        self.context = mock.MagicMock(
+            spec=LocalSessionContext(),
+            is_server=True,
+            is_push=True,
+            stage=transfer_stages.DEQUEUING,
+            capabilities={ASYNC_OPERATIONS},
+            transfer_session=mock.MagicMock(
+                id=uuid.uuid4().hex,
+                records_transferred=10,
+            ),
+        )
+        self.operation = IngestionOffloadOperation()
+
+    def test_handle(self, mock_enqueue, mock_hand_over):
+        result = self.operation.handle(self.context)
+        self.assertEqual(result, transfer_statuses.STARTED)
+        mock_hand_over.assert_called_once_with(self.context)
+        mock_enqueue.assert_called_once_with()
+
+    def test_handle__not_supported(self, mock_enqueue, mock_hand_over):
+        with mock.patch("kolibri.core.auth.kolibri_plugin.INGESTION_SUPPORTED", False):
+            self.assertFalse(self.operation.handle(self.context))
+        mock_enqueue.assert_not_called()
+
+    def test_handle__not_server(self, mock_enqueue, mock_hand_over):
+        self.context.is_server = False
+        self.assertFalse(self.operation.handle(self.context))
+        mock_enqueue.assert_not_called()
+
+    def test_handle__pull(self, mock_enqueue, mock_hand_over):
+        self.context.is_push = False
+        self.assertFalse(self.operation.handle(self.context))
+        mock_enqueue.assert_not_called()
+
+    def test_handle__no_async_operations(self, mock_enqueue, mock_hand_over):
+        self.context.capabilities = set()
+        self.assertFalse(self.operation.handle(self.context))
+        mock_enqueue.assert_not_called()
+
+    def test_handle__no_records(self, mock_enqueue, mock_hand_over):
+        self.context.transfer_session.records_transferred = 0
+        self.assertFalse(self.operation.handle(self.context))
+        mock_enqueue.assert_not_called()
+
+
 class AuthSyncHookTestCase(TestCase):
     def test_cleanup_operations(self):
         operation = AuthSyncHook().cleanup_operations[0]
         self.assertIsInstance(operation, CleanUpTaskOperation)
+
+    def test_ingestion_operations(self):
+        hook = AuthSyncHook()
+        self.assertIsInstance(hook.dequeuing_operations[0], IngestionOffloadOperation)
+        self.assertIsInstance(
+            hook.deserializing_operations[0], IngestionOffloadOperation
+        )
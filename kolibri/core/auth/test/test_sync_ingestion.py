@@ -0,0 +1,225 @@
+from uuid import uuid4
+
+import mock
+import requests
+from django.test import TestCase
+from django.utils import timezone
+from morango.constants import transfer_stages
+from morango.constants import transfer_statuses
+from morango.constants.capabilities import FSIC_V2_FORMAT
+from morango.models.core import SyncSession
+from morango.models.core import TransferSession
+
+from kolibri.core.auth.constants.morango_sync import PROFILE_FACILITY_DATA
+from kolibri.core.auth.sync_ingestion import get_stage_timings
+from kolibri.core.auth.sync_ingestion import get_sync_chunk_size
+from kolibri.core.auth.sync_ingestion import hand_over_transfer_session
+from kolibri.core.auth.sync_ingestion import ingest_pending_transfer_sessions
+from kolibri.core.auth.sync_ingestion import INGESTION_POLL_INTERVAL
+from kolibri.core.auth.sync_ingestion import MAX_INGESTION_ATTEMPTS
+from kolibri.core.auth.sync_ingestion import MAX_SYNC_CHUNK_SIZE
+from kolibri.core.auth.sync_ingestion import MIN_SYNC_CHUNK_SIZE
+from kolibri.core.auth.sync_ingestion import negotiate_chunk_size
+from kolibri.core.auth.sync_ingestion import process_pending_ingestion
+from kolibri.core.auth.sync_ingestion import SYNC_CHUNK_SIZE_HEADER
+from kolibri.core.auth.test.helpers import clear_process_cache
+from kolibri.core.device.models import SyncIngestion
+
+
+class SyncIngestionTestCase(TestCase):
+    def setUp(self):
+        clear_process_cache()
+
+    def _create_transfer_session(
+        self,
+        stage=transfer_stages.DEQUEUING,
+        status=transfer_statuses.STARTED,
+        fsic_v2_format=True,
+        handed_over=True,
+    ):
+        sync_session = SyncSession.objects.create(
+            id=uuid4().hex,
+            active=True,
+            is_server=True,
+            client_instance_id=uuid4().hex,
+            server_instance_id=uuid4().hex,
+            last_activity_timestamp=timezone.now(),
+            profile=PROFILE_FACILITY_DATA,
+        )
+        transfer_session = TransferSession.objects.create(
+            id=uuid4().hex,
+            active=True,
+            sync_session=sync_session,
+            push=True,
+            filter=uuid4().hex,
+            client_fsic="{}",
+            records_transferred=1,
+            transfer_stage=stage,
+            transfer_stage_status=status,
+            last_activity_timestamp=timezone.now(),
+        )
+        if handed_over:
+            SyncIngestion.objects.create(
+                transfer_session=transfer_session, fsic_v2_format=fsic_v2_format
+            )
+        return transfer_session
+
+    @mock.patch("kolibri.core.auth.sync_ingestion._deserialize_from_store")
+    @mock.patch("kolibri.core.auth.sync_ingestion._serialize_into_store")
+    @mock.patch("kolibri.core.auth.sync_ingestion._dequeue_into_store")
+    def test_process_pending_ingestion(
+        self, mock_dequeue, mock_serialize, mock_deserialize
+    ):
+        dequeuing = [self._create_transfer_session() for _ in range(2)]
+        deserializing = [
+            self._create_transfer_session(stage=transfer_stages.DESERIALIZING)
+            for _ in range(2)
+        ]
+        pending = self._create_transfer_session(status=transfer_statuses.PENDING)
+        # started by morango's own operations, as it was not handed over
+        inline = self._create_transfer_session(handed_over=False)
+
+        process_pending_ingestion()
+
+        self.assertEqual(mock_dequeue.call_count, 2)
+        self.assertTrue(mock_dequeue.call_args[1]["v2_format"])
+        # the deserializing transfer sessions are deserialized in a single pass
+        mock_serialize.assert_called_once()
+        mock_deserialize.assert_called_once()
+        sync_filter = mock_deserialize.call_args[1]["filter"]
+        for transfer_session in deserializing:
+            self.assertIn(transfer_session.filter, sync_filter)
+
+        for transfer_session in dequeuing + deserializing:
+            transfer_session.refresh_from_db()
+            self.assertEqual(
+                transfer_session.transfer_stage_status, transfer_statuses.COMPLETED
+            )
+            self.assertIn(
+                "completed",
+                get_stage_timings(transfer_session.id)[transfer_session.transfer_stage],
+            )
+        pending.refresh_from_db()
+        self.assertEqual(pending.transfer_stage_status, transfer_statuses.PENDING)
+        inline.refresh_from_db()
+        self.assertEqual(inline.transfer_stage_status, transfer_statuses.STARTED)
+
+    @mock.patch("kolibri.core.auth.sync_ingestion._dequeue_into_store")
+    def test_process_pending_ingestion__fsic_v1_format(self, mock_dequeue):
+        self._create_transfer_session(fsic_v2_format=False)
+        process_pending_ingestion()
+        self.assertFalse(mock_dequeue.call_args[1]["v2_format"])
+
+    @mock.patch("kolibri.core.auth.sync_ingestion._dequeue_into_store")
+    def test_process_pending_ingestion__error(self, mock_dequeue):
+        failing = self._create_transfer_session()
+        succeeding = self._create_transfer_session()
+
+        def dequeue(transfer_session, *args, **kwargs):
+            if transfer_session.id == failing.id:
+                raise ValueError()
+
+        mock_dequeue.side_effect = dequeue
+        process_pending_ingestion()
+
+        failing.refresh_from_db()
+        succeeding.refresh_from_db()
+        self.assertEqual(failing.transfer_stage_status, transfer_statuses.ERRORED)
+        self.assertEqual(succeeding.transfer_stage_status, transfer_statuses.COMPLETED)
+
+    @mock.patch("kolibri.core.auth.sync_ingestion._dequeue_into_store")
+    def test_process_pending_ingestion__stage_moved_on(self, mock_dequeue):
+        transfer_session = self._create_transfer_session()
+
+        def dequeue(*args, **kwargs):
+            # another ingestion task finished the stage and the client moved on
+            TransferSession.objects.filter(id=transfer_session.id).update(
+                transfer_stage=transfer_stages.DESERIALIZING,
+                transfer_stage_status=transfer_statuses.PENDING,
+            )
+
+        mock_dequeue.side_effect = dequeue
+        process_pending_ingestion()
+
+        transfer_session.refresh_from_db()
+        self.assertEqual(transfer_session.transfer_stage, transfer_stages.DESERIALIZING)
+        self.assertEqual(
+            transfer_session.transfer_stage_status, transfer_statuses.PENDING
+        )
+
+    @mock.patch("kolibri.core.auth.sync_ingestion._dequeue_into_store")
+    def test_ingest_pending_transfer_sessions(self, mock_dequeue):
+        transfer_session = self._create_transfer_session()
+        self.assertIsNone(ingest_pending_transfer_sessions())
+        mock_dequeue.assert_called_once()
+        transfer_session.refresh_from_db()
+        self.assertEqual(
+            transfer_session.transfer_stage_status, transfer_statuses.COMPLETED
+        )
+        self.assertEqual(transfer_session.syncingestion.attempts, 0)
+
+    @mock.patch("kolibri.core.auth.sync_ingestion.process_pending_ingestion")
+    def test_ingest_pending_transfer_sessions__not_processed(self, mock_process):
+        # handed over after the pass queried the pending transfer sessions
+        transfer_session = self._create_transfer_session()
+        mock_process.return_value = []
+        self.assertEqual(ingest_pending_transfer_sessions(), INGESTION_POLL_INTERVAL)
+        self.assertEqual(
+            SyncIngestion.objects.get(transfer_session=transfer_session).attempts, 0
+        )
+
+    @mock.patch("kolibri.core.auth.sync_ingestion.process_pending_ingestion")
+    def test_ingest_pending_transfer_sessions__max_attempts(self, mock_process):
+        # e.g. every pass fails with a transaction isolation error
+        transfer_session = self._create_transfer_session(
+            stage=transfer_stages.DESERIALIZING
+        )
+        mock_process.return_value = [transfer_session.id]
+        intervals = [
+            ingest_pending_transfer_sessions()
+            for _ in range(MAX_INGESTION_ATTEMPTS - 1)
+        ]
+        # the passes back off exponentially
+        self.assertEqual(intervals, sorted(intervals))
+        self.assertLess(intervals[0], intervals[-1])
+        self.assertIsNone(ingest_pending_transfer_sessions())
+        transfer_session.refresh_from_db()
+        self.assertEqual(
+            transfer_session.transfer_stage_status, transfer_statuses.ERRORED
+        )
+
+    def test_hand_over_transfer_session(self):
+        transfer_session = self._create_transfer_session(handed_over=False)
+        context = mock.Mock(
+            transfer_session=transfer_session, capabilities={FSIC_V2_FORMAT}
+        )
+        hand_over_transfer_session(context)
+        self.assertTrue(transfer_session.syncingestion.fsic_v2_format)
+
+        context.capabilities = set()
+        hand_over_transfer_session(context)
+        self.assertFalse(
+            SyncIngestion.objects.get(transfer_session=transfer_session).fsic_v2_format
+        )
+
+    def test_get_sync_chunk_size(self):
+        self.assertEqual(get_sync_chunk_size(), MAX_SYNC_CHUNK_SIZE)
+        for _ in range(100):
+            self._create_transfer_session()
+        # the chunk size is cached for a few seconds
+        self.assertEqual(get_sync_chunk_size(), MAX_SYNC_CHUNK_SIZE)
+        clear_process_cache()
+        self.assertEqual(get_sync_chunk_size(), MIN_SYNC_CHUNK_SIZE)
+
+    def test_negotiate_chunk_size(self):
+        sync_connection = mock.Mock(chunk_size=200, session=requests.Session())
+        negotiate_chunk_size(sync_connection)
+        (hook,) = sync_connection.session.hooks["response"]
+
+        hook(mock.Mock(headers={SYNC_CHUNK_SIZE_HEADER: "100"}))
+        self.assertEqual(sync_connection.chunk_size, 100)
+        # the server can not raise the chunk size over the requested chunk size
+        hook(mock.Mock(headers={SYNC_CHUNK_SIZE_HEADER: "500"}))
+        self.assertEqual(sync_connection.chunk_size, 200)
+        hook(mock.Mock(headers={}))
+        self.assertEqual(sync_connection.chunk_size, 200)
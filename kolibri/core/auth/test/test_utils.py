@@ -4,6 +4,7 @@ import uuid
 
 import factory
 import mock
+from django.core.management import call_command
 from django.core.management.base import CommandError
 from django.test import TestCase
 from morango.registry import syncable_models
@@ -22,6 +23,9 @@ from kolibri.core.auth.test.test_api import ClassroomFactory
 from kolibri.core.auth.test.test_api import FacilityFactory
 from kolibri.core.auth.test.test_api import FacilityUserFactory
 from kolibri.core.auth.test.test_api import LearnerGroupFactory
+from kolibri.core.auth.utils.delete import delete_in_batches
+from kolibri.core.auth.utils.delete import DeletionCheckpoint
+from kolibri.core.auth.utils.delete import DeletionThrottle
 from kolibri.core.auth.utils.delete import get_delete_group_for_facility
 from kolibri.core.auth.utils.migrate import fork_facility
 from kolibri.core.auth.utils.migrate import merge_users
@@ -495,6 +499,56 @@ class MergeUsersTestCase(TestCase):
             )
 
 
+class BatchedMergeUsersTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.facility = FacilityFactory.create()
+        cls.user_1 = FacilityUserFactory.create(facility=cls.facility)
+        cls.user_2 = FacilityUserFactory.create(facility=cls.facility)
+        for _ in range(5):
+            summarylog = ContentSummaryLogFactory.create(user=cls.user_1)
+            sessionlog = ContentSessionLogFactory.create(user=cls.user_1)
+            masterylog = MasteryLogFactory.create(
+                user=cls.user_1, summarylog=summarylog
+            )
+            AttemptLogFactory.create(
+                user=cls.user_1, masterylog=masterylog, sessionlog=sessionlog
+            )
+
+    @mock.patch("kolibri.core.auth.utils.migrate.MERGE_BATCH_SIZE", 2)
+    def test_merge_in_batches(self):
+        progress_callback = mock.Mock()
+        merge_users(self.user_1, self.user_2, progress_callback=progress_callback)
+
+        # 3 batches for each of the 4 log models that the user has
+        self.assertEqual(progress_callback.call_count, 12)
+        progress_callback.assert_called_with(20, 20)
+        for Model in (
+            log_models.ContentSummaryLog,
+            log_models.ContentSessionLog,
+            log_models.MasteryLog,
+            log_models.AttemptLog,
+        ):
+            self.assertEqual(Model.objects.filter(user=self.user_2).count(), 5)
+        self.assertFalse(
+            log_models.AttemptLog.objects.filter(user=self.user_2)
+            .exclude(masterylog__user=self.user_2)
+            .exists()
+        )
+
+    @mock.patch("kolibri.core.auth.utils.migrate.MERGE_BATCH_SIZE", 2)
+    def test_merge_only_missing_logs(self):
+        merge_users(self.user_1, self.user_2)
+        ContentSessionLogFactory.create(user=self.user_1)
+        with mock.patch(
+            "kolibri.core.auth.utils.migrate._batch_save"
+        ) as mock_batch_save:
+            merge_users(self.user_1, self.user_2)
+        saved = [log for call in mock_batch_save.call_args_list for log in call[0][1]]
+        self.assertEqual(len(saved), 1)
+        self.assertIsInstance(saved[0], log_models.ContentSessionLog)
+
+
 class AdHocGroupFactory(factory.DjangoModelFactory):
     class Meta:
         model = AdHocGroup
@@ -675,6 +729,68 @@ class TestDeleteFacilityDeletesAllFacilityModels(TestCase):
         self.assertTrue(all_deleted_models.issuperset(all_facility_models))
 
 
+class BatchedDeleteFacilityTestCase(TestCase):
+    def setUp(self):
+        self.facility = FacilityFactory.create()
+        self.other_facility = FacilityFactory.create()
+        classroom = ClassroomFactory.create(parent=self.facility)
+        for _ in range(10):
+            user = FacilityUserFactory.create(facility=self.facility)
+            classroom.add_member(user)
+        FacilityUserFactory.create(facility=self.other_facility)
+
+    def test_delete_in_batches(self):
+        throttle = DeletionThrottle(sleep_ratio=0, min_batch_size=3)
+        queryset = FacilityUser.objects.filter(facility=self.facility)
+        batches = list(delete_in_batches(queryset, throttle))
+        self.assertGreater(len(batches), 1)
+        self.assertEqual(sum(count for count, _ in batches), 20)
+        self.assertFalse(queryset.exists())
+        self.assertEqual(FacilityUser.objects.count(), 1)
+
+    def test_throttle_adapts_batch_size(self):
+        throttle = DeletionThrottle(
+            time_budget=1, sleep_ratio=0, min_batch_size=10, max_batch_size=40
+        )
+        throttle.update(0.1)
+        self.assertEqual(throttle.batch_size, 20)
+        throttle.update(0.1)
+        throttle.update(0.1)
+        self.assertEqual(throttle.batch_size, 40)
+        throttle.update(2)
+        self.assertEqual(throttle.batch_size, 20)
+
+    def test_deletefacility_resumes_from_checkpoint(self):
+        checkpoint = DeletionCheckpoint(self.facility.dataset_id)
+        checkpoint.complete("Log models")
+        checkpoint.add(5)
+        with mock.patch.object(
+            log_models.ContentSessionLog.objects, "filter"
+        ) as log_filter:
+            delete_group = get_delete_group_for_facility(self.facility)
+            log_qs = log_filter.return_value
+            delete_group.delete(
+                throttle=DeletionThrottle(sleep_ratio=0), checkpoint=checkpoint
+            )
+            log_qs.delete.assert_not_called()
+            log_qs.order_by.assert_not_called()
+        self.assertFalse(FacilityUser.objects.filter(facility=self.facility).exists())
+        self.assertEqual(FacilityUser.objects.count(), 1)
+        self.assertTrue(checkpoint.is_completed("User models"))
+        checkpoint.clear()
+
+    def test_deletefacility_command(self):
+        call_command(
+            "deletefacility",
+            facility=self.facility.id,
+            noninteractive=True,
+            sleep_ratio=0,
+        )
+        self.assertFalse(Facility.objects.filter(id=self.facility.id).exists())
+        self.assertEqual(FacilityUser.objects.count(), 1)
+        self.assertEqual(DeletionCheckpoint(self.facility.dataset_id).completed, set())
+
+
 class TestLocalEventHandler(TestCase):
     def setUp(self):
         self.mock_method = mock.Mock()
@@ -2,6 +2,7 @@ import logging
 import time
 
 from django.contrib.admin.models import LogEntry
+from django.db import connection
 from django.db import transaction
 from django.db.models import Q
 from django.db.models.signals import post_delete
@@ -14,6 +15,7 @@ from morango.models import RecordMaxCounterBuffer
 from morango.models import Store
 from morango.models import SyncSession
 from morango.models import TransferSession
+from morango.sync.backends.utils import calculate_max_sqlite_variables
 
 from kolibri.core.analytics.models import PingbackNotificationDismissed
 from kolibri.core.auth.models import AdHocGroup
@@ -43,6 +45,7 @@ from kolibri.core.logger.models import ExamLog
 from kolibri.core.logger.models import GenerateCSVLogRequest
 from kolibri.core.logger.models import MasteryLog
 from kolibri.core.logger.models import UserSessionLog
+from kolibri.core.utils.cache import process_cache
 
 
 logger = logging.getLogger(__name__)
@@ -63,6 +66,113 @@ class DisablePostDeleteSignal(object):
         self.receivers = None
 
 
+class DeletionThrottle(object):
+    """
+    Sizes deletion batches so that each one fits in a time budget, and sleeps after each batch
+    for a fraction of the time it took, so that other database writers are not starved
+    """
+
+    def __init__(
+        self, time_budget=0.5, sleep_ratio=1.0, min_batch_size=100, max_batch_size=None
+    ):
+        """
+        :param time_budget: Target duration in seconds of every batch
+        :param sleep_ratio: Seconds to sleep after a batch, per second spent deleting it
+        :type min_batch_size: int
+        :type max_batch_size: int
+        """
+        if max_batch_size is None:
+            max_batch_size = (
+                calculate_max_sqlite_variables()
+                if connection.vendor == "sqlite"
+                else 10000
+            )
+        self.time_budget = time_budget
+        self.sleep_ratio = sleep_ratio
+        self.min_batch_size = min(min_batch_size, max_batch_size)
+        self.max_batch_size = max_batch_size
+        self.batch_size = self.min_batch_size
+
+    def update(self, duration):
+        """
+        Adapt the batch size to the duration of the last batch, and pause accordingly
+
+        :param duration: Seconds that the last batch took
+        :type duration: float
+        """
+        if duration > self.time_budget:
+            self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+        elif duration < self.time_budget / 2:
+            self.batch_size = min(self.max_batch_size, self.batch_size * 2)
+        if self.sleep_ratio:
+            time.sleep(duration * self.sleep_ratio)
+
+
+DELETION_CHECKPOINT_CACHE_KEY = "GROUP_DELETION_CHECKPOINT_{}"
+
+
+class DeletionCheckpoint(object):
+    """
+    Persists which groups of a ``GroupDeletion`` have been completely deleted, so that an
+    interrupted deletion can resume where it left off
+    """
+
+    def __init__(self, key):
+        self.key = DELETION_CHECKPOINT_CACHE_KEY.format(key)
+        state = process_cache.get(self.key) or {}
+        self.completed = set(state.get("completed", []))
+        self.deleted = state.get("deleted", 0)
+
+    def is_completed(self, name):
+        return name in self.completed
+
+    def add(self, count):
+        self.deleted += count
+        self.save()
+
+    def complete(self, name):
+        self.completed.add(name)
+        self.save()
+
+    def save(self):
+        process_cache.set(
+            self.key,
+            {"completed": list(self.completed), "deleted": self.deleted},
+            None,
+        )
+
+    def clear(self):
+        process_cache.delete(self.key)
+        self.completed = set()
+        self.deleted = 0
+
+
+def delete_in_batches(queryset, throttle, checkpoint=None):
+    """
+    Delete the objects of the queryset in primary key order, in batches sized by the throttle,
+    each batch in its own transaction
+
+    :type queryset: QuerySet
+    :type throttle: DeletionThrottle
+    :type checkpoint: DeletionCheckpoint
+    :rtype: generator of tuple(int, dict)
+    """
+    manager = queryset.model._default_manager
+    while True:
+        ids = list(
+            queryset.order_by("pk").values_list("pk", flat=True)[: throttle.batch_size]
+        )
+        if not ids:
+            break
+        start = time.time()
+        with transaction.atomic():
+            count, deletions = manager.filter(pk__in=ids).delete()
+        if checkpoint is not None:
+            checkpoint.add(count)
+        throttle.update(time.time() - start)
+        yield count, deletions
+
+
 class GroupDeletion(object):
     """
     Helper to manage deleting many models, or groups of models
@@ -91,15 +201,18 @@ class GroupDeletion(object):
 
         return querysets
 
-    def count(self, progress_updater=None):
+    def count(self, progress_updater=None, checkpoint=None):
         """
         :type progress_updater: function
+        :type checkpoint: DeletionCheckpoint
         :rtype: int
         """
         sum = 0
         for qs in self.groups:
             if isinstance(qs, GroupDeletion):
-                count = qs.count(progress_updater)
+                if checkpoint is not None and checkpoint.is_completed(qs.name):
+                    continue
+                count = qs.count(progress_updater, checkpoint=checkpoint)
                 logger.debug("Counted {} in group `{}`".format(count, qs.name))
             else:
                 count = qs.count()
@@ -124,10 +237,30 @@ class GroupDeletion(object):
             ]
         )
 
-    def delete(self, progress_updater=None, sleep=None):
+    def _delete_queryset(
+        self, qs, progress_updater=None, throttle=None, checkpoint=None
+    ):
+        if throttle is None:
+            return qs.delete()
+
+        total_count = 0
+        all_deletions = {}
+        for count, deletions in delete_in_batches(qs, throttle, checkpoint=checkpoint):
+            total_count += count
+            if progress_updater:
+                progress_updater(increment=count)
+            for obj_name, obj_count in deletions.items():
+                all_deletions[obj_name] = all_deletions.get(obj_name, 0) + obj_count
+        return total_count, all_deletions
+
+    def delete(self, progress_updater=None, sleep=None, throttle=None, checkpoint=None):
         """
         :type progress_updater: function
         :type sleep: int
+        :param throttle: When passed, querysets are deleted in throttled batches
+        :type throttle: DeletionThrottle
+        :param checkpoint: When passed, groups already completed are skipped, and completed groups are recorded
+        :type checkpoint: DeletionCheckpoint
         :rtype: tuple(int, dict)
         """
         total_count = 0
@@ -136,16 +269,29 @@ class GroupDeletion(object):
 
         for qs in self.groups:
             if isinstance(qs, GroupDeletion):
-                count, deletions = qs.delete(progress_updater)
+                if checkpoint is not None and checkpoint.is_completed(qs.name):
+                    logger.debug("Skipping completed group `{}`".format(qs.name))
+                    continue
+                count, deletions = qs.delete(
+                    progress_updater, throttle=throttle, checkpoint=checkpoint
+                )
                 debug_msg = "Deleted {} of `{}` in group `{}`"
                 name = qs.name
+                if checkpoint is not None:
+                    checkpoint.complete(qs.name)
             else:
-                count, deletions = qs.delete()
+                count, deletions = self._delete_queryset(
+                    qs,
+                    progress_updater=progress_updater,
+                    throttle=throttle,
+                    checkpoint=checkpoint,
+                )
                 debug_msg = "Deleted {} of `{}` with model `{}`"
                 name = qs.model._meta.model_name
 
             total_count += count
-            if progress_updater:
+            # batched deletions already report their progress as they go
+            if progress_updater and (throttle is None or isinstance(qs, GroupDeletion)):
                 progress_updater(increment=count)
 
             for obj_name, count in deletions.items():
@@ -196,11 +342,13 @@ def _get_users(dataset_id):
             LogEntry.objects.filter(user_id_filter),
             DevicePermissions.objects.filter(user_id_filter),
             PingbackNotificationDismissed.objects.filter(user_id_filter),
-            Collection.objects.filter(Q(parent_id__isnull=True) & dataset_id_filter),
             Role.objects.filter(dataset_id_filter),
             Membership.objects.filter(dataset_id_filter),
             Bookmark.objects.filter(dataset_id_filter),
             FacilityUser.objects.filter(dataset_id_filter),
+            # delete the root collection after its users, otherwise they would all be
+            # cascade deleted at once, in a single unthrottled batch
+            Collection.objects.filter(Q(parent_id__isnull=True) & dataset_id_filter),
             Facility.objects.filter(dataset_id_filter),
         ],
     )
@@ -49,62 +49,64 @@ def _batch_save(Model, objects):
     Model.objects.bulk_create(objects, batch_size=batch_size)
 
 
-blocklist = set(["id", "_morango_partition"])
+blocklist = set(["id", "_morango_partition", "_morango_dirty_bit"])
 
+# Number of logs that are read and copied at once when merging users
+MERGE_BATCH_SIZE = 1000
 
-def merge_users(source_user, target_user):  # noqa C901
-    """
-    Utility to merge two users. It makes no assumptions about whether
-    the users are in the same facility and does raw copies of all
-    associated user data, rather than try to do anything clever.
-    """
-    if source_user.id == target_user.id:
-        raise ValueError("Cannot merge a user with themselves")
+# The log models of a user, in the order of their dependencies
+MERGED_LOG_MODELS = (
+    ContentSessionLog,
+    ContentSummaryLog,
+    UserSessionLog,
+    MasteryLog,
+    AttemptLog,
+)
 
-    _merge_user_models(source_user, target_user)
 
-    id_map = {
-        FacilityUser: {source_user.id: target_user.id},
-        FacilityDataset: {
-            source_user.dataset_id: target_user.dataset_id,
-        },
-    }
-
-    def _merge_log_data(LogModel):
-        log_map = {}
-        id_map[LogModel] = log_map
+def _iterate_batches(queryset, fields):
+    """
+    Iterates over the values of the fields of the queryset in batches ordered by id,
+    so that only one batch of the logs is held in memory at once.
+    """
+    last_id = None
+    while True:
+        batch_queryset = queryset.order_by("id")
+        if last_id is not None:
+            batch_queryset = batch_queryset.filter(id__gt=last_id)
+        batch = list(batch_queryset.values(*fields)[:MERGE_BATCH_SIZE])
+        if not batch:
+            return
+        last_id = batch[-1]["id"]
+        yield batch
+
+
+def _merge_log_data(LogModel, source_user, id_map, log_map):
+    """
+    Copies the logs of the source user to the user mapped in the id map, one batch at a time,
+    and yields the number of logs merged in every batch. The new ids of the logs are recorded
+    in the log map, unless it is None.
+    """
+    fields = [
+        f.attname for f in LogModel._meta.concrete_fields if f.attname not in blocklist
+    ]
+    related_fields = [f for f in LogModel._meta.concrete_fields if f.is_relation]
+    source_logs = LogModel.objects.filter(user=source_user)
+    for batch in _iterate_batches(source_logs, ["id"] + fields):
         new_logs = []
-        related_fields = [f for f in LogModel._meta.concrete_fields if f.is_relation]
-        source_logs = LogModel.objects.filter(user=source_user)
-        target_log_ids = set(
-            LogModel.objects.filter(user=target_user).values_list("id", flat=True)
-        )
-        for log in source_logs:
-            # Get all serialializable fields
-            data = log.serialize()
-            # Remove fields that we explicitly know we don't want to copy
-            for f in blocklist:
-                if f in data:
-                    del data[f]
+        for data in batch:
+            log_id = data.pop("id")
             # Iterate through each relation and map the old id to the new id for the foreign key
             for relation in related_fields:
                 data[relation.attname] = id_map[relation.related_model][
                     data[relation.attname]
                 ]
+            new_log = LogModel(**data)
             # If this is a randomly created source id, preserve it, so we can stop the same logs
             # being copied in repeatedly. If it is not random, remove it, so we can recreate
             # it on the target.
-            if log.calculate_source_id() is not None:
-                del data["_morango_source_id"]
-            new_log = LogModel()
-            for field, value in data.items():
-                try:
-                    field_obj = LogModel._meta.get_field(field)
-                    if hasattr(field_obj, "from_db_value"):
-                        value = field_obj.from_db_value(value, None, None, None)
-                except FieldDoesNotExist:
-                    pass
-                setattr(new_log, field, value)
+            if new_log.calculate_source_id() is not None:
+                new_log._morango_source_id = ""
             if not new_log._morango_source_id:
                 new_log.id = new_log.calculate_uuid()
             else:
@@ -117,21 +119,67 @@ def merge_users(source_user, target_user):  # noqa C901
                 new_log._morango_partition = new_log.calculate_partition().replace(
                     new_log.ID_PLACEHOLDER, new_log.id
                 )
-            log_map[log.id] = new_log.id
-            if new_log.id not in target_log_ids:
-                new_logs.append(new_log)
+            if log_map is not None:
+                log_map[log_id] = new_log.id
+            new_logs.append(new_log)
+        # Only copy the logs that the target user does not have yet
+        target_log_ids = set(
+            LogModel.objects.filter(
+                id__in=[new_log.id for new_log in new_logs]
+            ).values_list("id", flat=True)
+        )
+        _batch_save(
+            LogModel,
+            [new_log for new_log in new_logs if new_log.id not in target_log_ids],
+        )
+        yield len(batch)
 
-        _batch_save(LogModel, new_logs)
 
-    _merge_log_data(ContentSessionLog)
+def merge_users(source_user, target_user, progress_callback=None):
+    """
+    Utility to merge two users. It makes no assumptions about whether
+    the users are in the same facility and does raw copies of all
+    associated user data, rather than try to do anything clever.
+
+    The logs are copied in batches, and the logs that the target user already has,
+    for instance from a previous merge, are not copied again.
 
-    _merge_log_data(ContentSummaryLog)
+    :param progress_callback: An optional callable, called after every batch with the number
+        of logs merged so far and the total number of logs to merge
+    """
+    if source_user.id == target_user.id:
+        raise ValueError("Cannot merge a user with themselves")
 
-    _merge_log_data(UserSessionLog)
+    _merge_user_models(source_user, target_user)
 
-    _merge_log_data(MasteryLog)
+    id_map = {
+        FacilityUser: {source_user.id: target_user.id},
+        FacilityDataset: {
+            source_user.dataset_id: target_user.dataset_id,
+        },
+    }
+    # Only remember the new ids of the logs that other logs refer to
+    referenced_models = set(
+        f.related_model
+        for LogModel in MERGED_LOG_MODELS
+        for f in LogModel._meta.concrete_fields
+        if f.is_relation
+    )
 
-    _merge_log_data(AttemptLog)
+    total = sum(
+        LogModel.objects.filter(user=source_user).count()
+        for LogModel in MERGED_LOG_MODELS
+    )
+    progress = 0
+
+    for LogModel in MERGED_LOG_MODELS:
+        log_map = None
+        if LogModel in referenced_models:
+            log_map = id_map[LogModel] = {}
+        for merged in _merge_log_data(LogModel, source_user, id_map, log_map):
+            progress += merged
+            if progress_callback is not None:
+                progress_callback(progress, total)
 
 
 fork_blocklist = {"id", "_morango_partition", "_morango_source_id"}
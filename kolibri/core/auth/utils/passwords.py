@@ -0,0 +1,87 @@
+import logging
+import os
+from concurrent import futures
+from concurrent.futures.process import BrokenProcessPool
+
+from django.contrib.auth.hashers import get_hasher
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+from kolibri.utils.conf import OPTIONS
+
+
+logger = logging.getLogger(__name__)
+
+# Below this number of passwords the cost of starting a pool of workers
+# outweighs the gain of hashing in parallel
+MIN_PARALLEL_PASSWORDS = 50
+
+
+def get_hashing_workers():
+    workers = OPTIONS["Users"]["PASSWORD_HASHING_WORKERS"]
+    return workers or max(1, (os.cpu_count() or 1) - 1)
+
+
+def _get_iterations():
+    return OPTIONS["Users"]["BULK_PASSWORD_HASH_ITERATIONS"] or None
+
+
+def _get_executor(workers):
+    try:
+        # Import in order to check if multiprocessing is supported on this platform
+        from multiprocessing import synchronize  # noqa
+
+        return futures.ProcessPoolExecutor(max_workers=workers)
+    except ImportError:
+        # pbkdf2_hmac releases the GIL, so threads still give us some parallelism
+        return futures.ThreadPoolExecutor(max_workers=workers)
+
+
+def hash_password(password, iterations=None):
+    """
+    Hash a raw password, using a custom number of iterations if the default hasher is PBKDF2 based.
+    Django checks these hashes as usual, and rehashes them with the default iterations
+    when the user next signs in.
+    """
+    if iterations:
+        hasher = get_hasher()
+        if isinstance(hasher, PBKDF2PasswordHasher):
+            return hasher.encode(password, hasher.salt(), iterations=iterations)
+    return make_password(password)
+
+
+def _hash_passwords_serially(passwords, iterations):
+    return [hash_password(password, iterations) for password in passwords]
+
+
+def hash_passwords(passwords, workers=None, iterations=None):
+    """
+    Hash a list of raw passwords, returning a list of password hashes in the same order.
+    For large lists the hashing is spread across a pool of worker processes.
+
+    :param passwords: list of raw passwords
+    :param workers: number of workers to use, defaults to the PASSWORD_HASHING_WORKERS option
+    :param iterations: PBKDF2 iterations to use, defaults to the BULK_PASSWORD_HASH_ITERATIONS option
+    :return: list of hashed passwords
+    """
+    passwords = list(passwords)
+    workers = workers or get_hashing_workers()
+    iterations = iterations or _get_iterations()
+    if workers < 2 or len(passwords) < MIN_PARALLEL_PASSWORDS:
+        return _hash_passwords_serially(passwords, iterations)
+    chunksize = max(1, len(passwords) // (workers * 4))
+    try:
+        with _get_executor(workers) as executor:
+            return list(
+                executor.map(
+                    hash_password,
+                    passwords,
+                    [iterations] * len(passwords),
+                    chunksize=chunksize,
+                )
+            )
+    except (OSError, BrokenProcessPool) as e:
+        logger.warning(
+            "Parallel password hashing failed, hashing serially instead: {}".format(e)
+        )
+        return _hash_passwords_serially(passwords, iterations)
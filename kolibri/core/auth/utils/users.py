@@ -1,4 +1,3 @@
-import requests
 from django.core.management.base import CommandError
 from requests.exceptions import ConnectionError
 from requests.exceptions import HTTPError
@@ -9,6 +8,7 @@ from kolibri.core.auth.backends import FACILITY_CREDENTIAL_KEY
 from kolibri.core.auth.constants.demographics import NOT_SPECIFIED
 from kolibri.core.auth.models import AdHocGroup
 from kolibri.core.auth.models import Membership
+from kolibri.core.discovery.utils.network.client import PeerSession
 from kolibri.core.utils.urls import reverse_remote
 
 
@@ -36,7 +36,7 @@ def get_remote_users_info(baseurl, facility_id, username, password):
     user_info_url = reverse_remote(baseurl, "kolibri:core:publicuser-list")
     params = {"facility_id": facility_id}
     try:
-        response = requests.get(
+        response = PeerSession.for_address(baseurl).get(
             user_info_url,
             params=params,
             auth=(
@@ -56,7 +56,7 @@ def get_remote_users_info(baseurl, facility_id, username, password):
                     facility_id,
                 ],
             )
-            response = requests.get(facility_info_url)
+            response = PeerSession.for_address(baseurl).get(facility_info_url)
             if response.json()["learner_can_login_with_no_password"]:
                 raise AuthenticationFailed(
                     detail="The username can not be found",
@@ -78,6 +78,7 @@ from kolibri.core.content.utils.search import get_available_metadata_labels
 from kolibri.core.content.utils.stopwords import stopwords_set
 from kolibri.core.decorators import query_params_required
 from kolibri.core.device.models import ContentCacheKey
+from kolibri.core.discovery.utils.network.client import PeerSession
 from kolibri.core.discovery.utils.network.errors import ResourceGoneError
 from kolibri.core.lessons.models import Lesson
 from kolibri.core.logger.models import ContentSessionLog
@@ -212,7 +213,7 @@ class RemoteMixin(object):
             raise Http404("Remote resource not found")
         remote_url = join_url(baseurl, remote_path)
         try:
-            response = requests.get(
+            response = PeerSession.for_address(baseurl).get(
                 remote_url, params=qs, headers=self._get_request_headers(request)
             )
             if response.status_code == 404:
@@ -1773,7 +1774,9 @@ class RemoteChannelViewSet(viewsets.ViewSet):
             identifier=identifier, baseurl=baseurl, keyword=keyword, language=language
         )
 
-        resp = requests.get(url)
+        resp = PeerSession.for_address(
+            baseurl or OPTIONS["Urls"]["CENTRAL_CONTENT_BASE_URL"]
+        ).get(url)
 
         if resp.status_code == 404:
             raise Http404(
@@ -1876,7 +1879,9 @@ class RemoteChannelViewSet(viewsets.ViewSet):
     @no_cache_on_method
     def kolibri_studio_status(self, request, **kwargs):
         try:
-            resp = requests.get(get_info_url())
+            resp = PeerSession.for_address(
+                OPTIONS["Urls"]["CENTRAL_CONTENT_BASE_URL"]
+            ).get(get_info_url())
             if resp.status_code == 404:
                 raise requests.ConnectionError("Kolibri Studio URL is incorrect!")
             else:
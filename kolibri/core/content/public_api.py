@@ -12,6 +12,9 @@ from kolibri.core.content.constants.schema_versions import CONTENT_SCHEMA_VERSIO
 from kolibri.core.content.constants.schema_versions import MIN_CONTENT_SCHEMA_VERSION
 from kolibri.core.content.utils.sqlalchemybridge import BASES
 
+# Maximum number of content nodes whose metadata can be requested at once
+MAX_IMPORT_METADATA_IDS = 100
+
 
 class ImportMetadataViewset(GenericViewSet):
     default_content_schema = CONTENT_SCHEMA_VERSION
@@ -33,41 +36,44 @@ class ImportMetadataViewset(GenericViewSet):
             )
         return error
 
-    def retrieve(self, request, pk=None):
+    def _get_schema_base(self, request):
         """
-        An endpoint to retrieve all content metadata required for importing a content node
-        all of its ancestors, and any relevant needed metadata.
-
-        :param request: request object
-        :param pk: id parent node
-        :return: an object with keys for each content metadata table and a schema_version key
+        Returns the requested content schema version and its SQLAlchemy base,
+        or an error response if the version cannot be exported.
         """
-
         content_schema = request.query_params.get(
             "schema_version", self.default_content_schema
         )
 
         try:
             if int(content_schema) > int(self.default_content_schema):
-                return HttpResponseBadRequest(self._error_message(False))
+                return None, None, HttpResponseBadRequest(self._error_message(False))
             if int(content_schema) < int(self.min_content_schema):
-                return HttpResponseBadRequest(self._error_message(True))
+                return None, None, HttpResponseBadRequest(self._error_message(True))
             base = BASES[content_schema]
         except ValueError:
-            return HttpResponseBadRequest(
-                "Schema version is not parseable by this version of Kolibri"
+            return (
+                None,
+                None,
+                HttpResponseBadRequest(
+                    "Schema version is not parseable by this version of Kolibri"
+                ),
             )
         except AttributeError:
-            return HttpResponseBadRequest(
-                "Schema version is not known by this version of Kolibri"
+            return (
+                None,
+                None,
+                HttpResponseBadRequest(
+                    "Schema version is not known by this version of Kolibri"
+                ),
             )
+        return content_schema, base, None
 
-        # Get the model for the target node here - we do this so that we trigger a 404 immediately if the node
-        # does not exist.
-        node = get_object_or_404(models.ContentNode.objects.all(), pk=pk)
-
-        nodes = node.get_ancestors(include_self=True)
-
+    def _get_metadata(self, base, content_schema, nodes, channel_id):
+        """
+        Serializes the rows of every content metadata table needed to import the nodes,
+        which must all belong to the channel and include their ancestors.
+        """
         data = {}
 
         files = models.File.objects.filter(contentnode__in=nodes)
@@ -92,7 +98,7 @@ class ImportMetadataViewset(GenericViewSet):
         related = models.ContentNode.related.through.objects.filter(
             from_contentnode_id__in=node_ids, to_contentnode_id__in=node_ids
         )
-        channel_metadata = models.ChannelMetadata.objects.filter(id=node.channel_id)
+        channel_metadata = models.ChannelMetadata.objects.filter(id=channel_id)
 
         cursor = connection.cursor()
 
@@ -134,4 +140,68 @@ class ImportMetadataViewset(GenericViewSet):
 
         data["schema_version"] = content_schema
 
+        return data
+
+    def list(self, request):
+        """
+        An endpoint to retrieve, in a single request, all content metadata required for importing
+        many content nodes, all of their ancestors, and any relevant needed metadata.
+        Ancestors and metadata shared by the nodes are only returned once.
+
+        :param request: request object, with the comma separated node ids in the `ids` query param
+        :return: a list with an object for each channel of the nodes, with keys for each
+        content metadata table and a schema_version key, as returned by the retrieve endpoint
+        """
+        content_schema, base, error = self._get_schema_base(request)
+        if error is not None:
+            return error
+
+        ids = [pk for pk in request.query_params.get("ids", "").split(",") if pk]
+        if not ids:
+            return HttpResponseBadRequest("Content node ids are required")
+        if len(ids) > MAX_IMPORT_METADATA_IDS:
+            return HttpResponseBadRequest(
+                "At most {} content node ids can be requested".format(
+                    MAX_IMPORT_METADATA_IDS
+                )
+            )
+        try:
+            ids = [UUID(pk).hex for pk in ids]
+        except ValueError:
+            return HttpResponseBadRequest("Content node ids are not valid")
+
+        # Nodes that do not exist are ignored, so the requester can tell from the response
+        # which nodes have been found.
+        requested_nodes = models.ContentNode.objects.filter(id__in=ids)
+        channel_ids = set(requested_nodes.values_list("channel_id", flat=True))
+        data = []
+        for channel_id in sorted(channel_ids):
+            nodes = models.ContentNode.objects.get_queryset_ancestors(
+                requested_nodes.filter(channel_id=channel_id), include_self=True
+            )
+            data.append(self._get_metadata(base, content_schema, nodes, channel_id))
+
         return Response(data)
+
+    def retrieve(self, request, pk=None):
+        """
+        An endpoint to retrieve all content metadata required for importing a content node
+        all of its ancestors, and any relevant needed metadata.
+
+        :param request: request object
+        :param pk: id parent node
+        :return: an object with keys for each content metadata table and a schema_version key
+        """
+        content_schema, base, error = self._get_schema_base(request)
+        if error is not None:
+            return error
+
+        # Get the model for the target node here - we do this so that we trigger a 404 immediately if the node
+        # does not exist.
+        node = get_object_or_404(models.ContentNode.objects.all(), pk=pk)
+
+        nodes = node.get_ancestors(include_self=True)
+
+        return Response(
+            self._get_metadata(base, content_schema, nodes, node.channel_id)
+        )
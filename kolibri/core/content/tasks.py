@@ -1,6 +1,5 @@
 from urllib.parse import urljoin
 
-import requests
 from django.core.exceptions import ValidationError
 from django.core.management import call_command
 from django.db.models import Q
@@ -31,6 +30,7 @@ from kolibri.core.content.utils.settings import automatic_download_enabled
 from kolibri.core.content.utils.upgrade import diff_stats
 from kolibri.core.discovery.models import NetworkLocation
 from kolibri.core.discovery.utils.network.client import NetworkClient
+from kolibri.core.discovery.utils.network.client import PeerSession
 from kolibri.core.discovery.utils.network.errors import IncompatibleVersionError
 from kolibri.core.discovery.utils.network.errors import NetworkLocationNotFound
 from kolibri.core.discovery.utils.network.errors import ResourceGoneError
@@ -346,7 +346,7 @@ def remoteresourceimport(
             baseurl, "kolibri:core:importmetadata-detail", kwargs={"pk": node_id}
         ),
     )
-    response = requests.get(metadata_url)
+    response = PeerSession.for_address(baseurl).get(metadata_url)
     response.raise_for_status()
     import_metadata = response.json()
     cancel_check = None if not current_job else current_job.check_for_cancel
@@ -647,7 +647,7 @@ class RemoteChannelDiffStatsValidator(RemoteChannelImportValidator):
         url = get_channel_lookup_url(
             baseurl=job_data["kwargs"]["baseurl"], identifier=data["channel_id"]
         )
-        resp = requests.get(url)
+        resp = PeerSession.for_address(job_data["kwargs"]["baseurl"]).get(url)
         channel_metadata = resp.json()
         job_data["extra_metadata"]["new_channel_version"] = channel_metadata[0][
             "version"
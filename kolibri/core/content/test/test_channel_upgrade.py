@@ -1,4 +1,5 @@
 import copy
+import os
 import random
 import tempfile
 import uuid
@@ -23,11 +24,15 @@ from kolibri.core.content.models import ContentNode
 from kolibri.core.content.models import File
 from kolibri.core.content.models import LocalFile
 from kolibri.core.content.utils.annotation import mark_local_files_as_available
+from kolibri.core.content.utils.channels import CHANNEL_UPDATE_STATS_CACHE_KEY
 from kolibri.core.content.utils.content_types_tools import renderable_files_presets
 from kolibri.core.content.utils.sqlalchemybridge import load_metadata
+from kolibri.core.content.utils.upgrade import _get_precalculated_diff_stats
 from kolibri.core.content.utils.upgrade import count_removed_resources
+from kolibri.core.content.utils.upgrade import diff_stats
 from kolibri.core.content.utils.upgrade import get_automatically_updated_resources
 from kolibri.core.content.utils.upgrade import get_new_resources_available_for_import
+from kolibri.core.utils.cache import process_cache
 
 
 def to_dict(instance):
@@ -761,3 +766,49 @@ class ChannelNodesMovedTestCase(ChannelUpdateTestBase):
         self.assertEqual(set(updated_resource_ids), set())
         self.assertEqual(set(updated_resource_content_ids), set())
         self.assertEqual(updated_resource_total_size, 0)
+
+
+class PrecalculatedDiffStatsTestCase(TestCase):
+    def setUp(self):
+        self.channel_id = uuid4_hex()
+        _, self.source_path = tempfile.mkstemp(suffix=".sqlite3")
+        self.stats = {
+            "new_resource_content_ids": [],
+            "updated_resource_content_ids": [],
+            "deleted_resources_count": 0,
+            "channel_version": None,
+            "new_channel_version": 2,
+        }
+        process_cache.set(
+            CHANNEL_UPDATE_STATS_CACHE_KEY.format(self.channel_id), self.stats
+        )
+        self.addCleanup(
+            process_cache.delete, CHANNEL_UPDATE_STATS_CACHE_KEY.format(self.channel_id)
+        )
+
+    @patch("kolibri.core.content.utils.upgrade.get_upgrade_content_database_file_path")
+    @patch("kolibri.core.content.utils.upgrade.get_current_job")
+    def test_same_versions(self, job_mock, path_mock):
+        path_mock.return_value = self.source_path
+        job_mock.return_value.extra_metadata = {"new_channel_version": 2}
+        with patch("kolibri.core.content.utils.upgrade.call_command") as command_mock:
+            diff_stats(self.channel_id, "network", baseurl="http://test")
+            command_mock.assert_not_called()
+        self.assertEqual(
+            job_mock.return_value.extra_metadata["deleted_resources_count"], 0
+        )
+
+    @patch("kolibri.core.content.utils.upgrade.get_current_job")
+    def test_new_version(self, job_mock):
+        job_mock.return_value.extra_metadata = {"new_channel_version": 3}
+        self.assertIsNone(
+            _get_precalculated_diff_stats(self.channel_id, self.source_path)
+        )
+
+    @patch("kolibri.core.content.utils.upgrade.get_current_job")
+    def test_missing_upgrade_database(self, job_mock):
+        job_mock.return_value.extra_metadata = {"new_channel_version": 2}
+        os.remove(self.source_path)
+        self.assertIsNone(
+            _get_precalculated_diff_stats(self.channel_id, self.source_path)
+        )
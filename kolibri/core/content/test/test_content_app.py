@@ -26,6 +26,7 @@ from kolibri.core.content.test.test_channel_upgrade import ChannelBuilder
 from kolibri.core.device.models import ContentCacheKey
 from kolibri.core.device.models import DevicePermissions
 from kolibri.core.device.models import DeviceSettings
+from kolibri.core.discovery.utils.network.client import PeerSession
 from kolibri.core.logger.models import ContentSessionLog
 from kolibri.core.logger.models import ContentSummaryLog
 from kolibri.utils.tests.helpers import override_option
@@ -1831,7 +1832,7 @@ def mock_patch_decorator(func):
     def wrapper(*args, **kwargs):
         mock_object = mock.Mock()
         mock_object.json.return_value = [{"id": 1, "name": "studio"}]
-        with mock.patch.object(requests, "get", return_value=mock_object):
+        with mock.patch.object(PeerSession, "get", return_value=mock_object):
             return func(*args, **kwargs)
 
     return wrapper
@@ -1884,14 +1885,16 @@ class KolibriStudioAPITestCase(APITestCase):
     def test_channel_info_404(self):
         mock_object = mock.Mock()
         mock_object.status_code = 404
-        requests.get.return_value = mock_object
+        PeerSession.get.return_value = mock_object
         response = self.client.get(
             reverse("kolibri:core:remotechannel-detail", kwargs={"pk": "abc"}),
             format="json",
         )
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
-    @mock.patch.object(requests, "get", side_effect=requests.exceptions.ConnectionError)
+    @mock.patch.object(
+        PeerSession, "get", side_effect=requests.exceptions.ConnectionError
+    )
     def test_channel_info_offline(self, mock_get):
         response = self.client.get(
             reverse("kolibri:core:remotechannel-detail", kwargs={"pk": "abc"}),
@@ -1900,7 +1903,9 @@ class KolibriStudioAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
         self.assertEqual(response.json()["status"], "offline")
 
-    @mock.patch.object(requests, "get", side_effect=requests.exceptions.ConnectionError)
+    @mock.patch.object(
+        PeerSession, "get", side_effect=requests.exceptions.ConnectionError
+    )
     def test_channel_list_offline(self, mock_get):
         response = self.client.get(
             reverse("kolibri:core:remotechannel-list"), format="json"
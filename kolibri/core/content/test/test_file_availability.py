@@ -1,20 +1,28 @@
+import gzip
 import os
 import shutil
 import tempfile
+import time
 import uuid
 from collections import namedtuple
 
+from django.test import SimpleTestCase
 from django.test import TransactionTestCase
 from mock import patch
 
 from .sqlalchemytesting import django_connection_engine
 from kolibri.core.content.models import LocalFile
+from kolibri.core.content.utils.checksum_index import DiskChecksumIndex
+from kolibri.core.content.utils.file_availability import CHECKSUMS_DIGEST_MISMATCH
+from kolibri.core.content.utils.file_availability import generate_checksum_bitset
 from kolibri.core.content.utils.file_availability import (
     get_available_checksums_from_disk,
 )
 from kolibri.core.content.utils.file_availability import (
     get_available_checksums_from_remote,
 )
+from kolibri.core.content.utils.file_availability import get_channel_checksums
+from kolibri.core.content.utils.file_availability import unpack_checksums
 from kolibri.core.discovery.models import NetworkLocation
 from kolibri.core.utils.cache import process_cache
 
@@ -123,6 +131,68 @@ class LocalFileByDisk(TransactionTestCase):
         super(LocalFileByDisk, self).tearDown()
 
 
+class DiskChecksumIndexTestCase(SimpleTestCase):
+    def setUp(self):
+        self.mock_home_dir = tempfile.mkdtemp()
+        self.mock_storage_dir = os.path.join(self.mock_home_dir, "content", "storage")
+        os.makedirs(self.mock_storage_dir)
+        self.index = DiskChecksumIndex(self.mock_home_dir)
+
+    def create_file(self, checksum):
+        directory = os.path.join(self.mock_storage_dir, checksum[0], checksum[1])
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        path = os.path.join(directory, checksum + ".mp4")
+        open(path, "w+b").close()
+        return path
+
+    def age_directories(self):
+        # Make all directory modification times old enough to be stored in the index
+        past = time.time() - 3600
+        for root, dirs, _ in os.walk(self.mock_storage_dir):
+            for name in dirs + [""]:
+                os.utime(os.path.join(root, name), (past, past))
+
+    def test_files_added_and_removed(self):
+        self.create_file(file_id_1)
+        self.index.update()
+        self.assertEqual(self.index.intersection([file_id_1, file_id_2]), {file_id_1})
+        path = self.create_file(file_id_2)
+        os.remove(os.path.join(os.path.dirname(path), file_id_2 + ".mp4"))
+        self.index.update()
+        self.assertEqual(self.index.intersection([file_id_1, file_id_2]), {file_id_1})
+        self.create_file(file_id_2)
+        shutil.rmtree(os.path.join(self.mock_storage_dir, file_id_1[0]))
+        self.index.update()
+        self.assertEqual(self.index.intersection([file_id_1, file_id_2]), {file_id_2})
+
+    def test_unchanged_directories_not_scanned(self):
+        self.create_file(file_id_1)
+        self.create_file(file_id_2)
+        self.age_directories()
+        self.index.update()
+        with patch.object(
+            DiskChecksumIndex, "_scan_directory", wraps=self.index._scan_directory
+        ) as scan_mock:
+            self.index.update()
+            scan_mock.assert_not_called()
+            self.create_file(file_id_1[:2] + uuid.uuid4().hex[2:])
+            self.index.update()
+            self.assertEqual(scan_mock.call_count, 1)
+
+    def test_persisted_index(self):
+        self.create_file(file_id_1)
+        self.index.update()
+        self.assertEqual(
+            DiskChecksumIndex(self.mock_home_dir).intersection([file_id_1]),
+            {file_id_1},
+        )
+
+    def tearDown(self):
+        os.remove(self.index.index_path)
+        shutil.rmtree(self.mock_home_dir)
+
+
 local_file_qs = LocalFile.objects.filter(
     files__contentnode__channel_id=test_channel_id, files__supplementary=False
 ).values_list("id", flat=True)
@@ -138,8 +208,9 @@ class LocalFileRemote(TransactionTestCase):
         process_cache.clear()
         self.location = NetworkLocation.objects.create(base_url="test")
 
-    @patch("kolibri.core.content.utils.file_availability.requests")
-    def test_set_one_file(self, requests_mock):
+    @patch("kolibri.core.content.utils.file_availability.PeerSession")
+    def test_set_one_file(self, peer_session_mock):
+        requests_mock = peer_session_mock.for_address.return_value
         requests_mock.post.return_value.status_code = 200
         requests_mock.post.return_value.content = "1"
         checksums = get_available_checksums_from_remote(
@@ -148,8 +219,9 @@ class LocalFileRemote(TransactionTestCase):
         self.assertEqual(len(checksums), 1)
         self.assertTrue(local_file_qs.filter(id=list(checksums)[0]).exists())
 
-    @patch("kolibri.core.content.utils.file_availability.requests")
-    def test_set_two_files_in_channel(self, requests_mock):
+    @patch("kolibri.core.content.utils.file_availability.PeerSession")
+    def test_set_two_files_in_channel(self, peer_session_mock):
+        requests_mock = peer_session_mock.for_address.return_value
         requests_mock.post.return_value.status_code = 200
         requests_mock.post.return_value.content = "3"
         checksums = get_available_checksums_from_remote(
@@ -159,8 +231,9 @@ class LocalFileRemote(TransactionTestCase):
         self.assertTrue(local_file_qs.filter(id=list(checksums)[0]).exists())
         self.assertTrue(local_file_qs.filter(id=list(checksums)[1]).exists())
 
-    @patch("kolibri.core.content.utils.file_availability.requests")
-    def test_set_two_files_none_in_channel(self, requests_mock):
+    @patch("kolibri.core.content.utils.file_availability.PeerSession")
+    def test_set_two_files_none_in_channel(self, peer_session_mock):
+        requests_mock = peer_session_mock.for_address.return_value
         requests_mock.post.return_value.status_code = 200
         requests_mock.post.return_value.content = "0"
         checksums = get_available_checksums_from_remote(
@@ -168,19 +241,51 @@ class LocalFileRemote(TransactionTestCase):
         )
         self.assertEqual(checksums, set())
 
-    @patch("kolibri.core.content.utils.file_availability.requests")
-    def test_404_remote_checksum_response(self, requests_mock):
+    @patch("kolibri.core.content.utils.file_availability.PeerSession")
+    def test_404_remote_checksum_response(self, peer_session_mock):
+        requests_mock = peer_session_mock.for_address.return_value
         requests_mock.post.return_value.status_code = 404
         checksums = get_available_checksums_from_remote(
             test_channel_id, self.location.id
         )
         self.assertIsNone(checksums)
 
-    @patch("kolibri.core.content.utils.file_availability.requests")
-    def test_invalid_integer_remote_checksum_response(self, requests_mock):
+    @patch("kolibri.core.content.utils.file_availability.PeerSession")
+    def test_invalid_integer_remote_checksum_response(self, peer_session_mock):
+        requests_mock = peer_session_mock.for_address.return_value
         requests_mock.post.return_value.status_code = 200
         requests_mock.post.return_value.content = "I am not a json, I am a free man!"
         checksums = get_available_checksums_from_remote(
             test_channel_id, self.location.id
         )
         self.assertIsNone(checksums)
+
+    @patch("kolibri.core.content.utils.file_availability.PeerSession")
+    def test_v2_matching_digest(self, peer_session_mock):
+        requests_mock = peer_session_mock.for_address.return_value
+        requests_mock.get.return_value.status_code = 200
+        requests_mock.get.return_value.content = generate_checksum_bitset(
+            get_channel_checksums(test_channel_id), {file_id_1}
+        )
+        checksums = get_available_checksums_from_remote(
+            test_channel_id, self.location.id
+        )
+        self.assertEqual(checksums, {file_id_1})
+        requests_mock.post.assert_not_called()
+
+    @patch("kolibri.core.content.utils.file_availability.PeerSession")
+    def test_v2_digest_mismatch(self, peer_session_mock):
+        requests_mock = peer_session_mock.for_address.return_value
+        requests_mock.get.return_value.status_code = CHECKSUMS_DIGEST_MISMATCH
+        requests_mock.post.return_value.status_code = 200
+        requests_mock.post.return_value.content = generate_checksum_bitset(
+            get_channel_checksums(test_channel_id), {file_id_1, file_id_2}
+        )
+        checksums = get_available_checksums_from_remote(
+            test_channel_id, self.location.id
+        )
+        self.assertEqual(checksums, {file_id_1, file_id_2})
+        self.assertEqual(
+            unpack_checksums(gzip.decompress(requests_mock.post.call_args[1]["data"])),
+            get_channel_checksums(test_channel_id),
+        )
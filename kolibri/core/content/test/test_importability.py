@@ -1,13 +1,17 @@
 from django.core.management import call_command
 from django.test import TransactionTestCase
+from le_utils.constants import content_kinds
 from mock import patch
 
 from .sqlalchemytesting import django_connection_engine
+from kolibri.core.content.models import ContentNode
 from kolibri.core.content.models import File
 from kolibri.core.content.models import LocalFile
+from kolibri.core.content.utils.channels import CHANNEL_UPDATE_STATS_CACHE_KEY
 from kolibri.core.content.utils.importability_annotation import (
     get_channel_annotation_stats,
 )
+from kolibri.core.utils.cache import process_cache
 
 
 def get_engine(connection_string):
@@ -37,6 +41,41 @@ class ImportabilityStats(TransactionTestCase):
         stats = get_channel_annotation_stats(test_channel_id, checksums)
         self.assertEqual(len(stats), 4)
 
+    def test_resource_counts(self):
+        File.objects.update(supplementary=False)
+        stats = get_channel_annotation_stats(test_channel_id, [file_id_1, file_id_2])
+        available_ids = set(
+            File.objects.filter(local_file_id__in=[file_id_1, file_id_2]).values_list(
+                "contentnode_id", flat=True
+            )
+        )
+        for node_id in available_ids:
+            self.assertEqual(stats[node_id]["total_resources"], 1)
+        root = ContentNode.objects.get(channel_id=test_channel_id, parent=None)
+        self.assertEqual(stats[root.id]["total_resources"], len(available_ids))
+
+    def test_channel_annotation_not_modified(self):
+        File.objects.update(supplementary=False)
+        before = list(ContentNode.objects.values_list("id", "available").order_by("id"))
+        get_channel_annotation_stats(test_channel_id)
+        after = list(ContentNode.objects.values_list("id", "available").order_by("id"))
+        self.assertEqual(before, after)
+
+    def test_new_resources(self):
+        File.objects.update(supplementary=False)
+        LocalFile.objects.update(available=True)
+        node = ContentNode.objects.filter(
+            channel_id=test_channel_id, parent__isnull=False
+        ).exclude(kind=content_kinds.TOPIC)[0]
+        process_cache.set(
+            CHANNEL_UPDATE_STATS_CACHE_KEY.format(test_channel_id),
+            {"new_resource_ids": [node.id], "updated_resource_ids": []},
+        )
+        stats = get_channel_annotation_stats(test_channel_id, [])
+        self.assertTrue(stats[node.id]["new_resource"])
+        self.assertEqual(stats[node.parent_id]["num_new_resources"], 1)
+
     def tearDown(self):
         call_command("flush", interactive=False)
+        process_cache.clear()
         super(ImportabilityStats, self).tearDown()
@@ -101,3 +101,40 @@ class ImportMetadataTestCase(APITestCase):
             + "?schema_version={}".format(CONTENT_SCHEMA_VERSION)
         )
         self.assertEqual(response.status_code, 200)
+
+    def _get_batch(self, ids):
+        return self.client.get(
+            reverse("kolibri:core:importmetadata-list"), {"ids": ",".join(ids)}
+        )
+
+    def test_import_metadata_batch(self):
+        other_node = (
+            self.root.get_descendants()
+            .exclude(kind=content_kinds.TOPIC)
+            .exclude(id=self.node.id)
+            .first()
+        )
+        response = self._get_batch([self.node.id, other_node.id, "a" * 32])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        node_ids = [
+            node["id"] for node in response.data[0][content.ContentNode._meta.db_table]
+        ]
+        # Shared ancestors are only returned once
+        self.assertEqual(len(node_ids), len(set(node_ids)))
+        expected_ids = set(self.all_nodes.values_list("id", flat=True)) | set(
+            other_node.get_ancestors(include_self=True).values_list("id", flat=True)
+        )
+        self.assertEqual(set(node_ids), expected_ids)
+        self.assertEqual(
+            response.data[0][content.ChannelMetadata._meta.db_table][0]["id"],
+            self.root.channel_id,
+        )
+
+    def test_import_metadata_batch_no_ids(self):
+        response = self.client.get(reverse("kolibri:core:importmetadata-list"))
+        self.assertEqual(response.status_code, 400)
+
+    def test_import_metadata_batch_invalid_ids(self):
+        response = self._get_batch(["not a node id"])
+        self.assertEqual(response.status_code, 400)
@@ -4,6 +4,7 @@ from datetime import timedelta
 from functools import partial
 
 import mock
+from django.test import SimpleTestCase
 from django.test import TestCase
 from django.utils import timezone
 from morango.models.core import SyncSession
@@ -17,6 +18,7 @@ from kolibri.core.content.models import ContentRequestReason
 from kolibri.core.content.models import ContentRequestStatus
 from kolibri.core.content.models import File
 from kolibri.core.content.models import LocalFile
+from kolibri.core.content.utils.content_request import _import_metadata
 from kolibri.core.content.utils.content_request import _process_content_requests
 from kolibri.core.content.utils.content_request import _process_download
 from kolibri.core.content.utils.content_request import _total_size
@@ -34,6 +36,9 @@ from kolibri.core.content.utils.file_availability import LocationError
 from kolibri.core.discovery.models import ConnectionStatus
 from kolibri.core.discovery.models import NetworkLocation
 from kolibri.core.discovery.utils.network.errors import NetworkError
+from kolibri.core.discovery.utils.network.errors import (
+    NetworkLocationResponseFailure,
+)
 
 
 _module = "kolibri.core.content.utils.content_request."
@@ -341,6 +346,53 @@ class ProcessMetadataImportTestCase(BaseTestCase):
         )  # peer3
 
 
+@mock.patch(_module + "import_channel_from_data")
+class ImportMetadataTestCase(SimpleTestCase):
+    def setUp(self):
+        self.mock_client = mock.MagicMock()
+        self.node_ids = [uuid.uuid4().hex for _ in range(3)]
+
+    def _metadata(self, node_ids):
+        return {
+            "content_contentnode": [{"id": node_id} for node_id in node_ids],
+            "content_channelmetadata": [{"id": uuid.uuid4().hex}],
+        }
+
+    def test_batched(self, mock_import):
+        self.mock_client.get.return_value.json.return_value = [
+            self._metadata([uuid.uuid4().hex] + self.node_ids[:2])
+        ]
+        self.assertFalse(_import_metadata(self.mock_client, self.node_ids))
+        self.mock_client.get.assert_called_once()
+        self.assertEqual(
+            self.mock_client.get.call_args[1]["params"]["ids"],
+            ",".join(self.node_ids),
+        )
+        mock_import.assert_called_once()
+
+    @mock.patch(_module + "METADATA_IMPORT_BATCH_SIZE", 2)
+    def test_batched_multiple_batches(self, mock_import):
+        self.mock_client.get.return_value.json.side_effect = [
+            [self._metadata(self.node_ids[:2])],
+            [self._metadata(self.node_ids[2:])],
+        ]
+        self.assertTrue(_import_metadata(self.mock_client, self.node_ids))
+        self.assertEqual(self.mock_client.get.call_count, 2)
+        self.assertEqual(mock_import.call_count, 2)
+
+    def test_unsupported_batch_fallback(self, mock_import):
+        response = mock.MagicMock(status_code=404)
+        self.mock_client.get.side_effect = [
+            NetworkLocationResponseFailure(response=response),
+        ] + [
+            mock.MagicMock(json=mock.MagicMock(return_value=self._metadata([node_id])))
+            for node_id in self.node_ids
+        ]
+        self.assertTrue(_import_metadata(self.mock_client, self.node_ids))
+        self.assertEqual(self.mock_client.get.call_count, 4)
+        self.assertEqual(mock_import.call_count, 3)
+
+
 class BaseQuerysetTestCase(BaseTestCase):
     @classmethod
     def setUpTestData(cls):
@@ -0,0 +1,179 @@
+"""
+A persistent index of the content files stored on a drive, so that the availability of a
+channel's files on a drive can be checked without walking its whole content storage folder.
+
+The index is a small SQLite database in KOLIBRI_HOME, one per drive data folder, that records
+every directory of the content storage folder with its modification time, and the checksums of
+the files it contains. Adding or removing a file changes the modification time of its directory,
+so only the directories that changed since the last update need to be listed again.
+"""
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import time
+from contextlib import closing
+
+from kolibri.core.content.utils.paths import get_content_storage_dir_path
+from kolibri.utils import conf
+
+logger = logging.getLogger(__name__)
+
+checksum_regex = re.compile("^([a-f0-9]{32})$")
+
+CHECKSUM_INDEXES_DIR = "checksum_indexes"
+
+# The modification time of a directory changed less than this number of seconds ago
+# can change again within the resolution of the filesystem timestamps, so it is not stored
+# and the directory is listed again on the next update.
+RACY_MTIME_SECONDS = 2
+
+# Number of checksums looked up in the index in every query
+LOOKUP_BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime INTEGER
+);
+CREATE INDEX IF NOT EXISTS directories_parent ON directories (parent);
+CREATE TABLE IF NOT EXISTS checksums (
+    checksum TEXT NOT NULL,
+    directory TEXT NOT NULL,
+    PRIMARY KEY (checksum, directory)
+);
+CREATE INDEX IF NOT EXISTS checksums_directory ON checksums (directory);
+"""
+
+
+def get_checksum_index_path(datafolder):
+    key = hashlib.md5(os.path.abspath(datafolder).encode("utf-8")).hexdigest()
+    return os.path.join(conf.KOLIBRI_HOME, CHECKSUM_INDEXES_DIR, key + ".sqlite3")
+
+
+class DiskChecksumIndex(object):
+    def __init__(self, datafolder):
+        self.storage_dir = get_content_storage_dir_path(datafolder=datafolder)
+        self.index_path = get_checksum_index_path(datafolder)
+
+    def _connect(self):
+        index_dir = os.path.dirname(self.index_path)
+        if not os.path.isdir(index_dir):
+            os.makedirs(index_dir)
+        connection = sqlite3.connect(self.index_path, timeout=30)
+        connection.executescript(SCHEMA)
+        return connection
+
+    def _get_connection(self):
+        try:
+            return self._connect()
+        except sqlite3.DatabaseError as e:
+            # The index is only a cache of the contents of the drive, so rebuild it from scratch
+            logger.warning(
+                "Checksum index {} is corrupted, rebuilding it: {}".format(
+                    self.index_path, e
+                )
+            )
+            os.remove(self.index_path)
+            return self._connect()
+
+    def _delete_directories(self, connection, paths):
+        for path in paths:
+            pattern = path + os.sep + "%"
+            connection.execute(
+                "DELETE FROM checksums WHERE directory = ? OR directory LIKE ?",
+                (path, pattern),
+            )
+            connection.execute(
+                "DELETE FROM directories WHERE path = ? OR path LIKE ?",
+                (path, pattern),
+            )
+
+    def _scan_directory(self, connection, path, parent, mtime):
+        checksums = []
+        subdirectories = []
+        for entry in os.scandir(os.path.join(self.storage_dir, path)):
+            if entry.is_dir():
+                subdirectories.append(os.path.join(path, entry.name))
+            else:
+                checksum = os.path.splitext(entry.name)[0]
+                # Only add valid checksums formatted according to our standard filename
+                if checksum_regex.match(checksum):
+                    checksums.append(checksum)
+        connection.execute("DELETE FROM checksums WHERE directory = ?", (path,))
+        connection.executemany(
+            "INSERT OR IGNORE INTO checksums (checksum, directory) VALUES (?, ?)",
+            ((checksum, path) for checksum in checksums),
+        )
+        if time.time() - mtime / 1e9 < RACY_MTIME_SECONDS:
+            mtime = None
+        connection.execute(
+            "INSERT OR REPLACE INTO directories (path, parent, mtime) VALUES (?, ?, ?)",
+            (path, parent, mtime),
+        )
+        return subdirectories
+
+    def update(self):
+        """
+        Updates the index with the directories of the content storage folder
+        that have been modified since the last update.
+        """
+        with closing(self._get_connection()) as connection, connection:
+            stored = {
+                path: (parent, mtime)
+                for path, parent, mtime in connection.execute(
+                    "SELECT path, parent, mtime FROM directories"
+                )
+            }
+            children = {}
+            for path, (parent, _) in stored.items():
+                children.setdefault(parent, []).append(path)
+
+            pending = [("", None)]
+            while pending:
+                path, parent = pending.pop()
+                try:
+                    mtime = os.stat(os.path.join(self.storage_dir, path)).st_mtime_ns
+                except OSError:
+                    self._delete_directories(connection, [path])
+                    continue
+                if path in stored and stored[path][1] == mtime:
+                    subdirectories = children.get(path, [])
+                else:
+                    subdirectories = self._scan_directory(
+                        connection, path, parent, mtime
+                    )
+                    removed = set(children.get(path, [])) - set(subdirectories)
+                    self._delete_directories(connection, removed)
+                pending.extend((subdirectory, path) for subdirectory in subdirectories)
+
+    def intersection(self, checksums):
+        """
+        Returns the set of the given checksums that are present on the drive.
+        """
+        checksums = list(checksums)
+        available = set()
+        with closing(self._get_connection()) as connection:
+            for i in range(0, len(checksums), LOOKUP_BATCH_SIZE):
+                batch = checksums[i : i + LOOKUP_BATCH_SIZE]
+                available.update(
+                    checksum
+                    for (checksum,) in connection.execute(
+                        "SELECT DISTINCT checksum FROM checksums WHERE checksum IN ({})".format(
+                            ",".join("?" * len(batch))
+                        ),
+                        batch,
+                    )
+                )
+        return available
+
+
+def get_available_checksums_on_disk(datafolder, checksums):
+    """
+    Returns the set of the given checksums whose files are in the content storage of the data folder.
+    """
+    index = DiskChecksumIndex(datafolder)
+    index.update()
+    return index.intersection(checksums)
@@ -9,7 +9,6 @@ from django.db.models import Case
 from django.db.models import Exists
 from django.db.models import OuterRef
 from django.db.models import Q
-from django.db.models import QuerySet
 from django.db.models import Subquery
 from django.db.models import Sum
 from django.db.models import Value
@@ -52,6 +51,9 @@ from kolibri.utils.file_transfer import ChunkedFileDirectoryManager
 
 logger = logging.getLogger(__name__)
 
+# Number of content nodes whose metadata is requested from a peer at once
+METADATA_IMPORT_BATCH_SIZE = 50
+
 
 # request statuses that signify incomplete requests
 INCOMPLETE_STATUSES = [
@@ -537,6 +539,74 @@ def _get_import_metadata(client, contentnode_id):
         raise e
 
 
+def _get_import_metadata_batch(client, contentnode_ids):
+    """
+    Requests the metadata of many content nodes at once, deduplicated by the peer
+    :type client: NetworkClient
+    :type contentnode_ids: list
+    :return: A list with the import metadata for each channel of the nodes, or None if the peer
+        does not support batched metadata requests
+    :rtype: None|list
+    """
+    url_path = reverse_path("kolibri:core:importmetadata-list")
+    try:
+        response = client.get(url_path, params={"ids": ",".join(contentnode_ids)})
+        return response.json()
+    except NetworkLocationResponseFailure as e:
+        # peers running older versions of Kolibri do not have the batched endpoint
+        if e.response is not None and e.response.status_code in (404, 405):
+            logger.debug(
+                "Batched metadata request unsupported: GET {} {}".format(
+                    url_path, e.response.status_code
+                )
+            )
+            return None
+        raise e
+
+
+def _import_metadata_batch(client, contentnode_ids):
+    """
+    Imports the metadata of many content nodes with a single request, and a single channel
+    import for each of their channels
+    :type client: NetworkClient
+    :type contentnode_ids: list
+    :return: The set of the node ids whose metadata was imported, or None if the peer
+        does not support batched metadata requests
+    :rtype: None|set
+    """
+    batch_metadata = _get_import_metadata_batch(client, contentnode_ids)
+    if batch_metadata is None:
+        return None
+    requested_ids = set(contentnode_ids)
+    imported_ids = set()
+    for import_metadata in batch_metadata:
+        import_channel_from_data(import_metadata, cancel_check=False, partial=True)
+        imported_ids.update(
+            node["id"]
+            for node in import_metadata[ContentNode._meta.db_table]
+            if node["id"] in requested_ids
+        )
+    return imported_ids
+
+
+def _import_metadata_by_node(client, contentnode_ids):
+    """
+    Imports the metadata of content nodes with a request for each node
+    :type client: NetworkClient
+    :type contentnode_ids: list
+    :return: The set of the node ids whose metadata was imported
+    :rtype: set
+    """
+    imported_ids = set()
+    for contentnode_id in contentnode_ids:
+        import_metadata = _get_import_metadata(client, contentnode_id)
+        # if the request 404'd, then we wouldn't have this data
+        if import_metadata:
+            import_channel_from_data(import_metadata, cancel_check=False, partial=True)
+            imported_ids.add(contentnode_id)
+    return imported_ids
+
+
 def _import_metadata(client, contentnode_ids):
     """
     :type client: NetworkClient
@@ -544,33 +614,33 @@ def _import_metadata(client, contentnode_ids):
     :type contentnode_ids: QuerySet or list
     :return: A boolean indicating whether all metadata was imported successfully
     """
-    total_count = (
-        contentnode_ids.count()
-        if isinstance(contentnode_ids, QuerySet)
-        else len(contentnode_ids)
-    )
+    contentnode_ids = list(contentnode_ids)
+    total_count = len(contentnode_ids)
     # quick exit, without log noise, if nothing to do
     if not total_count:
         logging.debug("No content metadata to import")
         return
     processed_count = 0
+    batched = True
     logger.info("Importing content metadata for {} nodes".format(total_count))
-    for contentnode_id in contentnode_ids:
-        import_metadata = _get_import_metadata(client, contentnode_id)
-        # if the request 404'd, then we wouldn't have this data
-        if import_metadata:
-            processed_count += 1
-            import_channel_from_data(import_metadata, cancel_check=False, partial=True)
-            if processed_count % 10 == 0:
-                logger.info(
-                    "Imported content metadata for {} out of {} nodes".format(
-                        processed_count, total_count
-                    )
+    for i in range(0, total_count, METADATA_IMPORT_BATCH_SIZE):
+        batch = contentnode_ids[i : i + METADATA_IMPORT_BATCH_SIZE]
+        imported_ids = _import_metadata_batch(client, batch) if batched else None
+        if imported_ids is None:
+            # fallback to a request for each node, for peers without batched requests
+            batched = False
+            imported_ids = _import_metadata_by_node(client, batch)
+        for contentnode_id in batch:
+            if contentnode_id not in imported_ids:
+                logger.warning(
+                    "Failed to import content metadata for {}".format(contentnode_id)
                 )
-        else:
-            logger.warning(
-                "Failed to import content metadata for {}".format(contentnode_id)
+        processed_count += len(imported_ids)
+        logger.info(
+            "Imported content metadata for {} out of {} nodes".format(
+                processed_count, total_count
             )
+        )
     logger.info("Imported content metadata for {} nodes".format(processed_count))
     return total_count == processed_count
 
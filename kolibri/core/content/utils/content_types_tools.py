@@ -1,25 +1,41 @@
 from django.db.models import Q
+from django.utils.functional import SimpleLazyObject
 from le_utils.constants import content_kinds
 
 from kolibri.core.content.hooks import ContentRendererHook
 
-# Start with an empty Q object, as we'll be using OR to add conditions
-renderable_contentnodes_without_topics_q_filter = Q()
+# These are evaluated on first use, rather than when this module is imported, so that
+# importing it does not initialize the plugins deferred by the plugin registry.
 
-renderable_files_q_filter = Q()
 
-renderable_files_presets = set()
+def __renderable_files_presets():
+    presets = set()
+    # loop through all the registered content renderer hooks
+    for hook in ContentRendererHook.registered_hooks:
+        presets.update(hook.presets)
+    return presets
 
-# loop through all the registered content renderer hooks
-for hook in ContentRendererHook.registered_hooks:
-    for preset in hook.presets:
-        # iterate through each of the content presets that each hook can handle
-        # Extend the q filter by ORing with a q filter for this preset
-        renderable_contentnodes_without_topics_q_filter |= Q(files__preset=preset)
-        renderable_files_q_filter |= Q(preset=preset)
-        renderable_files_presets.add(preset)
+
+def __renderable_q_filter(field_name):
+    # Start with an empty Q object, as we'll be using OR to add conditions
+    q_filter = Q()
+    for hook in ContentRendererHook.registered_hooks:
+        for preset in hook.presets:
+            # iterate through each of the content presets that each hook can handle
+            # Extend the q filter by ORing with a q filter for this preset
+            q_filter |= Q(**{field_name: preset})
+    return q_filter
+
+
+renderable_contentnodes_without_topics_q_filter = SimpleLazyObject(
+    lambda: __renderable_q_filter("files__preset")
+)
+
+renderable_files_q_filter = SimpleLazyObject(lambda: __renderable_q_filter("preset"))
+
+renderable_files_presets = SimpleLazyObject(__renderable_files_presets)
 
 # Regardless of which renderers are installed, we can render topics!
-renderable_contentnodes_q_filter = (
-    Q(kind=content_kinds.TOPIC) | renderable_contentnodes_without_topics_q_filter
+renderable_contentnodes_q_filter = SimpleLazyObject(
+    lambda: Q(kind=content_kinds.TOPIC) | __renderable_q_filter("files__preset")
 )
@@ -1,20 +1,19 @@
+import binascii
+import hashlib
 import json
-import os
-import re
 from itertools import compress
 
-import requests
 from django.utils.text import compress_string
 
 from kolibri.core.content.models import LocalFile
 from kolibri.core.content.utils.channels import get_mounted_drive_by_id
-from kolibri.core.content.utils.paths import get_content_storage_dir_path
+from kolibri.core.content.utils.checksum_index import get_available_checksums_on_disk
 from kolibri.core.content.utils.paths import get_file_checksums_url
+from kolibri.core.device.models import ContentCacheKey
 from kolibri.core.discovery.models import NetworkLocation
+from kolibri.core.discovery.utils.network.client import PeerSession
 from kolibri.core.utils.cache import process_cache
 
-checksum_regex = re.compile("^([a-f0-9]{32})$")
-
 
 class LocationError(Exception):
     """
@@ -37,13 +36,148 @@ def _generate_mask_from_integer(integer_mask):
         integer_mask //= 2
 
 
+# Version 2 of the file checksums protocol exchanges checksums as their raw 16 byte digests,
+# and availability as a packed bitset, with the bit for the n-th checksum at bit n % 8 of byte n // 8.
+CHECKSUM_BYTES = 16
+
+# Returned by version 2 of the endpoint when the channel digest sent by the client
+# does not match its own, so the client needs to send the checksums it wants to check.
+CHECKSUMS_DIGEST_MISMATCH = 412
+
+PUBLIC_CHANNEL_CHECKSUMS_CACHE_KEY = "PUBLIC_CHANNEL_CHECKSUMS_{channel_id}_{cache_key}"
+
+
+def pack_checksums(checksums):
+    return b"".join(binascii.unhexlify(checksum) for checksum in checksums)
+
+
+def unpack_checksums(data):
+    if len(data) % CHECKSUM_BYTES:
+        raise ValueError("Checksums data must be a multiple of 16 bytes")
+    return [
+        binascii.hexlify(data[i : i + CHECKSUM_BYTES]).decode("ascii")
+        for i in range(0, len(data), CHECKSUM_BYTES)
+    ]
+
+
+def get_checksums_digest(checksums):
+    return hashlib.md5(pack_checksums(checksums)).hexdigest()
+
+
+def generate_checksum_bitset(checksums, available_checksums):
+    bitset = bytearray((len(checksums) + 7) // 8)
+    for i, checksum in enumerate(checksums):
+        if checksum in available_checksums:
+            bitset[i // 8] |= 1 << (i % 8)
+    return bytes(bitset)
+
+
+def _generate_mask_from_bitset(bitset):
+    for byte in bytearray(bitset):
+        for i in range(8):
+            yield bool(byte & (1 << i))
+
+
+def get_channel_checksums(channel_id):
+    """
+    Returns the sorted checksums of the non-supplementary files of a channel,
+    so that two devices with the same version of a channel produce the same list and digest.
+    """
+    return list(
+        LocalFile.objects.filter(
+            files__contentnode__channel_id=channel_id, files__supplementary=False
+        )
+        .values_list("id", flat=True)
+        .order_by("id")
+        .distinct()
+    )
+
+
+def get_channel_checksums_availability(channel_id):
+    """
+    Returns the digest of the checksums of a channel and the bitset of their availability on this device.
+    Cached until the content on the device changes, with the same lifetime that peers cache the result.
+    """
+    cache_key = PUBLIC_CHANNEL_CHECKSUMS_CACHE_KEY.format(
+        channel_id=channel_id, cache_key=ContentCacheKey.get_cache_key()
+    )
+    result = process_cache.get(cache_key)
+    if result is None:
+        checksums = get_channel_checksums(channel_id)
+        available_checksums = set(
+            LocalFile.objects.filter(
+                available=True,
+                files__contentnode__channel_id=channel_id,
+                files__supplementary=False,
+            ).values_list("id", flat=True)
+        )
+        result = (
+            get_checksums_digest(checksums),
+            generate_checksum_bitset(checksums, available_checksums),
+        )
+        process_cache.set(cache_key, result, 3600)
+    return result
+
+
+def _get_available_checksums_v2(session, channel_id, baseurl, channel_checksums):
+    """
+    First sends only the digest of the channel checksums, which is enough when the peer has
+    the same version of the channel, and the packed checksums otherwise.
+    Returns None if the peer does not support version 2 of the protocol.
+    """
+    url = get_file_checksums_url(channel_id, baseurl, version="2")
+    response = session.get(
+        url, params={"digest": get_checksums_digest(channel_checksums)}
+    )
+    if response.status_code == CHECKSUMS_DIGEST_MISMATCH:
+        response = session.post(
+            url,
+            data=compress_string(pack_checksums(channel_checksums)),
+            headers={"content-type": "application/gzip"},
+        )
+    if response.status_code == 200:
+        return set(
+            compress(channel_checksums, _generate_mask_from_bitset(response.content))
+        )
+    return None
+
+
+def _get_available_checksums_v1(session, channel_id, baseurl, channel_checksums):
+    response = session.post(
+        get_file_checksums_url(channel_id, baseurl),
+        data=compress_string(
+            bytes(json.dumps(list(channel_checksums)).encode("utf-8"))
+        ),
+        headers={"content-type": "application/gzip"},
+    )
+
+    # Do something if we got a successful return
+    if response.status_code == 200:
+        try:
+            integer_mask = int(response.content)
+
+            # Filter to avoid passing in bad checksums
+            return set(
+                compress(channel_checksums, _generate_mask_from_integer(integer_mask))
+            )
+        except (ValueError, TypeError):
+            # Bad JSON parsing will throw ValueError
+            # If the result of the json.loads is not iterable, a TypeError will be thrown
+            # If we end up here, just return None to allow us to cleanly continue
+            pass
+    return None
+
+
 def get_available_checksums_from_remote(channel_id, peer_id):
     """
     The current implementation prioritizes minimising requests to the remote server.
     In order to achieve this, it caches based on the baseurl and the channel_id.
-    Also, it POSTs the complete list of non-supplementary files to the rmeote endpoint,
-    and thus can keep this representation cached regardless of how the availability on
-    the local server has changed in the interim.
+    It first tries version 2 of the protocol, which only sends the digest of the sorted
+    list of non-supplementary files when the remote has the same channel version, or the
+    list as packed binary checksums otherwise. If the remote does not support it,
+    it POSTs the complete JSON list of non-supplementary files to the version 1 endpoint.
+    In both cases it can keep this representation cached regardless of how the availability
+    on the local server has changed in the interim.
     """
     try:
         baseurl = NetworkLocation.objects.values_list("base_url", flat=True).get(
@@ -56,42 +190,18 @@ def get_available_checksums_from_remote(channel_id, peer_id):
         baseurl=baseurl, channel_id=channel_id
     )
     if CACHE_KEY not in process_cache:
+        channel_checksums = get_channel_checksums(channel_id)
 
-        channel_checksums = (
-            LocalFile.objects.filter(
-                files__contentnode__channel_id=channel_id, files__supplementary=False
-            )
-            .values_list("id", flat=True)
-            .distinct()
-        )
-
-        response = requests.post(
-            get_file_checksums_url(channel_id, baseurl),
-            data=compress_string(
-                bytes(json.dumps(list(channel_checksums)).encode("utf-8"))
-            ),
-            headers={"content-type": "application/gzip"},
+        session = PeerSession.for_address(baseurl)
+        checksums = _get_available_checksums_v2(
+            session, channel_id, baseurl, channel_checksums
         )
-
-        checksums = None
-
-        # Do something if we got a successful return
-        if response.status_code == 200:
-            try:
-                integer_mask = int(response.content)
-
-                # Filter to avoid passing in bad checksums
-                checksums = set(
-                    compress(
-                        channel_checksums, _generate_mask_from_integer(integer_mask)
-                    )
-                )
-                process_cache.set(CACHE_KEY, checksums, 3600)
-            except (ValueError, TypeError):
-                # Bad JSON parsing will throw ValueError
-                # If the result of the json.loads is not iterable, a TypeError will be thrown
-                # If we end up here, just set checksums to None to allow us to cleanly continue
-                pass
+        if checksums is None:
+            checksums = _get_available_checksums_v1(
+                session, channel_id, baseurl, channel_checksums
+            )
+        if checksums is not None:
+            process_cache.set(CACHE_KEY, checksums, 3600)
     else:
         checksums = process_cache.get(CACHE_KEY)
     return checksums
@@ -102,34 +212,21 @@ def get_available_checksums_from_disk(channel_id, drive_id):
         basepath = get_mounted_drive_by_id(drive_id).datafolder
     except KeyError:
         raise LocationError("Drive with id {} does not exist".format(drive_id))
-    PER_DISK_CACHE_KEY = "DISK_AVAILABLE_CHECKSUMS_{basepath}".format(basepath=basepath)
     PER_DISK_PER_CHANNEL_CACHE_KEY = (
         "DISK_AVAILABLE_CHECKSUMS_{basepath}_{channel_id}".format(
             basepath=basepath, channel_id=channel_id
         )
     )
     if PER_DISK_PER_CHANNEL_CACHE_KEY not in process_cache:
-        if PER_DISK_CACHE_KEY not in process_cache:
-            content_dir = get_content_storage_dir_path(datafolder=basepath)
-
-            disk_checksums = []
-
-            for _, _, files in os.walk(content_dir):
-                for name in files:
-                    checksum = os.path.splitext(name)[0]
-                    # Only add valid checksums formatted according to our standard filename
-                    if checksum_regex.match(checksum):
-                        disk_checksums.append(checksum)
-            # Cache is per device, so a relatively long lived one should
-            # be fine.
-            process_cache.set(PER_DISK_CACHE_KEY, disk_checksums, 3600)
-        else:
-            disk_checksums = process_cache.get(PER_DISK_CACHE_KEY)
-        checksums = set(
-            LocalFile.objects.filter(
-                files__contentnode__channel_id=channel_id
-            ).values_list("id", flat=True)
-        ).intersection(set(disk_checksums))
+        # The checksum index persists across restarts and is only updated for
+        # the directories of the drive that have changed, so it is cheap to
+        # check it whenever the per channel result is not cached.
+        checksums = get_available_checksums_on_disk(
+            basepath,
+            LocalFile.objects.filter(files__contentnode__channel_id=channel_id)
+            .values_list("id", flat=True)
+            .distinct(),
+        )
         process_cache.set(PER_DISK_PER_CHANNEL_CACHE_KEY, checksums, 3600)
     else:
         checksums = process_cache.get(PER_DISK_PER_CHANNEL_CACHE_KEY)
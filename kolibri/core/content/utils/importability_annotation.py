@@ -1,18 +1,10 @@
 import logging
 
 from le_utils.constants import content_kinds
-from sqlalchemy import and_
-from sqlalchemy import cast
-from sqlalchemy import exists
-from sqlalchemy import func
-from sqlalchemy import Integer
-from sqlalchemy import or_
-from sqlalchemy import select
-
-from kolibri.core.content.apps import KolibriContentConfig
+
+from kolibri.core.content.models import ChannelMetadata
 from kolibri.core.content.models import ContentNode
 from kolibri.core.content.models import File
-from kolibri.core.content.models import LocalFile
 from kolibri.core.content.utils.channels import CHANNEL_UPDATE_STATS_CACHE_KEY
 from kolibri.core.content.utils.content_types_tools import renderable_files_presets
 from kolibri.core.content.utils.file_availability import (
@@ -21,332 +13,136 @@ from kolibri.core.content.utils.file_availability import (
 from kolibri.core.content.utils.file_availability import (
     get_available_checksums_from_remote,
 )
-from kolibri.core.content.utils.sqlalchemybridge import Bridge
-from kolibri.core.content.utils.sqlalchemybridge import coerce_key
-from kolibri.core.content.utils.sqlalchemybridge import filter_by_checksums
-from kolibri.core.content.utils.sqlalchemybridge import filter_by_uuids
-from kolibri.core.content.utils.tree import get_channel_node_depth
 from kolibri.core.utils.cache import process_cache
 
 logger = logging.getLogger(__name__)
 
-CONTENT_APP_NAME = KolibriContentConfig.label
-
-
-def get_channel_annotation_stats(channel_id, checksums=None):  # noqa
-    bridge = Bridge(app_name=CONTENT_APP_NAME)
-
-    ContentNodeTable = bridge.get_table(ContentNode)
-    FileTable = bridge.get_table(File)
-    LocalFileTable = bridge.get_table(LocalFile)
-    if checksums is not None:
-        file_table = FileTable.join(
-            LocalFileTable,
-            and_(
-                FileTable.c.local_file_id == LocalFileTable.c.id,
-                or_(
-                    filter_by_checksums(LocalFileTable.c.id, checksums),
-                    LocalFileTable.c.available == True,  # noqa
-                ),
-            ),
-        )
-    else:
-        file_table = FileTable.join(
-            LocalFileTable, FileTable.c.local_file_id == LocalFileTable.c.id
-        )
-
-    contentnode_statement = (
-        select(FileTable.c.contentnode_id)
-        .select_from(file_table)
-        .where(FileTable.c.supplementary == False)  # noqa
-        .where(
-            or_(*(FileTable.c.preset == preset for preset in renderable_files_presets))
-        )
-        .where(ContentNodeTable.c.id == FileTable.c.contentnode_id)
-    )
-    connection = bridge.get_connection()
-
-    # start a transaction
 
-    trans = connection.begin()
-
-    connection.execute(
-        ContentNodeTable.update()
-        .where(
-            and_(
-                ContentNodeTable.c.kind != content_kinds.TOPIC,
-                ContentNodeTable.c.channel_id == channel_id,
-            )
-        )
-        .values(available=exists(contentnode_statement))
+class NodeStats(object):
+    __slots__ = (
+        "available",
+        "coach_content",
+        "num_coach_contents",
+        "total_resources",
+        "num_new_resources",
+        "has_new_resources",
     )
 
-    node_depth = get_channel_node_depth(bridge, channel_id)
-
-    child = ContentNodeTable.alias()
-
-    # Update all leaf ContentNodes to have num_coach_content to 1 or 0
-    # Update all leaf ContentNodes to have on_device_resources to 1 or 0
-    connection.execute(
-        ContentNodeTable.update()
-        .where(
-            and_(
-                # In this channel
-                ContentNodeTable.c.channel_id == channel_id,
-                # That are not topics
-                ContentNodeTable.c.kind != content_kinds.TOPIC,
-            )
-        )
-        .values(
-            num_coach_contents=cast(ContentNodeTable.c.coach_content, Integer()),
-            on_device_resources=cast(ContentNodeTable.c.available, Integer()),
-        )
-    )
-
-    # Before starting set availability to False on all topics.
-    connection.execute(
-        ContentNodeTable.update()
-        .where(
-            and_(
-                # In this channel
-                ContentNodeTable.c.channel_id == channel_id,
-                # That are topics
-                ContentNodeTable.c.kind == content_kinds.TOPIC,
-            )
-        )
-        .values(available=False)
+    def __init__(self, coach_content):
+        self.available = False
+        self.coach_content = coach_content
+        self.num_coach_contents = 0
+        self.total_resources = 0
+        self.num_new_resources = 0
+        self.has_new_resources = False
+
+
+def _get_available_leaf_ids(channel_id, checksums):
+    """
+    Returns the ids of the resources of the channel with a renderable file
+    that is either in the checksums or already available on this device.
+    If checksums is None, all the files of the channel are considered available.
+    """
+    files = File.objects.filter(
+        contentnode__channel_id=channel_id,
+        supplementary=False,
+        preset__in=renderable_files_presets,
     )
+    if checksums is None:
+        return set(files.values_list("contentnode_id", flat=True))
+    checksums = set(checksums)
+    return {
+        contentnode_id
+        for contentnode_id, local_file_id, available in files.values_list(
+            "contentnode_id", "local_file_id", "local_file__available"
+        )
+        if available or local_file_id in checksums
+    }
 
-    # Expression to capture all available child nodes of a contentnode
-    available_nodes = select(child.c.available).where(
-        and_(
-            child.c.available == True,  # noqa
-            ContentNodeTable.c.id == child.c.parent_id,
-        )
-    )
 
-    # Expressions for annotation of coach content
-
-    # Expression that will resolve a boolean value for all the available children
-    # of a content node, whereby if they all have coach_content flagged on them, it will be true,
-    # but otherwise false.
-    # Everything after the select statement should be identical to the available_nodes expression above.
-    if bridge.engine.name == "sqlite":
-        # Use a min function to simulate an AND.
-        coach_content_nodes = select(func.min(child.c.coach_content)).where(
-            and_(
-                child.c.available == True,  # noqa
-                ContentNodeTable.c.id == child.c.parent_id,
-            )
-        )
-    elif bridge.engine.name == "postgresql":
-        # Use the postgres boolean AND operator
-        coach_content_nodes = select(func.bool_and(child.c.coach_content)).where(
-            and_(
-                child.c.available == True,  # noqa
-                ContentNodeTable.c.id == child.c.parent_id,
-            )
-        )
-
-    # Expression that sums the total number of coach contents for each child node
-    # of a contentnode
-    coach_content_num = select(func.sum(child.c.num_coach_contents)).where(
-        and_(
-            child.c.available == True,  # noqa
-            ContentNodeTable.c.id == child.c.parent_id,
-        )
+def _annotate_tree(nodes, available_leaf_ids, new_resource_ids):
+    """
+    Aggregates the stats of the resources into their ancestors in a single pass
+    over the nodes, which must be sorted from the deepest level.
+    """
+    # Topics are initialized with their stored coach_content,
+    # which is kept if they have no available children
+    node_stats = {node[0]: NodeStats(node[4]) for node in nodes}
+
+    for node_id, parent_id, kind, _, coach_content in nodes:
+        stats = node_stats[node_id]
+        if kind != content_kinds.TOPIC:
+            stats.available = node_id in available_leaf_ids
+            stats.num_coach_contents = int(bool(coach_content))
+            stats.total_resources = int(stats.available)
+            stats.has_new_resources = node_id in new_resource_ids
+            stats.num_new_resources = int(stats.has_new_resources)
+        if parent_id is None:
+            continue
+        # As nodes are sorted from the deepest level, all the children of the parent
+        # have been visited when the parent is reached.
+        parent = node_stats[parent_id]
+        if stats.available:
+            # The coach_content of a topic is true if all its available children are coach content
+            parent.coach_content = (
+                parent.coach_content if parent.available else True
+            ) and bool(stats.coach_content)
+            parent.available = True
+            parent.num_coach_contents += stats.num_coach_contents
+            parent.total_resources += stats.total_resources
+        if stats.has_new_resources:
+            parent.has_new_resources = True
+            parent.num_new_resources += stats.num_new_resources
+    return node_stats
+
+
+def get_channel_annotation_stats(channel_id, checksums=None):
+    """
+    Computes, for every available node of the channel, the number of resources and coach
+    resources that are importable from a source that has the files with the given checksums.
+    The whole tree is loaded with a single query and annotated in memory from the deepest
+    level up, so the annotation of the channel in the database is never modified.
+    """
+    nodes = list(
+        ContentNode.objects.filter(channel_id=channel_id)
+        .order_by("-level")
+        .values_list("id", "parent_id", "kind", "level", "coach_content")
     )
+    if not nodes:
+        return {}
 
-    # Expression that sums the total number of on_device_resources for each child node
-    # of a contentnode
-    on_device_num = select(func.sum(child.c.on_device_resources)).where(
-        and_(
-            child.c.available == True,  # noqa
-            ContentNodeTable.c.id == child.c.parent_id,
-        )
-    )
-
-    stats = {}
-
-    # Go from the deepest level to the shallowest
-    for level in range(node_depth, 0, -1):
-
-        # Only modify topic availability here
-        connection.execute(
-            ContentNodeTable.update()
-            .where(
-                and_(
-                    ContentNodeTable.c.level == level - 1,
-                    ContentNodeTable.c.channel_id == channel_id,
-                    ContentNodeTable.c.kind == content_kinds.TOPIC,
-                )
-            )
-            # Because we have set availability to False on all topics as a starting point
-            # we only need to make updates to topics with available children.
-            .where(exists(available_nodes))
-            .values(
-                available=exists(available_nodes),
-                coach_content=coach_content_nodes.scalar_subquery(),
-                num_coach_contents=coach_content_num.scalar_subquery(),
-                on_device_resources=on_device_num.scalar_subquery(),
-            )
-        )
-
-        level_stats = connection.execute(
-            select(
-                [
-                    ContentNodeTable.c.id,
-                    ContentNodeTable.c.coach_content,
-                    ContentNodeTable.c.num_coach_contents,
-                    ContentNodeTable.c.on_device_resources,
-                ]
-            ).where(
-                and_(
-                    ContentNodeTable.c.level == level,
-                    ContentNodeTable.c.channel_id == channel_id,
-                    ContentNodeTable.c.available == True,  # noqa
-                )
-            )
-        )
-
-        for stat in level_stats:
-            stats[coerce_key(stat[0])] = {
-                "coach_content": bool(stat[1]),
-                "num_coach_contents": stat[2] or 0,
-                "total_resources": stat[3] or 0,
-            }
-
-    root_node_stats = connection.execute(
-        select(
-            [
-                ContentNodeTable.c.id,
-                ContentNodeTable.c.coach_content,
-                ContentNodeTable.c.num_coach_contents,
-                ContentNodeTable.c.on_device_resources,
-            ]
-        ).where(
-            and_(
-                ContentNodeTable.c.level == 0,
-                ContentNodeTable.c.channel_id == channel_id,
-            )
-        )
-    ).fetchone()
-
-    stats[coerce_key(root_node_stats[0])] = {
-        "coach_content": root_node_stats[1],
-        "num_coach_contents": root_node_stats[2],
-        "total_resources": root_node_stats[3],
-    }
-
-    # rollback the transaction to undo the temporary annotation
-    trans.rollback()
+    available_leaf_ids = _get_available_leaf_ids(channel_id, checksums)
 
     new_resource_stats = process_cache.get(
         CHANNEL_UPDATE_STATS_CACHE_KEY.format(channel_id)
     )
+    new_resource_ids = set((new_resource_stats or {}).get("new_resource_ids") or [])
 
-    if new_resource_stats and new_resource_stats.get("new_resource_ids"):
+    node_stats = _annotate_tree(nodes, available_leaf_ids, new_resource_ids)
 
-        trans = connection.begin()
-
-        # Here we are using the on_device_resources key to track 'newness'
-        # set everything to false to start with.
-
-        connection.execute(
-            ContentNodeTable.update()
-            .where(ContentNodeTable.c.channel_id == channel_id)
-            .values(available=False, on_device_resources=0)
-        )
-
-        i = 0
-        batch_size = 1000
-
-        # Now set all new resources as 'available' in batches of 1000
-        new_resource_ids = new_resource_stats.get("new_resource_ids")[
-            i : i + batch_size
-        ]
-
-        while new_resource_ids:
-            connection.execute(
-                ContentNodeTable.update()
-                .where(
-                    and_(
-                        ContentNodeTable.c.channel_id == channel_id,
-                        filter_by_uuids(ContentNodeTable.c.id, new_resource_ids),
-                    )
-                )
-                .values(available=True, on_device_resources=1)
-            )
-
-            i += batch_size
-            new_resource_ids = new_resource_stats.get("new_resource_ids")[
-                i : i + batch_size
-            ]
-
-        # Go from the deepest level to the shallowest
-        for level in range(node_depth, 0, -1):
-
-            # Only modify topic availability here
-            connection.execute(
-                ContentNodeTable.update()
-                .where(
-                    and_(
-                        ContentNodeTable.c.level == level - 1,
-                        ContentNodeTable.c.channel_id == channel_id,
-                        ContentNodeTable.c.kind == content_kinds.TOPIC,
-                    )
-                )
-                # Because we have set availability to False on all topics as a starting point
-                # we only need to make updates to topics with available children.
-                .where(exists(available_nodes))
-                .values(available=True, on_device_resources=on_device_num)
-            )
-
-            level_stats = connection.execute(
-                select(
-                    [ContentNodeTable.c.id, ContentNodeTable.c.on_device_resources]
-                ).where(
-                    and_(
-                        ContentNodeTable.c.level == level,
-                        ContentNodeTable.c.channel_id == channel_id,
-                        ContentNodeTable.c.available == True,  # noqa
-                    )
-                )
-            )
-
-            for stat in level_stats:
-                key = coerce_key(stat[0])
-                if key in stats:
-                    stats[key]["new_resource"] = True
-                    stats[key]["num_new_resources"] = stat[1]
-
-        root_node_stats = connection.execute(
-            select(ContentNodeTable.c.id).where(
-                and_(
-                    ContentNodeTable.c.level == 0,
-                    ContentNodeTable.c.channel_id == channel_id,
-                )
-            )
-        ).fetchone()
-
-        # If there are any new resource ids then the root node has new resources
-        key = coerce_key(root_node_stats[0])
-        if key in stats:
-            stats[key]["new_resource"] = True
-            stats[key]["num_new_resources"] = len(
-                new_resource_stats.get("new_resource_ids")
-            )
-
-        # rollback the transaction to undo the temporary annotation
-        trans.rollback()
+    stats = {}
+    for node_id, parent_id, _, _, _ in nodes:
+        node = node_stats[node_id]
+        if parent_id is not None and not node.available:
+            continue
+        stats[node_id] = {
+            "coach_content": bool(node.coach_content),
+            "num_coach_contents": node.num_coach_contents,
+            "total_resources": node.total_resources,
+        }
+        if parent_id is None and new_resource_ids:
+            # If there are any new resource ids then the root node has new resources
+            stats[node_id]["new_resource"] = True
+            stats[node_id]["num_new_resources"] = len(new_resource_ids)
+        elif node.has_new_resources:
+            stats[node_id]["new_resource"] = True
+            stats[node_id]["num_new_resources"] = node.num_new_resources
 
     if new_resource_stats and new_resource_stats.get("updated_resource_ids"):
         for key in new_resource_stats.get("updated_resource_ids"):
             if key in stats:
                 stats[key]["updated_resource"] = True
 
-    bridge.end()
-
     return stats
 
 
@@ -365,43 +161,52 @@ def register_key_as_cached(key, channel_id):
     )
 
 
-def get_channel_stats_from_disk(channel_id, drive_id):
-    CACHE_KEY = "DISK_CHANNEL_STATS_{drive_id}_{channel_id}".format(
-        drive_id=drive_id, channel_id=channel_id
+def _get_channel_version(channel_id):
+    return (
+        ChannelMetadata.objects.filter(id=channel_id)
+        .values_list("version", flat=True)
+        .first()
     )
-    if CACHE_KEY not in process_cache:
-        checksums = get_available_checksums_from_disk(channel_id, drive_id)
-        channel_stats = get_channel_annotation_stats(channel_id, checksums)
+
+
+def _get_cached_channel_stats(cache_key, channel_id, get_checksums):
+    # Stats are keyed by the channel version, so that they are never reused
+    # across channel updates, even if clear_channel_stats was not called.
+    CACHE_KEY = "{}_{}".format(cache_key, _get_channel_version(channel_id))
+    channel_stats = process_cache.get(CACHE_KEY)
+    if channel_stats is None:
+        channel_stats = get_channel_annotation_stats(channel_id, get_checksums())
         process_cache.set(CACHE_KEY, channel_stats, 3600)
         register_key_as_cached(CACHE_KEY, channel_id)
-    else:
-        channel_stats = process_cache.get(CACHE_KEY)
     return channel_stats
 
 
+def get_channel_stats_from_disk(channel_id, drive_id):
+    return _get_cached_channel_stats(
+        "DISK_CHANNEL_STATS_{drive_id}_{channel_id}".format(
+            drive_id=drive_id, channel_id=channel_id
+        ),
+        channel_id,
+        lambda: get_available_checksums_from_disk(channel_id, drive_id),
+    )
+
+
 def get_channel_stats_from_peer(channel_id, peer_id):
-    CACHE_KEY = "PEER_CHANNEL_STATS_{peer_id}_{channel_id}".format(
-        peer_id=peer_id, channel_id=channel_id
+    return _get_cached_channel_stats(
+        "PEER_CHANNEL_STATS_{peer_id}_{channel_id}".format(
+            peer_id=peer_id, channel_id=channel_id
+        ),
+        channel_id,
+        lambda: get_available_checksums_from_remote(channel_id, peer_id),
     )
-    if CACHE_KEY not in process_cache:
-        checksums = get_available_checksums_from_remote(channel_id, peer_id)
-        channel_stats = get_channel_annotation_stats(channel_id, checksums)
-        process_cache.set(CACHE_KEY, channel_stats, 3600)
-        register_key_as_cached(CACHE_KEY, channel_id)
-    else:
-        channel_stats = process_cache.get(CACHE_KEY)
-    return channel_stats
 
 
 def get_channel_stats_from_studio(channel_id):
-    CACHE_KEY = "STUDIO_CHANNEL_STATS_{channel_id}".format(channel_id=channel_id)
-    if CACHE_KEY not in process_cache:
-        channel_stats = get_channel_annotation_stats(channel_id)
-        process_cache.set(CACHE_KEY, channel_stats, 3600)
-        register_key_as_cached(CACHE_KEY, channel_id)
-    else:
-        channel_stats = process_cache.get(CACHE_KEY)
-    return channel_stats
+    return _get_cached_channel_stats(
+        "STUDIO_CHANNEL_STATS_{channel_id}".format(channel_id=channel_id),
+        channel_id,
+        lambda: None,
+    )
 
 
 def clear_channel_stats(channel_id):
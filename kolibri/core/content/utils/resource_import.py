@@ -23,6 +23,7 @@ from kolibri.core.content.utils.paths import get_content_file_name
 from kolibri.core.content.utils.upgrade import get_import_data_for_update
 from kolibri.core.discovery.models import NetworkLocation
 from kolibri.core.discovery.utils.network.client import NetworkClient
+from kolibri.core.discovery.utils.network.client import PeerSession
 from kolibri.core.discovery.utils.network.errors import NetworkLocationNotFound
 from kolibri.core.discovery.utils.network.errors import NetworkLocationResponseFailure
 from kolibri.core.discovery.utils.network.errors import NetworkLocationResponseTimeout
@@ -43,7 +44,10 @@ def lookup_channel_listing_status(channel_id, baseurl=None):
     Look up the listing status of the channel from the remote, this is surfaced as a
     `public` boolean field.
     """
-    resp = requests.get(get_channel_lookup_url(identifier=channel_id, baseurl=baseurl))
+    session = PeerSession.for_address(
+        baseurl or conf.OPTIONS["Urls"]["CENTRAL_CONTENT_BASE_URL"]
+    )
+    resp = session.get(get_channel_lookup_url(identifier=channel_id, baseurl=baseurl))
 
     # Raise here to prevent trying to fetch a channel from a remote that it is not
     # available from.
@@ -391,7 +395,8 @@ class RemoteResourceImportManagerBase(ResourceImportManagerBase):
             channel_id=channel_id, baseurl=baseurl
         )
 
-        self.session = requests.Session()
+        # Share the pooled keep-alive connections to the peer with the other clients
+        self.session = PeerSession.for_address(self.baseurl)
 
     def create_file_transfer(self, f, filename, dest):
         url = paths.get_content_storage_remote_url(filename, baseurl=self.baseurl)
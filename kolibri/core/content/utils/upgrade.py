@@ -1,14 +1,14 @@
 import logging
 import os
+from collections import defaultdict
 
 from django.core.management import call_command
 from le_utils.constants import content_kinds
 from sqlalchemy import and_
-from sqlalchemy import func
-from sqlalchemy import or_
 from sqlalchemy import select
 
 from kolibri.core.content.constants.schema_versions import CURRENT_SCHEMA_VERSION
+from kolibri.core.content.models import ChannelMetadata
 from kolibri.core.content.models import ContentNode
 from kolibri.core.content.models import File
 from kolibri.core.content.models import LocalFile
@@ -32,7 +32,6 @@ from kolibri.core.content.utils.paths import get_annotated_content_database_file
 from kolibri.core.content.utils.paths import get_upgrade_content_database_file_path
 from kolibri.core.content.utils.sqlalchemybridge import Bridge
 from kolibri.core.content.utils.sqlalchemybridge import coerce_key
-from kolibri.core.content.utils.sqlalchemybridge import filter_by_uuids
 from kolibri.core.tasks.exceptions import UserCancelledError
 from kolibri.core.tasks.utils import get_current_job
 from kolibri.core.utils.cache import process_cache
@@ -45,6 +44,46 @@ def clear_diff_stats(channel_id):
     process_cache.delete(CHANNEL_UPDATE_STATS_CACHE_KEY.format(channel_id))
 
 
+def _get_current_channel_version(channel_id):
+    return (
+        ChannelMetadata.objects.filter(id=channel_id)
+        .values_list("version", flat=True)
+        .first()
+    )
+
+
+def _annotate_job_with_diff_stats(stats):
+    job = get_current_job()
+    if job:
+        job.extra_metadata["new_resources_count"] = len(
+            stats["new_resource_content_ids"]
+        )
+        job.extra_metadata["deleted_resources_count"] = stats["deleted_resources_count"]
+        job.extra_metadata["updated_resources_count"] = len(
+            stats["updated_resource_content_ids"]
+        )
+        job.save_meta()
+
+
+def _get_precalculated_diff_stats(channel_id, source_path):
+    """
+    Returns the diff stats calculated by a previous run, if the upgrade database
+    is still in place and neither version of the channel has changed since.
+    """
+    stats = process_cache.get(CHANNEL_UPDATE_STATS_CACHE_KEY.format(channel_id))
+    job = get_current_job()
+    if not stats or not job or not os.path.exists(source_path):
+        return None
+    new_channel_version = job.extra_metadata.get("new_channel_version")
+    if (
+        new_channel_version is not None
+        and stats.get("new_channel_version") == new_channel_version
+        and stats.get("channel_version") == _get_current_channel_version(channel_id)
+    ):
+        return stats
+    return None
+
+
 def diff_stats(channel_id, method, drive_id=None, baseurl=None):
     """
     Download the channel database to an upgraded path.
@@ -53,6 +92,10 @@ def diff_stats(channel_id, method, drive_id=None, baseurl=None):
     """
     # upgraded content database path
     source_path = get_upgrade_content_database_file_path(channel_id)
+    stats = _get_precalculated_diff_stats(channel_id, source_path)
+    if stats is not None:
+        _annotate_job_with_diff_stats(stats)
+        return
     # annotated db to be used for calculating diff stats
     destination_path = get_annotated_content_database_file_path(channel_id)
     try:
@@ -87,22 +130,21 @@ def diff_stats(channel_id, method, drive_id=None, baseurl=None):
 
         # annotate file availability on destination db
         annotation.set_local_file_availability_from_disk(destination=destination_path)
+        channel_diff = ChannelDiff(destination_path, channel_id)
         # get the diff count between whats on the default db and the annotated db
         (
             new_resource_ids,
             new_resource_content_ids,
             new_resource_total_size,
-        ) = get_new_resources_available_for_import(destination_path, channel_id)
+        ) = channel_diff.new_resources()
         # get the count for leaf nodes which are in the default db, but not in the annotated db
-        resources_to_be_deleted_count = count_removed_resources(
-            destination_path, channel_id
-        )
+        resources_to_be_deleted_count = channel_diff.removed_resources_count()
         # get the ids of leaf nodes which are now incomplete due to missing local files
         (
             updated_resource_ids,
             updated_resource_content_ids,
             updated_resource_total_size,
-        ) = get_automatically_updated_resources(destination_path, channel_id)
+        ) = channel_diff.updated_resources()
         # remove the annotated database
         try:
             os.remove(destination_path)
@@ -112,30 +154,22 @@ def diff_stats(channel_id, method, drive_id=None, baseurl=None):
                     destination_path, e
                 )
             )
-        # annotate job metadata with diff stats
-        job = get_current_job()
-        if job:
-            job.extra_metadata["new_resources_count"] = len(new_resource_content_ids)
-            job.extra_metadata[
-                "deleted_resources_count"
-            ] = resources_to_be_deleted_count
-            job.extra_metadata["updated_resources_count"] = len(
-                updated_resource_content_ids
-            )
-            job.save_meta()
-
-        CACHE_KEY = CHANNEL_UPDATE_STATS_CACHE_KEY.format(channel_id)
+        stats = {
+            "new_resource_ids": new_resource_ids,
+            "new_resource_content_ids": new_resource_content_ids,
+            "new_resource_total_size": new_resource_total_size,
+            "deleted_resources_count": resources_to_be_deleted_count,
+            "updated_resource_ids": updated_resource_ids,
+            "updated_resource_content_ids": updated_resource_content_ids,
+            "updated_resource_total_size": updated_resource_total_size,
+            "channel_version": _get_current_channel_version(channel_id),
+            "new_channel_version": channel_metadata["version"],
+        }
+        _annotate_job_with_diff_stats(stats)
 
         process_cache.set(
-            CACHE_KEY,
-            {
-                "new_resource_ids": new_resource_ids,
-                "new_resource_content_ids": new_resource_content_ids,
-                "new_resource_total_size": new_resource_total_size,
-                "updated_resource_ids": updated_resource_ids,
-                "updated_resource_content_ids": updated_resource_content_ids,
-                "updated_resource_total_size": updated_resource_total_size,
-            },
+            CHANNEL_UPDATE_STATS_CACHE_KEY.format(channel_id),
+            stats,
             # Should persist until explicitly cleared (at content import)
             # or until server restart.
             None,
@@ -153,268 +187,160 @@ def diff_stats(channel_id, method, drive_id=None, baseurl=None):
 batch_size = 1000
 
 
-def get_new_resources_available_for_import(destination, channel_id):
+class ChannelDiff(object):
     """
-    Queries the destination db to get leaf nodes.
-    Subtract total number of leaf nodes by the count of leaf nodes on default db to get the number of new resources.
+    Compact in-memory representation of the resources of a channel in the annotated
+    upgrade database and in the default database, loaded with a single scan of each,
+    from which all the diff stats between both versions of the channel are computed.
     """
-    bridge = Bridge(app_name=CONTENT_APP_NAME, sqlite_file_path=destination)
-    # SQL Alchemy reference to the content node table
-    ContentNodeTable = bridge.get_table(ContentNode)
-    # SQL Alchemy reference to the file table - a mapping from
-    # contentnodes to the files that they use
-    FileTable = bridge.get_table(File)
-    # SQL Alchemy reference to the localfile table which tracks
-    # information about the files on disk, such as availability
-    LocalFileTable = bridge.get_table(LocalFile)
-    connection = bridge.get_connection()
-
-    # To efficiently get the node ids of all new nodes in the channel
-    # we are going to iterate over the currently existing nodes for the
-    # channel in the default database, and cache their existence in the
-    # temporary upgrade database by flagging them as 'available' in there
-    # We can then read out all of the unavailable ContentNodes in order
-    # to get a complete list of the newly available ids.
-    # We wrap this all in a transaction so that we can roll it back afterwards
-    # but this is mostly just not to leave the upgrade DB in a messy state
-    # and could be removed if it becomes a performance concern
-
-    # Create a queryset for the node ids of resources currently in this channel
-    # we will slice this later in a while loop in order to efficiently process this
-    # this is necessary otherwise we would end up querying tens of thousands of node ids
-    # for a large channel, which would then be impossible to pass into an update query
-    # for the temporary upgrade DB without causing an excessively large query
-    # greater than 1MB, which is the default max for SQLite
-    current_resource_node_id_queryset = (
-        ContentNode.objects.filter(channel_id=channel_id)
-        .exclude(kind=content_kinds.TOPIC)
-        .values_list("id", flat=True)
-    )
-
-    i = 0
-
-    # start a transaction
 
-    trans = connection.begin()
-
-    # Set everything to False to start with
-    connection.execute(
-        ContentNodeTable.update()
-        .where(ContentNodeTable.c.channel_id == channel_id)
-        .values(available=False)
-    )
-
-    node_ids = current_resource_node_id_queryset[i : i + batch_size]
-    while node_ids:
-        # Set everything to False to start with
-        connection.execute(
-            ContentNodeTable.update()
-            .where(
-                and_(
-                    filter_by_uuids(
-                        ContentNodeTable.c.id, node_ids, vendor=bridge.engine.name
+    def __init__(self, destination, channel_id):
+        bridge = Bridge(app_name=CONTENT_APP_NAME, sqlite_file_path=destination)
+        ContentNodeTable = bridge.get_table(ContentNode)
+        FileTable = bridge.get_table(File)
+        LocalFileTable = bridge.get_table(LocalFile)
+        connection = bridge.get_connection()
+
+        # content_ids of the resources of the new version of the channel, by node id
+        self.resources = {
+            coerce_key(node_id): coerce_key(content_id)
+            for node_id, content_id in connection.execute(
+                select([ContentNodeTable.c.id, ContentNodeTable.c.content_id]).where(
+                    and_(
+                        ContentNodeTable.c.channel_id == channel_id,
+                        ContentNodeTable.c.kind != content_kinds.TOPIC,
+                    )
+                )
+            )
+        }
+
+        # local file ids of all the files of every node of the new version of the channel,
+        # and of the files that make the node renderable
+        self.node_files = defaultdict(set)
+        self.renderable_node_files = defaultdict(set)
+        for node_id, local_file_id, supplementary, preset in connection.execute(
+            select(
+                [
+                    FileTable.c.contentnode_id,
+                    FileTable.c.local_file_id,
+                    FileTable.c.supplementary,
+                    FileTable.c.preset,
+                ]
+            ).select_from(
+                FileTable.join(
+                    ContentNodeTable,
+                    and_(
+                        FileTable.c.contentnode_id == ContentNodeTable.c.id,
+                        ContentNodeTable.c.channel_id == channel_id,
                     ),
-                    ContentNodeTable.c.channel_id == channel_id,
                 )
             )
-            .values(available=True)
-        )
-        i += batch_size
-        node_ids = current_resource_node_id_queryset[i : i + batch_size]
-
-    renderable_contentnodes = (
-        select(FileTable.c.contentnode_id)
-        .where(FileTable.c.supplementary == False)  # noqa
-        .where(
-            or_(*(FileTable.c.preset == preset for preset in renderable_files_presets))
-        )
-    )
-
-    contentnode_filter_expression = and_(
-        ContentNodeTable.c.channel_id == channel_id,
-        ContentNodeTable.c.kind != content_kinds.TOPIC,
-        ContentNodeTable.c.available == False,  # noqa
-        ContentNodeTable.c.id.in_(renderable_contentnodes),
-    )
-
-    new_resource_nodes_total_size = (
-        connection.execute(
-            # This does the first step in the many to many lookup for File
-            select(func.sum(LocalFileTable.c.file_size)).where(
-                LocalFileTable.c.id.in_(
-                    select(LocalFileTable.c.id)
-                    .select_from(
-                        # and LocalFile.
-                        LocalFileTable.join(
-                            FileTable.join(
-                                ContentNodeTable,
-                                FileTable.c.contentnode_id == ContentNodeTable.c.id,
-                            ),  # This does the actual correlation between file and local file
-                            FileTable.c.local_file_id == LocalFileTable.c.id,
-                        )
-                    )
-                    .where(
-                        and_(
-                            # Filter only for files that are unavailable so we show
-                            # the import size
-                            LocalFileTable.c.available == False,  # noqa
-                            contentnode_filter_expression,
-                        )
-                    )
+        ):
+            node_id = coerce_key(node_id)
+            local_file_id = coerce_key(local_file_id)
+            self.node_files[node_id].add(local_file_id)
+            if not supplementary and preset in renderable_files_presets:
+                self.renderable_node_files[node_id].add(local_file_id)
+
+        # sizes of the files that are not available on this device
+        self.unavailable_file_sizes = {
+            coerce_key(local_file_id): file_size or 0
+            for local_file_id, file_size in connection.execute(
+                select([LocalFileTable.c.id, LocalFileTable.c.file_size]).where(
+                    LocalFileTable.c.available == False  # noqa
                 )
             )
-        ).fetchone()[0]
-        or 0
-    )
-
-    new_resource_node_ids_statement = select(ContentNodeTable.c.id).where(
-        and_(
-            ContentNodeTable.c.channel_id == channel_id,
-            ContentNodeTable.c.kind != content_kinds.TOPIC,
-            ContentNodeTable.c.available == False,  # noqa
-        )
-    )
-
-    new_resource_node_ids = [
-        coerce_key(c[0])
-        for c in connection.execute(new_resource_node_ids_statement).fetchall()
-    ]
-
-    trans.rollback()
-
-    # Create a queryset for the content_ids of resources currently in this channel
-    # we will slice this later in a while loop in order to efficiently process this
-    # this is necessary otherwise we would end up querying tens of thousands of node ids
-    # for a large channel, which would then be impossible to pass into an update query
-    # for the temporary upgrade DB without causing an excessively large query
-    # greater than 1MB, which is the default max for SQLite
-    current_resource_content_id_queryset = (
-        ContentNode.objects.filter(channel_id=channel_id)
-        .exclude(kind=content_kinds.TOPIC)
-        .values_list("content_id", flat=True)
-    )
-
-    i = 0
-
-    # start a transaction
+        }
 
-    trans = connection.begin()
-
-    # Set everything to False to start with
-    connection.execute(
-        ContentNodeTable.update()
-        .where(ContentNodeTable.c.channel_id == channel_id)
-        .values(available=False)
-    )
+        bridge.end()
 
-    content_ids = current_resource_content_id_queryset[i : i + batch_size]
-    while content_ids:
-        # Set everything to False to start with
-        connection.execute(
-            ContentNodeTable.update()
-            .where(
-                and_(
-                    filter_by_uuids(
-                        ContentNodeTable.c.content_id,
-                        content_ids,
-                        vendor=bridge.engine.name,
-                    ),
-                    ContentNodeTable.c.channel_id == channel_id,
-                )
+        # content_ids and availability of the resources of the current version, by node id
+        self.current_resources = {
+            node_id: (content_id, available)
+            for node_id, content_id, available in ContentNode.objects.filter(
+                channel_id=channel_id
             )
-            .values(available=True)
+            .exclude(kind=content_kinds.TOPIC)
+            .values_list("id", "content_id", "available")
+        }
+
+    def _total_size(self, node_ids):
+        # Make the files unique so that files shared by several nodes are only counted once
+        local_file_ids = set()
+        for node_id in node_ids:
+            local_file_ids.update(self.node_files.get(node_id, ()))
+        return sum(self.unavailable_file_sizes.get(f, 0) for f in local_file_ids)
+
+    def new_resources(self):
+        new_resource_ids = [
+            node_id
+            for node_id in self.resources
+            if node_id not in self.current_resources
+        ]
+        current_content_ids = {
+            content_id for content_id, _ in self.current_resources.values()
+        }
+        new_resource_content_ids = list(
+            {
+                self.resources[node_id]
+                for node_id in new_resource_ids
+                if self.resources[node_id] not in current_content_ids
+            }
         )
-        i += batch_size
-        content_ids = current_resource_content_id_queryset[i : i + batch_size]
-
-    new_resource_content_ids_statement = (
-        select(ContentNodeTable.c.content_id)
-        .where(
-            and_(
-                ContentNodeTable.c.channel_id == channel_id,
-                ContentNodeTable.c.kind != content_kinds.TOPIC,
-                ContentNodeTable.c.available == False,  # noqa
-            )
+        # Only count the size of the resources that can be rendered
+        new_resource_total_size = self._total_size(
+            node_id
+            for node_id in new_resource_ids
+            if node_id in self.renderable_node_files
+        )
+        return new_resource_ids, new_resource_content_ids, new_resource_total_size
+
+    def removed_resources_count(self):
+        available_content_ids = {
+            content_id
+            for content_id, available in self.current_resources.values()
+            if available
+        }
+        content_ids_after_upgrade = {
+            self.current_resources[node_id][0]
+            for node_id in self.resources
+            if node_id in self.current_resources and self.current_resources[node_id][1]
+        }
+        return len(available_content_ids) - len(content_ids_after_upgrade)
+
+    def updated_resources(self):
+        # Resources currently available that have a renderable file missing in the new version
+        updated_resource_ids = [
+            node_id
+            for node_id, local_file_ids in self.renderable_node_files.items()
+            if node_id in self.current_resources
+            and self.current_resources[node_id][1]
+            and any(f in self.unavailable_file_sizes for f in local_file_ids)
+        ]
+        updated_resource_content_ids = list(
+            {self.current_resources[node_id][0] for node_id in updated_resource_ids}
+        )
+        return (
+            updated_resource_ids,
+            updated_resource_content_ids,
+            self._total_size(updated_resource_ids),
         )
-        .distinct()
-    )
-
-    new_resource_content_ids = [
-        coerce_key(c[0])
-        for c in connection.execute(new_resource_content_ids_statement).fetchall()
-    ]
 
-    trans.rollback()
 
-    return (
-        new_resource_node_ids,
-        new_resource_content_ids,
-        new_resource_nodes_total_size,
-    )
+def get_new_resources_available_for_import(destination, channel_id):
+    """
+    Queries the destination db to get leaf nodes that are not in the default db,
+    and the size of their files that need to be imported.
+    """
+    return ChannelDiff(destination, channel_id).new_resources()
 
 
 def count_removed_resources(destination, channel_id):
     """
-    Queries the destination db to get the leaf node content_ids.
     Subtract available leaf nodes count on default db by available
-    leaf nodes based on destination db leaf node content_ids.
+    leaf nodes based on destination db leaf node ids.
     """
-    bridge = Bridge(app_name=CONTENT_APP_NAME, sqlite_file_path=destination)
-    connection = bridge.get_connection()
-    ContentNodeTable = bridge.get_table(ContentNode)
-    resource_node_ids_statement = (
-        select(ContentNodeTable.c.id)
-        .where(
-            and_(
-                ContentNodeTable.c.channel_id == channel_id,
-                ContentNodeTable.c.kind != content_kinds.TOPIC,
-            )
-        )
-        .limit(batch_size)
-    )
-
-    i = 0
-
-    resource_node_ids = [
-        coerce_key(cid[0])
-        for cid in connection.execute(resource_node_ids_statement.offset(i)).fetchall()
-    ]
-
-    content_ids_after_upgrade = set()
-
-    # Batch the query here, as passing too many uuids into Django could cause
-    # the a SQL query too large error. This will happen around about 30000+ uuids.
-    # Could probably batch at 10000 rather than 1000 - but using 1000 to be defensive.
-
-    while resource_node_ids:
-        content_ids_after_upgrade.update(
-            (
-                ContentNode.objects.filter_by_uuids(resource_node_ids, validate=False)
-                .exclude(kind=content_kinds.TOPIC)
-                .filter(available=True, channel_id=channel_id)
-                .values_list("content_id", flat=True)
-                .distinct()
-            )
-        )
-
-        i += batch_size
-        resource_node_ids = [
-            coerce_key(cid[0])
-            for cid in connection.execute(
-                resource_node_ids_statement.offset(i)
-            ).fetchall()
-        ]
-
-    total_resources_after_upgrade = len(content_ids_after_upgrade)
-
-    return (
-        ContentNode.objects.filter(channel_id=channel_id, available=True)
-        .exclude(kind=content_kinds.TOPIC)
-        .values("content_id")
-        .distinct()
-        .count()
-        - total_resources_after_upgrade
-    )
+    return ChannelDiff(destination, channel_id).removed_resources_count()
 
 
 def get_automatically_updated_resources(destination, channel_id):
@@ -422,126 +348,7 @@ def get_automatically_updated_resources(destination, channel_id):
     Queries the destination db to get the leaf node ids, where local file objects are unavailable.
     Get the available node ids related to those missing file objects.
     """
-    bridge = Bridge(app_name=CONTENT_APP_NAME, sqlite_file_path=destination)
-    connection = bridge.get_connection()
-    ContentNodeTable = bridge.get_table(ContentNode)
-    # SQL Alchemy reference to the file table - a mapping from
-    # contentnodes to the files that they use
-    FileTable = bridge.get_table(File)
-    # SQL Alchemy reference to the localfile table which tracks
-    # information about the files on disk, such as availability
-    LocalFileTable = bridge.get_table(LocalFile)
-    # get unavailable local file ids on the destination db
-    unavailable_local_file_ids_statement = select(LocalFileTable.c.id).where(
-        LocalFileTable.c.available == False  # noqa
-    )
-    # get the Contentnode ids where File objects are missing in the destination db
-    contentnode_ids_statement = (
-        select(FileTable.c.contentnode_id)
-        .where(
-            and_(
-                FileTable.c.local_file_id.in_(unavailable_local_file_ids_statement),
-                FileTable.c.supplementary == False,  # noqa
-                or_(
-                    *(
-                        FileTable.c.preset == preset
-                        for preset in renderable_files_presets
-                    )
-                ),
-            )
-        )
-        .limit(batch_size)
-    )
-
-    i = 0
-
-    updated_resource_ids = set()
-
-    updated_resource_content_ids = set()
-
-    contentnode_ids = [
-        coerce_key(cid[0])
-        for cid in connection.execute(contentnode_ids_statement.offset(i)).fetchall()
-    ]
-
-    while contentnode_ids:
-        # Exclude topics from here to prevent erroneous imports of their children
-        # This should already be excluded as we are filtering to renderable files
-        # so this is more of a sanity check
-        for c in (
-            ContentNode.objects.filter_by_uuids(contentnode_ids, validate=False)
-            .filter(available=True, channel_id=channel_id)
-            .exclude(kind=content_kinds.TOPIC)
-            .values_list("id", "content_id")
-        ):
-            updated_resource_ids.add(c[0])
-            updated_resource_content_ids.add(c[1])
-
-        i += batch_size
-
-        contentnode_ids = [
-            coerce_key(cid[0])
-            for cid in connection.execute(
-                contentnode_ids_statement.offset(i)
-            ).fetchall()
-        ]
-
-    # Do this after we have fetched all the ids and made them unique
-    # otherwise, because we are getting our ids from the File table, we could
-    # end up with a duplicate count of file sizes
-
-    updated_resources_total_size = 0
-
-    i = 0
-
-    # Coerce to lists
-    updated_resource_ids = list(updated_resource_ids)
-    updated_resource_content_ids = list(updated_resource_content_ids)
-
-    ids_batch = updated_resource_ids[i : i + batch_size]
-
-    while ids_batch:
-
-        contentnode_filter_expression = filter_by_uuids(
-            ContentNodeTable.c.id, ids_batch, vendor=bridge.engine.name
-        )
-
-        # This does the first step in the many to many lookup for File
-        updated_resources_total_size += connection.execute(
-            select(func.sum(LocalFileTable.c.file_size)).where(
-                LocalFileTable.c.id.in_(
-                    select(LocalFileTable.c.id)
-                    .select_from(
-                        # and LocalFile.
-                        LocalFileTable.join(
-                            FileTable.join(
-                                ContentNodeTable,
-                                FileTable.c.contentnode_id == ContentNodeTable.c.id,
-                            ),  # This does the actual correlation between file and local file
-                            FileTable.c.local_file_id == LocalFileTable.c.id,
-                        )
-                    )
-                    .where(
-                        and_(
-                            # Filter only for files that are unavailable so we show
-                            # the import size
-                            LocalFileTable.c.available == False,  # noqa
-                            contentnode_filter_expression,
-                        )
-                    )
-                )
-            )
-        ).fetchone()[0]
-
-        i += batch_size
-
-        ids_batch = updated_resource_ids[i : i + batch_size]
-
-    return (
-        updated_resource_ids,
-        updated_resource_content_ids,
-        updated_resources_total_size,
-    )
+    return ChannelDiff(destination, channel_id).updated_resources()
 
 
 def get_import_data_for_update(
@@ -64,3 +64,8 @@ class SyncQueueStatusHook(FacilityDataSyncHook):
                     "last_sync": time.time(),
                 },
             )
+            # single user devices push after pulling, which concludes their sync
+            if context.is_server and context.is_push:
+                from kolibri.core.public.admission import record_sync_duration
+
+                record_sync_duration(context.sync_session)
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-19 17:06
+from __future__ import unicode_literals
+
+import django.db.models.deletion
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("morango", "0023_add_instance_id_fields"),
+        ("device", "0020_fix_learner_device_status_choices"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncIngestion",
+            fields=[
+                (
+                    "transfer_session",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to="morango.TransferSession",
+                    ),
+                ),
+                ("fsic_v2_format", models.BooleanField(default=False)),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+            ],
+        ),
+    ]
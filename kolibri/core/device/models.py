@@ -1,14 +1,17 @@
+import copy
 import platform
 import time
 from uuid import uuid4
 
 from django.conf import settings
 from django.db import models
+from django.db import transaction
 from django.db.models import F
 from django.db.models import QuerySet
 from morango.models import UUIDField
 from morango.models.core import InstanceIDModel
 from morango.models.core import SyncSession
+from morango.models.core import TransferSession
 
 from .utils import LANDING_PAGE_LEARN
 from .utils import LANDING_PAGE_SIGN_IN
@@ -51,29 +54,64 @@ class DevicePermissions(models.Model):
     can_manage_content = models.BooleanField(default=False)
 
 
-DEVICE_SETTINGS_CACHE_KEY = "device_settings_cache_key"
+# A stamp of the version of the device settings, that changes every time they are saved,
+# so that every process can keep the device settings in memory until they change
+DEVICE_SETTINGS_VERSION_CACHE_KEY = "device_settings_version_cache_key"
+
+# The version stamp and the device settings loaded by this process, or None if there are none
+_device_settings_snapshot = (None, None)
+
+
+def bump_device_settings_version():
+    cache.set(DEVICE_SETTINGS_VERSION_CACHE_KEY, uuid4().hex, None)
+
+
+def _invalidate_device_settings():
+    bump_device_settings_version()
+    # bump it again once committed, as other processes could have read the settings
+    # from the database before the transaction was committed
+    transaction.on_commit(bump_device_settings_version)
 
 
 class DeviceSettingsQuerySet(QuerySet):
     def delete(self, **kwargs):
-        cache.delete(DEVICE_SETTINGS_CACHE_KEY)
-        return super(DeviceSettingsQuerySet, self).delete(**kwargs)
+        out = super(DeviceSettingsQuerySet, self).delete(**kwargs)
+        _invalidate_device_settings()
+        return out
 
 
 class DeviceSettingsManager(models.Manager.from_queryset(DeviceSettingsQuerySet)):
-    def get(self, **kwargs):
-        model = None
-
-        # load from cache
-        if DEVICE_SETTINGS_CACHE_KEY in cache:
-            model = cache.get(DEVICE_SETTINGS_CACHE_KEY)
-
-        # ensure cached value is of correct type, otherwise allow .get to raise if not created
-        if not isinstance(model, DeviceSettings):
-            model = super(DeviceSettingsManager, self).get(**kwargs)
-            cache.set(DEVICE_SETTINGS_CACHE_KEY, model, 600)
+    def get_snapshot(self):
+        """
+        Returns the device settings loaded by this process, which is shared by all the threads and
+        must not be modified, reloading them from the database only if their version has changed.
+        Raises DoesNotExist if there are no device settings.
+        """
+        global _device_settings_snapshot
+        # the version is read before the database, so that the snapshot is reloaded again
+        # if the device settings are saved in the meantime
+        version = cache.get(DEVICE_SETTINGS_VERSION_CACHE_KEY)
+        snapshot_version, model = _device_settings_snapshot
+        if version is None:
+            # the process cache has been cleared, so start a new version
+            cache.add(DEVICE_SETTINGS_VERSION_CACHE_KEY, uuid4().hex, None)
+            version = cache.get(DEVICE_SETTINGS_VERSION_CACHE_KEY)
+            snapshot_version = None
+        if version is None or version != snapshot_version:
+            model = super(DeviceSettingsManager, self).filter().first()
+            _device_settings_snapshot = (version, model)
+        if model is None:
+            raise self.model.DoesNotExist(
+                "DeviceSettings matching query does not exist."
+            )
         return model
 
+    def get(self, **kwargs):
+        if kwargs:
+            return super(DeviceSettingsManager, self).get(**kwargs)
+        # return a copy, so that it can be modified and saved
+        return copy.deepcopy(self.get_snapshot())
+
 
 def get_device_hostname():
     # Get the device hostname to set it as the default value of name field in
@@ -163,12 +201,12 @@ class DeviceSettings(models.Model):
         self.pk = 1
         self.full_clean()
         out = super(DeviceSettings, self).save(*args, **kwargs)
-        cache.set(DEVICE_SETTINGS_CACHE_KEY, self, 600)
+        _invalidate_device_settings()
         return out
 
     def delete(self, *args, **kwargs):
         out = super(DeviceSettings, self).delete(*args, **kwargs)
-        cache.delete(DEVICE_SETTINGS_CACHE_KEY)
+        _invalidate_device_settings()
         return out
 
     @property
@@ -565,6 +603,20 @@ class UserSyncStatus(models.Model):
         return self.status == SyncQueueStatus.Queued
 
 
+class SyncIngestion(models.Model):
+    """
+    Records the handover of a transfer session pushed to this device to the sync ingestion task
+    """
+
+    transfer_session = models.OneToOneField(
+        TransferSession, on_delete=models.CASCADE, primary_key=True
+    )
+    # whether the sync session negotiated morango's v2 format for the FSICs
+    fsic_v2_format = models.BooleanField(default=False)
+    # passes of the ingestion task that did not integrate the current stage of the transfer session
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+
 class OSUser(models.Model):
     """
     This class stores a lookup from os username to user id
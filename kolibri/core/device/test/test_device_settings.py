@@ -2,10 +2,12 @@ import pytest
 from django.core.exceptions import ValidationError
 from django.test import TestCase
 
+from kolibri.core.device.models import bump_device_settings_version
 from kolibri.core.device.models import DeviceSettings
 from kolibri.core.device.models import get_device_hostname
 from kolibri.core.device.utils import get_device_setting
 from kolibri.core.device.utils import LANDING_PAGE_SIGN_IN
+from kolibri.core.device.utils import set_device_settings
 from kolibri.core.utils.cache import process_cache as cache
 
 
@@ -41,6 +43,39 @@ class DeviceSettingsTestCase(TestCase):
         with self.assertRaises(DeviceSettings.DoesNotExist):
             DeviceSettings.objects.get()
 
+    def test_get_setting_from_snapshot(self):
+        DeviceSettings.objects.create(name="device")
+        self.assertEqual(get_device_setting("name"), "device")
+        with self.assertNumQueries(0):
+            self.assertEqual(get_device_setting("name"), "device")
+            DeviceSettings.objects.get()
+
+    def test_save_invalidates_snapshot(self):
+        DeviceSettings.objects.create(name="device")
+        self.assertEqual(get_device_setting("name"), "device")
+        set_device_settings(name="renamed")
+        self.assertEqual(get_device_setting("name"), "renamed")
+
+    def test_changed_by_other_process(self):
+        DeviceSettings.objects.create(name="device")
+        self.assertEqual(get_device_setting("name"), "device")
+        DeviceSettings.objects.filter(pk=1).update(name="renamed")
+        self.assertEqual(get_device_setting("name"), "device")
+        # another process saving the device settings changes their version
+        bump_device_settings_version()
+        self.assertEqual(get_device_setting("name"), "renamed")
+
+    def test_get_returns_copy(self):
+        DeviceSettings.objects.create()
+        device_settings = DeviceSettings.objects.get()
+        device_settings.extra_settings["limit_for_autodownload"] = 1000
+        self.assertEqual(
+            DeviceSettings.objects.get_snapshot().extra_settings[
+                "limit_for_autodownload"
+            ],
+            0,
+        )
+
     @pytest.mark.skip(
         reason="Other tests enabling the App plugin are not properly isolated"
     )
@@ -43,7 +43,8 @@ no_default_value = object()
 
 def get_device_setting(setting):
     """
-    Get a device setting from the database, or return the default value if it is not set or
+    Get a device setting from the device settings loaded by this process, which are reloaded
+    from the database when they change, or return the default value if it is not set or
     the device is not provisioned.
     :param setting: a string key to the model attribute or property
     :return: the value of the setting
@@ -52,7 +53,7 @@ def get_device_setting(setting):
     from kolibri.core.auth.models import Facility
 
     try:
-        device_settings = DeviceSettings.objects.get()
+        device_settings = DeviceSettings.objects.get_snapshot()
     except (
         DeviceSettings.DoesNotExist,
         OperationalError,
@@ -3,6 +3,8 @@ import logging
 from django.core.management.base import BaseCommand
 
 import kolibri
+from ...utils import BACKUP_PAGES_PER_STEP
+from ...utils import BACKUP_STEP_SLEEP
 from ...utils import dbbackup
 from kolibri.utils import server
 
@@ -30,6 +32,18 @@ class Command(BaseCommand):
                 "is created in the default location ~/.kolibri/backups"
             ),
         )
+        parser.add_argument(
+            "--pages",
+            type=int,
+            default=BACKUP_PAGES_PER_STEP,
+            help="Number of database pages to copy at every step of the backup",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=BACKUP_STEP_SLEEP,
+            help="Seconds to sleep between the steps of the backup",
+        )
 
     def handle(self, *args, **options):
 
@@ -49,7 +63,12 @@ class Command(BaseCommand):
 
         dest_folder = options.get("dest_folder", None)
 
-        backup = dbbackup(kolibri.__version__, dest_folder=dest_folder)
+        backup = dbbackup(
+            kolibri.__version__,
+            dest_folder=dest_folder,
+            pages=options["pages"],
+            sleep=options["sleep"],
+        )
         self.stdout.write(
             self.style.SUCCESS("Backed up database to: {path}".format(path=backup))
         )
@@ -6,6 +6,7 @@ from django.core.management.base import BaseCommand
 from django.core.management.base import CommandError
 
 import kolibri
+from ...utils import BACKUP_EXTENSIONS
 from ...utils import dbrestore
 from ...utils import default_backup_folder
 from ...utils import get_dtm_from_backup_name
@@ -80,7 +81,7 @@ class Command(BaseCommand):
         backups = []
         if os.path.exists(dumps_root):
             backups = os.listdir(dumps_root)
-            backups = filter(lambda f: f.endswith(".dump"), backups)
+            backups = filter(lambda f: f.endswith(BACKUP_EXTENSIONS), backups)
             backups = list(backups)
             backups.sort(key=get_dtm_from_backup_name, reverse=True)
             backups = backups[:10]  # don't show more than 10 backups
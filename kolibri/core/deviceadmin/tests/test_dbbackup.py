@@ -3,12 +3,18 @@ import tempfile
 
 import pytest
 from django.core.management import call_command
+from mock import ANY
+from mock import MagicMock
 from mock import patch
 
+import kolibri
 from kolibri.core.deviceadmin.tests.test_dbrestore import is_sqlite_settings
 from kolibri.core.deviceadmin.tests.test_dbrestore import mock_status_not_running
+from kolibri.core.deviceadmin.utils import _copy_database
 from kolibri.core.deviceadmin.utils import dbbackup
 from kolibri.core.deviceadmin.utils import IncompatibleDatabase
+from kolibri.core.deviceadmin.utils import is_dump_file
+from kolibri.utils.conf import KOLIBRI_HOME
 
 
 def test_active_kolibri():
@@ -43,7 +49,9 @@ def test_inactive_kolibri():
         gs.assert_called_once()
         files = os.listdir(dest_folder)
         assert len(files) == 1
+        assert files[0].endswith(".sqlite3.gz")
         assert os.path.getsize(os.path.join(dest_folder, files[0])) > 1000
+        assert not is_dump_file(os.path.join(dest_folder, files[0]))
 
 
 def test_not_sqlite():
@@ -51,3 +59,37 @@ def test_not_sqlite():
         return
     with pytest.raises(IncompatibleDatabase):
         dbbackup("/doesnt/matter.file")
+
+
+def test_copy_database_in_steps():
+    source = MagicMock()
+    target = MagicMock()
+    _copy_database(source, target, 100, 0.5)
+    source.backup.assert_called_once_with(target, pages=100, progress=ANY, sleep=0.5)
+    source.iterdump.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_uncompressed_copy_in_kolibri_home():
+    if not is_sqlite_settings():
+        return
+
+    dest_folder = tempfile.mkdtemp()
+    copy_paths = []
+    mkstemp = tempfile.mkstemp
+
+    def record_mkstemp(*args, **kwargs):
+        fd, path = mkstemp(*args, **kwargs)
+        copy_paths.append(path)
+        return fd, path
+
+    with patch(
+        "kolibri.core.deviceadmin.utils.tempfile.mkstemp", side_effect=record_mkstemp
+    ):
+        backup = dbbackup(kolibri.__version__, dest_folder=dest_folder)
+
+    assert os.listdir(dest_folder) == [os.path.basename(backup)]
+    (copy_path,) = copy_paths
+    assert os.path.dirname(copy_path) == KOLIBRI_HOME
+    # the temporary copy is removed once compressed
+    assert not os.path.exists(copy_path)
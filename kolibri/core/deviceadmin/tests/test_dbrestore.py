@@ -178,6 +178,43 @@ def test_restore_from_file_to_memory():
             assert Facility.objects.filter(name="test file", kind=FACILITY).count() == 1
 
 
+@pytest.mark.django_db
+@pytest.mark.filterwarnings("ignore:Overriding setting DATABASES")
+def test_restore_from_dump_to_memory():
+    """
+    Restores from an SQL text dump, as made by older versions, to a database
+    stored in memory and reads contents from the new database.
+    """
+    if not is_sqlite_settings():
+        return
+    with patch("kolibri.utils.server.get_status", side_effect=mock_status_not_running):
+        # Create something special in the database!
+        from kolibri.core.auth.models import Facility
+
+        Facility.objects.create(name="test dump", kind=FACILITY)
+        # Create a dump file from the current test database
+        from django import db
+
+        if not db.connections["default"].connection:
+            db.connections["default"].connect()
+        backup = os.path.join(
+            tempfile.mkdtemp(),
+            "db-v{}_2015-08-02_00-00-00.dump".format(kolibri.__version__),
+        )
+        with open(backup, "w") as f:
+            for line in db.connections["default"].connection.iterdump():
+                f.write(line)
+
+        # Restore it into a new test database setting
+        with override_settings(DATABASES=MOCK_DATABASES):
+            # Destroy current connections and create new ones:
+            db.connections.close_all()
+            db.connections = db.ConnectionHandler()
+            call_command("dbrestore", backup)
+            # Test that the user has been restored!
+            assert Facility.objects.filter(name="test dump", kind=FACILITY).count() == 1
+
+
 @pytest.mark.django_db
 @pytest.mark.filterwarnings("ignore:Overriding setting DATABASES")
 def test_restore_from_file_to_file():
@@ -225,6 +262,8 @@ def test_search_latest():
         "db-v{}_2016-08-02_00-00-00.dump".format(kolibri.__version__),
         "db-v{}_2017-07-02_00-00-00.dump".format(major_version),
         "db-v{}_2017-08-02_00-00-00.dump".format(kolibri.__version__),
+        "db-v{}_2017-09-02_00-00-00.sqlite3.gz.tmp".format(kolibri.__version__),
+        "db-v{}_2017-09-02_00-00-00.sqlite3.gz".format(kolibri.__version__),
     ]
 
     latest = files[-1]
@@ -1,7 +1,12 @@
+import gzip
 import io
 import logging
 import os
 import re
+import shutil
+import sqlite3
+import tempfile
+import time
 from datetime import datetime
 
 from django import db
@@ -22,6 +27,22 @@ logger = logging.getLogger(__name__)
 KWARGS_IO_READ = {"mode": "r", "encoding": "utf-8"}
 KWARGS_IO_WRITE = {"mode": "w", "encoding": "utf-8"}
 
+# Extension of the backups made with the SQLite online backup API, which are
+# compressed copies of the database file
+BACKUP_EXTENSION = ".sqlite3.gz"
+
+# Extension of the backups made by older versions, which are SQL text dumps
+DUMP_EXTENSION = ".dump"
+
+BACKUP_EXTENSIONS = (BACKUP_EXTENSION, DUMP_EXTENSION)
+
+# Number of database pages copied at every step of an online backup
+BACKUP_PAGES_PER_STEP = 1024
+
+# Seconds to sleep between the steps of an online backup, so that the
+# database keeps serving other connections while it is being copied
+BACKUP_STEP_SLEEP = 0.01
+
 
 def default_backup_folder():
     return os.path.join(KOLIBRI_HOME, "backups")
@@ -34,7 +55,7 @@ def get_backup_files():
     default_path = default_backup_folder()
     backups = os.listdir(default_path)
     prefix = "db-v"
-    backups = filter(lambda f: f.endswith(".dump"), backups)
+    backups = filter(lambda f: f.endswith(BACKUP_EXTENSIONS), backups)
     backups = filter(lambda f: f.startswith(prefix), backups)
     backups = list(backups)
     backups.sort(reverse=True)
@@ -45,7 +66,7 @@ def get_dtm_from_backup_name(fname):
     """
     Returns the date time string from our automated backup filenames
     """
-    p = re.compile(r"^db\-v[^_]+_(?P<dtm>[\d\-_]+).*\.dump$")
+    p = re.compile(r"^db\-v[^_]+_(?P<dtm>[\d\-_]+).*\.(dump|sqlite3\.gz)$")
     m = p.search(fname)
     if m:
         label = m.groups("dtm")[0]
@@ -69,19 +90,64 @@ def is_full_version(fname):
     return fname.startswith("db-v{}_".format(full_version))
 
 
-def dbbackup(old_version, dest_folder=None):
+def _copy_database(source, target, pages, sleep):
+    """
+    Copies the database of the source sqlite3 connection to the target one,
+    a few pages at a time so that other connections can use the source
+    database between the steps.
+    """
+    # Connection.backup is only available from Python 3.7
+    if not hasattr(source, "backup"):
+        isolation_level = target.isolation_level
+        target.isolation_level = None
+        try:
+            for statement in source.iterdump():
+                target.execute(statement)
+        finally:
+            target.isolation_level = isolation_level
+        return
+
+    def progress(status, remaining, total):
+        logger.debug("Copied {} of {} database pages".format(total - remaining, total))
+        if remaining and sleep:
+            time.sleep(sleep)
+
+    source.backup(target, pages=pages, progress=progress, sleep=sleep)
+
+
+def is_dump_file(path):
+    """
+    Tells if a backup file is an SQL text dump, as made by older versions,
+    rather than a compressed copy of the database.
+    """
+    with open(path, "rb") as f:
+        # gzip magic number
+        return f.read(2) != b"\x1f\x8b"
+
+
+def dbbackup(
+    old_version,
+    dest_folder=None,
+    pages=BACKUP_PAGES_PER_STEP,
+    sleep=BACKUP_STEP_SLEEP,
+):
     """
     Sqlite3 only
 
-    Backup database to dest_folder. Uses SQLite's built in iterdump():
-    https://docs.python.org/3/library/sqlite3.html#sqlite3.Connection.iterdump
+    Backup database to dest_folder. Uses SQLite's online backup API:
+    https://docs.python.org/3/library/sqlite3.html#sqlite3.Connection.backup
+
+    The database is copied a few pages at a time, so writers are not blocked
+    for the whole backup, and the copy is compressed with gzip.
 
     Notice that it's important to add at least version and date to the path
     of the backup, otherwise you risk that upgrade activities carried out on
     the same date overwrite each other. It's also quite important for the user
     to know which version of Kolibri that a certain database should match.
 
-    :param: dest_folder: Default is ~/.kolibri/backups/db-[version]-[date].dump
+    :param: dest_folder: Default is ~/.kolibri/backups/db-[version]-[date].sqlite3.gz
+    :param: pages: Number of pages copied at every step
+    :param: sleep: Seconds to sleep between steps
 
     :returns: Path of new backup file
     """
@@ -94,8 +160,10 @@ def dbbackup(old_version, dest_folder=None):
 
     # This file name is a convention, used to figure out the latest backup
     # that was made (by the dbrestore command)
-    fname = "db-v{version}_{dtm}.dump".format(
-        version=old_version, dtm=datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    fname = "db-v{version}_{dtm}{ext}".format(
+        version=old_version,
+        dtm=datetime.now().strftime("%Y-%m-%d_%H-%M-%S"),
+        ext=BACKUP_EXTENSION,
     )
 
     if not os.path.exists(dest_folder):
@@ -103,14 +171,36 @@ def dbbackup(old_version, dest_folder=None):
 
     backup_path = os.path.join(dest_folder, fname)
 
-    # Setting encoding=utf-8: io.open() is Python 2 compatible
-    # See: https://github.com/learningequality/kolibri/issues/2875
-    with io.open(backup_path, **KWARGS_IO_WRITE) as f:
-        # If the connection hasn't been opened yet, then open it
-        if not db.connections["default"].connection:
-            db.connections["default"].connect()
-        for line in db.connections["default"].connection.iterdump():
-            f.write(line)
+    # If the connection hasn't been opened yet, then open it
+    if not db.connections["default"].connection:
+        db.connections["default"].connect()
+
+    # The backup API needs a database file to copy into, so the uncompressed
+    # copy goes to a hidden temporary file in KOLIBRI_HOME, next to the
+    # database rather than in a system temporary folder that may be a small
+    # tmpfs, which is then streamed through gzip into the backup
+    fd, copy_path = tempfile.mkstemp(
+        prefix=".dbbackup-", suffix=".sqlite3", dir=KOLIBRI_HOME
+    )
+    os.close(fd)
+    # The backup is only given its final name once it is complete, so that an
+    # interrupted backup is never picked by dbrestore
+    tmp_backup_path = backup_path + ".tmp"
+    try:
+        target = sqlite3.connect(copy_path)
+        try:
+            _copy_database(db.connections["default"].connection, target, pages, sleep)
+        finally:
+            target.close()
+        with open(copy_path, "rb") as src, gzip.open(
+            tmp_backup_path, "wb", compresslevel=6
+        ) as dst:
+            shutil.copyfileobj(src, dst)
+        os.rename(tmp_backup_path, backup_path)
+    finally:
+        for path in (copy_path, tmp_backup_path):
+            if os.path.exists(path):
+                os.remove(path)
 
     return backup_path
 
@@ -119,8 +209,8 @@ def dbrestore(from_file):
     """
     Sqlite3 only
 
-    Restores the database given a special database dump file containing SQL
-    statements.
+    Restores the database given a backup file, either a compressed copy of
+    the database or a special database dump file containing SQL statements.
     """
 
     if "sqlite3" not in settings.DATABASES["default"]["ENGINE"]:
@@ -138,11 +228,27 @@ def dbrestore(from_file):
     else:
         logger.info("In memory database, not truncating: {}".format(dst_file))
 
-    # Setting encoding=utf-8: io.open() is Python 2 compatible
-    # See: https://github.com/learningequality/kolibri/issues/2875
-    with open(from_file, **KWARGS_IO_READ) as f:
-        db.connections["default"].connect()
-        db.connections["default"].connection.executescript(f.read())
+    db.connections["default"].connect()
+
+    if is_dump_file(from_file):
+        # Setting encoding=utf-8: io.open() is Python 2 compatible
+        # See: https://github.com/learningequality/kolibri/issues/2875
+        with io.open(from_file, **KWARGS_IO_READ) as f:
+            db.connections["default"].connection.executescript(f.read())
+    else:
+        fd, copy_path = tempfile.mkstemp(
+            suffix=".sqlite3", dir=os.path.dirname(os.path.abspath(from_file))
+        )
+        try:
+            with gzip.open(from_file, "rb") as src, os.fdopen(fd, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            source = sqlite3.connect(copy_path)
+            try:
+                _copy_database(source, db.connections["default"].connection, -1, 0)
+            finally:
+                source.close()
+        finally:
+            os.remove(copy_path)
 
     # Finally, it's okay to import models and open database connections.
     # We need this to avoid generating records with identical 'Instance ID'
@@ -163,7 +269,7 @@ def search_latest(search_root, fallback_version):
     prefix = "db-v{}".format(fallback_version)
 
     backups = os.listdir(search_root)
-    backups = filter(lambda f: f.endswith(".dump"), backups)
+    backups = filter(lambda f: f.endswith(BACKUP_EXTENSIONS), backups)
     backups = filter(lambda f: f.startswith(prefix), backups)
 
     # Everything is sorted alphanumerically, and since dates in the
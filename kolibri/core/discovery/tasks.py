@@ -1,10 +1,13 @@
+import asyncio
 import datetime
 import functools
 import hashlib
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.db import IntegrityError
 from django.db.utils import OperationalError
 
@@ -17,6 +20,9 @@ from kolibri.core.discovery.models import DynamicNetworkLocation
 from kolibri.core.discovery.models import LocationTypes
 from kolibri.core.discovery.models import NetworkLocation
 from kolibri.core.discovery.models import StaticNetworkLocation
+from kolibri.core.discovery.utils.network.broadcast import (
+    DEFAULT_DISCOVERY_CONCURRENCY,
+)
 from kolibri.core.discovery.utils.network.broadcast import KolibriInstance
 from kolibri.core.discovery.utils.network.connections import update_network_location
 from kolibri.core.discovery.well_known import CENTRAL_CONTENT_BASE_INSTANCE_ID
@@ -90,6 +96,37 @@ def _store_dynamic_instance(broadcast_id, instance):
     return network_location
 
 
+def _store_dynamic_instance_with_retries(broadcast_id, instance, attempts=6):
+    """
+    Stores the instance, retrying when the database is locked
+    :type instance: kolibri.core.discovery.utils.network.broadcast.KolibriInstance
+    :rtype: NetworkLocation
+    """
+    network_location = None
+    for attempt in range(attempts):
+        network_location = _store_dynamic_instance(broadcast_id, instance)
+        if network_location is not None:
+            break
+        time.sleep(0.1)
+    return network_location
+
+
+def _remove_dynamic_instance(broadcast_id, instance):
+    """
+    :type instance: kolibri.core.discovery.utils.network.broadcast.KolibriInstance
+    """
+    try:
+        network_location = DynamicNetworkLocation.objects.get(
+            pk=instance.zeroconf_id, broadcast_id=broadcast_id
+        )
+    except NetworkLocation.DoesNotExist:
+        return
+
+    logger.debug("Removing network location {}".format(network_location.id))
+    _dispatch_discovery_hooks(network_location, False)
+    network_location.delete()
+
+
 def _dispatch_discovery_hooks(network_location, is_connected):
     """
     :type network_location: NetworkLocation
@@ -150,6 +187,38 @@ def _update_connection_status(network_location):
     return new_status
 
 
+def _update_connection_statuses(network_locations, concurrency):
+    """
+    Updates the connection status of the network locations concurrently, from an asyncio event
+    loop, with at most `concurrency` connections open at the same time
+
+    :type network_locations: list[NetworkLocation]
+    :return: A list of the new statuses
+    """
+
+    def update_connection_status(network_location):
+        try:
+            return _update_connection_status(network_location)
+        finally:
+            # Close the database connection opened by the executor thread
+            connection.close()
+
+    async def update_connection_statuses(loop, executor):
+        return await asyncio.gather(
+            *(
+                loop.run_in_executor(executor, update_connection_status, location)
+                for location in network_locations
+            )
+        )
+
+    loop = asyncio.new_event_loop()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return loop.run_until_complete(update_connection_statuses(loop, executor))
+    finally:
+        loop.close()
+
+
 def hydrate_instance(func):
     """
     Small decorator that turns the `KolibriInstance` dictionary/JSON into a `KolibriInstance`
@@ -240,12 +309,7 @@ def add_dynamic_network_location(broadcast_id, instance):
     :param instance: The new Kolibri instance that has been discovered
     :type instance: kolibri.core.discovery.utils.network.broadcast.KolibriInstance
     """
-    attempts = 0
-    network_location = None
-    while network_location is None and attempts <= 5:
-        network_location = _store_dynamic_instance(broadcast_id, instance)
-        attempts += 1
-        time.sleep(0.1)
+    network_location = _store_dynamic_instance_with_retries(broadcast_id, instance)
 
     # if we couldn't store it, that's the end
     if network_location is None:
@@ -279,16 +343,68 @@ def remove_dynamic_network_location(broadcast_id, instance):
     :param instance: The new Kolibri instance that has been discovered
     :type instance: kolibri.core.discovery.utils.network.broadcast.KolibriInstance
     """
-    try:
-        network_location = DynamicNetworkLocation.objects.get(
-            pk=instance.zeroconf_id, broadcast_id=broadcast_id
+    _remove_dynamic_instance(broadcast_id, instance)
+
+
+@register_task(priority=Priority.HIGH, status_fn=status_fn)
+def update_dynamic_network_locations(
+    broadcast_id,
+    added_instances,
+    removed_instances,
+    concurrency=DEFAULT_DISCOVERY_CONCURRENCY,
+):
+    """
+    Handles a batch of instances added to and removed from Zeroconf, checking the connections to
+    the added instances concurrently, instead of in a task for each
+    :param broadcast_id: The hex UUID of the broadcast during which the instances were discovered
+    :param added_instances: A list of dicts of the Kolibri instances added or updated
+    :param removed_instances: A list of dicts of the Kolibri instances removed
+    :param concurrency: The maximum number of connections checked at the same time
+    """
+    for instance in removed_instances:
+        _remove_dynamic_instance(broadcast_id, KolibriInstance.from_dict(instance))
+
+    network_locations = []
+    for instance in added_instances:
+        network_location = _store_dynamic_instance_with_retries(
+            broadcast_id, KolibriInstance.from_dict(instance)
         )
-    except NetworkLocation.DoesNotExist:
+        if network_location is not None:
+            network_locations.append(network_location)
+
+    if not network_locations:
         return
 
-    logger.debug("Removing network location {}".format(network_location.id))
-    _dispatch_discovery_hooks(network_location, False)
-    network_location.delete()
+    logger.debug(
+        "Checking connection status for {} network locations".format(
+            len(network_locations)
+        )
+    )
+    prior_statuses = [
+        network_location.connection_status for network_location in network_locations
+    ]
+    new_statuses = _update_connection_statuses(network_locations, concurrency)
+
+    # enqueue another attempt for each connection that failed, as `perform_network_location_update`
+    # would have
+    for network_location, prior_status, new_status in zip(
+        network_locations, prior_statuses, new_statuses
+    ):
+        if (
+            new_status == ConnectionStatus.Okay
+            or network_location.connection_faults >= CONNECTION_FAULT_LIMIT
+            or (
+                new_status == ConnectionStatus.Conflict
+                and prior_status == ConnectionStatus.Conflict
+            )
+        ):
+            continue
+        perform_network_location_update.enqueue_in(
+            datetime.timedelta(minutes=2 ** network_location.connection_faults),
+            job_id=generate_job_id(TYPE_CONNECT, network_location.id),
+            args=(network_location.id,),
+            priority=Priority.LOW,
+        )
 
 
 @register_task(priority=Priority.HIGH, status_fn=status_fn)
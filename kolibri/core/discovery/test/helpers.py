@@ -13,6 +13,8 @@ info = {
 def mock_response(status_code):
     response = mock.MagicMock()
     response.__enter__.return_value = response
+    response.__exit__.side_effect = lambda *args: response.close()
+    response.close.side_effect = lambda: response.raw.release_conn()
     response.status_code = status_code
     response.raw._connection.sock.getpeername.return_value = ("192.168.101.101", 123456)
     if status_code == 200:
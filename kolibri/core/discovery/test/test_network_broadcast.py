@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import socket
+import threading
 
 import mock
 import pytest
@@ -9,6 +11,7 @@ from zeroconf import NonUniqueNameException
 from zeroconf import ServiceInfo
 from zeroconf import Zeroconf
 
+from ..utils.network.broadcast import AsyncKolibriBroadcast
 from ..utils.network.broadcast import KolibriBroadcast
 from ..utils.network.broadcast import KolibriInstance
 from ..utils.network.broadcast import KolibriInstanceListener
@@ -827,3 +830,99 @@ class KolibriBroadcastTestCase(SimpleTestCase):
             SERVICE_TYPE, "test", timeout=10000
         )
         mock_logger.assert_called_once()
+
+
+class AsyncKolibriBroadcastTestCase(SimpleTestCase):
+    def setUp(self):
+        super(AsyncKolibriBroadcastTestCase, self).setUp()
+        self.instance = mock.Mock(spec_set=KolibriInstance)(
+            MOCK_ID, ip=MOCK_INTERFACE_IP, port=MOCK_PORT
+        )
+        self.broadcast = AsyncKolibriBroadcast(self.instance, concurrency=4)
+        self.listener = self.broadcast.add_listener(KolibriTestInstanceListener)
+        self.broadcast._start_loop()
+        self.addCleanup(self.broadcast._stop_loop)
+
+    def wait_for_loop(self):
+        # wait for the callbacks scheduled so far and the queries in progress
+        async def wait():
+            while self.broadcast._tasks:
+                await asyncio.gather(*self.broadcast._tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(wait(), self.broadcast._loop).result(5)
+
+    def test_add_service(self):
+        expected_instance = KolibriInstance(
+            MOCK_ID, ip=MOCK_INTERFACE_IP, port=MOCK_PORT
+        )
+        with mock.patch.object(
+            AsyncKolibriBroadcast, "_get_service_info"
+        ) as mock_get_service_info, mock.patch.object(
+            AsyncKolibriBroadcast, "_build_instance", return_value=expected_instance
+        ):
+            self.broadcast.add_service("test")
+            self.wait_for_loop()
+        mock_get_service_info.assert_called_once_with("test")
+        self.assertEqual(expected_instance, self.broadcast.other_instances["test"])
+        self.listener.mock.add_instance.assert_called_once_with(expected_instance)
+
+    def test_add_services_concurrently(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def get_service_info(name):
+            # blocks until all three services are being queried at the same time
+            barrier.wait()
+
+        with mock.patch.object(
+            AsyncKolibriBroadcast, "_get_service_info", side_effect=get_service_info
+        ) as mock_get_service_info:
+            for name in ("a", "b", "c"):
+                self.broadcast.add_service(name)
+            self.wait_for_loop()
+        self.assertEqual(3, mock_get_service_info.call_count)
+        self.assertFalse(barrier.broken)
+
+    def test_update_service__coalesced(self):
+        event = threading.Event()
+
+        def get_service_info(name):
+            event.wait(5)
+
+        with mock.patch.object(
+            AsyncKolibriBroadcast, "_get_service_info", side_effect=get_service_info
+        ) as mock_get_service_info:
+            self.broadcast.add_service("test")
+            for i in range(5):
+                self.broadcast.update_service("test")
+            # let the loop schedule all the events before the first query completes
+            asyncio.run_coroutine_threadsafe(
+                asyncio.sleep(0), self.broadcast._loop
+            ).result(5)
+            event.set()
+            self.wait_for_loop()
+        # the first query, and a single query for all the updates made while it ran
+        self.assertEqual(2, mock_get_service_info.call_count)
+
+    def test_remove_service(self):
+        instance = KolibriInstance(MOCK_ID, ip=MOCK_INTERFACE_IP, port=MOCK_PORT)
+        instance.set_broadcasting(mock.Mock(spec_set=ServiceInfo)("test"))
+        self.broadcast.other_instances["test"] = instance
+        self.broadcast.remove_service("test")
+        self.wait_for_loop()
+        self.listener.mock.remove_instance.assert_called_once_with(instance)
+
+    def test_stop_loop__query_in_progress(self):
+        event = threading.Event()
+        self.addCleanup(event.set)
+        with mock.patch.object(
+            AsyncKolibriBroadcast,
+            "_get_service_info",
+            side_effect=lambda name: event.wait(5),
+        ):
+            self.broadcast.add_service("test")
+            asyncio.run_coroutine_threadsafe(
+                asyncio.sleep(0), self.broadcast._loop
+            ).result(5)
+            self.broadcast._stop_loop()
+            self.broadcast._start_loop()
+        self.listener.mock.add_instance.assert_not_called()
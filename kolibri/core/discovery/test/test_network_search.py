@@ -3,6 +3,7 @@ from django.test import TransactionTestCase
 
 from ..utils.network.broadcast import KolibriBroadcast
 from ..utils.network.broadcast import KolibriInstance
+from ..utils.network.search import BatchedNetworkLocationListener
 from ..utils.network.search import NetworkLocationListener
 from kolibri.core.tasks.job import Priority
 
@@ -108,3 +109,74 @@ class NetworkLocationListenerTestCase(TransactionTestCase):
             job_id="c5e88d1cb4a342ad3d23081022248fbc",
             args=(self.broadcast.id, self.instance.to_dict()),
         )
+
+
+@mock.patch(SEARCH_MODULE + "BATCH_DEBOUNCE", 60)
+class BatchedNetworkLocationListenerTestCase(TransactionTestCase):
+    multi_db = True
+
+    def setUp(self):
+        super(BatchedNetworkLocationListenerTestCase, self).setUp()
+        self.instances = [
+            KolibriInstance(
+                instance_id,
+                ip=MOCK_INTERFACE_IP,
+                port=MOCK_PORT,
+                device_info={"instance_id": instance_id},
+            )
+            for instance_id in ("a" * 32, "b" * 32, "c" * 32)
+        ]
+        self.broadcast_instance = KolibriInstance(
+            "abcd",
+            ip=MOCK_INTERFACE_IP,
+            port=MOCK_PORT,
+            device_info={"instance_id": "abcd"},
+        )
+        self.broadcast = KolibriBroadcast(instance=self.broadcast_instance)
+        self.broadcast.id = "abc123"
+        self.listener = BatchedNetworkLocationListener(self.broadcast)
+        self.addCleanup(self.listener._reset)
+
+    @mock.patch(SEARCH_MODULE + "update_dynamic_network_locations.enqueue")
+    def test_batch(self, mock_enqueue):
+        for instance in self.instances:
+            self.listener.add_instance(instance)
+        self.listener.update_instance(self.instances[0])
+        self.listener.remove_instance(self.instances[1])
+        self.listener.flush()
+        mock_enqueue.assert_called_once_with(
+            args=(
+                self.broadcast.id,
+                [self.instances[0].to_dict(), self.instances[2].to_dict()],
+                [self.instances[1].to_dict()],
+            ),
+            kwargs=dict(concurrency=self.listener.concurrency),
+            priority=Priority.HIGH,
+        )
+
+    @mock.patch(SEARCH_MODULE + "update_dynamic_network_locations.enqueue")
+    def test_batch__lod(self, mock_enqueue):
+        # both devices are LODs, so the task should have a regular priority
+        self.broadcast_instance.device_info["subset_of_users_device"] = True
+        self.instances[0].device_info["subset_of_users_device"] = True
+        self.listener.add_instance(self.instances[0])
+        self.listener.flush()
+        self.assertEqual(mock_enqueue.call_args[1]["priority"], Priority.REGULAR)
+
+    @mock.patch(SEARCH_MODULE + "update_dynamic_network_locations.enqueue")
+    @mock.patch(SEARCH_MODULE + "BATCH_MAX_DELAY", 0)
+    def test_batch__max_delay(self, mock_enqueue):
+        self.listener.add_instance(self.instances[0])
+        timer = self.listener._timer
+        self.assertEqual(timer.interval, 0)
+        timer.join(5)
+        mock_enqueue.assert_called_once()
+
+    @mock.patch(SEARCH_MODULE + "reset_connection_states.enqueue")
+    @mock.patch(SEARCH_MODULE + "update_dynamic_network_locations.enqueue")
+    def test_unregister_instance(self, mock_enqueue, mock_reset_enqueue):
+        self.listener.add_instance(self.instances[0])
+        self.listener.unregister_instance(self.broadcast_instance)
+        self.listener.flush()
+        mock_enqueue.assert_not_called()
+        mock_reset_enqueue.assert_called_once_with(args=(self.broadcast.id,))
@@ -7,6 +7,10 @@ from ..models import ConnectionStatus
 from ..models import NetworkLocation
 from ..utils.network import errors
 from ..utils.network.client import NetworkClient
+from ..utils.network.client import PEER_MAX_CONNECTIONS
+from ..utils.network.client import peer_registry
+from ..utils.network.client import PeerSession
+from ..utils.network.client import TooManyConnections
 from ..utils.network.urls import get_normalized_url_variations
 from .helpers import info as mock_device_info
 from .helpers import mock_happy_request
@@ -403,3 +407,117 @@ class NetworkClientTestCase(TestCase):
             with mock.patch.object(NetworkClient, "get", return_value=response):
                 with NetworkClient("http://url.qqq/") as nc:
                     nc.connect()
+
+
+def record_requests(mock_request):
+    urls = []
+
+    def request(session, method, url, *args, **kwargs):
+        urls.append(url)
+        return mock_request(session, method, url, *args, **kwargs)
+
+    return urls, request
+
+
+class PeerRegistryTestCase(TestCase):
+    def tearDown(self):
+        peer_registry.clear()
+
+    def test_build_for_address__reuses_resolution(self):
+        urls, request = record_requests(mock_happy_request("https://url.qqq/"))
+        with mock.patch.object(requests.Session, "request", request):
+            client = NetworkClient.build_for_address("url.qqq")
+            requested = len(urls)
+            cached_client = NetworkClient.build_for_address("url.qqq")
+        self.assertEqual(len(urls), requested)
+        self.assertEqual(cached_client.base_url, client.base_url)
+        self.assertEqual(cached_client.device_info, client.device_info)
+        self.assertEqual(cached_client.remote_ip, client.remote_ip)
+        self.assertIs(cached_client.peer, client.peer)
+
+    def test_build_for_address__unreachable(self):
+        urls, request = record_requests(mock_not_found())
+        with mock.patch.object(requests.Session, "request", request):
+            with self.assertRaises(errors.NetworkLocationNotFound):
+                NetworkClient.build_for_address("sadurl.qqq")
+            requested = len(urls)
+            with self.assertRaises(errors.NetworkLocationNotFound):
+                NetworkClient.build_for_address("sadurl.qqq")
+        self.assertEqual(len(urls), requested)
+
+    def test_request__failure_invalidates_resolution(self):
+        with mock.patch.object(
+            requests.Session, "request", mock_happy_request("https://url.qqq/")
+        ):
+            client = NetworkClient.build_for_address("url.qqq")
+        peer = peer_registry.get_peer("url.qqq")
+        self.assertTrue(peer.is_healthy)
+        with mock.patch.object(requests.Session, "request", mock_not_found()):
+            with self.assertRaises(errors.NetworkLocationConnectionFailure):
+                client.get("api/public/info/")
+        self.assertFalse(peer.is_healthy)
+        self.assertIsNone(peer.get_resolution())
+
+    def test_request__too_many_connections(self):
+        client = NetworkClient("https://url.qqq/")
+        with mock.patch.object(client.peer.semaphore, "acquire", return_value=False):
+            with self.assertRaises(errors.NetworkLocationResponseTimeout):
+                client.get("api/public/info/", timeout=0.01)
+        self.assertTrue(client.peer.is_healthy)
+
+    def test_session_request__too_many_connections(self):
+        session = PeerSession.for_address("https://url.qqq/")
+        with mock.patch.object(session.peer.semaphore, "acquire", return_value=False):
+            with self.assertRaises(TooManyConnections):
+                session.get("https://url.qqq/content/storage/", timeout=0.01)
+
+    def test_request__releases_connection(self):
+        client = NetworkClient("https://url.qqq/")
+        with mock.patch.object(
+            requests.Session, "request", mock_happy_request("https://url.qqq/")
+        ):
+            with mock.patch.object(
+                client.peer.semaphore,
+                "acquire",
+                wraps=client.peer.semaphore.acquire,
+            ) as acquire:
+                client.get("api/public/info/")
+        # the connection is acquired once by the network client, and released
+        acquire.assert_called_once()
+        for _ in range(PEER_MAX_CONNECTIONS):
+            self.assertTrue(client.peer.semaphore.acquire(blocking=False))
+
+    def test_session_request__stream_holds_connection(self):
+        session = PeerSession.for_address("https://url.qqq/")
+        with mock.patch.object(
+            requests.Session, "request", mock_happy_request("https://url.qqq/")
+        ):
+            response = session.get("https://url.qqq/content/storage/", stream=True)
+        for _ in range(PEER_MAX_CONNECTIONS - 1):
+            self.assertTrue(session.peer.semaphore.acquire(blocking=False))
+        # the connection is held by the streamed response
+        self.assertFalse(session.peer.semaphore.acquire(blocking=False))
+        response.close()
+        self.assertTrue(session.peer.semaphore.acquire(blocking=False))
+        # and only released once
+        response.close()
+        self.assertFalse(session.peer.semaphore.acquire(blocking=False))
+
+    def test_session_request__stream_released_when_consumed(self):
+        session = PeerSession.for_address("https://url.qqq/")
+        with mock.patch.object(
+            requests.Session, "request", mock_happy_request("https://url.qqq/")
+        ):
+            response = session.get("https://url.qqq/content/storage/", stream=True)
+        # urllib3 releases the connection once the body is fully read
+        response.raw.release_conn()
+        for _ in range(PEER_MAX_CONNECTIONS):
+            self.assertTrue(session.peer.semaphore.acquire(blocking=False))
+
+    def test_session_close__keeps_connections(self):
+        peer = peer_registry.get_peer("https://url.qqq/")
+        with mock.patch.object(peer.adapter, "close") as close_mock:
+            with PeerSession.for_address("https://url.qqq/") as session:
+                self.assertIs(session.get_adapter("https://url.qqq/"), peer.adapter)
+        close_mock.assert_not_called()
+        self.assertIs(NetworkClient("https://url.qqq").peer, peer)
@@ -20,6 +20,7 @@ from ..tasks import hydrate_instance
 from ..tasks import perform_network_location_update
 from ..tasks import remove_dynamic_network_location
 from ..tasks import reset_connection_states
+from ..tasks import update_dynamic_network_locations
 from ..utils.network.broadcast import KolibriInstance
 from .helpers import info as mock_device_info
 from kolibri.core.tasks.job import Priority
@@ -211,6 +212,77 @@ class RemoveDynamicNetworkLocationTestCase(TestCase):
         )
 
 
+class UpdateDynamicNetworkLocationsTestCase(TestCase):
+    multi_db = True
+
+    def setUp(self):
+        self.broadcast_id = uuid.uuid4().hex
+        self.instances = [
+            KolibriInstance(
+                instance_id,
+                ip=MOCK_INTERFACE_IP,
+                port=MOCK_PORT,
+                device_info=dict(mock_device_info, instance_id=instance_id),
+            )
+            for instance_id in ("a" * 32, "b" * 32)
+        ]
+        self.task = unwrap(update_dynamic_network_locations)
+
+    def _set_connection_status(self, network_location):
+        if network_location.id == "a" * 32:
+            network_location.connection_status = ConnectionStatus.Okay
+        else:
+            network_location.connection_status = ConnectionStatus.ConnectionFailure
+            network_location.connection_faults += 1
+        return network_location.connection_status
+
+    @mock.patch(
+        "kolibri.core.discovery.tasks.perform_network_location_update.enqueue_in"
+    )
+    @mock.patch("kolibri.core.discovery.tasks._update_connection_status")
+    def test_added(self, mock_update, mock_enqueue_in):
+        mock_update.side_effect = self._set_connection_status
+        self.task(
+            self.broadcast_id,
+            [instance.to_dict() for instance in self.instances],
+            [],
+            concurrency=2,
+        )
+        self.assertEqual(
+            2,
+            DynamicNetworkLocation.objects.filter(
+                broadcast_id=self.broadcast_id
+            ).count(),
+        )
+        self.assertEqual(
+            {"a" * 32, "b" * 32},
+            {call[0][0].id for call in mock_update.call_args_list},
+        )
+        # only the failed connection is checked again
+        mock_enqueue_in.assert_called_once_with(
+            datetime.timedelta(minutes=2),
+            job_id=generate_job_id("connect", "b" * 32),
+            args=("b" * 32,),
+            priority=Priority.LOW,
+        )
+
+    @mock.patch("kolibri.core.discovery.tasks._dispatch_discovery_hooks")
+    @mock.patch("kolibri.core.discovery.tasks._update_connection_status")
+    def test_removed(self, mock_update, mock_dispatch):
+        DynamicNetworkLocation.objects.create(
+            id="a" * 32,
+            base_url="http://url.qqq",
+            broadcast_id=self.broadcast_id,
+            application="kolibri",
+            kolibri_version="0.15.11",
+            instance_id="a" * 32,
+        )
+        self.task(self.broadcast_id, [], [self.instances[0].to_dict()])
+        mock_dispatch.assert_called_once()
+        mock_update.assert_not_called()
+        self.assertFalse(DynamicNetworkLocation.objects.exists())
+
+
 class DispatchBroadcastHooksTestCase(TestCase):
     multi_db = True
 
@@ -1,8 +1,11 @@
+import asyncio
 import json
 import logging
 import socket
+import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 from magicbus.base import Bus
 from magicbus.plugins import SimplePlugin
@@ -26,6 +29,7 @@ FALSE = "FALSE"
 DEFAULT_PORT = 8080
 SERVICE_RENAME_ATTEMPTS = 100
 SERVICE_TTL = 60
+DEFAULT_DISCOVERY_CONCURRENCY = 16
 
 EVENT_REGISTER_INSTANCE = (
     "register_instance"  # our local instance is registered on the network
@@ -562,8 +566,13 @@ class KolibriBroadcast(object):
         if instance is not None and instance.is_broadcasting:
             return
 
-        # get information about the instance from Zeroconf
-        service_info = self._get_service_info(name)
+        self._resolve_service(name, self._add_service_info)
+
+    def _add_service_info(self, name, service_info):
+        """
+        :param name: A str of the service name
+        :type service_info: ServiceInfo
+        """
         if service_info is None:
             return
 
@@ -588,8 +597,13 @@ class KolibriBroadcast(object):
 
         logger.debug("Received UPDATE event for Zeroconf service: {}".format(name))
 
-        # get information about the instance from Zeroconf
-        service_info = self._get_service_info(name)
+        self._resolve_service(name, self._update_service_info)
+
+    def _update_service_info(self, name, service_info):
+        """
+        :param name: A str of the service name
+        :type service_info: ServiceInfo
+        """
         if service_info is None:
             # trying to update the instance but we couldn't find it so just remove it
             return self.remove_service(name)
@@ -643,6 +657,15 @@ class KolibriBroadcast(object):
         instance.set_broadcasting(service_info, is_self=is_self)
         return instance
 
+    def _resolve_service(self, name, callback):
+        """
+        Queries Zeroconf for info about a service, and passes it to the callback
+        :param name: A str of the service name on the network
+        :param callback: A callable receiving the name and the `ServiceInfo`, or None if it
+            could not be retrieved
+        """
+        callback(name, self._get_service_info(name))
+
     def _get_service_info(self, name):
         """
         Queries Zeroconf for info about a service by `name`
@@ -663,3 +686,124 @@ class KolibriBroadcast(object):
                 )
             )
         return service_info
+
+
+class AsyncKolibriBroadcast(KolibriBroadcast):
+    """
+    Broadcast that queries Zeroconf for info about the services on the network concurrently, from
+    an asyncio event loop, instead of one at a time in the thread of the Zeroconf service browser.
+    The network events are handled in the event loop thread.
+    """
+
+    __slots__ = (
+        "concurrency",
+        "_loop",
+        "_loop_thread",
+        "_executor",
+        "_resolving",
+        "_tasks",
+    )
+
+    def __init__(
+        self,
+        instance,
+        interfaces=InterfaceChoice.All,
+        concurrency=DEFAULT_DISCOVERY_CONCURRENCY,
+    ):
+        """
+        :param instance: A `KolibriInstance` we'll register and broadcast on Zeroconf
+        :param interfaces: A list of addresses or a Zeroconf `InterfaceChoice`
+        :param concurrency: The maximum number of services queried at the same time
+        """
+        super(AsyncKolibriBroadcast, self).__init__(instance, interfaces=interfaces)
+        self.concurrency = concurrency
+        self._loop = None
+        self._loop_thread = None
+        self._executor = None
+        # the next callback for each service being queried, or None
+        self._resolving = {}
+        self._tasks = set()
+
+    def start_broadcast(self):
+        # the event loop must be running before the service browser sends any events
+        if not self.is_broadcasting and self._loop is None:
+            self._start_loop()
+        super(AsyncKolibriBroadcast, self).start_broadcast()
+
+    def stop_broadcast(self):
+        if self._loop is not None:
+            self._stop_loop()
+        super(AsyncKolibriBroadcast, self).stop_broadcast()
+
+    def _start_loop(self):
+        self._loop = asyncio.new_event_loop()
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        self._loop_thread = threading.Thread(
+            target=self._loop.run_forever, name="zeroconf-discovery"
+        )
+        self._loop_thread.daemon = True
+        self._loop_thread.start()
+
+    def _stop_loop(self):
+        # cancel the queries in progress before stopping the loop
+        asyncio.run_coroutine_threadsafe(self._cancel_tasks(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join()
+        self._loop.close()
+        self._executor.shutdown(wait=False)
+        self._loop = None
+        self._loop_thread = None
+        self._executor = None
+        self._resolving = {}
+
+    async def _cancel_tasks(self):
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _in_loop_thread(self):
+        return threading.current_thread() is self._loop_thread
+
+    def _resolve_service(self, name, callback):
+        if self._loop is None:
+            return super(AsyncKolibriBroadcast, self)._resolve_service(name, callback)
+        self._loop.call_soon_threadsafe(self._schedule_resolve, name, callback)
+
+    def _schedule_resolve(self, name, callback):
+        if name in self._resolving:
+            # coalesce with the query in progress, and query once more after it, as the service
+            # may have changed since it started
+            self._resolving[name] = callback
+            return
+        self._resolving[name] = None
+        task = self._loop.create_task(self._resolve_service_async(name, callback))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _resolve_service_async(self, name, callback):
+        try:
+            while callback is not None:
+                service_info = await self._loop.run_in_executor(
+                    self._executor, self._get_service_info, name
+                )
+                try:
+                    callback(name, service_info)
+                except Exception as e:
+                    logger.error(
+                        "Failed to handle Zeroconf service {}".format(name), exc_info=e
+                    )
+                callback = self._resolving[name]
+                self._resolving[name] = None
+        finally:
+            self._resolving.pop(name, None)
+
+    def remove_service(self, name):
+        """
+        :param name: A str of the service name
+        """
+        if self._loop is None or self._in_loop_thread():
+            return super(AsyncKolibriBroadcast, self).remove_service(name)
+        self._loop.call_soon_threadsafe(
+            super(AsyncKolibriBroadcast, self).remove_service, name
+        )
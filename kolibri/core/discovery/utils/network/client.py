@@ -1,7 +1,12 @@
 import logging
+import threading
+import time
+import weakref
+from collections import namedtuple
 from urllib.parse import urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
 
 import kolibri
 from . import errors
@@ -28,45 +33,265 @@ DEFAULT_ASYNC_READ_TIMEOUT = 30
 # make the overall timeout ~= the DEFAULT_READ_TIMEOUT
 DEFAULT_SYNC_READ_TIMEOUT = DEFAULT_READ_TIMEOUT / (len(HTTP_PORTS) + len(HTTPS_PORTS))
 
+# seconds for which the URL that the address of a peer resolved to is reused
+RESOLVED_URL_TTL = 60
+# seconds for which an address that could not be resolved is not tried again
+UNREACHABLE_TTL = 10
+# the maximum number of concurrent requests, and of kept alive connections, to a peer
+PEER_MAX_CONNECTIONS = 10
 
-class NetworkClient(requests.Session):
+
+Resolution = namedtuple("Resolution", ["base_url", "device_info", "remote_ip"])
+
+
+class TooManyConnections(requests.exceptions.ConnectTimeout):
+    """
+    No connection to the peer became available within the connect timeout, as the other sessions
+    of this process are using all of them
+    """
+
+
+class Peer(object):
+    """
+    A device that network clients connect to. It pools the connections to the device, caches the
+    URL that its address resolved to, and tracks its health.
+    """
+
+    __slots__ = (
+        "address",
+        "adapter",
+        "semaphore",
+        "failures",
+        "last_success",
+        "last_failure",
+        "_resolution",
+        "_resolved_at",
+        "_unreachable_at",
+        "_lock",
+    )
+
+    def __init__(self, address, max_connections=PEER_MAX_CONNECTIONS):
+        """
+        :param address: The address of the peer
+        :param max_connections: The maximum number of concurrent requests to the peer
+        """
+        self.address = address
+        self.adapter = HTTPAdapter(pool_maxsize=max_connections)
+        self.semaphore = threading.BoundedSemaphore(max_connections)
+        # the number of consecutive failures to connect
+        self.failures = 0
+        self.last_success = None
+        self.last_failure = None
+        self._resolution = None
+        self._resolved_at = None
+        self._unreachable_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_healthy(self):
+        return self.failures == 0
+
+    @property
+    def is_unreachable(self):
+        """
+        Whether the address could not be resolved recently
+        """
+        with self._lock:
+            return (
+                self._unreachable_at is not None
+                and time.time() - self._unreachable_at < UNREACHABLE_TTL
+            )
+
+    def get_resolution(self):
+        """
+        :return: The Resolution of the address, or None if it wasn't resolved recently
+        :rtype: Resolution
+        """
+        with self._lock:
+            if (
+                self._resolution is not None
+                and time.time() - self._resolved_at < RESOLVED_URL_TTL
+            ):
+                return self._resolution
+        return None
+
+    def set_resolution(self, client):
+        """
+        :param client: A connected NetworkClient for the address
+        :type client: NetworkClient
+        """
+        with self._lock:
+            self._resolution = Resolution(
+                client.base_url, dict(client.device_info), client.remote_ip
+            )
+            self._resolved_at = time.time()
+            self._unreachable_at = None
+
+    def set_unreachable(self):
+        with self._lock:
+            self._resolution = None
+            self._unreachable_at = time.time()
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.last_success = time.time()
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.last_failure = time.time()
+            # resolve the address again, as the peer may have moved
+            self._resolution = None
+
+
+class PeerRegistry(object):
+    """
+    Process wide registry of the peers, so that the network clients built for the same address,
+    by any task or request, share its connections and resolved URL
+    """
+
+    def __init__(self, max_connections=PEER_MAX_CONNECTIONS):
+        self.max_connections = max_connections
+        self._peers = {}
+        self._lock = threading.Lock()
+
+    def get_peer(self, address):
+        """
+        :param address: The address or base URL of the peer
+        :rtype: Peer
+        """
+        key = address.rstrip("/")
+        with self._lock:
+            peer = self._peers.get(key)
+            if peer is None:
+                peer = self._peers[key] = Peer(
+                    address, max_connections=self.max_connections
+                )
+            return peer
+
+    def clear(self):
+        with self._lock:
+            peers = list(self._peers.values())
+            self._peers = {}
+        for peer in peers:
+            peer.adapter.close()
+
+
+peer_registry = PeerRegistry()
+
+
+def _release_with_response(response, semaphore):
+    """
+    Releases the semaphore once the connection of the streamed response is released, which
+    urllib3 does when the body is fully read or the response is closed, or at the latest when
+    the response is garbage collected
+
+    :type response: requests.Response
+    :type semaphore: threading.BoundedSemaphore
+    """
+    # a finalizer calls the release at most once
+    release = weakref.finalize(response, semaphore.release)
+    release_conn = response.raw.release_conn
+
+    def release_conn_and_semaphore():
+        try:
+            release_conn()
+        finally:
+            release()
+
+    response.raw.release_conn = release_conn_and_semaphore
+
+
+class PeerSession(requests.Session):
+    """
+    A session that uses the pooled, kept alive connections of a peer, which outlive the session
+    """
+
+    def __init__(self, peer):
+        """
+        :type peer: Peer
+        """
+        super(PeerSession, self).__init__()
+        self.peer = peer
+        self.mount("http://", peer.adapter)
+        self.mount("https://", peer.adapter)
+        self.headers.update(
+            {
+                "User-Agent": get_user_agent(),
+            }
+        )
+
+    def request(self, method, url, **kwargs):
+        timeout = kwargs.get("timeout")
+        if isinstance(timeout, tuple):
+            timeout = timeout[0]
+        # wait for a connection to the peer for at most the connect timeout
+        if not self.peer.semaphore.acquire(
+            timeout=DEFAULT_CONNECT_TIMEOUT if timeout is None else timeout
+        ):
+            raise TooManyConnections("Too many connections to: {}".format(url))
+        try:
+            response = super(PeerSession, self).request(method, url, **kwargs)
+        except BaseException:
+            self.peer.semaphore.release()
+            raise
+        if kwargs.get("stream"):
+            # the body of a streamed response is read after it is returned, so the connection
+            # is held until the response is consumed or closed
+            _release_with_response(response, self.peer.semaphore)
+        else:
+            self.peer.semaphore.release()
+        return response
+
+    @classmethod
+    def for_address(cls, address):
+        """
+        :param address: The address or base URL of the peer
+        :rtype: PeerSession
+        """
+        return cls(peer_registry.get_peer(address))
+
+    def close(self):
+        # leave the connections of the peer open for the other sessions
+        for prefix, adapter in list(self.adapters.items()):
+            if adapter is self.peer.adapter:
+                del self.adapters[prefix]
+        super(PeerSession, self).close()
+
+
+class NetworkClient(PeerSession):
     __slots__ = ("base_url", "timeout", "session", "device_info", "remote_ip")
 
-    def __init__(self, base_url, timeout=None):
+    def __init__(self, base_url, timeout=None, peer=None):
         """
         If an explicit base_url is already known, provide that. If only a vague address is known,
         `build_from_address` can build a client to determine the actual `base_url`
         :param base_url: The fully composed URL for a network location, without path
         :param timeout: A timeout value in seconds or tuple for (connect, read)
         :type timeout: float|tuple
+        :param peer: The peer to share connections with, by default the peer of the base_url
+        :type peer: Peer
         """
-        super(NetworkClient, self).__init__()
+        super(NetworkClient, self).__init__(peer or peer_registry.get_peer(base_url))
 
         self.base_url = base_url
         self.timeout = timeout or (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
         self.session = None
         self.device_info = None
         self.remote_ip = None
-        self.headers.update(
-            {
-                "User-Agent": get_user_agent(),
-            }
-        )
 
     @classmethod
     def build_for_address(cls, address, timeout=None):
         """
         Normalizes the address URL and tries a number of variations until we find one
-        that's able to connect
+        that's able to connect. The variation found is reused for RESOLVED_URL_TTL seconds.
 
         :param address: The address of which to try variations of
         :param timeout: A timeout value in seconds or tuple for (connect, read)
         :return: A NetworkClient with a verified connection
         :rtype: NetworkClient|cls
         """
-        logger.info(
-            "Attempting connections to variations of the URL: {}".format(address)
-        )
         if timeout is None:
             if get_current_job() is not None:
                 # when we're within a job, then we can use longer timeouts
@@ -74,14 +299,31 @@ class NetworkClient(requests.Session):
             else:
                 # if we're within a request thread, then we limit it for an overall time
                 timeout = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_SYNC_READ_TIMEOUT)
+
+        peer = peer_registry.get_peer(address)
+        resolution = peer.get_resolution()
+        if resolution is not None:
+            client = cls(resolution.base_url, timeout=timeout, peer=peer)
+            client.device_info = dict(resolution.device_info)
+            client.remote_ip = resolution.remote_ip
+            return client
+        if peer.is_unreachable:
+            raise errors.NetworkLocationNotFound()
+
+        logger.info(
+            "Attempting connections to variations of the URL: {}".format(address)
+        )
         _, self_urls = get_urls()
         for url in get_normalized_url_variations(address):
             if url in self_urls:
                 continue  # exclude our own URLs
-            with cls(url, timeout=timeout) as client:
-                if client.connect(raise_if_unavailable=False):
-                    return client
+            client = cls(url, timeout=timeout, peer=peer)
+            if client.connect(raise_if_unavailable=False):
+                peer.set_resolution(client)
+                return client
+            client.close()
         # we weren't able to connect to any of the URL variations, so all we can do is throw
+        peer.set_unreachable()
         raise errors.NetworkLocationNotFound()
 
     @classmethod
@@ -114,11 +356,30 @@ class NetworkClient(requests.Session):
         return self.request("POST", path, **kwargs)
 
     def request(self, method, path, **kwargs):
-        response = None
         if "timeout" not in kwargs:
             kwargs.update(timeout=self.timeout)
 
         url = join_url(self.base_url, path)
+        try:
+            response = self._request(method, url, **kwargs)
+        except TooManyConnections as e:
+            # the peer is only busy with the other requests of this process
+            raise errors.NetworkLocationResponseTimeout(str(e)) from e
+        except (
+            errors.NetworkLocationConnectionFailure,
+            errors.NetworkLocationResponseTimeout,
+        ):
+            self.peer.record_failure()
+            raise
+        except errors.NetworkLocationResponseFailure:
+            # the peer responded, so it is still healthy
+            self.peer.record_success()
+            raise
+        self.peer.record_success()
+        return response
+
+    def _request(self, method, url, **kwargs):
+        response = None
         try:
             with super(NetworkClient, self).request(
                 method, url, stream=True, **kwargs
@@ -133,6 +394,8 @@ class NetworkClient(requests.Session):
 
             response.raise_for_status()
             return response
+        except TooManyConnections:
+            raise
         except (
             requests.exceptions.ConnectionError,
             requests.exceptions.SSLError,
@@ -1,4 +1,6 @@
 import logging
+import threading
+import time
 
 from kolibri.core.discovery.tasks import add_dynamic_network_location
 from kolibri.core.discovery.tasks import dispatch_broadcast_hooks
@@ -7,11 +9,20 @@ from kolibri.core.discovery.tasks import remove_dynamic_network_location
 from kolibri.core.discovery.tasks import reset_connection_states
 from kolibri.core.discovery.tasks import TYPE_ADD
 from kolibri.core.discovery.tasks import TYPE_REMOVE
+from kolibri.core.discovery.tasks import update_dynamic_network_locations
+from kolibri.core.discovery.utils.network.broadcast import (
+    DEFAULT_DISCOVERY_CONCURRENCY,
+)
 from kolibri.core.discovery.utils.network.broadcast import KolibriInstanceListener
 from kolibri.core.tasks.job import Priority
 
 logger = logging.getLogger(__name__)
 
+# Seconds without any change to the instances on the network before the changes are handled
+BATCH_DEBOUNCE = 2
+# Maximum seconds a change waits to be handled while the instances keep changing
+BATCH_MAX_DELAY = 10
+
 
 class NetworkLocationListener(KolibriInstanceListener):
     """
@@ -91,3 +102,106 @@ class NetworkLocationListener(KolibriInstanceListener):
             job_id=generate_job_id(TYPE_REMOVE, self.broadcast.id, instance.id),
             args=(self.broadcast.id, instance.to_dict()),
         )
+
+
+class BatchedNetworkLocationListener(NetworkLocationListener):
+    """
+    Listener that coalesces the changes to the instances on the network, and enqueues a single
+    task to manage the corresponding `NetworkLocation` models once they stop changing, instead of
+    a task for each change
+    """
+
+    def __init__(self, broadcast):
+        super(BatchedNetworkLocationListener, self).__init__(broadcast)
+        self.concurrency = getattr(
+            broadcast, "concurrency", DEFAULT_DISCOVERY_CONCURRENCY
+        )
+        self._lock = threading.Lock()
+        self._timer = None
+        self._first_change = None
+        # the pending changes by instance ID, only the latest change to an instance is kept
+        self._added = {}
+        self._removed = {}
+        self._priority = None
+
+    def unregister_instance(self, instance):
+        """
+        :type instance: kolibri.core.discovery.utils.network.broadcast.KolibriInstance
+        """
+        # the connection states are reset for the new broadcast, so drop the pending changes
+        with self._lock:
+            self._reset()
+        super(BatchedNetworkLocationListener, self).unregister_instance(instance)
+
+    def add_instance(self, instance):
+        """
+        :type instance: kolibri.core.discovery.utils.network.broadcast.KolibriInstance
+        """
+        self._add_change(instance, removed=False)
+
+    def update_instance(self, instance):
+        """
+        :type instance: kolibri.core.discovery.utils.network.broadcast.KolibriInstance
+        """
+        self._add_change(instance, removed=False)
+
+    def remove_instance(self, instance):
+        """
+        :type instance: kolibri.core.discovery.utils.network.broadcast.KolibriInstance
+        """
+        self._add_change(instance, removed=True)
+
+    def _add_change(self, instance, removed):
+        with self._lock:
+            if removed:
+                self._added.pop(instance.id, None)
+                self._removed[instance.id] = instance.to_dict()
+            else:
+                self._removed.pop(instance.id, None)
+                self._added[instance.id] = instance.to_dict()
+                priority = self._get_dynamic_network_location_task_priority(instance)
+                # lower values are higher priorities
+                self._priority = min(priority, self._priority or priority)
+
+            now = time.time()
+            if self._first_change is None:
+                self._first_change = now
+            if self._timer is not None:
+                self._timer.cancel()
+            delay = min(BATCH_DEBOUNCE, self._first_change + BATCH_MAX_DELAY - now)
+            self._timer = threading.Timer(max(delay, 0), self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _reset(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = None
+        self._first_change = None
+        self._added = {}
+        self._removed = {}
+        self._priority = None
+
+    def flush(self):
+        """
+        Enqueues the task handling the pending changes
+        """
+        with self._lock:
+            added = list(self._added.values())
+            removed = list(self._removed.values())
+            priority = self._priority
+            self._reset()
+
+        if not added and not removed:
+            return
+
+        logger.debug(
+            "Enqueuing update of {} added and {} removed network locations".format(
+                len(added), len(removed)
+            )
+        )
+        update_dynamic_network_locations.enqueue(
+            args=(self.broadcast.id, added, removed),
+            kwargs=dict(concurrency=self.concurrency),
+            priority=priority,
+        )
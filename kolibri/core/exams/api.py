@@ -1,3 +1,4 @@
+from django.db import transaction
 from django.utils.timezone import now
 from django_filters.rest_framework import DjangoFilterBackend
 from django_filters.rest_framework import FilterSet
@@ -119,21 +120,24 @@ class ExamViewset(ValuesViewset):
     def perform_update(self, serializer):
         was_active = serializer.instance.active
         was_archived = serializer.instance.archive
-        serializer.save()
+        # Atomic, so that the handlers of the exam being saved that run on commit see the
+        # updated mastery logs too
+        with transaction.atomic():
+            serializer.save()
 
-        masterylog_queryset = MasteryLog.objects.filter(
-            summarylog__content_id=serializer.instance.id
-        )
-
-        if was_active and not serializer.instance.active:
-            # Has changed from active to not active, set completion_timestamps on all non complete masterylogs
-            masterylog_queryset.filter(completion_timestamp__isnull=True).update(
-                completion_timestamp=now()
+            masterylog_queryset = MasteryLog.objects.filter(
+                summarylog__content_id=serializer.instance.id
             )
 
-        if not was_archived and serializer.instance.archive:
-            # It was not archived (closed), but now it is - so we set all MasteryLogs as complete
-            masterylog_queryset.update(complete=True)
+            if was_active and not serializer.instance.active:
+                # Has changed from active to not active, set completion_timestamps on all non complete masterylogs
+                masterylog_queryset.filter(completion_timestamp__isnull=True).update(
+                    completion_timestamp=now()
+                )
+
+            if not was_archived and serializer.instance.archive:
+                # It was not archived (closed), but now it is - so we set all MasteryLogs as complete
+                masterylog_queryset.update(complete=True)
 
     @action(detail=False)
     def size(self, request, **kwargs):
@@ -14,6 +14,7 @@ from kolibri.core.auth.constants import demographics
 from kolibri.core.auth.models import Classroom
 from kolibri.core.auth.models import Facility
 from kolibri.core.auth.models import FacilityUser
+from kolibri.core.auth.utils.passwords import hash_passwords
 from kolibri.core.content.models import ContentNode
 from kolibri.core.exams.models import Exam
 from kolibri.core.exams.models import ExamAssignment
@@ -137,6 +138,8 @@ def get_or_create_classroom_users(**options):
             ),
             verbosity=verbosity,
         )
+        # Set a dummy password so that if we want to login as this learner later, we can.
+        passwords = hash_passwords(["password"] * n_to_create)
         for i in range(0, n_to_create):
             # Get the first base data that does not have a matching user already
             base_data = user_data[n_in_classroom + i]
@@ -164,10 +167,8 @@ def get_or_create_classroom_users(**options):
                     username=base_data["Username"],
                     gender=gender,
                     birth_year=birth_year,
+                    password=passwords[i],
                 )
-                # Set a dummy password so that if we want to login as this learner later, we can.
-                user.set_password("password")
-                user.save()
             except IntegrityError:
                 user = FacilityUser.objects.get(
                     facility=facility, username=base_data["Username"]
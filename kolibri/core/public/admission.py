@@ -0,0 +1,194 @@
+"""
+Admission control of the single user devices that request to sync with this server.
+
+The number of syncs that run concurrently, the budget, is sized from the current load of the
+server: the CPU usage, the latency of the database writes and the number of requests being
+served. The load is sampled at most every ADMISSION_SAMPLE_INTERVAL seconds, and every sample
+is published in the process cache, so that it can be inspected from other processes.
+"""
+import logging
+import threading
+import time
+
+from django.utils import timezone
+
+from kolibri.core.analytics import SUPPORTED_OS
+from kolibri.core.device.models import SyncQueue
+from kolibri.core.device.models import SyncQueueStatus
+from kolibri.core.public.constants.user_sync_options import HANDSHAKING_TIME
+from kolibri.core.public.constants.user_sync_options import MAX_CONCURRENT_SYNCS
+from kolibri.core.public.middleware import get_active_requests
+from kolibri.core.utils.cache import process_cache
+from kolibri.utils.conf import OPTIONS
+
+if SUPPORTED_OS:
+    import kolibri.utils.pskolibri as psutil
+else:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+SYNC_ADMISSION_METRICS_CACHE_KEY = "SYNC_ADMISSION_METRICS"
+
+ADMISSION_SAMPLE_INTERVAL = 5
+
+# Concurrent syncs allowed for every CPU of the server
+SYNCS_PER_CPU = 2
+
+# The budget shrinks linearly while the CPU usage goes from the low to the high mark
+CPU_LOW_PERCENT = 50.0
+CPU_HIGH_PERCENT = 90.0
+
+# The budget shrinks linearly while the database write latency goes from the low to the high mark
+WRITE_LATENCY_LOW = 0.05
+WRITE_LATENCY_HIGH = 1.0
+
+# Weight of the latest measurement in the moving averages
+EWMA_WEIGHT = 0.2
+
+_lock = threading.Lock()
+
+_write_latency = None
+
+_sync_duration = None
+
+_metrics = None
+
+_sampled_at = 0
+
+
+def _moving_average(average, value):
+    if average is None:
+        return value
+    return EWMA_WEIGHT * value + (1 - EWMA_WEIGHT) * average
+
+
+def record_write_latency(seconds):
+    """
+    Records the duration of a write to the database made while serving a sync request
+    """
+    global _write_latency
+    with _lock:
+        _write_latency = _moving_average(_write_latency, seconds)
+
+
+def record_sync_duration(sync_session):
+    """
+    Records the duration of a sync that a single user device has completed with this server
+
+    :type sync_session: morango.models.core.SyncSession
+    """
+    global _sync_duration
+    seconds = (timezone.now() - sync_session.start_timestamp).total_seconds()
+    if seconds <= 0:
+        return
+    with _lock:
+        _sync_duration = _moving_average(_sync_duration, seconds)
+
+
+def _headroom(value, low, high):
+    """
+    :return: 1 when the value is below the low mark, 0 when it is above the high mark,
+        and the linear interpolation in between
+    """
+    if value is None:
+        return 1.0
+    return min(max((high - value) / (high - low), 0.0), 1.0)
+
+
+def calculate_sync_budget(cpu_percent, write_latency, active_requests):
+    """
+    :return: The number of syncs that may run concurrently under the given load, which is never
+        less than one, so that the queue always moves forward
+    """
+    ceiling = MAX_CONCURRENT_SYNCS
+    if psutil is not None:
+        ceiling = min(ceiling, (psutil.cpu_count() or 1) * SYNCS_PER_CPU)
+    thread_pool = OPTIONS["Server"]["CHERRYPY_THREAD_POOL"]
+    headroom = min(
+        _headroom(cpu_percent, CPU_LOW_PERCENT, CPU_HIGH_PERCENT),
+        _headroom(write_latency, WRITE_LATENCY_LOW, WRITE_LATENCY_HIGH),
+        # the request checking the queue is one of the active requests
+        _headroom(active_requests - 1, 0, thread_pool),
+    )
+    return max(int(ceiling * headroom), 1)
+
+
+def _sample_metrics():
+    cpu_percent = psutil.cpu_percent() if psutil is not None else None
+    active_requests = get_active_requests()
+    budget = calculate_sync_budget(cpu_percent, _write_latency, active_requests)
+    active_syncs = SyncQueue.objects.filter(
+        status__in=[SyncQueueStatus.Ready, SyncQueueStatus.Syncing]
+    ).count()
+    queued = SyncQueue.objects.filter(status=SyncQueueStatus.Queued).count()
+    return {
+        "budget": budget,
+        "cpu_percent": cpu_percent,
+        "write_latency": _write_latency,
+        "active_requests": active_requests,
+        "active_syncs": active_syncs,
+        "queued": queued,
+        "sync_duration": _sync_duration,
+        "time": time.time(),
+    }
+
+
+def get_admission_metrics():
+    """
+    Returns the latest load sample of this server, as a dict with the sync budget, the CPU usage
+    in percent, the average database write latency in seconds, the number of active requests,
+    the number of admitted and queued syncs, and the average sync duration in seconds.
+    """
+    global _metrics, _sampled_at
+    with _lock:
+        if (
+            _metrics is not None
+            and time.time() - _sampled_at < ADMISSION_SAMPLE_INTERVAL
+        ):
+            return _metrics
+        # claim the sample, so that concurrent requests keep using the previous one
+        _sampled_at = time.time()
+    metrics = _sample_metrics()
+    with _lock:
+        _metrics = metrics
+    process_cache.set(SYNC_ADMISSION_METRICS_CACHE_KEY, metrics, None)
+    logger.debug("Sync admission metrics: {}".format(metrics))
+    return metrics
+
+
+def get_published_admission_metrics():
+    """
+    Returns the latest load sample published by the server process, or None
+    """
+    return process_cache.get(SYNC_ADMISSION_METRICS_CACHE_KEY)
+
+
+def get_sync_budget():
+    """
+    :return: The number of syncs that may run concurrently under the current load
+    """
+    return get_admission_metrics()["budget"]
+
+
+def get_retry_after(position, active_syncs, budget):
+    """
+    Estimates when a queued device should check the queue again. Devices are admitted one per
+    handshake while the budget has free slots, and the devices that do not fit in the free slots
+    also wait for a round of running syncs to complete for every budget of devices ahead of them.
+
+    :param position: The number of queued devices ahead of the device
+    :param active_syncs: The number of devices admitted and syncing
+    :param budget: The number of syncs that may run concurrently
+    :return: The number of seconds the device should wait
+    """
+    retry_after = HANDSHAKING_TIME * position
+    free_slots = max(budget - active_syncs, 0)
+    if _sync_duration is not None and position >= free_slots:
+        rounds = (position - free_slots) // budget + 1
+        retry_after = max(retry_after, rounds * _sync_duration)
+    # up to HANDSHAKING_TIME less than the sync interval
+    return max(
+        HANDSHAKING_TIME,
+        min(retry_after, OPTIONS["Deployment"]["SYNC_INTERVAL"] - HANDSHAKING_TIME),
+    )
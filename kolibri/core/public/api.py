@@ -39,16 +39,24 @@ from kolibri.core.content.models import ChannelMetadata
 from kolibri.core.content.models import ContentNode
 from kolibri.core.content.models import LocalFile
 from kolibri.core.content.serializers import PublicChannelSerializer
-from kolibri.core.content.utils.file_availability import checksum_regex
+from kolibri.core.content.utils.checksum_index import checksum_regex
+from kolibri.core.content.utils.file_availability import CHECKSUMS_DIGEST_MISMATCH
+from kolibri.core.content.utils.file_availability import generate_checksum_bitset
 from kolibri.core.content.utils.file_availability import generate_checksum_integer_mask
+from kolibri.core.content.utils.file_availability import (
+    get_channel_checksums_availability,
+)
+from kolibri.core.content.utils.file_availability import unpack_checksums
 from kolibri.core.device import soud
 from kolibri.core.device.models import SyncQueue
 from kolibri.core.device.models import SyncQueueStatus
 from kolibri.core.device.utils import allow_peer_unlisted_channel_import
 from kolibri.core.device.utils import get_device_info
 from kolibri.core.device.utils import get_device_setting
+from kolibri.core.public.admission import get_retry_after
+from kolibri.core.public.admission import get_sync_budget
+from kolibri.core.public.admission import record_write_latency
 from kolibri.core.public.constants.user_sync_options import HANDSHAKING_TIME
-from kolibri.core.public.constants.user_sync_options import MAX_CONCURRENT_SYNCS
 from kolibri.core.serializers import HexOnlyUUIDField
 from kolibri.utils.conf import OPTIONS
 
@@ -187,18 +195,53 @@ def get_public_channel_lookup(request, version, identifier):
     )
 
 
+def _get_request_data(request):
+    if request.content_type == "application/gzip":
+        with gzip.GzipFile(fileobj=io.BytesIO(request.body)) as f:
+            return f.read()
+    return request.body
+
+
+def _get_public_file_checksums_v2(request, channel_id):
+    if request.method == "GET":
+        digest, bitset = get_channel_checksums_availability(channel_id)
+        if request.GET.get("digest") != digest:
+            return HttpResponse(status=CHECKSUMS_DIGEST_MISMATCH)
+        return HttpResponse(bitset, content_type="application/octet-stream")
+    if request.content_type not in ("application/octet-stream", "application/gzip"):
+        return HttpResponseBadRequest("POST body must be either octet-stream or gzip")
+    try:
+        checksums = unpack_checksums(_get_request_data(request))
+    except (ValueError, IOError):
+        return HttpResponseBadRequest("POST body must be a list of 16 byte checksums")
+    available_checksums = set(
+        LocalFile.objects.filter(available=True)
+        .filter_by_uuids(checksums)
+        .values_list("id", flat=True)
+        .distinct()
+    )
+    return HttpResponse(
+        generate_checksum_bitset(checksums, available_checksums),
+        content_type="application/octet-stream",
+    )
+
+
 @csrf_exempt
 @gzip_page
-def get_public_file_checksums(request, version):
-    """ Endpoint: /public/<version>/file_checksums/ """
+def get_public_file_checksums(request, version, channel_id=None):
+    """
+    Endpoint: /public/<version>/file_checksums/<channel_id>
+
+    v1: POST a JSON list of checksums, returns an integer bitmask of their availability.
+    v2: GET with the digest of the sorted checksums of the channel, or POST the checksums
+    as packed 16 byte digests, returns a packed bitset of their availability.
+    """
+    if version == "v2" and channel_id is not None:
+        return _get_public_file_checksums_v2(request, channel_id)
     if version == "v1":
-        if request.content_type == "application/json":
-            data = request.body
-        elif request.content_type == "application/gzip":
-            with gzip.GzipFile(fileobj=io.BytesIO(request.body)) as f:
-                data = f.read()
-        else:
+        if request.content_type not in ("application/json", "application/gzip"):
             return HttpResponseBadRequest("POST body must be either json or gzip")
+        data = _get_request_data(request)
         try:
             checksums = json.loads(data.decode("utf-8"))
         except ValueError:
@@ -240,6 +283,9 @@ class SyncQueueAPIView(APIView):
         # first, ensure no expired devices are in the queue
         SyncQueue.clean_stale()
 
+        # the number of concurrent syncs depends on the current load of the server
+        budget = get_sync_budget()
+
         # open a transaction for claiming the next ready queue position, if applicable
         with transaction.atomic():
             current_count = SyncQueue.objects.filter(
@@ -248,7 +294,7 @@ class SyncQueueAPIView(APIView):
                     SyncQueueStatus.Syncing,
                 ]
             ).count()
-            if current_count < MAX_CONCURRENT_SYNCS:
+            if current_count < budget:
                 next_id = SyncQueue.find_next_id_in_queue()
                 if next_id == queue_object.id:
                     queue_object.status = SyncQueueStatus.Ready
@@ -256,13 +302,10 @@ class SyncQueueAPIView(APIView):
                     queue_object.save()
 
         if queue_object.status != SyncQueueStatus.Ready:
-            # score the active queue objects
+            # score the queued objects, which prioritizes the devices that have not synced
+            # for longest
             scored_queue = SyncQueue.objects.filter(
-                status__in=[
-                    SyncQueueStatus.Queued,
-                    SyncQueueStatus.Ready,
-                    SyncQueueStatus.Syncing,
-                ]
+                status=SyncQueueStatus.Queued
             ).annotate_score()
             # get the score of the current queue object
             score = (
@@ -272,16 +315,8 @@ class SyncQueueAPIView(APIView):
             )
             # get the position of the current queue object
             position = scored_queue.filter(score__gt=score).count()
-            # set next attempt in increments of HANDSHAKING_TIME, up to HANDSHAKING_TIME less than
-            # the sync interval
             queue_object.set_next_attempt(
-                max(
-                    HANDSHAKING_TIME,
-                    min(
-                        HANDSHAKING_TIME * position,
-                        OPTIONS["Deployment"]["SYNC_INTERVAL"] - HANDSHAKING_TIME,
-                    ),
-                )
+                get_retry_after(position, current_count, budget)
             )
             queue_object.save()
 
@@ -329,7 +364,9 @@ class SyncQueueAPIView(APIView):
                     time.time() - OPTIONS["Deployment"]["SYNC_INTERVAL"]
                 )
 
+        start = time.time()
         queue_object.save()
+        record_write_latency(time.time() - start)
 
         self.check_queue(queue_object)
         return queue_object
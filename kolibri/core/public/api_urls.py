@@ -70,6 +70,11 @@ urlpatterns = [
         get_public_channel_list,
         name="get_public_channel_list",
     ),
+    url(
+        r"(?P<version>[^/]+)/file_checksums/(?P<channel_id>[a-f0-9]{32})",
+        get_public_file_checksums,
+        name="get_public_channel_file_checksums",
+    ),
     url(
         r"(?P<version>[^/]+)/file_checksums/",
         get_public_file_checksums,
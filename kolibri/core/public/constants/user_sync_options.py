@@ -5,7 +5,9 @@ from __future__ import unicode_literals
 
 DELAYED_SYNC = 900  # client: seconds to mark sync as not recent
 
-MAX_CONCURRENT_SYNCS = 1  # Server: max number of concurrent syncs allowed
+MAX_CONCURRENT_SYNCS = (
+    8  # Server: max number of concurrent syncs allowed, under no load
+)
 HANDSHAKING_TIME = 5  # Server: minimum time (seconds) considered as the ttl for the next sync request from an enqueued client
 
 STALE_QUEUE_TIME = (
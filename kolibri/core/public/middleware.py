@@ -0,0 +1,32 @@
+import threading
+
+_lock = threading.Lock()
+
+_active_requests = 0
+
+
+def get_active_requests():
+    """
+    :return: The number of requests being served by this process
+    """
+    return _active_requests
+
+
+class ActiveRequestsMiddleware(object):
+    """
+    Counts the requests being served by this process, as a measure of the load of the server
+    for the admission of the syncs of single user devices.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        global _active_requests
+        with _lock:
+            _active_requests += 1
+        try:
+            return self.get_response(request)
+        finally:
+            with _lock:
+                _active_requests -= 1
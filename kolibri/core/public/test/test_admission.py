@@ -0,0 +1,129 @@
+import time
+import uuid
+
+import mock
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from kolibri.core.auth.models import Facility
+from kolibri.core.auth.models import FacilityUser
+from kolibri.core.auth.test.helpers import provision_device
+from kolibri.core.device.models import SyncQueue
+from kolibri.core.device.models import SyncQueueStatus
+from kolibri.core.public import admission
+from kolibri.core.public.constants.user_sync_options import HANDSHAKING_TIME
+from kolibri.core.public.middleware import ActiveRequestsMiddleware
+from kolibri.core.public.middleware import get_active_requests
+
+
+@mock.patch("kolibri.core.public.admission.MAX_CONCURRENT_SYNCS", 8)
+@mock.patch("kolibri.core.public.admission.psutil", None)
+class SyncBudgetTestCase(SimpleTestCase):
+    def test_no_load(self):
+        self.assertEqual(admission.calculate_sync_budget(10.0, 0.01, 1), 8)
+
+    def test_cpu_load(self):
+        self.assertEqual(admission.calculate_sync_budget(70.0, None, 1), 4)
+        self.assertEqual(admission.calculate_sync_budget(100.0, None, 1), 1)
+
+    def test_write_latency(self):
+        self.assertEqual(admission.calculate_sync_budget(None, 2.0, 1), 1)
+
+    def test_active_requests(self):
+        thread_pool = admission.OPTIONS["Server"]["CHERRYPY_THREAD_POOL"]
+        self.assertEqual(
+            admission.calculate_sync_budget(None, None, thread_pool // 2 + 1), 4
+        )
+
+
+class RetryAfterTestCase(SimpleTestCase):
+    def test_free_slots(self):
+        with mock.patch.object(admission, "_sync_duration", 30):
+            self.assertEqual(admission.get_retry_after(2, 0, 4), 2 * HANDSHAKING_TIME)
+
+    def test_full_budget(self):
+        with mock.patch.object(admission, "_sync_duration", 20):
+            self.assertEqual(admission.get_retry_after(0, 2, 2), 20)
+            self.assertEqual(admission.get_retry_after(2, 2, 2), 40)
+
+    def test_unknown_sync_duration(self):
+        with mock.patch.object(admission, "_sync_duration", None):
+            self.assertEqual(admission.get_retry_after(3, 2, 2), 3 * HANDSHAKING_TIME)
+
+    def test_sync_interval(self):
+        with mock.patch.object(admission, "_sync_duration", 1000):
+            self.assertEqual(
+                admission.get_retry_after(1, 1, 1),
+                admission.OPTIONS["Deployment"]["SYNC_INTERVAL"] - HANDSHAKING_TIME,
+            )
+
+
+class ActiveRequestsMiddlewareTestCase(SimpleTestCase):
+    def test_count(self):
+        counts = []
+        middleware = ActiveRequestsMiddleware(
+            lambda request: counts.append(get_active_requests())
+        )
+        middleware(mock.Mock())
+        self.assertEqual(counts, [1])
+        self.assertEqual(get_active_requests(), 0)
+
+
+class SyncAdmissionTestCase(APITestCase):
+    multi_db = True
+
+    def setUp(self):
+        provision_device()
+        self.facility = Facility.objects.create(name="facility")
+        self.learner = FacilityUser.objects.create(
+            username="learner", password="***", facility=self.facility
+        )
+        self.instance_id = uuid.uuid4().hex
+
+    def _create_queue_object(self, status):
+        learner = FacilityUser.objects.create(
+            username=uuid.uuid4().hex[:20], password="***", facility=self.facility
+        )
+        return SyncQueue.objects.create(
+            user_id=learner.id,
+            instance_id=uuid.uuid4().hex,
+            status=status,
+            keep_alive=10,
+            last_sync=time.time(),
+        )
+
+    def _post(self):
+        return self.client.post(
+            reverse("kolibri:core:syncqueue"),
+            {"user": self.learner.id, "instance": self.instance_id},
+            format="json",
+        )
+
+    @mock.patch("kolibri.core.public.api.get_sync_budget", return_value=2)
+    def test_admitted_within_budget(self, mock_budget):
+        self._create_queue_object(SyncQueueStatus.Syncing)
+        response = self._post()
+        self.assertEqual(response.data["status"], SyncQueueStatus.Ready)
+
+    @mock.patch("kolibri.core.public.api.get_sync_budget", return_value=2)
+    def test_queued_over_budget(self, mock_budget):
+        for _ in range(2):
+            self._create_queue_object(SyncQueueStatus.Syncing)
+        with mock.patch.object(admission, "_sync_duration", 20):
+            response = self._post()
+        self.assertEqual(response.data["status"], SyncQueueStatus.Queued)
+        self.assertEqual(response.data["keep_alive"], 20)
+
+    @mock.patch("kolibri.core.public.admission.process_cache")
+    def test_metrics_published(self, mock_cache):
+        self._create_queue_object(SyncQueueStatus.Syncing)
+        self._create_queue_object(SyncQueueStatus.Queued)
+        with mock.patch.object(admission, "_metrics", None):
+            metrics = admission.get_admission_metrics()
+        self.assertEqual(metrics["active_syncs"], 1)
+        self.assertEqual(metrics["queued"], 1)
+        self.assertGreaterEqual(metrics["budget"], 1)
+        mock_cache.set.assert_called_once_with(
+            admission.SYNC_ADMISSION_METRICS_CACHE_KEY, metrics, None
+        )
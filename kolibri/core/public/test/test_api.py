@@ -27,6 +27,10 @@ from kolibri.core.content.models import File
 from kolibri.core.content.models import Language
 from kolibri.core.content.models import LocalFile
 from kolibri.core.content.utils.annotation import set_channel_metadata_fields
+from kolibri.core.content.utils.file_availability import CHECKSUMS_DIGEST_MISMATCH
+from kolibri.core.content.utils.file_availability import get_channel_checksums
+from kolibri.core.content.utils.file_availability import get_checksums_digest
+from kolibri.core.content.utils.file_availability import pack_checksums
 from kolibri.core.content.utils.paths import get_channel_lookup_url
 from kolibri.core.device.models import DeviceSettings
 from kolibri.core.device.models import SyncQueue
@@ -35,6 +39,7 @@ from kolibri.core.device.utils import set_device_settings
 from kolibri.core.public.constants.user_sync_options import HANDSHAKING_TIME
 from kolibri.core.public.constants.user_sync_options import MAX_CONCURRENT_SYNCS
 from kolibri.core.public.constants.user_sync_options import STALE_QUEUE_TIME
+from kolibri.core.utils.cache import process_cache
 
 
 class ContentNodeFactory(factory.DjangoModelFactory):
@@ -265,6 +270,51 @@ class PublicAPITestCase(APITransactionTestCase):
         )
         self.assertEqual(int(response.content), 2)
 
+    def _v2_checksums_url(self):
+        return reverse(
+            "kolibri:core:get_public_channel_file_checksums",
+            kwargs={"version": "v2", "channel_id": self.channel_id1},
+        )
+
+    def test_public_checksum_lookup_v2_matching_digest(self):
+        process_cache.clear()
+        checksums = get_channel_checksums(self.channel_id1)
+        LocalFile.objects.filter(id=checksums[0]).update(available=True)
+        LocalFile.objects.exclude(id=checksums[0]).update(available=False)
+        response = self.client.get(
+            self._v2_checksums_url(), {"digest": get_checksums_digest(checksums)}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(bytearray(response.content)[0], 1)
+
+    def test_public_checksum_lookup_v2_digest_mismatch(self):
+        process_cache.clear()
+        response = self.client.get(
+            self._v2_checksums_url(), {"digest": get_checksums_digest([])}
+        )
+        self.assertEqual(response.status_code, CHECKSUMS_DIGEST_MISMATCH)
+
+    def test_public_checksum_lookup_v2_packed_checksums(self):
+        LocalFile.objects.all().update(available=True)
+        ids = list(
+            LocalFile.objects.all().order_by("id")[:2].values_list("id", flat=True)
+        )
+        LocalFile.objects.filter(id=ids[0]).update(available=False)
+        response = self.client.post(
+            self._v2_checksums_url(),
+            data=pack_checksums(ids + [uuid.uuid4().hex]),
+            content_type="application/octet-stream",
+        )
+        self.assertEqual(bytearray(response.content)[0], 2)
+
+    def test_public_checksum_lookup_v2_invalid_checksums(self):
+        response = self.client.post(
+            self._v2_checksums_url(),
+            data=b"not a checksum",
+            content_type="application/octet-stream",
+        )
+        self.assertEqual(response.status_code, 400)
+
     def test_public_filter_unlisted(self):
         set_device_settings(allow_peer_unlisted_channel_import=False)
         unlisted_channel_id = uuid.uuid4().hex
@@ -56,6 +56,11 @@ class GroupConcat(Aggregate):
         self.result_field = kwargs.pop("result_field", None)
         super(GroupConcat, self).__init__(*args, **kwargs)
 
+    def as_postgresql(self, compiler, connection):
+        return super(GroupConcat, self).as_sql(
+            compiler, connection, template="STRING_AGG(%(field)s::text, ',')"
+        )
+
     def convert_value(self, value, expression, connection, context):
         if not value:
             return []
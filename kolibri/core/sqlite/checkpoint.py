@@ -0,0 +1,202 @@
+"""
+Checkpointing of the write-ahead logs of the Kolibri SQLite databases, run by a
+dedicated service rather than by the request thread that happens to commit when
+the write-ahead log exceeds the autocheckpoint size.
+
+The service runs in the services process, which may not be the process serving the
+requests, e.g. when Kolibri is served by a separate WSGI server. So the service records
+that it is running in the process cache, and every process derives the autocheckpoint
+size of its new connections, and the backpressure on its writes, from that record and
+from the sizes of the write-ahead log files.
+"""
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+from django.conf import settings
+
+from kolibri.core.sqlite.pragmas import WAL_AUTOCHECKPOINT
+from kolibri.core.utils.cache import process_cache
+from kolibri.deployment.default.sqlite_db_names import DEFAULT_READ
+from kolibri.deployment.default.sqlite_db_names import JOB_STORAGE
+from kolibri.utils.conf import OPTIONS
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_METRICS_CACHE_KEY = "SQLITE_CHECKPOINT_METRICS"
+
+CHECKPOINT_SERVICE_CACHE_KEY = "SQLITE_CHECKPOINT_SERVICE"
+
+# Seconds for which the service is considered running after its last run
+SERVICE_HEARTBEAT_TIMEOUT = 30
+
+# Seconds that a TRUNCATE checkpoint waits for readers and writers to finish
+TRUNCATE_BUSY_TIMEOUT = 1
+
+# When checkpoints are run by the service, the connections only checkpoint as a safety net,
+# should the write-ahead log grow far beyond the backpressure threshold.
+SERVICE_WAL_AUTOCHECKPOINT = 16000
+
+# Seconds that a write waits at most for a checkpoint when backpressure is applied
+BACKPRESSURE_MAX_WAIT = 5
+
+# Seconds between two checks of the write-ahead logs by a write that is held back
+BACKPRESSURE_POLL_INTERVAL = 0.1
+
+
+def get_sqlite_database_paths():
+    """
+    Returns a dict of the names and file paths of all the Kolibri SQLite databases.
+    """
+    paths = {
+        alias: database["NAME"]
+        for alias, database in settings.DATABASES.items()
+        if database["ENGINE"] == "django.db.backends.sqlite3" and alias != DEFAULT_READ
+    }
+    paths[JOB_STORAGE] = OPTIONS["Tasks"]["JOB_STORAGE_FILEPATH"]
+    return paths
+
+
+def _get_wal_stat(path):
+    try:
+        stat = os.stat(path + "-wal")
+    except OSError:
+        return 0, None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def get_wal_size(path):
+    return _get_wal_stat(path)[0]
+
+
+def checkpoint(path, mode):
+    """
+    Runs a checkpoint of the write-ahead log of the database.
+    :param path: the file path of the database
+    :param mode: PASSIVE, FULL, RESTART or TRUNCATE
+    :return: whether the checkpoint completed, without being blocked by readers or writers
+    """
+    timeout = 0 if mode == "PASSIVE" else TRUNCATE_BUSY_TIMEOUT
+    with closing(sqlite3.connect(path, timeout=timeout)) as connection:
+        busy, _, _ = connection.execute(
+            "PRAGMA wal_checkpoint({});".format(mode)
+        ).fetchone()
+    return not busy
+
+
+def is_checkpoint_service_running():
+    """
+    Returns whether the checkpoint service is running, in this or in any other process.
+    """
+    return bool(process_cache.get(CHECKPOINT_SERVICE_CACHE_KEY))
+
+
+def get_wal_autocheckpoint():
+    """
+    Returns the autocheckpoint size of the new connections, as a number of pages, which is
+    only raised while the checkpoint service is running.
+    """
+    if is_checkpoint_service_running():
+        return SERVICE_WAL_AUTOCHECKPOINT
+    return WAL_AUTOCHECKPOINT
+
+
+def _wal_over_threshold(threshold):
+    return any(
+        get_wal_size(path) > threshold for path in get_sqlite_database_paths().values()
+    )
+
+
+def wait_for_checkpoint(threshold=None):
+    """
+    Blocks the calling thread while the write-ahead log of any database is beyond the
+    backpressure threshold and the checkpoint service is running to catch up,
+    for BACKPRESSURE_MAX_WAIT seconds at most.
+    :return: whether the write-ahead logs are below the threshold
+    """
+    threshold = threshold or OPTIONS["Database"]["SQLITE_WAL_BACKPRESSURE_SIZE"]
+    deadline = time.time() + BACKPRESSURE_MAX_WAIT
+    while _wal_over_threshold(threshold):
+        # without the service, the connections checkpoint the write-ahead logs themselves
+        if time.time() >= deadline or not is_checkpoint_service_running():
+            return False
+        time.sleep(BACKPRESSURE_POLL_INTERVAL)
+    return True
+
+
+def get_checkpoint_metrics():
+    """
+    Returns the last metrics recorded by the checkpoint service for every database, as a dict
+    of dicts with the wal_size in bytes, and the duration in seconds and time of the last checkpoint.
+    """
+    return process_cache.get(CHECKPOINT_METRICS_CACHE_KEY, {})
+
+
+class CheckpointService(object):
+    """
+    Checkpoints the write-ahead logs of all the Kolibri SQLite databases:
+    - PASSIVE checkpoints, that never block, every `interval` seconds
+    - PASSIVE and then TRUNCATE checkpoints when the database is idle, i.e. the write-ahead log
+      was not modified since the previous run, or when the write-ahead log exceeds the threshold
+    Writes are held back by wait_for_checkpoint, in any process, while it is running and any
+    write-ahead log exceeds the threshold.
+    """
+
+    def __init__(self, interval=None, threshold=None):
+        self.interval = interval or OPTIONS["Database"]["SQLITE_CHECKPOINT_INTERVAL"]
+        self.threshold = (
+            threshold or OPTIONS["Database"]["SQLITE_WAL_BACKPRESSURE_SIZE"]
+        )
+        self.paths = get_sqlite_database_paths()
+        self.wal_stats = {}
+        self.last_checkpoints = {}
+        self.metrics = {}
+        self.over_threshold = False
+
+    def start(self):
+        process_cache.set(CHECKPOINT_SERVICE_CACHE_KEY, True, SERVICE_HEARTBEAT_TIMEOUT)
+
+    def stop(self):
+        process_cache.delete(CHECKPOINT_SERVICE_CACHE_KEY)
+
+    def _checkpoint(self, name, path, truncate):
+        start = time.time()
+        try:
+            completed = checkpoint(path, "PASSIVE")
+            if truncate:
+                completed = checkpoint(path, "TRUNCATE")
+        except sqlite3.Error as e:
+            logger.warning("Checkpoint of the {} database failed: {}".format(name, e))
+            return
+        self.last_checkpoints[name] = start
+        self.metrics[name] = {
+            "wal_size": get_wal_size(path),
+            "checkpoint_duration": time.time() - start,
+            "checkpoint_completed": completed,
+            "last_checkpoint": start,
+        }
+
+    def run(self):
+        over_threshold = False
+        for name, path in self.paths.items():
+            wal_stat = _get_wal_stat(path)
+            wal_size = wal_stat[0]
+            # The write-ahead log is reused from its start after a checkpoint, so its size
+            # alone does not tell whether the database has been written to.
+            idle = wal_stat == self.wal_stats.get(name)
+            over = wal_size > self.threshold
+            due = time.time() - self.last_checkpoints.get(name, 0) >= self.interval
+            if wal_size and (idle or over or due):
+                self._checkpoint(name, path, truncate=idle or over)
+                wal_stat = _get_wal_stat(path)
+            else:
+                self.metrics.setdefault(name, {})["wal_size"] = wal_size
+            self.wal_stats[name] = wal_stat
+            over_threshold = over_threshold or wal_stat[0] > self.threshold
+        if over_threshold and not self.over_threshold:
+            logger.warning("Write-ahead log beyond threshold, holding back writes")
+        self.over_threshold = over_threshold
+        process_cache.set(CHECKPOINT_METRICS_CACHE_KEY, self.metrics, None)
+        process_cache.set(CHECKPOINT_SERVICE_CACHE_KEY, True, SERVICE_HEARTBEAT_TIMEOUT)
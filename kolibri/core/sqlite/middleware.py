@@ -0,0 +1,36 @@
+from kolibri.core.sqlite.checkpoint import wait_for_checkpoint
+from kolibri.core.sqlite.routers import read_only_queries
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReadConnectionMiddleware(object):
+    """
+    Runs the queries of the requests with safe methods on the separate read connections
+    to the default database, so that they are not queued behind the writes of other requests.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in SAFE_METHODS:
+            return self.get_response(request)
+        with read_only_queries():
+            return self.get_response(request)
+
+
+class WriteBackpressureMiddleware(object):
+    """
+    Holds back the requests with unsafe methods, which are likely to write to the databases,
+    while the write-ahead log of any database is beyond the backpressure threshold,
+    so that the checkpoint service can catch up.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in SAFE_METHODS:
+            wait_for_checkpoint()
+        return self.get_response(request)
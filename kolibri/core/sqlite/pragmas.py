@@ -1,3 +1,104 @@
+from django.db import DEFAULT_DB_ALIAS
+
+from kolibri.deployment.default.sqlite_db_names import DEFAULT_READ
+from kolibri.deployment.default.sqlite_db_names import JOB_STORAGE
+from kolibri.deployment.default.sqlite_db_names import NETWORK_LOCATION
+from kolibri.deployment.default.sqlite_db_names import NOTIFICATIONS
+from kolibri.deployment.default.sqlite_db_names import SYNC_QUEUE
+from kolibri.utils.conf import OPTIONS
+
+# Shorten the default WAL autocheckpoint from 1000 pages to 500
+WAL_AUTOCHECKPOINT = 500
+
+# The PRAGMAs of the connections to the content databases, which are not tuned like the
+# connections to the Kolibri databases
 CONNECTION_PRAGMAS = "PRAGMA wal_autocheckpoint=500; PRAGMA legacy_alter_table = ON;"
 
 START_PRAGMAS = "PRAGMA journal_mode=WAL;"
+
+# Share of the configured page cache and memory mapped sizes used by the connections
+# to each database, as the other databases are much smaller than the main database.
+DATABASE_SIZE_RATIOS = {
+    NOTIFICATIONS: 0.25,
+    JOB_STORAGE: 0.25,
+    SYNC_QUEUE: 0.125,
+    NETWORK_LOCATION: 0.125,
+}
+
+SYNCHRONOUS_LEVELS = ("off", "normal", "full", "extra")
+
+# The data of these databases is transient and rebuilt as needed, so it is never
+# worth waiting for it to be written to disk more than the 'normal' level.
+MAX_SYNCHRONOUS_LEVELS = {
+    SYNC_QUEUE: "normal",
+    NETWORK_LOCATION: "normal",
+}
+
+# Size in bytes to which the write-ahead log is truncated after a checkpoint
+JOURNAL_SIZE_LIMIT = 64 * pow(2, 20)
+
+# The default size in KiB of the page cache of an SQLite connection, which no connection
+# is given less of
+DEFAULT_CACHE_SIZE = 2000
+
+
+def _get_connection_count():
+    """
+    Returns the number of connections to a database that can be open at once: one for each
+    server thread and task worker, and one more for each server thread when the reads of
+    requests run on separate connections.
+    """
+    server_threads = OPTIONS["Server"]["CHERRYPY_THREAD_POOL"]
+    workers = (
+        OPTIONS["Tasks"]["REGULAR_PRIORITY_WORKERS"]
+        + OPTIONS["Tasks"]["HIGH_PRIORITY_WORKERS"]
+    )
+    if OPTIONS["Database"]["SQLITE_READ_CONNECTIONS"]:
+        server_threads *= 2
+    return max(1, server_threads + workers)
+
+
+def _get_cache_size(database):
+    """
+    Returns the size in KiB of the page cache of each connection to the database, so that the
+    caches of all its connections fit in its share of the configured cache size.
+    """
+    ratio = DATABASE_SIZE_RATIOS.get(database, 1)
+    cache_size = int(OPTIONS["Database"]["SQLITE_CACHE_SIZE"] * ratio) // 1024
+    return max(DEFAULT_CACHE_SIZE, cache_size // _get_connection_count())
+
+
+def _get_synchronous_level(database):
+    level = OPTIONS["Database"]["SQLITE_SYNCHRONOUS"]
+    max_level = MAX_SYNCHRONOUS_LEVELS.get(database, level)
+    return min(level, max_level, key=SYNCHRONOUS_LEVELS.index)
+
+
+def get_connection_pragmas(
+    database=DEFAULT_DB_ALIAS, wal_autocheckpoint=WAL_AUTOCHECKPOINT
+):
+    """
+    Returns the PRAGMAs to set on every new connection to the database,
+    tuned according to the Kolibri options and the database.
+    :param database: the Django alias of the database, or JOB_STORAGE
+    :param wal_autocheckpoint: the number of pages of the write-ahead log beyond which
+        the connection runs a checkpoint when committing
+    :rtype: str
+    """
+    ratio = DATABASE_SIZE_RATIOS.get(database, 1)
+    # The memory mapped pages are shared by all the connections, through the page cache of the OS
+    mmap_size = int(OPTIONS["Database"]["SQLITE_MMAP_SIZE"] * ratio)
+    pragmas = [
+        "PRAGMA legacy_alter_table = ON;",
+        "PRAGMA wal_autocheckpoint={};".format(wal_autocheckpoint),
+        # A negative cache size is a number of KiB, rather than a number of pages
+        "PRAGMA cache_size=-{};".format(_get_cache_size(database)),
+        "PRAGMA mmap_size={};".format(mmap_size),
+        "PRAGMA temp_store={};".format(OPTIONS["Database"]["SQLITE_TEMP_STORE"]),
+        "PRAGMA synchronous={};".format(_get_synchronous_level(database)),
+        "PRAGMA journal_size_limit={};".format(JOURNAL_SIZE_LIMIT),
+    ]
+    if database == DEFAULT_READ:
+        # Ensure that the read connections never write to the database
+        pragmas.append("PRAGMA query_only=ON;")
+    return " ".join(pragmas)
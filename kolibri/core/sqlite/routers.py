@@ -0,0 +1,67 @@
+from contextlib import contextmanager
+from threading import local
+
+from django.db import connections
+from django.db import DEFAULT_DB_ALIAS
+
+from kolibri.deployment.default.sqlite_db_names import DEFAULT_READ
+
+_state = local()
+
+
+def read_connections_enabled():
+    return DEFAULT_READ in connections.databases
+
+
+@contextmanager
+def read_only_queries():
+    """
+    Context manager within which the reads of the default database are run on its
+    separate read connections, if they are configured.
+    """
+    previous = getattr(_state, "read_only", False)
+    _state.read_only = True
+    try:
+        yield
+    finally:
+        _state.read_only = previous
+
+
+class ReadConnectionRouter(object):
+    """
+    Determine how to route database calls for the separate read connections to the default database.
+    This router must be the last one, so that only the models of the default database reach it.
+    """
+
+    def db_for_read(self, model, **hints):
+        """
+        Send the read operations within read_only_queries to DEFAULT_READ, unless a transaction
+        is open on the default database, as its changes would not be visible to the read connection.
+        """
+        if (
+            getattr(_state, "read_only", False)
+            and read_connections_enabled()
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_READ
+        return None
+
+    def db_for_write(self, model, **hints):
+        """Send the write operations of the objects read from DEFAULT_READ to the default database."""
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db == DEFAULT_READ:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Allow any relation between objects of the default database and of its read connections."""
+        aliases = (DEFAULT_DB_ALIAS, DEFAULT_READ)
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Never migrate through the read connections, they share the default database."""
+        if db == DEFAULT_READ:
+            return False
+        return None
@@ -13,12 +13,15 @@ from sqlalchemy import create_engine
 from sqlalchemy import event
 from sqlalchemy import exc
 
+from kolibri.core.sqlite.checkpoint import get_wal_autocheckpoint
+from kolibri.core.sqlite.pragmas import get_connection_pragmas
 from kolibri.core.sqlite.utils import check_sqlite_integrity
 from kolibri.core.sqlite.utils import repair_sqlite_db
 from kolibri.core.tasks import compat
 from kolibri.core.tasks.exceptions import UserCancelledError
+from kolibri.deployment.default.sqlite_db_names import JOB_STORAGE
 from kolibri.utils import conf
-from kolibri.utils.options import FD_PER_THREAD
+from kolibri.utils.options import get_fd_per_thread
 from kolibri.utils.system import get_fd_limit
 
 
@@ -205,6 +208,18 @@ def db_connection():
         db_url,
     )
 
+    if conf.OPTIONS["Database"]["DATABASE_ENGINE"] == "sqlite":
+
+        @event.listens_for(connection, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.executescript(
+                get_connection_pragmas(
+                    JOB_STORAGE, wal_autocheckpoint=get_wal_autocheckpoint()
+                )
+            )
+            cursor.close()
+
     # Check if the database is corrupted
     try:
         check_sqlite_integrity(connection)
@@ -365,7 +380,8 @@ def fd_safe_executor(fds_per_task=2):
         # by the number of regular workers running in the task runner
         # (although the high priority task queue could also be running a channel database download).
         server_reserved_fd_count = (
-            FD_PER_THREAD * conf.OPTIONS["Server"]["CHERRYPY_THREAD_POOL"]
+            get_fd_per_thread(conf.OPTIONS["Database"]["SQLITE_READ_CONNECTIONS"])
+            * conf.OPTIONS["Server"]["CHERRYPY_THREAD_POOL"]
         )
         max_descriptors_per_task = (
             get_fd_limit() - server_reserved_fd_count
@@ -0,0 +1,177 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from contextlib import closing
+
+import mock
+from django.db import transaction
+from django.test import SimpleTestCase
+
+from kolibri.core.auth.models import Facility
+from kolibri.core.sqlite import checkpoint
+from kolibri.core.sqlite import pragmas
+from kolibri.core.sqlite.checkpoint import CheckpointService
+from kolibri.core.sqlite.checkpoint import get_wal_size
+from kolibri.core.sqlite.pragmas import get_connection_pragmas
+from kolibri.core.sqlite.routers import read_only_queries
+from kolibri.core.sqlite.routers import ReadConnectionRouter
+from kolibri.deployment.default.sqlite_db_names import DEFAULT_READ
+from kolibri.deployment.default.sqlite_db_names import NETWORK_LOCATION
+from kolibri.deployment.default.sqlite_db_names import NOTIFICATIONS
+
+DATABASE_OPTIONS = {
+    "SQLITE_CACHE_SIZE": 64 * pow(2, 20),
+    "SQLITE_MMAP_SIZE": 64 * pow(2, 20),
+    "SQLITE_TEMP_STORE": "memory",
+    "SQLITE_SYNCHRONOUS": "full",
+    "SQLITE_READ_CONNECTIONS": False,
+}
+
+OPTIONS = {
+    "Database": DATABASE_OPTIONS,
+    "Server": {"CHERRYPY_THREAD_POOL": 4},
+    "Tasks": {"REGULAR_PRIORITY_WORKERS": 3, "HIGH_PRIORITY_WORKERS": 1},
+}
+
+
+@mock.patch.dict("kolibri.core.sqlite.pragmas.OPTIONS", OPTIONS)
+class ConnectionPragmasTestCase(SimpleTestCase):
+    def test_default_database(self):
+        pragmas = get_connection_pragmas()
+        # The cache size is divided between the 8 server threads and workers
+        self.assertIn("PRAGMA cache_size=-8192;", pragmas)
+        self.assertIn("PRAGMA mmap_size=67108864;", pragmas)
+        self.assertIn("PRAGMA temp_store=memory;", pragmas)
+        self.assertIn("PRAGMA synchronous=full;", pragmas)
+        self.assertNotIn("query_only", pragmas)
+
+    def test_additional_database_sizes(self):
+        pragmas = get_connection_pragmas(NOTIFICATIONS)
+        self.assertIn("PRAGMA cache_size=-2048;", pragmas)
+        self.assertIn("PRAGMA mmap_size=16777216;", pragmas)
+
+    def test_read_connections_cache_size(self):
+        with mock.patch.dict(
+            pragmas.OPTIONS["Database"], {"SQLITE_READ_CONNECTIONS": True}
+        ):
+            connection_pragmas = get_connection_pragmas()
+        self.assertIn("PRAGMA cache_size=-5461;", connection_pragmas)
+
+    def test_minimum_cache_size(self):
+        with mock.patch.dict(pragmas.OPTIONS["Server"], {"CHERRYPY_THREAD_POOL": 150}):
+            connection_pragmas = get_connection_pragmas()
+        self.assertIn("PRAGMA cache_size=-2000;", connection_pragmas)
+
+    def test_transient_database_synchronous(self):
+        self.assertIn(
+            "PRAGMA synchronous=normal;", get_connection_pragmas(NETWORK_LOCATION)
+        )
+
+    def test_read_connection_query_only(self):
+        self.assertIn("PRAGMA query_only=ON;", get_connection_pragmas(DEFAULT_READ))
+
+
+@mock.patch("kolibri.core.sqlite.routers.read_connections_enabled", return_value=True)
+class ReadConnectionRouterTestCase(SimpleTestCase):
+    # Not a TestCase, as its transaction would always keep the reads on the default database
+    allow_database_queries = True
+
+    def setUp(self):
+        self.router = ReadConnectionRouter()
+
+    def test_read_outside_read_only_queries(self, _):
+        self.assertIsNone(self.router.db_for_read(Facility))
+
+    def test_read_within_read_only_queries(self, _):
+        with read_only_queries():
+            self.assertEqual(self.router.db_for_read(Facility), DEFAULT_READ)
+        self.assertIsNone(self.router.db_for_read(Facility))
+
+    def test_read_within_transaction(self, _):
+        with read_only_queries(), transaction.atomic():
+            self.assertIsNone(self.router.db_for_read(Facility))
+
+    def test_write_of_read_object(self, _):
+        facility = Facility(name="Facility")
+        facility._state.db = DEFAULT_READ
+        self.assertEqual(
+            self.router.db_for_write(Facility, instance=facility), "default"
+        )
+
+    def test_no_migrations(self, _):
+        self.assertFalse(self.router.allow_migrate(DEFAULT_READ, "kolibriauth"))
+        self.assertIsNone(self.router.allow_migrate("default", "kolibriauth"))
+
+
+class CheckpointServiceTestCase(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "db.sqlite3")
+        # Keep a connection open, otherwise the write-ahead log is checkpointed on close
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript(
+            "PRAGMA journal_mode=WAL; PRAGMA wal_autocheckpoint=0;"
+            "CREATE TABLE test (value TEXT);"
+        )
+        paths_patcher = mock.patch(
+            "kolibri.core.sqlite.checkpoint.get_sqlite_database_paths",
+            return_value={"default": self.path},
+        )
+        paths_patcher.start()
+        self.addCleanup(paths_patcher.stop)
+        cache_patcher = mock.patch("kolibri.core.sqlite.checkpoint.process_cache")
+        self.process_cache = cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
+        self.service = CheckpointService(interval=3600, threshold=pow(2, 20))
+
+    def write(self, size=1024):
+        with self.connection:
+            self.connection.execute("INSERT INTO test VALUES (?)", ("a" * size,))
+
+    def test_truncate_when_idle(self):
+        self.write()
+        self.service.run()
+        # The write-ahead log has been written since the previous run
+        self.assertGreater(get_wal_size(self.path), 0)
+        self.service.run()
+        self.assertEqual(get_wal_size(self.path), 0)
+        self.assertEqual(self.service.metrics["default"]["wal_size"], 0)
+        self.assertIn("checkpoint_duration", self.service.metrics["default"])
+
+    def test_backpressure(self):
+        self.write(2 * pow(2, 20))
+        # Block the truncation of the write-ahead log with an open read transaction
+        with closing(sqlite3.connect(self.path)) as reader:
+            reader.execute("BEGIN")
+            reader.execute("SELECT COUNT(*) FROM test").fetchone()
+            with mock.patch.object(checkpoint, "TRUNCATE_BUSY_TIMEOUT", 0):
+                self.service.run()
+            with mock.patch.object(checkpoint, "BACKPRESSURE_MAX_WAIT", 0.2):
+                self.assertFalse(checkpoint.wait_for_checkpoint(self.service.threshold))
+            reader.rollback()
+        self.service.run()
+        self.assertTrue(checkpoint.wait_for_checkpoint(self.service.threshold))
+        self.assertEqual(get_wal_size(self.path), 0)
+
+    def test_no_backpressure_without_service(self):
+        self.write(2 * pow(2, 20))
+        self.process_cache.get.return_value = None
+        with mock.patch.object(checkpoint, "BACKPRESSURE_MAX_WAIT", 60):
+            # the connections checkpoint the write-ahead log themselves
+            self.assertFalse(checkpoint.wait_for_checkpoint(self.service.threshold))
+
+    def test_wal_autocheckpoint(self):
+        self.process_cache.get.return_value = None
+        self.assertEqual(
+            checkpoint.get_wal_autocheckpoint(), pragmas.WAL_AUTOCHECKPOINT
+        )
+        # the service may run in another process
+        self.process_cache.get.return_value = True
+        self.assertEqual(
+            checkpoint.get_wal_autocheckpoint(), checkpoint.SERVICE_WAL_AUTOCHECKPOINT
+        )
+
+    def tearDown(self):
+        self.connection.close()
+        shutil.rmtree(self.directory)
@@ -1,7 +1,9 @@
 import logging
+import threading
 
 from django.core.cache import caches
 from django.core.cache import InvalidCacheBackendError
+from django.core.cache.backends.locmem import LocMemCache as BaseLocMemCache
 from django.utils.functional import SimpleLazyObject
 
 
@@ -18,6 +20,52 @@ def __get_process_cache():
 process_cache = SimpleLazyObject(__get_process_cache)
 
 
+_cache_stats = threading.local()
+
+_missing = object()
+
+
+def start_cache_stats():
+    """
+    Starts counting the cache hits and misses of the current thread
+    """
+    _cache_stats.counts = {"hits": 0, "misses": 0}
+
+
+def stop_cache_stats():
+    """
+    Stops counting the cache hits and misses of the current thread
+    :return: A dict with the number of hits and misses since the count was started
+    """
+    counts = getattr(_cache_stats, "counts", None)
+    _cache_stats.counts = None
+    return counts or {"hits": 0, "misses": 0}
+
+
+def _record_cache_lookup(hit):
+    counts = getattr(_cache_stats, "counts", None)
+    if counts is not None:
+        counts["hits" if hit else "misses"] += 1
+
+
+class CacheStatsMixin(object):
+    """
+    Counts the hits and misses of a cache backend, for the threads that started counting them
+    """
+
+    def get(self, key, default=None, *args, **kwargs):
+        value = super(CacheStatsMixin, self).get(key, _missing, *args, **kwargs)
+        if value is _missing:
+            _record_cache_lookup(False)
+            return default
+        _record_cache_lookup(True)
+        return value
+
+
+class LocMemCache(CacheStatsMixin, BaseLocMemCache):
+    pass
+
+
 class RedisSettingsHelper(object):
     """
     Small wrapper for the Redis client to explicitly get/set values from the client
@@ -66,7 +114,7 @@ class RedisSettingsHelper(object):
 try:
     from redis_cache import RedisCache as BaseRedisCache
 
-    class RedisCache(BaseRedisCache):
+    class RedisCache(CacheStatsMixin, BaseRedisCache):
         def set(self, *args, **kwargs):
             """
             Overwrite the set method to not return a value, in line with the Django cache interface
@@ -13,7 +13,10 @@ import os
 import re
 import time
 from abc import abstractproperty
+from collections import namedtuple
 from functools import partial
+from threading import Lock
+from types import MappingProxyType
 from urllib.request import url2pathname
 
 from django.conf import settings
@@ -42,6 +45,18 @@ class WebpackError(Exception):
 logger = logging.getLogger(__name__)
 
 
+#: The tags of a bundle rendered for a language
+RenderedBundle = namedtuple(
+    "RenderedBundle", ["messages", "message_tags", "js_and_css_tags", "chunk_urls"]
+)
+
+_rendered_bundles_lock = Lock()
+
+# The rendered bundles keyed by (unique_id, lang_code, bidi). The map is immutable, and is
+# replaced rather than updated, so that pages can be rendered without holding the lock.
+_rendered_bundles = MappingProxyType({})
+
+
 def filter_by_bidi(bidi, chunk):
     if chunk["name"].split(".")[-1] != "css":
         return True
@@ -108,12 +123,9 @@ class WebpackBundleHook(hooks.KolibriHook):
 
         return stats_file_content
 
-    @property
-    def bundle(self):
-        """
-        :returns: a generator yielding dict objects with properties of the built
-          asset, most notably its URL.
-        """
+    @cached_property
+    def _bundle_chunks(self):
+        chunks = []
         for f in self._stats_file_content["files"]:
             filename = f["name"]
             if not getattr(settings, "DEVELOPER_MODE", False):
@@ -122,12 +134,21 @@ class WebpackBundleHook(hooks.KolibriHook):
             relpath = "{0}/{1}".format(self.unique_id, filename)
             if getattr(settings, "DEVELOPER_MODE", False):
                 try:
-                    f["url"] = f["publicPath"]
+                    url = f["publicPath"]
                 except KeyError:
-                    f["url"] = staticfiles_storage.url(relpath)
+                    url = staticfiles_storage.url(relpath)
             else:
-                f["url"] = staticfiles_storage.url(relpath)
-            yield f
+                url = staticfiles_storage.url(relpath)
+            chunks.append(dict(f, url=url))
+        return tuple(chunks)
+
+    @property
+    def bundle(self):
+        """
+        :returns: an iterator of dict objects with properties of the built
+          asset, most notably its URL.
+        """
+        return iter(self._bundle_chunks)
 
     @property
     def unique_id(self):
@@ -165,51 +186,86 @@ class WebpackBundleHook(hooks.KolibriHook):
             if os.path.exists(file_path):
                 return file_path
 
-    def frontend_messages(self):
-        lang_code = get_language()
+    def read_frontend_messages(self, lang_code):
         frontend_message_file = self.frontend_message_file(lang_code)
         if frontend_message_file:
             with io.open(frontend_message_file, mode="r", encoding="utf-8") as f:
                 message_file_content = json.load(f)
             return message_file_content
 
-    def sorted_chunks(self):
-        bidi = get_language_info(get_language())["bidi"]
+    def _sorted_chunks(self, bidi):
         return sorted(
             filter(partial(filter_by_bidi, bidi), self.bundle),
             key=lambda x: x["name"].split(".")[-1],
         )
 
-    def js_and_css_tags(self):
-        js_tag = '<script type="text/javascript" src="{url}"></script>'
-        css_tag = '<link type="text/css" href="{url}" rel="stylesheet"/>'
-        # Sorted to load css before js
-        for chunk in self.sorted_chunks():
-            if chunk["name"].endswith(".js"):
-                yield js_tag.format(url=chunk["url"])
-            elif chunk["name"].endswith(".css"):
-                yield css_tag.format(url=chunk["url"])
-
-    def frontend_message_tag(self):
-        if self.frontend_messages():
-            return [
+    def _render_bundle(self, lang_code, bidi):
+        messages = self.read_frontend_messages(lang_code)
+        message_tags = []
+        if messages:
+            message_tags.append(
                 """
                         <script>
                             {kolibri_name}.registerLanguageAssets('{bundle}', '{lang_code}', JSON.parse({messages}));
                         </script>""".format(
                     kolibri_name="kolibriCoreAppGlobal",
                     bundle=self.unique_id,
-                    lang_code=get_language(),
+                    lang_code=lang_code,
                     messages=json.dumps(
-                        json.dumps(
-                            self.frontend_messages(),
-                            separators=(",", ":"),
-                            ensure_ascii=False,
-                        )
+                        json.dumps(messages, separators=(",", ":"), ensure_ascii=False)
                     ),
                 )
-            ]
-        return []
+            )
+        js_tag = '<script type="text/javascript" src="{url}"></script>'
+        css_tag = '<link type="text/css" href="{url}" rel="stylesheet"/>'
+        js_and_css_tags = []
+        chunk_urls = []
+        # Sorted to load css before js
+        for chunk in self._sorted_chunks(bidi):
+            chunk_urls.append(chunk["url"])
+            if chunk["name"].endswith(".js"):
+                js_and_css_tags.append(js_tag.format(url=chunk["url"]))
+            elif chunk["name"].endswith(".css"):
+                js_and_css_tags.append(css_tag.format(url=chunk["url"]))
+        return RenderedBundle(
+            messages, tuple(message_tags), tuple(js_and_css_tags), tuple(chunk_urls)
+        )
+
+    def get_rendered_bundle(self, lang_code=None):
+        """
+        Renders the tags of the bundle for a language once, so that rendering a page does not
+        read the stats and message files. In DEVELOPER_MODE the bundle is rendered every time,
+        as the files may have been rebuilt.
+
+        :param lang_code: The language to render the bundle for, the active language if None
+        :returns: A RenderedBundle
+        """
+        global _rendered_bundles
+        lang_code = lang_code or get_language()
+        bidi = get_language_info(lang_code)["bidi"]
+        if getattr(settings, "DEVELOPER_MODE", False):
+            return self._render_bundle(lang_code, bidi)
+        key = (self.unique_id, lang_code, bidi)
+        rendered_bundle = _rendered_bundles.get(key)
+        if rendered_bundle is None:
+            rendered_bundle = self._render_bundle(lang_code, bidi)
+            with _rendered_bundles_lock:
+                rendered_bundles = dict(_rendered_bundles)
+                rendered_bundle = rendered_bundles.setdefault(key, rendered_bundle)
+                _rendered_bundles = MappingProxyType(rendered_bundles)
+        return rendered_bundle
+
+    def frontend_messages(self):
+        return self.get_rendered_bundle().messages
+
+    def sorted_chunks(self):
+        return self._sorted_chunks(get_language_info(get_language())["bidi"])
+
+    def js_and_css_tags(self):
+        return iter(self.get_rendered_bundle().js_and_css_tags)
+
+    def frontend_message_tag(self):
+        return list(self.get_rendered_bundle().message_tags)
 
     def plugin_data_tag(self):
         if self.plugin_data:
@@ -302,10 +358,11 @@ class WebpackBundleHook(hooks.KolibriHook):
         :param bundle_data: The data returned from
         :return: HTML of script tags for insertion into a page.
         """
+        rendered_bundle = self.get_rendered_bundle()
         tags = (
             self.plugin_data_tag()
-            + self.frontend_message_tag()
-            + list(self.js_and_css_tags())
+            + list(rendered_bundle.message_tags)
+            + list(rendered_bundle.js_and_css_tags)
         )
 
         return mark_safe("\n".join(tags))
@@ -325,15 +382,15 @@ class WebpackBundleHook(hooks.KolibriHook):
 
         :returns: HTML of a script tag to insert into a page.
         """
-        urls = [chunk["url"] for chunk in self.sorted_chunks()]
+        rendered_bundle = self.get_rendered_bundle()
         tags = (
             self.plugin_data_tag()
-            + self.frontend_message_tag()
+            + list(rendered_bundle.message_tags)
             + [
                 '<script>{kolibri_name}.registerKolibriModuleAsync("{bundle}", ["{urls}"]);</script>'.format(
                     kolibri_name="kolibriCoreAppGlobal",
                     bundle=self.unique_id,
-                    urls='","'.join(urls),
+                    urls='","'.join(rendered_bundle.chunk_urls),
                 )
             ]
         )
@@ -1,6 +1,12 @@
+from types import MappingProxyType
+
+import mock
 from django.test.testcases import TestCase
+from django.test.utils import override_settings
+from django.utils import translation
 
 from .base import Hook
+from kolibri.core.webpack import hooks
 from kolibri.plugins.hooks import register_hook
 
 
@@ -9,8 +15,44 @@ class KolibriTagNavigationTestCase(TestCase):
         super(KolibriTagNavigationTestCase, self).setUp()
         Hook.__module__ = "test.kolibri_plugin"
         self.test_hook = register_hook(Hook)()
+        patcher = mock.patch.object(hooks, "_rendered_bundles", MappingProxyType({}))
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
     def test_frontend_tag(self):
         self.assertIn(
             "non_default_frontend", self.test_hook.render_to_page_load_sync_html()
         )
+
+    def test_frontend_tag_rendered_once(self):
+        with mock.patch.object(
+            self.test_hook, "read_frontend_messages", return_value={"message": "value"}
+        ) as read_frontend_messages:
+            first = self.test_hook.render_to_page_load_sync_html()
+            second = self.test_hook.render_to_page_load_sync_html()
+        self.assertEqual(first, second)
+        self.assertIn("registerLanguageAssets", first)
+        read_frontend_messages.assert_called_once_with("en")
+
+    def test_frontend_tag_rendered_per_language(self):
+        with mock.patch.object(
+            self.test_hook, "read_frontend_messages", return_value={"message": "value"}
+        ) as read_frontend_messages:
+            self.test_hook.render_to_page_load_sync_html()
+            with translation.override("es-es"):
+                self.assertIn("'es-es'", self.test_hook.render_to_page_load_sync_html())
+        self.assertEqual(read_frontend_messages.call_count, 2)
+
+    @override_settings(DEVELOPER_MODE=True)
+    def test_frontend_tag_developer_mode(self):
+        with mock.patch.object(
+            self.test_hook, "read_frontend_messages", return_value=None
+        ) as read_frontend_messages:
+            self.test_hook.render_to_page_load_sync_html()
+            self.test_hook.render_to_page_load_sync_html()
+        self.assertEqual(read_frontend_messages.call_count, 2)
+
+    def test_bundle_does_not_modify_stats(self):
+        list(self.test_hook.bundle)
+        for f in self.test_hook._stats_file_content["files"]:
+            self.assertNotIn("url", f)
@@ -7,6 +7,7 @@ import os
 import kolibri.core.content
 from kolibri.core.content.utils import paths
 from kolibri.core.content.zip_wsgi import get_application
+from kolibri.utils import conf
 from kolibri.utils.kolibri_whitenoise import DynamicWhiteNoise
 
 os.environ.setdefault(
@@ -33,6 +34,7 @@ def generate_alt_wsgi_application():
         ]
         + [(paths.zip_content_static_root(), content_static_path)],
         app_paths=[paths.get_zip_content_base_path()],
+        dynamic_files_max_size=conf.OPTIONS["Server"]["DYNAMIC_FILES_CACHE_SIZE"],
     )
 
 
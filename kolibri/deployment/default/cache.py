@@ -13,7 +13,7 @@ diskcache_location = os.path.join(KOLIBRI_HOME, "process_cache")
 
 # Default to LocMemCache, as it has the simplest configuration
 default_cache = {
-    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    "BACKEND": "kolibri.core.utils.cache.LocMemCache",
     # Default time out of each cache key
     "TIMEOUT": cache_options["CACHE_TIMEOUT"],
     "OPTIONS": {"MAX_ENTRIES": cache_options["CACHE_MAX_ENTRIES"]},
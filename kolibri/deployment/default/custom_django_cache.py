@@ -3,8 +3,10 @@ import sqlite3
 from diskcache import DjangoCache
 from django.core.cache.backends.base import DEFAULT_TIMEOUT
 
+from kolibri.core.utils.cache import CacheStatsMixin
 
-class CustomDjangoCache(DjangoCache):
+
+class CustomDjangoCache(CacheStatsMixin, DjangoCache):
     """
     Inherits from the DjangoCache to better manage the error handling of the
     diskcache package by try-catching methods that perform database operations
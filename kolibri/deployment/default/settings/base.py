@@ -20,6 +20,7 @@ from tzlocal import get_localzone
 import kolibri
 from kolibri.deployment.default.cache import CACHES
 from kolibri.deployment.default.sqlite_db_names import ADDITIONAL_SQLITE_DATABASES
+from kolibri.deployment.default.sqlite_db_names import DEFAULT_READ
 from kolibri.plugins.utils.settings import apply_settings
 from kolibri.utils import conf
 from kolibri.utils import i18n
@@ -92,15 +93,19 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "kolibri.core.analytics.middleware.cherrypy_access_log_middleware",
+    "kolibri.core.public.middleware.ActiveRequestsMiddleware",
     "kolibri.core.device.middleware.ProvisioningErrorHandler",
     "kolibri.core.device.middleware.DatabaseBusyErrorHandler",
+    "kolibri.core.sqlite.middleware.ReadConnectionMiddleware",
+    "kolibri.core.sqlite.middleware.WriteBackpressureMiddleware",
     "django.middleware.cache.UpdateCacheMiddleware",
-    "kolibri.core.analytics.middleware.MetricsMiddleware",
+    "kolibri.core.analytics.middleware.RequestTracingMiddleware",
     "kolibri.core.auth.middleware.KolibriSessionMiddleware",
     "kolibri.core.device.middleware.KolibriLocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "kolibri.core.auth.middleware.CustomAuthenticationMiddleware",
+    "kolibri.core.auth.middleware.SyncChunkSizeMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django.middleware.security.SecurityMiddleware",
@@ -164,6 +169,11 @@ if conf.OPTIONS["Database"]["DATABASE_ENGINE"] == "sqlite":
         "kolibri.core.discovery.models.NetworkLocationRouter",
     )
 
+    if conf.OPTIONS["Database"]["SQLITE_READ_CONNECTIONS"]:
+        DATABASES[DEFAULT_READ] = dict(DATABASES["default"], TEST={"MIRROR": "default"})
+        # Must be the last router, as it only handles the models of the default database
+        DATABASE_ROUTERS += ("kolibri.core.sqlite.routers.ReadConnectionRouter",)
+
 elif conf.OPTIONS["Database"]["DATABASE_ENGINE"] == "postgres":
     DATABASES = {
         "default": {
@@ -23,4 +23,8 @@ CACHES = {
 if process_cache:
     CACHES["process_cache"] = process_cache
 
+# Each test runs within a transaction on the default connection,
+# whose changes would not be visible to the separate read connections.
+DATABASES.pop(DEFAULT_READ, None)  # noqa F405
+
 TESTING = True
@@ -12,3 +12,9 @@ NOTIFICATIONS = "notifications"
 
 
 ADDITIONAL_SQLITE_DATABASES = (SYNC_QUEUE, NETWORK_LOCATION, NOTIFICATIONS)
+
+# Separate connections to the default database, used for the queries of read-only requests
+DEFAULT_READ = "default-read"
+
+# The job storage database, that is not accessed through the Django ORM
+JOB_STORAGE = "jobstorage"
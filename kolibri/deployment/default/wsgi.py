@@ -37,6 +37,7 @@ def generate_wsgi_application():
             (base_content_path, content_dir) for content_dir in content_dirs
         ]
         + [(settings.MEDIA_URL, settings.MEDIA_ROOT)],
+        dynamic_files_max_size=conf.OPTIONS["Server"]["DYNAMIC_FILES_CACHE_SIZE"],
     )
 
 
@@ -143,6 +143,12 @@ the frontend are returned. When iterating over ``registered_hooks`` the returned
 objects are each instances of the hook classes that were registered.
 
 
+.. note::
+
+    When the plugins are deferred by the plugin registry, their ``kolibri_plugin``
+    modules are imported, and their hooks registered, the first time that the
+    registered hooks of any hook are looked up.
+
 .. warning::
 
     Do not load registered hook classes outside of a plugin's
@@ -246,6 +252,14 @@ def register_hook(subclass):
     return subclass
 
 
+def _initialize_deferred_plugins():
+    # Import here to prevent circular import
+    from kolibri.plugins import registry
+
+    if registry.is_initialized():
+        registry.registered_plugins.initialize_deferred_plugins()
+
+
 class KolibriHookMeta(SingletonMeta):
     """
     We use a metaclass to define class level properties and methods in a simple way.
@@ -271,6 +285,7 @@ class KolibriHookMeta(SingletonMeta):
         """
         if not cls.abstract:
             raise TypeError("registered_hooks property accessed on a non-abstract hook")
+        _initialize_deferred_plugins()
         for hook in cls._registered_hooks.values():
             yield hook
 
@@ -333,6 +348,7 @@ class KolibriHookMeta(SingletonMeta):
         """
         if not cls.abstract:
             raise TypeError("get_hook method used on a non-abstract hook")
+        _initialize_deferred_plugins()
         return cls._registered_hooks.get(unique_id, None)
 
 
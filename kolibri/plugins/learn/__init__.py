@@ -0,0 +1 @@
+default_app_config = "kolibri.plugins.learn.apps.LearnConfig"
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class LearnConfig(AppConfig):
+    name = "kolibri.plugins.learn"
+    verbose_name = "Kolibri Learn"
+
+    def ready(self):
+        from . import signals  # noqa F401
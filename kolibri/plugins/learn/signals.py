@@ -0,0 +1,56 @@
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .utils import invalidate_assignments_hydration
+from .utils import invalidate_user_hydration
+from kolibri.core.auth.models import Membership
+from kolibri.core.exams.models import Exam
+from kolibri.core.exams.models import ExamAssignment
+from kolibri.core.lessons.models import Lesson
+from kolibri.core.lessons.models import LessonAssignment
+from kolibri.core.logger.models import AttemptLog
+from kolibri.core.logger.models import ContentSummaryLog
+from kolibri.core.logger.models import MasteryLog
+
+
+def _invalidate_now_and_on_commit(invalidate):
+    invalidate()
+    # Invalidate again once the transaction is committed, as a snapshot can be built from the
+    # data committed so far in the meantime, and changes later in the same transaction may
+    # be made without sending any signal
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=ContentSummaryLog)
+@receiver(post_save, sender=MasteryLog)
+@receiver(post_save, sender=AttemptLog)
+@receiver(post_delete, sender=ContentSummaryLog)
+@receiver(post_delete, sender=MasteryLog)
+@receiver(post_delete, sender=AttemptLog)
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+def invalidate_learner_home_hydration(sender, instance=None, *args, **kwargs):
+    """
+    When the progress or the classrooms of a learner change, their home page snapshot is stale.
+    """
+    user_id = instance.user_id
+    _invalidate_now_and_on_commit(lambda: invalidate_user_hydration(user_id))
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=Exam)
+@receiver(post_save, sender=LessonAssignment)
+@receiver(post_save, sender=ExamAssignment)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=Exam)
+@receiver(post_delete, sender=LessonAssignment)
+@receiver(post_delete, sender=ExamAssignment)
+def invalidate_assignments_home_hydration(sender, *args, **kwargs):
+    """
+    Lessons and quizzes can be assigned to many learners, so all home page snapshots are stale.
+    Closing a quiz also completes the mastery logs of its learners with a queryset update that
+    sends no signals, in the same transaction as saving the quiz.
+    """
+    _invalidate_now_and_on_commit(invalidate_assignments_hydration)
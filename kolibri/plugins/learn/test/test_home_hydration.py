@@ -0,0 +1,146 @@
+import mock
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework.test import APITestCase
+
+from kolibri.core.auth.models import Classroom
+from kolibri.core.auth.models import Facility
+from kolibri.core.auth.models import FacilityUser
+from kolibri.core.auth.test.helpers import clear_process_cache
+from kolibri.core.auth.test.helpers import provision_device
+from kolibri.core.exams.models import Exam
+from kolibri.core.exams.models import ExamAssignment
+from kolibri.core.lessons.models import Lesson
+from kolibri.core.lessons.models import LessonAssignment
+from kolibri.core.logger.models import ContentSummaryLog
+from kolibri.core.logger.models import MasteryLog
+from kolibri.plugins.learn import signals
+
+
+class LearnHomePageHydrationTestCase(APITestCase):
+    def setUp(self):
+        clear_process_cache()
+        provision_device()
+        self.facility = Facility.objects.create(name="My Facility")
+        self.coach_user = FacilityUser.objects.create(
+            username="admin", facility=self.facility
+        )
+        self.learner_user = FacilityUser.objects.create(
+            username="learner", facility=self.facility
+        )
+        self.learner_user.set_password("password")
+        self.learner_user.save()
+        self.classroom = Classroom.objects.create(
+            name="Own Classroom", parent=self.facility
+        )
+        self.classroom.add_member(self.learner_user)
+        self.url = reverse("kolibri:kolibri.plugins.learn:homehydrate")
+        self.client.login(username="learner", password="password")
+
+    def _create_lesson(self):
+        lesson = Lesson.objects.create(
+            title="Lesson",
+            collection=self.classroom,
+            created_by=self.coach_user,
+            is_active=True,
+        )
+        LessonAssignment.objects.create(
+            lesson=lesson, collection=self.classroom, assigned_by=self.coach_user
+        )
+
+    def test_anonymous_user(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["classrooms"], [])
+
+    def test_snapshot_is_cached(self):
+        self.client.get(self.url)
+        # Only the query to fetch the authenticated user
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data["classrooms"]), 1)
+
+    def test_snapshot_invalidated_by_lesson_assignment(self):
+        response = self.client.get(self.url)
+        self.assertEqual(
+            len(response.data["classrooms"][0]["assignments"]["lessons"]), 0
+        )
+        self._create_lesson()
+        response = self.client.get(self.url)
+        self.assertEqual(
+            len(response.data["classrooms"][0]["assignments"]["lessons"]), 1
+        )
+
+    def test_snapshot_invalidated_by_membership(self):
+        self.client.get(self.url)
+        Classroom.objects.create(
+            name="Other Classroom", parent=self.facility
+        ).add_member(self.learner_user)
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data["classrooms"]), 2)
+
+    def _count_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.url)
+        return len(context.captured_queries)
+
+    def test_snapshot_invalidated_by_learner_logs(self):
+        self.client.get(self.url)
+        self.assertEqual(self._count_queries(), 1)
+        ContentSummaryLog.objects.create(
+            user=self.learner_user,
+            content_id="a" * 32,
+            channel_id="b" * 32,
+            kind="video",
+            start_timestamp=now(),
+            progress=0.5,
+        )
+        self.assertGreater(self._count_queries(), 1)
+
+    def test_snapshot_invalidated_after_quiz_closed(self):
+        self.facility.add_admin(self.coach_user)
+        self.coach_user.set_password("password")
+        self.coach_user.save()
+        exam = Exam.objects.create(
+            title="Exam",
+            collection=self.classroom,
+            question_count=10,
+            creator=self.coach_user,
+            active=True,
+        )
+        ExamAssignment.objects.create(
+            exam=exam, collection=self.classroom, assigned_by=self.coach_user
+        )
+        summarylog = ContentSummaryLog.objects.create(
+            user=self.learner_user,
+            content_id=exam.id,
+            kind="quiz",
+            start_timestamp=now(),
+            progress=0,
+        )
+        MasteryLog.objects.create(
+            user=self.learner_user,
+            summarylog=summarylog,
+            start_timestamp=now(),
+            mastery_level=1,
+        )
+        response = self.client.get(self.url)
+        exams = response.data["classrooms"][0]["assignments"]["exams"]
+        self.assertFalse(exams[0]["progress"]["closed"])
+
+        self.client.login(username="admin", password="password")
+        with mock.patch.object(signals.transaction, "on_commit") as on_commit:
+            self.client.put(
+                reverse("kolibri:core:exam-detail", kwargs={"pk": exam.id}),
+                {"archive": True},
+                format="json",
+            )
+        # The mastery logs are only completed after the quiz is saved
+        on_commit.assert_called_with(signals.invalidate_assignments_hydration)
+
+        self.client.login(username="learner", password="password")
+        response = self.client.get(self.url)
+        exams = response.data["classrooms"][0]["assignments"]["exams"]
+        self.assertTrue(exams[0]["progress"]["closed"])
@@ -13,6 +13,8 @@ from kolibri.core.exams.models import Exam
 from kolibri.core.exams.models import ExamAssignment
 from kolibri.core.lessons.models import Lesson
 from kolibri.core.lessons.models import LessonAssignment
+from kolibri.core.logger.models import AttemptLog
+from kolibri.core.logger.models import ContentSessionLog
 from kolibri.core.logger.models import ContentSummaryLog
 from kolibri.core.logger.models import MasteryLog
 
@@ -206,3 +208,72 @@ class LearnerClassroomTestCase(APITestCase):
             get_response.data[1]["assignments"]["lessons"]
         )
         self.assertEqual(total_lessons, Lesson.objects.count())
+
+    def test_exam_progress(self):
+        started_exam = Exam.objects.create(
+            title="Started Exam",
+            collection=self.own_classroom,
+            question_count=10,
+            creator=self.coach_user,
+            active=True,
+        )
+        exam = Exam.objects.create(
+            title="Exam",
+            collection=self.own_classroom,
+            question_count=10,
+            creator=self.coach_user,
+            active=True,
+        )
+        for assigned_exam in (started_exam, exam):
+            ExamAssignment.objects.create(
+                exam=assigned_exam,
+                collection=self.own_classroom,
+                assigned_by=self.coach_user,
+            )
+        summarylog = ContentSummaryLog.objects.create(
+            user=self.learner_user,
+            content_id=started_exam.id,
+            kind=content_kinds.QUIZ,
+            progress=0.0,
+            start_timestamp=now(),
+        )
+        masterylog = MasteryLog.objects.create(
+            user=self.learner_user,
+            summarylog=summarylog,
+            start_timestamp=now(),
+            mastery_level=1,
+            complete=True,
+        )
+        sessionlog = ContentSessionLog.objects.create(
+            user=self.learner_user,
+            content_id=started_exam.id,
+            channel_id=None,
+            kind=content_kinds.QUIZ,
+            start_timestamp=now(),
+        )
+        for i, correct in enumerate((1, 0, 1)):
+            AttemptLog.objects.create(
+                user=self.learner_user,
+                masterylog=masterylog,
+                sessionlog=sessionlog,
+                item="item_{}".format(i),
+                start_timestamp=now(),
+                end_timestamp=now(),
+                correct=correct,
+            )
+        self.client.login(username="learner", password="password")
+        get_response = self.client.get(
+            reverse(self.basename + "-detail", kwargs={"pk": self.own_classroom.id})
+        )
+        progress = {
+            exam["id"]: exam["progress"]
+            for exam in get_response.data["assignments"]["exams"]
+        }
+        self.assertEqual(
+            progress[started_exam.id],
+            {"closed": True, "score": 2, "answer_count": 3, "started": True},
+        )
+        self.assertEqual(
+            progress[exam.id],
+            {"closed": None, "score": None, "answer_count": None, "started": False},
+        )
@@ -0,0 +1,59 @@
+import time
+
+from kolibri.core.device.models import ContentCacheKey
+from kolibri.core.utils.cache import process_cache
+
+# Snapshots are keyed by versions that are bumped whenever the data they are built from changes,
+# so stale snapshots are never read and simply expire after this time.
+HYDRATION_CACHE_TIMEOUT = 300
+
+HYDRATION_CACHE_KEY = "LEARN_HOME_HYDRATION_{user_id}_{user_version}_{assignments_version}_{content_version}"
+
+# Bumped when the logs or the memberships of a single learner change
+USER_VERSION_CACHE_KEY = "LEARN_HOME_USER_VERSION_{}"
+
+# Bumped when any lesson or quiz, or their assignments, change, as they can affect many learners
+ASSIGNMENTS_VERSION_CACHE_KEY = "LEARN_HOME_ASSIGNMENTS_VERSION"
+
+
+def _new_version():
+    return repr(time.time())
+
+
+def _get_version(key):
+    version = process_cache.get(key)
+    if version is None:
+        version = _new_version()
+        process_cache.set(key, version, None)
+    return version
+
+
+def invalidate_user_hydration(user_id):
+    process_cache.set(USER_VERSION_CACHE_KEY.format(user_id), _new_version(), None)
+
+
+def invalidate_assignments_hydration():
+    process_cache.set(ASSIGNMENTS_VERSION_CACHE_KEY, _new_version(), None)
+
+
+def get_hydration_cache_key(user_id):
+    return HYDRATION_CACHE_KEY.format(
+        user_id=user_id,
+        user_version=_get_version(USER_VERSION_CACHE_KEY.format(user_id)),
+        assignments_version=_get_version(ASSIGNMENTS_VERSION_CACHE_KEY),
+        content_version=ContentCacheKey.get_cache_key(),
+    )
+
+
+def get_cached_hydration(user_id, build):
+    """
+    Returns the home page hydration data for a learner, calling build to generate it only
+    when there is no snapshot that is still valid for the learner's logs, memberships,
+    assignments and the content available on the device.
+    """
+    cache_key = get_hydration_cache_key(user_id)
+    data = process_cache.get(cache_key)
+    if data is None:
+        data = build()
+        process_cache.set(cache_key, data, HYDRATION_CACHE_TIMEOUT)
+    return data
@@ -1,13 +1,18 @@
+from collections import defaultdict
+
+from django.db.models import Case
 from django.db.models import Count
-from django.db.models import OuterRef
+from django.db.models import Max
 from django.db.models import Q
-from django.db.models import Subquery
 from django.db.models import Sum
+from django.db.models import Value
+from django.db.models import When
 from django.db.models.fields import IntegerField
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .utils import get_cached_hydration
 from kolibri.core.api import ReadOnlyValuesViewset
 from kolibri.core.auth.models import Classroom
 from kolibri.core.auth.models import Facility
@@ -17,7 +22,7 @@ from kolibri.core.content.api import UserContentNodeViewset
 from kolibri.core.content.models import ContentNode
 from kolibri.core.exams.models import Exam
 from kolibri.core.lessons.models import Lesson
-from kolibri.core.logger.models import AttemptLog
+from kolibri.core.logger.models import ContentSummaryLog
 from kolibri.core.logger.models import MasteryLog
 
 
@@ -54,30 +59,57 @@ class LearnStateView(APIView):
         )
 
 
-def _consolidate_lessons_data(request, lessons):
+def _get_lessons_contentnodes(request, lessons):
     lesson_contentnode_ids = set()
     for lesson in lessons:
         lesson_contentnode_ids |= {
             resource["contentnode_id"] for resource in lesson["resources"]
         }
 
-    contentnode_progress = (
-        contentnode_progress_viewset.serialize_list(
-            request, {"ids": lesson_contentnode_ids}
-        )
-        if lesson_contentnode_ids
-        else []
-    )
-
     contentnodes = (
         contentnode_viewset.serialize_list(request, {"ids": lesson_contentnode_ids})
         if lesson_contentnode_ids
         else []
     )
 
-    progress_map = {l["content_id"]: l["progress"] for l in contentnode_progress}
+    return {c["id"]: c for c in contentnodes}
+
+
+def _get_learner_progress(user, content_ids):
+    """
+    Fetches the progress of the learner on resources and quizzes in a single query, along with
+    whether they closed the quizzes, their score and the number of questions they answered.
+    """
+    if not content_ids:
+        return {}
+    logs = (
+        ContentSummaryLog.objects.filter(user=user, content_id__in=content_ids)
+        .order_by()
+        .values("content_id", "progress")
+        .annotate(
+            mastery_log_count=Count("masterylogs", distinct=True),
+            closed=Max(
+                Case(
+                    When(masterylogs__complete=True, then=Value(1)),
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+            ),
+            score=Sum("masterylogs__attemptlogs__correct"),
+            answer_count=Count("masterylogs__attemptlogs", distinct=True),
+        )
+    )
+    return {log["content_id"]: log for log in logs}
+
 
-    contentnode_map = {c["id"]: c for c in contentnodes}
+def _consolidate_lessons_data(lessons, contentnode_map, learner_progress):
+    # Only count the progress on the resources that are available on the device
+    available_content_ids = {c["content_id"] for c in contentnode_map.values()}
+    progress_map = {
+        content_id: log["progress"]
+        for content_id, log in learner_progress.items()
+        if content_id in available_content_ids
+    }
 
     for lesson in lessons:
         lesson["progress"] = {
@@ -100,6 +132,40 @@ def _consolidate_lessons_data(request, lessons):
         lesson["missing_resource"] = missing_resource
 
 
+def _consolidate_exams_data(exams, learner_progress):
+    exam_node_ids = set()
+    for exam in exams:
+        exam_node_ids |= {
+            question["exercise_id"] for question in exam.get("question_sources")
+        }
+
+    available_exam_ids = set(
+        ContentNode.objects.filter_by_uuids(exam_node_ids).values_list("id", flat=True)
+    )
+
+    for exam in exams:
+        log = learner_progress.get(exam["id"])
+        if log is not None and log["mastery_log_count"]:
+            exam["progress"] = {
+                "closed": bool(log["closed"]),
+                "score": log["score"],
+                # None rather than 0 when no question has been answered yet
+                "answer_count": log["answer_count"] or None,
+                "started": True,
+            }
+        else:
+            exam["progress"] = {
+                "score": None,
+                "answer_count": None,
+                "closed": None,
+                "started": False,
+            }
+        exam["missing_resource"] = any(
+            question["exercise_id"] not in available_exam_ids
+            for question in exam.get("question_sources")
+        )
+
+
 class LearnerClassroomViewset(ReadOnlyValuesViewset):
     """
     Returns all Classrooms for which the requesting User is a member,
@@ -118,7 +184,7 @@ class LearnerClassroomViewset(ReadOnlyValuesViewset):
     def consolidate(self, items, queryset):
         if not items:
             return items
-        lessons = (
+        lessons = list(
             Lesson.objects.filter(
                 lesson_assignments__collection__membership__user=self.request.user,
                 is_active=True,
@@ -129,49 +195,17 @@ class LearnerClassroomViewset(ReadOnlyValuesViewset):
                 "description", "id", "is_active", "title", "resources", "collection"
             )
         )
-        _consolidate_lessons_data(self.request, lessons)
 
         user_masterylog_content_ids = MasteryLog.objects.filter(
             user=self.request.user
         ).values("summarylog__content_id")
 
-        exams = (
+        exams = list(
             Exam.objects.filter(
                 assignments__collection__membership__user=self.request.user,
                 collection__in=(c["id"] for c in items),
             )
             .filter(Q(active=True) | Q(id__in=user_masterylog_content_ids))
-            .annotate(
-                closed=Subquery(
-                    MasteryLog.objects.filter(
-                        summarylog__content_id=OuterRef("id"), user=self.request.user
-                    ).values("complete")[:1]
-                ),
-                score=Subquery(
-                    AttemptLog.objects.filter(
-                        sessionlog__content_id=OuterRef("id"), user=self.request.user
-                    )
-                    .order_by()
-                    .values_list("item")
-                    .distinct()
-                    .values("masterylog")
-                    .annotate(total_correct=Sum("correct"))
-                    .values("total_correct"),
-                    output_field=IntegerField(),
-                ),
-                answer_count=Subquery(
-                    AttemptLog.objects.filter(
-                        sessionlog__content_id=OuterRef("id"), user=self.request.user
-                    )
-                    .order_by()
-                    .values_list("item")
-                    .distinct()
-                    .values("masterylog")
-                    .annotate(total_complete=Count("id"))
-                    .values("total_complete"),
-                    output_field=IntegerField(),
-                ),
-            )
             .distinct()
             .values(
                 "collection",
@@ -180,53 +214,31 @@ class LearnerClassroomViewset(ReadOnlyValuesViewset):
                 "id",
                 "question_count",
                 "title",
-                "closed",
-                "answer_count",
-                "score",
                 "question_sources",
             )
         )
-        exam_node_ids = set()
-        for exam in exams:
-            exam_node_ids |= {
-                question["exercise_id"] for question in exam.get("question_sources")
-            }
 
-        available_exam_ids = set(
-            ContentNode.objects.filter_by_uuids(exam_node_ids).values_list(
-                "id", flat=True
-            )
+        contentnode_map = _get_lessons_contentnodes(self.request, lessons)
+        # The progress on the lesson resources and on the quizzes in a single round trip
+        learner_progress = _get_learner_progress(
+            self.request.user,
+            {c["content_id"] for c in contentnode_map.values()}
+            | {exam["id"] for exam in exams},
         )
+        _consolidate_lessons_data(lessons, contentnode_map, learner_progress)
+        _consolidate_exams_data(exams, learner_progress)
 
+        classroom_exams = defaultdict(list)
         for exam in exams:
-            closed = exam.pop("closed")
-            score = exam.pop("score")
-            answer_count = exam.pop("answer_count")
-            if closed is not None:
-                exam["progress"] = {
-                    "closed": closed,
-                    "score": score,
-                    "answer_count": answer_count,
-                    "started": True,
-                }
-            else:
-                exam["progress"] = {
-                    "score": None,
-                    "answer_count": None,
-                    "closed": None,
-                    "started": False,
-                }
-            exam["missing_resource"] = any(
-                question["exercise_id"] not in available_exam_ids
-                for question in exam.get("question_sources")
-            )
+            classroom_exams[exam["collection"]].append(exam)
+        classroom_lessons = defaultdict(list)
+        for lesson in lessons:
+            classroom_lessons[lesson["collection"]].append(lesson)
         out_items = []
         for item in items:
             item["assignments"] = {
-                "exams": [exam for exam in exams if exam["collection"] == item["id"]],
-                "lessons": [
-                    lesson for lesson in lessons if lesson["collection"] == item["id"]
-                ],
+                "exams": classroom_exams[item["id"]],
+                "lessons": classroom_lessons[item["id"]],
             }
             out_items.append(item)
         return out_items
@@ -244,35 +256,41 @@ def _resumable_resources(classrooms):
 
 class LearnHomePageHydrationView(APIView):
     def get(self, request, format=None):
-        classrooms = []
-        resumable_resources = []
-        resumable_resources_progress = []
-        if not request.user.is_anonymous:
-            classrooms = learner_classroom_viewset.serialize_list(request)
-            if not classrooms or not any(_resumable_resources(classrooms)):
-                resumable_resources = user_contentnode_viewset.serialize_list(
-                    request,
-                    {"resume": True, "max_results": 12, "ordering": "-last_interacted"},
-                )
-                resumable_resources_progress = (
-                    contentnode_progress_viewset.serialize_list(
-                        request,
-                        {
-                            "resume": True,
-                            "max_results": 12,
-                            "ordering": "-last_interacted",
-                        },
-                    )
-                )
-
+        if request.user.is_anonymous:
+            return Response(
+                {
+                    "classrooms": [],
+                    "resumable_resources": [],
+                    "resumable_resources_progress": [],
+                }
+            )
         return Response(
-            {
-                "classrooms": classrooms,
-                "resumable_resources": resumable_resources,
-                "resumable_resources_progress": resumable_resources_progress,
-            }
+            get_cached_hydration(request.user.id, lambda: self._hydrate(request))
         )
 
+    def _hydrate(self, request):
+        resumable_resources = []
+        resumable_resources_progress = []
+        classrooms = learner_classroom_viewset.serialize_list(request)
+        if not classrooms or not any(_resumable_resources(classrooms)):
+            resumable_resources = user_contentnode_viewset.serialize_list(
+                request,
+                {"resume": True, "max_results": 12, "ordering": "-last_interacted"},
+            )
+            resumable_resources_progress = contentnode_progress_viewset.serialize_list(
+                request,
+                {
+                    "resume": True,
+                    "max_results": 12,
+                    "ordering": "-last_interacted",
+                },
+            )
+        return {
+            "classrooms": classrooms,
+            "resumable_resources": resumable_resources,
+            "resumable_resources_progress": resumable_resources_progress,
+        }
+
 
 def _map_lesson_classroom(item):
     return {
@@ -316,6 +334,10 @@ class LearnerLessonViewset(ReadOnlyValuesViewset):
         if not items:
             return items
 
-        _consolidate_lessons_data(self.request, items)
+        contentnode_map = _get_lessons_contentnodes(self.request, items)
+        learner_progress = _get_learner_progress(
+            self.request.user, {c["content_id"] for c in contentnode_map.values()}
+        )
+        _consolidate_lessons_data(items, contentnode_map, learner_progress)
 
         return items
@@ -25,9 +25,21 @@ plugins without using the hooks API or normal conventional Django scenarios.
 Everything that a plugin does is expected to be defined through
 ``<myapp>/kolibri_plugin.py``.
 
+Deferred plugins
+~~~~~~~~~~~~~~~~
+
+Importing the ``kolibri_plugin`` module of every plugin at startup also imports
+their hooks and webpack bundle definitions. When the plugin manifest cached in
+``KOLIBRI_HOME`` matches the enabled plugins, the registry instead registers a
+``DeferredPlugin`` for each of them, which holds what is needed to configure
+Django, and their ``kolibri_plugin`` modules are imported, and their hooks
+registered, the first time a hook is looked up or any other plugin attribute
+is used.
+
 
 """
 import logging
+import threading
 from importlib import import_module
 
 from django.apps import AppConfig
@@ -42,12 +54,16 @@ from kolibri.plugins.utils import is_plugin_updated
 from kolibri.plugins.utils import MultiplePlugins
 from kolibri.plugins.utils import PluginDoesNotExist
 from kolibri.plugins.utils import PluginLoadsApp
+from kolibri.plugins.utils.manifest import read_plugin_manifest
+from kolibri.plugins.utils.manifest import write_plugin_manifest
 
 logger = logging.getLogger(__name__)
 
 
 __initialized = False
 
+_deferred_lock = threading.RLock()
+
 
 class PluginExistsInApp(Exception):
     """
@@ -84,11 +100,54 @@ def parse_installed_app_entry(app):
     return app
 
 
+class DeferredPlugin(object):
+    """
+    Stands in for a plugin recorded in the plugin manifest, without importing its
+    kolibri_plugin module, which is only initialized when an attribute that is not
+    recorded in the manifest is used.
+    """
+
+    _return_module = KolibriPluginBase._return_module
+    url_module = KolibriPluginBase.url_module
+    api_url_module = KolibriPluginBase.api_url_module
+    root_url_module = KolibriPluginBase.root_url_module
+    settings_module = KolibriPluginBase.settings_module
+    options_module = KolibriPluginBase.options_module
+    option_defaults_module = KolibriPluginBase.option_defaults_module
+
+    def __init__(self, module_path, attributes):
+        # Imports the plugin package, which the module properties look for submodules in
+        import_module(module_path)
+        self.module_path = module_path
+        self.INSTALLED_APPS = []
+        self._plugin = None
+        for attribute, value in attributes.items():
+            setattr(self, attribute, value)
+
+    @property
+    def initialized(self):
+        return self._plugin is not None
+
+    def initialize(self):
+        with _deferred_lock:
+            if self._plugin is None:
+                self._plugin = initialize_kolibri_plugin(self.module_path)
+                logger.debug("Initialized deferred plugin {}".format(self.module_path))
+        return self._plugin
+
+    def __getattr__(self, name):
+        if name.startswith("__") or name == "_plugin":
+            raise AttributeError(name)
+        return getattr(self.initialize(), name)
+
+
 class Registry(object):
-    __slots__ = ("_apps",)
+    __slots__ = ("_apps", "_deferred", "_initializing")
 
     def __init__(self):
         self._apps = {}
+        self._deferred = None
+        self._initializing = False
 
     def __iter__(self):
         return iter(app for app in self._apps.values() if app is not None)
@@ -112,9 +171,7 @@ class Registry(object):
                 if app not in self._apps:
                     plugin_object = initialize_kolibri_plugin(app)
                     self._apps[app] = plugin_object
-                    if is_plugin_updated(app):
-                        config["UPDATED_PLUGINS"].add(app)
-                        config.save()
+                    self._check_plugin_updated(app)
             except (
                 PluginDoesNotExist,
                 MultiplePlugins,
@@ -122,16 +179,82 @@ class Registry(object):
                 HookSingleInstanceError,
                 PluginLoadsApp,
             ) as e:
-                logger.error("Cannot initialize plugin {}".format(app))
-                logger.error(str(e))
-                logger.error("Disabling plugin {}".format(app))
-                config.clear_plugin(app)
+                self._disable_plugin(app, e)
                 if isinstance(e, PluginLoadsApp):
                     logger.error(
                         "Please restart Kolibri now that this plugin is disabled"
                     )
                     raise
 
+    def _check_plugin_updated(self, app):
+        if is_plugin_updated(app):
+            config["UPDATED_PLUGINS"].add(app)
+            config.save()
+
+    def _disable_plugin(self, app, error):
+        logger.error("Cannot initialize plugin {}".format(app))
+        logger.error(str(error))
+        logger.error("Disabling plugin {}".format(app))
+        config.clear_plugin(app)
+
+    def register_deferred_plugins(self, apps, manifest):
+        """
+        Register the plugins recorded in the plugin manifest as deferred plugins.
+
+        :returns: the plugins that are not recorded in the manifest
+        """
+        if self._deferred is None:
+            self._deferred = []
+        remaining = []
+        for app in apps:
+            if app in self._apps:
+                continue
+            if app not in manifest:
+                remaining.append(app)
+                continue
+            try:
+                plugin_object = DeferredPlugin(app, manifest[app])
+            except ImportError:
+                remaining.append(app)
+                continue
+            self._apps[app] = plugin_object
+            self._deferred.append(plugin_object)
+            self._check_plugin_updated(app)
+        return remaining
+
+    def initialize_deferred_plugins(self):
+        """
+        Initialize the deferred plugins, importing their kolibri_plugin modules and registering
+        their hooks, in the order they were registered in.
+        """
+        if self._deferred is None:
+            return
+        with _deferred_lock:
+            # Registering hooks looks up hooks, which gets here again from the same thread
+            if self._initializing:
+                return
+            self._initializing = True
+            try:
+                self._initialize_deferred_plugins()
+            finally:
+                self._initializing = False
+
+    def _initialize_deferred_plugins(self):
+        while self._deferred:
+            plugin_object = self._deferred.pop(0)
+            try:
+                plugin_object.initialize()
+            except (
+                PluginDoesNotExist,
+                MultiplePlugins,
+                ImportError,
+                HookSingleInstanceError,
+                PluginLoadsApp,
+            ) as e:
+                self._disable_plugin(plugin_object.module_path, e)
+                logger.error("Please restart Kolibri now that this plugin is disabled")
+        self._deferred = None
+
     def register_non_plugins(self, apps):
         """
         Register non-plugins - i.e. modules that do not have a KolibriPluginBase derived
@@ -170,7 +293,13 @@ def __initialize():
         raise RuntimeError(
             "Django settings already configured when plugin registry initialized"
         )
-    registry.register_plugins(config.ACTIVE_PLUGINS)
+    apps = config.ACTIVE_PLUGINS
+    manifest = read_plugin_manifest(apps)
+    if manifest is not None:
+        apps = registry.register_deferred_plugins(apps, manifest)
+    registry.register_plugins(apps)
+    if manifest is None:
+        write_plugin_manifest(config.ACTIVE_PLUGINS, registry)
     __initialized = True
     return registry
 
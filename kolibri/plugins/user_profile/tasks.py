@@ -151,7 +151,7 @@ def mergeuser(command, **kwargs):
         raise
 
     remote_user = FacilityUser.objects.get(id=kwargs["user"])
-    merge_users(local_user, remote_user)
+    merge_users(local_user, remote_user, progress_callback=job.update_progress)
     set_device_settings(subset_of_users_device=True)
 
     # Resync with the server to update the merged records
@@ -0,0 +1,123 @@
+"""
+The plugin manifest records what the plugin registry needs to know about the enabled plugins
+to configure Django: their URL slugs and the names of their url, settings and options modules.
+
+With a manifest, the registry does not have to import the kolibri_plugin module of every plugin
+at startup, which also imports their hooks and webpack bundle definitions, and the plugins are
+fully initialized on first use instead. The manifest is cached in KOLIBRI_HOME, and is only used
+when the Kolibri version, the enabled plugins, their versions and their kolibri_plugin modules
+are the same as when it was written.
+"""
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+
+import kolibri
+from kolibri.plugins import KolibriPluginBase
+from kolibri.plugins.utils import _get_plugin_version
+from kolibri.utils.conf import KOLIBRI_HOME
+
+logger = logging.getLogger(__name__)
+
+
+manifest_file = os.path.join(KOLIBRI_HOME, "plugins_manifest.json")
+
+#: The plugin attributes recorded in the manifest
+MANIFEST_ATTRIBUTES = (
+    "url_slug",
+    "untranslated_view_urls",
+    "translated_view_urls",
+    "root_view_urls",
+    "django_settings",
+    "kolibri_options",
+    "kolibri_option_defaults",
+)
+
+#: The plugin properties derived from the recorded attributes, a plugin that overrides
+#: any of them is always initialized at startup
+DERIVED_PROPERTIES = (
+    "url_module",
+    "api_url_module",
+    "root_url_module",
+    "settings_module",
+    "options_module",
+    "option_defaults_module",
+)
+
+
+def _get_plugin_module_mtime(plugin_name):
+    try:
+        spec = importlib.util.find_spec(plugin_name + ".kolibri_plugin")
+    except ImportError:
+        return None
+    if spec is None or not spec.origin or not os.path.exists(spec.origin):
+        return None
+    return os.path.getmtime(spec.origin)
+
+
+def get_manifest_key(plugin_names):
+    """
+    :return: A hash of the Kolibri version and of the names, versions and kolibri_plugin module
+        modification times of the plugins
+    """
+    entries = [kolibri.__version__]
+    for plugin_name in sorted(plugin_names):
+        entries.append(
+            "{}:{}:{}".format(
+                plugin_name,
+                _get_plugin_version(plugin_name),
+                _get_plugin_module_mtime(plugin_name),
+            )
+        )
+    return hashlib.md5("\n".join(entries).encode("utf-8")).hexdigest()
+
+
+def can_defer_plugin(plugin_instance):
+    plugin_class = type(plugin_instance)
+    return all(
+        getattr(plugin_class, name) is getattr(KolibriPluginBase, name)
+        for name in DERIVED_PROPERTIES
+    )
+
+
+def read_plugin_manifest(plugin_names):
+    """
+    :return: A dict of the recorded attributes by plugin name, or None if there is no manifest
+        for these plugins
+    """
+    try:
+        with open(manifest_file, "r") as f:
+            manifest = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+    if manifest.get("key") != get_manifest_key(plugin_names):
+        return None
+    return manifest.get("plugins")
+
+
+def write_plugin_manifest(plugin_names, plugin_instances):
+    """
+    Records the attributes of the plugins that can be deferred in the manifest of the
+    plugin names.
+    """
+    manifest = {
+        "key": get_manifest_key(plugin_names),
+        "plugins": {
+            plugin_instance.module_path: {
+                attribute: getattr(plugin_instance, attribute)
+                for attribute in MANIFEST_ATTRIBUTES
+            }
+            for plugin_instance in plugin_instances
+            if can_defer_plugin(plugin_instance)
+        },
+    }
+    tmp_file = "{}.{}.tmp".format(manifest_file, os.getpid())
+    try:
+        with open(tmp_file, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        # Atomic, so that processes starting concurrently never read a partial manifest
+        os.replace(tmp_file, manifest_file)
+    except (IOError, OSError) as e:
+        logger.warning("Could not write the plugin manifest: {}".format(e))
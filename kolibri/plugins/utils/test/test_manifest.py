@@ -0,0 +1,87 @@
+import os
+import tempfile
+
+import mock
+import pytest
+
+from kolibri.plugins.hooks import define_hook
+from kolibri.plugins.hooks import KolibriHook
+from kolibri.plugins.registry import DeferredPlugin
+from kolibri.plugins.registry import Registry
+from kolibri.plugins.utils import initialize_kolibri_plugin
+from kolibri.plugins.utils import manifest
+
+LEARN = "kolibri.plugins.learn"
+USER_AUTH = "kolibri.plugins.user_auth"
+
+
+@pytest.fixture
+def manifest_file():
+    fd, path = tempfile.mkstemp()
+    os.close(fd)
+    os.remove(path)
+    with mock.patch.object(manifest, "manifest_file", path):
+        yield path
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def test_manifest_round_trip(manifest_file):
+    plugin = initialize_kolibri_plugin(USER_AUTH, initialize_hooks=False)
+    manifest.write_plugin_manifest([USER_AUTH], [plugin])
+    plugins = manifest.read_plugin_manifest([USER_AUTH])
+    assert plugins[USER_AUTH]["url_slug"] == plugin.url_slug
+    assert plugins[USER_AUTH]["translated_view_urls"] == plugin.translated_view_urls
+
+
+def test_manifest_other_plugins(manifest_file):
+    plugin = initialize_kolibri_plugin(USER_AUTH, initialize_hooks=False)
+    manifest.write_plugin_manifest([USER_AUTH], [plugin])
+    assert manifest.read_plugin_manifest([USER_AUTH, LEARN]) is None
+
+
+def test_manifest_other_version(manifest_file):
+    plugin = initialize_kolibri_plugin(USER_AUTH, initialize_hooks=False)
+    manifest.write_plugin_manifest([USER_AUTH], [plugin])
+    with mock.patch("kolibri.__version__", "0.0.1"):
+        assert manifest.read_plugin_manifest([USER_AUTH]) is None
+
+
+def test_no_manifest(manifest_file):
+    assert manifest.read_plugin_manifest([USER_AUTH]) is None
+
+
+def test_deferred_plugin():
+    plugin = initialize_kolibri_plugin(LEARN, initialize_hooks=False)
+    deferred = DeferredPlugin(
+        LEARN,
+        {
+            attribute: getattr(plugin, attribute)
+            for attribute in manifest.MANIFEST_ATTRIBUTES
+        },
+    )
+    assert not deferred.initialized
+    assert deferred.url_slug == plugin.url_slug
+    assert deferred.api_url_module is plugin.api_url_module
+    assert not deferred.initialized
+    assert deferred.name("en") == plugin.name("en")
+    assert deferred.initialized
+
+
+@define_hook
+class DeferredTestHook(KolibriHook):
+    pass
+
+
+def test_hooks_initialize_deferred_plugins():
+    registry = Registry()
+    with mock.patch.object(Registry, "_check_plugin_updated"):
+        remaining = registry.register_deferred_plugins(
+            [LEARN, USER_AUTH], {LEARN: {"url_slug": "learn/"}}
+        )
+    assert remaining == [USER_AUTH]
+    deferred = registry.get(LEARN)
+    assert not deferred.initialized
+    with mock.patch("kolibri.plugins.registry.registered_plugins", registry):
+        list(DeferredTestHook.registered_hooks)
+    assert deferred.initialized
@@ -43,6 +43,12 @@ ENVIRONMENT_VARIABLES = {
             cherrypy.access logs.
         """,
     },
+    "KOLIBRI_PROFILE_STARTUP": {
+        "description": """
+            Profile the startup of Kolibri. Set the variable to True to log the time spent
+            importing the slowest modules and the modules of every plugin.
+        """,
+    },
     "NOTIFY_SOCKET": {
         "description": """
             Path to a socket provided by systemd for sending it notifications
@@ -108,6 +114,11 @@ def set_env():
     from the distributed version in case it exists before importing anything
     else.
     """
+    if os.environ.get("KOLIBRI_PROFILE_STARTUP", "").lower() in ("true", "1"):
+        from kolibri.utils.import_profile import start_import_profile
+
+        start_import_profile()
+
     monkey_patch_markdown()
 
     from kolibri import dist as kolibri_dist  # noqa
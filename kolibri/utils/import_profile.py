@@ -0,0 +1,149 @@
+"""
+Profiling of the time Kolibri spends importing modules while it starts up.
+
+When the KOLIBRI_PROFILE_STARTUP environment variable is set, an import hook times the
+execution of every module imported, excluding the time spent importing the modules that it
+imports itself, and once Kolibri is initialized the slowest modules and the time spent in the
+modules of every plugin are logged.
+
+Do not import anything from the rest of Kolibri in this module, as it is loaded before the
+Kolibri environment is set up.
+"""
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Number of modules in the report of the slowest modules
+REPORT_MODULES = 30
+
+_lock = threading.Lock()
+
+# Import durations in seconds by module name
+_import_times = {}
+
+# Stacks of the durations of the nested imports of the modules being imported by each thread
+_local = threading.local()
+
+
+def _nested_import_times():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+class _TimedLoader(object):
+    """
+    Wraps the loader of a module to time its execution
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+
+    def create_module(self, spec):
+        create_module = getattr(self._loader, "create_module", None)
+        return create_module(spec) if create_module else None
+
+    def exec_module(self, module):
+        stack = _nested_import_times()
+        stack.append(0.0)
+        start = time.time()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            duration = time.time() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += duration
+            with _lock:
+                _import_times[module.__name__] = duration - nested
+            # Restore the loader, which some code checks the type of
+            module.__loader__ = self._loader
+            if getattr(module, "__spec__", None) is not None:
+                module.__spec__.loader = self._loader
+
+    def __getattr__(self, name):
+        if name == "_loader":
+            raise AttributeError(name)
+        return getattr(self._loader, name)
+
+
+class _ImportTimer(object):
+    """
+    A meta path finder that finds modules with the other finders, and wraps their loaders
+    """
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader)
+                return spec
+        return None
+
+
+_import_timer = _ImportTimer()
+
+
+def start_import_profile():
+    if _import_timer not in sys.meta_path:
+        sys.meta_path.insert(0, _import_timer)
+
+
+def stop_import_profile():
+    if _import_timer in sys.meta_path:
+        sys.meta_path.remove(_import_timer)
+
+
+def is_profiling_imports():
+    return _import_timer in sys.meta_path
+
+
+def get_import_times():
+    """
+    :return: A dict of the time in seconds spent executing every module imported since the
+        profile was started, excluding the modules it imported
+    """
+    with _lock:
+        return dict(_import_times)
+
+
+def get_package_import_times(package_names):
+    """
+    :return: A dict of the time in seconds spent executing the modules of every package
+    """
+    import_times = get_import_times()
+    return {
+        package_name: sum(
+            duration
+            for module_name, duration in import_times.items()
+            if module_name == package_name or module_name.startswith(package_name + ".")
+        )
+        for package_name in package_names
+    }
+
+
+def log_import_profile(plugin_names):
+    import_times = get_import_times()
+    logger.info(
+        "Imported {} modules in {:.2f} s".format(
+            len(import_times), sum(import_times.values())
+        )
+    )
+    logger.info("Slowest modules:")
+    for module_name, duration in sorted(
+        import_times.items(), key=lambda item: item[1], reverse=True
+    )[:REPORT_MODULES]:
+        logger.info("  {:.3f} s  {}".format(duration, module_name))
+    logger.info("Plugins:")
+    for plugin_name, duration in sorted(
+        get_package_import_times(plugin_names).items(),
+        key=lambda item: item[1],
+        reverse=True,
+    ):
+        logger.info("  {:.3f} s  {}".format(duration, plugin_name))
@@ -1,6 +1,9 @@
 import os
 import re
 import stat
+import threading
+import time
+from collections import namedtuple
 from collections import OrderedDict
 from io import BufferedIOBase
 from urllib.parse import parse_qs
@@ -193,6 +196,105 @@ class StreamingStaticFile(EndRangeStaticFile):
         return Response(HTTPStatus.OK, self.headers.items(), file_handle)
 
 
+# Number of dynamic files that are registered at most
+DEFAULT_DYNAMIC_FILES_MAX_SIZE = 10000
+
+# Seconds during which a URL that did not match any dynamic file is not looked up again
+DYNAMIC_FILES_NEGATIVE_TTL = 10
+
+# Seconds after which a registered dynamic file is statted again before being served
+DYNAMIC_FILES_REVALIDATE_INTERVAL = 60
+
+# The minimal stat result that whitenoise needs to serve a file
+FileStat = namedtuple("FileStat", ("st_mode", "st_size", "st_mtime"))
+
+# A dynamic file found on disk, with the size and mtime of the file and of its compressed
+# variants, and when they were last statted
+DynamicFile = namedtuple(
+    "DynamicFile", ("path", "size", "mtime", "encodings", "checked_at")
+)
+
+# A URL that did not match any dynamic file, until expires_at
+MissingDynamicFile = namedtuple("MissingDynamicFile", ("expires_at",))
+
+
+def stat_dynamic_file(path):
+    """
+    Returns a DynamicFile for the path, or None if it is not a regular file.
+    """
+    file_stat = os.stat(path)
+    # Only try to do matches for regular files.
+    if not stat.S_ISREG(file_stat.st_mode):
+        return None
+    encodings = []
+    for ext in compressed_file_extensions:
+        comp_path = "{}.{}".format(path, ext)
+        try:
+            comp_stat = os.stat(comp_path)
+        except (IOError, OSError):
+            continue
+        encodings.append((comp_path, comp_stat.st_size, comp_stat.st_mtime))
+    return DynamicFile(
+        path, file_stat.st_size, file_stat.st_mtime, tuple(encodings), time.time()
+    )
+
+
+class DynamicFileRegistry(object):
+    """
+    A registry of the dynamic files found on disk by URL, which keeps at most max_size files
+    by evicting the least recently used ones, and remembers the URLs that did not match any
+    file for negative_ttl seconds.
+    """
+
+    def __init__(
+        self,
+        max_size=DEFAULT_DYNAMIC_FILES_MAX_SIZE,
+        negative_ttl=DYNAMIC_FILES_NEGATIVE_TTL,
+    ):
+        self.max_size = max_size
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, url):
+        """
+        Returns the DynamicFile or the MissingDynamicFile registered for the URL, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if isinstance(entry, MissingDynamicFile) and entry.expires_at < time.time():
+                del self._entries[url]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(url)
+            self.hits += 1
+            return entry
+
+    def add(self, url, dynamic_file):
+        with self._lock:
+            self._entries[url] = dynamic_file
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def add_missing(self, url):
+        self.add(url, MissingDynamicFile(time.time() + self.negative_ttl))
+
+    def remove(self, url):
+        with self._lock:
+            self._entries.pop(url, None)
+
+    def get_stats(self):
+        return {"size": len(self), "hits": self.hits, "misses": self.misses}
+
+
 def add_headers_function(headers, path, url):
     headers["Accept-Ranges"] = "bytes"
 
@@ -207,6 +309,7 @@ class DynamicWhiteNoise(WhiteNoise):
         static_prefix=None,
         writable_locations=(0,),
         app_paths=None,
+        dynamic_files_max_size=DEFAULT_DYNAMIC_FILES_MAX_SIZE,
         **kwargs
     ):
         whitenoise_settings = {
@@ -222,6 +325,7 @@ class DynamicWhiteNoise(WhiteNoise):
         kwargs.update(whitenoise_settings)
         super(DynamicWhiteNoise, self).__init__(application, **kwargs)
         self.dynamic_finder = FileFinder(dynamic_locations or [])
+        self.dynamic_files = DynamicFileRegistry(max_size=dynamic_files_max_size)
         # Generate a regex to check if a path matches one of our dynamic
         # location prefixes
         self.dynamic_check = (
@@ -267,32 +371,68 @@ class DynamicWhiteNoise(WhiteNoise):
         return self.serve(static_file, environ, start_response)
 
     def find_and_cache_dynamic_file(self, url, remote_baseurl):
-        path = self.get_dynamic_path(url)
-        if path:
-            file_stat = os.stat(path)
-            # Only try to do matches for regular files.
-            if stat.S_ISREG(file_stat.st_mode):
-                stat_cache = {path: os.stat(path)}
-                for ext in compressed_file_extensions:
-                    try:
-                        comp_path = "{}.{}".format(path, ext)
-                        stat_cache[comp_path] = os.stat(comp_path)
-                    except (IOError, OSError):
-                        pass
-                self.add_file_to_dictionary(url, path, stat_cache=stat_cache)
-        elif (
+        dynamic_file = self.dynamic_files.get(url)
+        if isinstance(dynamic_file, DynamicFile):
+            dynamic_file = self.revalidate_dynamic_file(url, dynamic_file)
+        if dynamic_file is None:
+            dynamic_file = self.find_dynamic_file(url)
+        if isinstance(dynamic_file, DynamicFile):
+            return self.get_dynamic_static_file(url, dynamic_file)
+        if (
             remote_baseurl is not None
             and self.writable_check is not None
             and self.writable_check.match(url)
         ):
-            self.files[url] = self.get_streaming_static_file(url, remote_baseurl)
-        elif (
-            path is None
-            and self.static_prefix is not None
-            and url.startswith(self.static_prefix)
-        ):
-            self.files[url] = NOT_FOUND
-        return self.files.get(url)
+            return self.get_streaming_static_file(url, remote_baseurl)
+        if self.static_prefix is not None and url.startswith(self.static_prefix):
+            return NOT_FOUND
+        return None
+
+    def find_dynamic_file(self, url):
+        """
+        Looks up the dynamic file for the URL on disk, and registers the result.
+        """
+        path = self.get_dynamic_path(url)
+        dynamic_file = None
+        if path:
+            try:
+                dynamic_file = stat_dynamic_file(path)
+            except (IOError, OSError):
+                pass
+        if dynamic_file is None:
+            self.dynamic_files.add_missing(url)
+        else:
+            self.dynamic_files.add(url, dynamic_file)
+        return dynamic_file
+
+    def revalidate_dynamic_file(self, url, dynamic_file):
+        """
+        Stats a registered dynamic file again if it has not been for a while, returning None
+        if it has to be looked up again, or the updated DynamicFile.
+        """
+        if time.time() - dynamic_file.checked_at < DYNAMIC_FILES_REVALIDATE_INTERVAL:
+            return dynamic_file
+        try:
+            updated_file = stat_dynamic_file(dynamic_file.path)
+        except (IOError, OSError):
+            updated_file = None
+        if updated_file is None:
+            self.dynamic_files.remove(url)
+        else:
+            self.dynamic_files.add(url, updated_file)
+        return updated_file
+
+    def get_dynamic_static_file(self, url, dynamic_file):
+        if self.index_file and url.endswith("/" + self.index_file):
+            return self.redirect(url, url[: -len(self.index_file)])
+        stat_cache = {
+            dynamic_file.path: FileStat(
+                stat.S_IFREG, dynamic_file.size, dynamic_file.mtime
+            )
+        }
+        for comp_path, size, mtime in dynamic_file.encodings:
+            stat_cache[comp_path] = FileStat(stat.S_IFREG, size, mtime)
+        return self.get_static_file(dynamic_file.path, url, stat_cache=stat_cache)
 
     def get_dynamic_path(self, url):
         try:
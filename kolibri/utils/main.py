@@ -29,6 +29,9 @@ from kolibri.utils.conf import KOLIBRI_HOME
 from kolibri.utils.conf import LOG_ROOT
 from kolibri.utils.conf import OPTIONS
 from kolibri.utils.debian_check import check_debian_user
+from kolibri.utils.import_profile import is_profiling_imports
+from kolibri.utils.import_profile import log_import_profile
+from kolibri.utils.import_profile import stop_import_profile
 from kolibri.utils.logger import get_base_logging_config
 from kolibri.utils.sanity_checks import check_content_directory_exists_and_writable
 from kolibri.utils.sanity_checks import check_database_is_migrated
@@ -336,6 +339,27 @@ def initialize(  # noqa C901
 
         _upgrades_after_django_setup(updated, version)
 
+    if is_profiling_imports():
+        _log_startup_profile()
+
+
+def _log_startup_profile():
+    # Import here to prevent the module level initialization of the plugin registry
+    from kolibri.plugins.registry import DeferredPlugin
+    from kolibri.plugins.registry import registered_plugins
+
+    stop_import_profile()
+    log_import_profile([plugin.module_path for plugin in registered_plugins])
+    deferred = [
+        plugin.module_path
+        for plugin in registered_plugins
+        if isinstance(plugin, DeferredPlugin) and not plugin.initialized
+    ]
+    if deferred:
+        logger.info(
+            "Deferred the initialization of plugins: {}".format(", ".join(deferred))
+        )
+
 
 def update(old_version, new_version):
     """
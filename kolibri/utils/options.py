@@ -54,12 +54,26 @@ FD_PER_THREAD = sum(
     )
 )
 
+# file descriptors per thread for the read connection to the main database
+READ_CONNECTION_FD_PER_THREAD = 1
+
+
+def get_fd_per_thread(read_connections=False):
+    """
+    :param read_connections: Whether SQLITE_READ_CONNECTIONS is enabled
+    :return: The number of file descriptors per thread
+    """
+    if read_connections:
+        return FD_PER_THREAD + READ_CONNECTION_FD_PER_THREAD
+    return FD_PER_THREAD
+
+
 # Reserve some file descriptors for file operations happening in asynchronous tasks
 # when the server is running with threaded task runners.
 MIN_RESERVED_FD = 64
 
 
-def calculate_thread_pool():
+def calculate_thread_pool(fd_per_thread=FD_PER_THREAD):
     """
     Returns the default value for CherryPY thread_pool:
     - calculated based on the best values obtained in several partners installations
@@ -90,11 +104,63 @@ def calculate_thread_pool():
         pool_size = MAX_POOL
 
     # ensure (number of threads) x (open file descriptors) < (fd limit)
-    max_threads = (get_fd_limit() - MIN_RESERVED_FD) // FD_PER_THREAD
+    max_threads = (get_fd_limit() - MIN_RESERVED_FD) // fd_per_thread
     # Ensure that the number of threads never goes below 1
     return max(1, min(pool_size, max_threads))
 
 
+def _get_total_memory():
+    """
+    Returns the total memory of the device in bytes, or None if it cannot be determined.
+    """
+    if psutil:
+        return psutil.virtual_memory().total
+    return None
+
+
+def calculate_sqlite_cache_size():
+    """
+    Returns the default total size of the SQLite page caches of the connections to the main
+    database:
+    - 1/64th of the memory of the device, between 2MB and 64MB
+    - 8MB when the memory of the device is unknown
+    """
+    MIN_CACHE = 2 * pow(2, 20)
+    MAX_CACHE = 64 * pow(2, 20)
+
+    total_memory = _get_total_memory()
+    if total_memory is None:
+        return 8 * pow(2, 20)
+    return max(MIN_CACHE, min(MAX_CACHE, total_memory // 64))
+
+
+def calculate_sqlite_mmap_size():
+    """
+    Returns the default size of the memory mapped I/O region of the main database:
+    - disabled for devices with less than 1GB of memory, as the mapped pages compete with
+      the page cache of the OS
+    - 1/16th of the memory of the device, up to 256MB, otherwise
+    """
+    MIN_MEM = pow(2, 30)
+    MAX_MMAP = 256 * pow(2, 20)
+
+    total_memory = _get_total_memory()
+    if total_memory is None or total_memory < MIN_MEM:
+        return 0
+    return min(MAX_MMAP, total_memory // 16)
+
+
+def calculate_sqlite_temp_store():
+    """
+    Returns the default SQLite temporary storage, keeping temporary tables and indices
+    in memory only for devices with at least 2GB of memory.
+    """
+    total_memory = _get_total_memory()
+    if total_memory is not None and total_memory >= 2 * pow(2, 30):
+        return "memory"
+    return "default"
+
+
 ALL_LANGUAGES = "kolibri-all"
 SUPPORTED_LANGUAGES = "kolibri-supported"
 
@@ -466,6 +532,66 @@ base_option_spec = {
             "type": "string",
             "description": "The port on which to connect to the database, Postgresql only.",
         },
+        "SQLITE_CACHE_SIZE": {
+            "type": "bytes",
+            "default": calculate_sqlite_cache_size(),
+            "description": """
+                The total size of the page caches of the connections to the main Kolibri database, SQLite only.
+                It is divided between the server threads and task workers, but no connection gets less than
+                the SQLite default of 2000KiB. The other Kolibri databases use a fraction of this size.
+                Value can either be a number suffixed with a unit (e.g. MB, GB, TB) or an integer number of bytes.
+            """,
+        },
+        "SQLITE_MMAP_SIZE": {
+            "type": "bytes",
+            "default": calculate_sqlite_mmap_size(),
+            "description": """
+                The maximum size of the main Kolibri database that is accessed through memory mapped I/O,
+                SQLite only. The other Kolibri databases use a fraction of this size. Set to 0 to disable.
+                Value can either be a number suffixed with a unit (e.g. MB, GB, TB) or an integer number of bytes.
+            """,
+        },
+        "SQLITE_TEMP_STORE": {
+            "type": "option",
+            "options": ("default", "file", "memory"),
+            "default": calculate_sqlite_temp_store(),
+            "description": "Where SQLite stores temporary tables and indices, SQLite only.",
+        },
+        "SQLITE_SYNCHRONOUS": {
+            "type": "option",
+            "options": ("off", "normal", "full", "extra"),
+            "default": "full",
+            "description": """
+                How often SQLite waits for data to be written to disk, SQLite only.
+                With the write-ahead log used by Kolibri, 'normal' never corrupts the databases and
+                makes writes faster, but the last transactions can be lost on power failure.
+            """,
+        },
+        "SQLITE_CHECKPOINT_INTERVAL": {
+            "type": "integer",
+            "default": 60,
+            "description": """
+                How often, in seconds, the write-ahead logs of the Kolibri databases are checkpointed
+                by the Kolibri services, besides when the databases are idle, SQLite only.
+            """,
+        },
+        "SQLITE_WAL_BACKPRESSURE_SIZE": {
+            "type": "bytes",
+            "default": "32MB",
+            "description": """
+                The size of the write-ahead log of a Kolibri database beyond which writes are
+                held back until it is checkpointed, SQLite only.
+                Value can either be a number suffixed with a unit (e.g. MB, GB, TB) or an integer number of bytes.
+            """,
+        },
+        "SQLITE_READ_CONNECTIONS": {
+            "type": "boolean",
+            "default": False,
+            "description": """
+                Whether to run the queries of read-only API requests on separate connections
+                to the main Kolibri database, so that they are not queued behind writes, SQLite only.
+            """,
+        },
     },
     "Server": {
         "CHERRYPY_START": {
@@ -506,11 +632,32 @@ base_option_spec = {
                 Increasing this may help situations where requests are instantly refused by the server.
             """,
         },
+        "DYNAMIC_FILES_CACHE_SIZE": {
+            "type": "integer",
+            "default": 10000,
+            "description": """
+                How many content files the server keeps track of in memory to serve them,
+                the least recently requested files are forgotten beyond this number.
+            """,
+        },
         "PROFILE": {
             "type": "boolean",
             "default": False,
             "envvars": ("KOLIBRI_SERVER_PROFILE",),
-            "description": "Activate the server profiling middleware.",
+            "description": "Trace every request served, for the profile command.",
+        },
+        "TRACE_SAMPLE_RATE": {
+            "type": "float",
+            "default": 0.0,
+            "description": """
+                Fraction of the requests served that are traced, recording their database queries
+                and cache lookups. A small rate can be left on in production.
+            """,
+        },
+        "TRACE_BUFFER_SIZE": {
+            "type": "integer",
+            "default": 1000,
+            "description": "How many of the latest request traces are kept in memory.",
         },
         "DEBUG": {
             "type": "boolean",
@@ -673,6 +820,23 @@ base_option_spec = {
                 to a specific network interface.
             """,
         },
+        "ZEROCONF_ASYNC_DISCOVERY": {
+            "type": "boolean",
+            "default": False,
+            "description": """
+                Discover the other Kolibri devices on the network asynchronously. Their Zeroconf service information
+                is retrieved concurrently, changes to them are handled in batches, and the connections to them are
+                checked concurrently. Recommended for networks with many Kolibri devices.
+            """,
+        },
+        "ZEROCONF_DISCOVERY_CONCURRENCY": {
+            "type": "integer",
+            "default": 16,
+            "description": """
+                The maximum number of Kolibri devices on the network that are queried at the same time, when
+                ZEROCONF_ASYNC_DISCOVERY is enabled.
+            """,
+        },
         "RESTART_HOOKS": {
             "type": "lazy_import_callback_list",
             "default": ["kolibri.utils.server.signal_restart"],
@@ -692,6 +856,25 @@ base_option_spec = {
             """,
         }
     },
+    "Users": {
+        "PASSWORD_HASHING_WORKERS": {
+            "type": "integer",
+            "default": 0,
+            "description": """
+                The number of workers used to hash passwords when many users are created at once, for example
+                when importing users from a CSV file. If 0, it will use one less than the number of CPUs available.
+            """,
+        },
+        "BULK_PASSWORD_HASH_ITERATIONS": {
+            "type": "integer",
+            "default": 0,
+            "description": """
+                The number of PBKDF2 iterations used to hash passwords when many users are created at once.
+                If 0, the default number of iterations is used. Lower values make bulk user creation faster,
+                the password hash is then upgraded to the default number of iterations the first time the user signs in.
+            """,
+        },
+    },
     "Tasks": {
         "USE_WORKER_MULTIPROCESSING": {
             "type": "multiprocess_bool",
@@ -883,6 +1066,21 @@ def _set_from_deprecated_aliases(conf):
     return using_deprecated_alias
 
 
+def _set_default_thread_pool(conf):
+    """
+    The default thread pool only leaves room for the read connections when they are enabled
+    """
+    if (
+        conf["Database"]["SQLITE_READ_CONNECTIONS"]
+        and "CHERRYPY_THREAD_POOL" in conf["Server"].defaults
+    ):
+        conf["Server"]["CHERRYPY_THREAD_POOL"] = calculate_thread_pool(
+            fd_per_thread=get_fd_per_thread(read_connections=True)
+        )
+        # keep it a default value, so that it is not written to the options file
+        conf["Server"].defaults.append("CHERRYPY_THREAD_POOL")
+
+
 def read_options_file(ini_filename="options.ini"):
 
     from kolibri.utils.conf import KOLIBRI_HOME
@@ -970,6 +1168,8 @@ def read_options_file(ini_filename="options.ini"):
     # run validation once again to fill in any default values for options we deleted due to issues
     conf.validate(_get_validator())
 
+    _set_default_thread_pool(conf)
+
     return conf
 
 
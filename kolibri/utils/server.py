@@ -60,9 +60,6 @@ PORT_AVAILABILITY_CHECK_TIMEOUT = 0.1
 # Used to store PID and port number (both in foreground and daemon mode)
 PID_FILE = os.path.join(conf.KOLIBRI_HOME, "server.pid")
 
-# File used to activate profiling middleware and get profiler PID
-PROFILE_LOCK = os.path.join(conf.KOLIBRI_HOME, "server_profile.lock")
-
 # File used to send a state transition command to the server process
 PROCESS_CONTROL_FLAG = os.path.join(conf.KOLIBRI_HOME, "process_control.flag")
 
@@ -281,6 +278,39 @@ class ServicesPlugin(SimplePlugin):
             self.worker.shutdown(wait=True)
 
 
+class SQLiteCheckpointPlugin(Monitor):
+    """
+    Checkpoints the write-ahead logs of the Kolibri SQLite databases in the background,
+    so that the checkpoints are not run by the request threads when they commit.
+    """
+
+    # How often, in seconds, the write-ahead logs are checked
+    frequency = 5
+
+    def __init__(self, bus):
+        Monitor.__init__(self, bus, self.run, frequency=self.frequency)
+        self.service = None
+
+    def START(self):
+        from kolibri.core.sqlite.checkpoint import CheckpointService
+
+        self.service = CheckpointService()
+        self.service.start()
+        super(SQLiteCheckpointPlugin, self).START()
+
+    START.priority = Monitor.START.priority
+
+    def STOP(self):
+        super(SQLiteCheckpointPlugin, self).STOP()
+        if self.service is not None:
+            self.service.stop()
+            self.service = None
+
+    def run(self):
+        if self.service is not None:
+            self.service.run()
+
+
 class ZeroConfPlugin(Monitor):
     def __init__(self, bus, port):
         self.port = port
@@ -323,16 +353,30 @@ class ZeroConfPlugin(Monitor):
     def RUN(self):
         # Register the Kolibri zeroconf service so it will be discoverable on the network
         from kolibri.core.discovery.utils.network.broadcast import (
+            AsyncKolibriBroadcast,
             build_broadcast_instance,
             KolibriBroadcast,
         )
-        from kolibri.core.discovery.utils.network.search import NetworkLocationListener
+        from kolibri.core.discovery.utils.network.search import (
+            BatchedNetworkLocationListener,
+            NetworkLocationListener,
+        )
 
         instance = build_broadcast_instance(self.port)
 
         if self.broadcast is None:
-            self.broadcast = KolibriBroadcast(instance, interfaces=self.interfaces)
-            self.broadcast.add_listener(NetworkLocationListener)
+            if conf.OPTIONS["Deployment"]["ZEROCONF_ASYNC_DISCOVERY"]:
+                self.broadcast = AsyncKolibriBroadcast(
+                    instance,
+                    interfaces=self.interfaces,
+                    concurrency=conf.OPTIONS["Deployment"][
+                        "ZEROCONF_DISCOVERY_CONCURRENCY"
+                    ],
+                )
+                self.broadcast.add_listener(BatchedNetworkLocationListener)
+            else:
+                self.broadcast = KolibriBroadcast(instance, interfaces=self.interfaces)
+                self.broadcast.add_listener(NetworkLocationListener)
             self.broadcast.start_broadcast()
         else:
             # `interfaces` should only be passed to update when there is a change to the interfaces,
@@ -763,6 +807,11 @@ class KolibriServicesProcessBus(BaseKolibriProcessBus):
         zeroconf_plugin = ZeroConfPlugin(self, self.port)
         zeroconf_plugin.subscribe()
 
+        if conf.OPTIONS["Database"]["DATABASE_ENGINE"] == "sqlite":
+            # Setup plugin for checkpointing the SQLite databases
+            checkpoint_plugin = SQLiteCheckpointPlugin(self)
+            checkpoint_plugin.subscribe()
+
     def run(self):
         self.graceful()
         self.publish("SERVING", self.port)
@@ -1,10 +1,16 @@
 import os
 import tempfile
+from time import time
 
 from mock import MagicMock
+from mock import patch
 
+from kolibri.utils.kolibri_whitenoise import DYNAMIC_FILES_NEGATIVE_TTL
+from kolibri.utils.kolibri_whitenoise import DYNAMIC_FILES_REVALIDATE_INTERVAL
+from kolibri.utils.kolibri_whitenoise import DynamicFileRegistry
 from kolibri.utils.kolibri_whitenoise import DynamicWhiteNoise
 from kolibri.utils.kolibri_whitenoise import FileFinder
+from kolibri.utils.kolibri_whitenoise import MissingDynamicFile
 from kolibri.utils.kolibri_whitenoise import NOT_FOUND
 
 
@@ -108,3 +114,71 @@ def test_dynamic_whitenoise_suspicious_file():
     )
     os.removedirs(tempdir11)
     os.removedirs(tempdir12)
+
+
+def test_dynamic_file_registry_evicts_least_recently_used():
+    registry = DynamicFileRegistry(max_size=2)
+    registry.add("/a", "a")
+    registry.add("/b", "b")
+    assert registry.get("/a") == "a"
+    registry.add("/c", "c")
+    assert len(registry) == 2
+    assert registry.get("/b") is None
+    assert registry.get("/a") == "a"
+    assert registry.get("/c") == "c"
+    assert registry.get_stats() == {"size": 2, "hits": 3, "misses": 1}
+
+
+def test_dynamic_file_registry_missing_expires():
+    registry = DynamicFileRegistry(negative_ttl=10)
+    registry.add_missing("/a")
+    assert isinstance(registry.get("/a"), MissingDynamicFile)
+    with patch("kolibri.utils.kolibri_whitenoise.time.time", return_value=time() + 11):
+        assert registry.get("/a") is None
+    assert len(registry) == 0
+
+
+def test_dynamic_whitenoise_caches_missing_files():
+    tempdir = tempfile.mkdtemp()
+    prefix = "/test"
+    dynamic_whitenoise = DynamicWhiteNoise(
+        MagicMock(), dynamic_locations=[(prefix, tempdir)]
+    )
+    url = prefix + "/file.js"
+    assert dynamic_whitenoise.find_and_cache_dynamic_file(url, None) is None
+    with open(os.path.join(tempdir, "file.js"), "w") as f:
+        f.write("content")
+    # the URL is not looked up again until the negative entry expires
+    assert dynamic_whitenoise.find_and_cache_dynamic_file(url, None) is None
+    with patch(
+        "kolibri.utils.kolibri_whitenoise.time.time",
+        return_value=time() + DYNAMIC_FILES_NEGATIVE_TTL + 1,
+    ):
+        assert dynamic_whitenoise.find_and_cache_dynamic_file(url, None) is not None
+    os.remove(os.path.join(tempdir, "file.js"))
+    os.removedirs(tempdir)
+
+
+def test_dynamic_whitenoise_revalidates_files():
+    tempdir = tempfile.mkdtemp()
+    prefix = "/test"
+    path = os.path.join(tempdir, "file.js")
+    with open(path, "w") as f:
+        f.write("content")
+    dynamic_whitenoise = DynamicWhiteNoise(
+        MagicMock(), dynamic_locations=[(prefix, tempdir)]
+    )
+    url = prefix + "/file.js"
+    static_file = dynamic_whitenoise.find_and_cache_dynamic_file(url, None)
+    assert dict(static_file.alternatives[0][2])["Content-Length"] == "7"
+    with open(path, "w") as f:
+        f.write("new content")
+    later = time() + DYNAMIC_FILES_REVALIDATE_INTERVAL + 1
+    with patch("kolibri.utils.kolibri_whitenoise.time.time", return_value=later):
+        static_file = dynamic_whitenoise.find_and_cache_dynamic_file(url, None)
+    assert dict(static_file.alternatives[0][2])["Content-Length"] == "11"
+    os.remove(path)
+    later += DYNAMIC_FILES_REVALIDATE_INTERVAL + 1
+    with patch("kolibri.utils.kolibri_whitenoise.time.time", return_value=later):
+        assert dynamic_whitenoise.find_and_cache_dynamic_file(url, None) is None
+    os.removedirs(tempdir)
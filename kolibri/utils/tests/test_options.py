@@ -354,3 +354,27 @@ def test_lazy_function_import():
         pass
 
     assert "kolibri.utils.tests.do_not_import" in sys.modules
+
+
+def test_default_thread_pool_read_connections():
+    _, tmp_ini_path = tempfile.mkstemp(prefix="options", suffix=".ini")
+    fd_limit = options.MIN_RESERVED_FD + 10 * (options.FD_PER_THREAD + 1)
+    with mock.patch.object(options, "get_fd_limit", return_value=fd_limit):
+        with mock.patch.dict(os.environ, {"KOLIBRI_SQLITE_READ_CONNECTIONS": "1"}):
+            OPTIONS = options.read_options_file(ini_filename=tmp_ini_path)
+            assert OPTIONS["Server"]["CHERRYPY_THREAD_POOL"] == 10
+            # the calculated default is not written to the options file
+            options.update_options_file(
+                "Deployment", "HTTP_PORT", 7007, ini_filename=tmp_ini_path
+            )
+            with open(tmp_ini_path) as f:
+                assert "CHERRYPY_THREAD_POOL" not in f.read()
+        with mock.patch.dict(
+            os.environ,
+            {
+                "KOLIBRI_SQLITE_READ_CONNECTIONS": "1",
+                "KOLIBRI_CHERRYPY_THREAD_POOL": "20",
+            },
+        ):
+            OPTIONS = options.read_options_file(ini_filename=tmp_ini_path)
+            assert OPTIONS["Server"]["CHERRYPY_THREAD_POOL"] == 20